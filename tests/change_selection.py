@@ -0,0 +1,607 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Change aware selection of the simulation tests
+
+A pytest plugin (loaded from conftest.py) which, given the files changed, runs the tests whose profiles build those
+files first and caps the rest by a time budget:
+
+    pytest --changed-since origin/develop --time-budget 600
+    pytest --changed lib_ethernet/src/rmii_master_rx_pins_1b_body.S --time-budget 0
+
+Every application links the whole library, so whether a profile includes a file is worked out from the sources:
+ - the library directories are the LIB_INCLUDES of lib_build_info.cmake
+ - a file reaches another if it calls a function the other defines or includes it
+ - a profile starts from the library functions its application calls, once the application sources are
+   preprocessed with the profile's defines (from the CMake build if there is one, else as the application
+   CMakeLists.txt sets them), so e.g. an RMII profile only starts from rmii_ethernet_rt_mac
+ - the RMII files for one port width, e.g. rmii_master_rx_pins_1b_body.S, only count for profiles with that width
+A test is affected by a change to a library file its profile reaches, to its application (its test_params.json
+directory, or the directories in the APP_INCLUDES of the application's CMakeLists.txt), or to a Python module it
+imports. Changes to the test build (CMakeLists.txt, *.cmake) or to conftest.py, and to the library build
+(lib_build_info.cmake, module_build_info), affect every test.
+
+The rest of the tests run in collection order while their expected wall time, the median in the sim_metrics
+database (of the runs made with --sim-metrics), fits in the budget. Without a budget every test runs, with the affected ones first.
+
+Running this file prints the profiles of each application which the changes reach:
+    python change_selection.py [--since origin/develop] [files...]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import warnings
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent
+REPO_DIR = TESTS_DIR.parent
+LIB_DIR = REPO_DIR / "lib_ethernet"
+
+SOURCE_SUFFIXES = (".xc", ".c", ".S", ".h")
+
+# The defines profile_defines() works out from a profile. The application may set others in its CMakeLists.txt.
+PROFILE_DEFINES = ("RX_WIDTH", "TX_WIDTH", "RX_USE_LOWER_2B", "RX_USE_UPPER_2B", "TX_USE_LOWER_2B",
+                   "TX_USE_UPPER_2B", "RT", "ETHERNET_SUPPORT_HP_QUEUES", "RGMII", "RMII", "MII")
+
+# Estimate for a simulation test with no runs in the metrics database
+DEFAULT_TEST_TIME_S = 60
+
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_INCLUDE = re.compile(r'^\s*#\s*include\s*[<"]([^">]+)[">]', re.M)
+_ASM_GLOBAL = re.compile(r"^\s*\.globl\s+([A-Za-z_]\w*)\s*(?:,|$)", re.M)
+_ASM_LABEL = re.compile(r"^\s*([A-Za-z_]\w*):", re.M)
+# A function starts at the beginning of a line, with its name before the first bracket. XC functions can return
+# a tuple, {int, unsigned}, and be [[combinable]].
+_FUNCTION_START = re.compile(r"^(?:\[\[\w+\]\]\s*)?(?!extern\b|typedef\b)[A-Za-z_{][\w\s\*{},:&]*?"
+                             r"\b([A-Za-z_]\w*)\s*\(", re.M)
+_STATIC = re.compile(r"^(?:\[\[\w+\]\]\s*)?static\b")
+# A function-like macro, e.g. mii() in mii_impl.h, with its continuation lines
+_MACRO = re.compile(r"^\s*#\s*define\s+([A-Za-z_]\w*)\(((?:[^\n]*\\\n)*[^\n]*)", re.M)
+_CONDITIONAL = re.compile(r"^\s*#\s*(if|ifdef|ifndef|elif|else|endif)\b(.*)$")
+_DEFINE = re.compile(r"^\s*#\s*(define|undef)\s+([A-Za-z_]\w*)(?!\()(.*)$")
+_DEFINED = re.compile(r"\bdefined\s*(?:\(\s*([A-Za-z_]\w*)\s*\)|([A-Za-z_]\w*))")
+_FLAG_DEFINE = re.compile(r"(?:^|\s)-D([A-Za-z_]\w*)(?:=(\S*))?")
+_CMAKE_DEFINE = re.compile(r"-D([A-Za-z_]\w*)")
+_KEYWORDS = {"if", "while", "for", "switch", "select", "case", "return", "sizeof", "par"}
+_WIDTH = re.compile(r"(?:^|_)(1b|4b)(?:_|$)")
+_RX = re.compile(r"(?:^|_)(rx|receive)(?:_|$)")
+_TX = re.compile(r"(?:^|_)(tx|transmit)(?:_|$)")
+_PY_IMPORT = re.compile(r"^\s*(?:from\s+(\w+)\s+import|import\s+([\w, ]+))", re.M)
+_PARAMS_FILE = re.compile(r"""["'](\w+)/test_params\.json["']""")
+
+
+def read_cmake_list(path, name):
+    """ The values of set(name ...) in a CMake file """
+    match = re.search(rf"set\(\s*{name}\s+([^)]*)\)", Path(path).read_text())
+    return match.group(1).split() if match else []
+
+
+def source_identifiers(text):
+    return set(_IDENTIFIER.findall(_INCLUDE.sub(" ", _COMMENT.sub(" ", text))))
+
+
+def _closing(code, start):
+    """ Index of the bracket closing the one at start, or the end of the code if it is not closed """
+    opening = code[start]
+    closing = {"(": ")", "{": "}"}[opening]
+    depth = 0
+    for i in range(start, len(code)):
+        if code[i] == opening:
+            depth += 1
+        elif code[i] == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(code) - 1
+
+
+def function_bodies(code):
+    """ {name: (body, static)} of the functions a C or XC file defines, not only declares """
+    functions = {}
+    for match in _FUNCTION_START.finditer(code):
+        name = match.group(1)
+        if name in _KEYWORDS:
+            continue
+        # The function has a body if its parameter list is followed by a brace rather than a semicolon
+        body_start = _closing(code, match.end() - 1) + 1
+        while body_start < len(code) and code[body_start].isspace():
+            body_start += 1
+        if body_start < len(code) and code[body_start] == "{":
+            body = code[body_start:_closing(code, body_start) + 1]
+            # Alternative definitions under #if are treated as one
+            previous = functions.get(name, ("", True))
+            functions[name] = (previous[0] + body, previous[1] and bool(_STATIC.match(match.group(0))))
+    return functions
+
+
+class SourceGraph():
+    """ Which library files a build reaches, from the functions they define and call and the headers they include
+
+        Parameters:
+        dirs (list): Directories of the library sources and headers
+    """
+
+    def __init__(self, dirs):
+        self.files = sorted(p for d in dirs for p in Path(d).iterdir() if p.suffix in SOURCE_SUFFIXES)
+        by_name = {p.name: p for p in self.files}
+        self.functions = {} # (path, name): identifiers in the function
+        self.symbols = {}   # name: paths of the functions other files can call
+        self.common = {}    # Sources which only instantiate inline functions, e.g. ethernet.xc: their identifiers
+        self._includes = {}
+        for path in self.files:
+            text = path.read_text(errors="replace")
+            code = _COMMENT.sub(" ", text)
+            self._includes[path] = {by_name[os.path.basename(name)] for name in _INCLUDE.findall(text)
+                                    if os.path.basename(name) in by_name}
+            if path.suffix == ".S":
+                # Each global of an assembler file calls whatever the file does. The file's own labels are not
+                # calls, although some have global names elsewhere.
+                globals_ = set(_ASM_GLOBAL.findall(code))
+                identifiers = source_identifiers(code) - globals_ - set(_ASM_LABEL.findall(code))
+                for name in globals_:
+                    self._add_function(path, name, identifiers, static=False)
+                continue
+            functions = function_bodies(code)
+            for name, body in _MACRO.findall(code):
+                previous = functions.get(name, ("", path.suffix != ".h"))
+                functions[name] = (previous[0] + body, previous[1])
+            for name, (body, static) in functions.items():
+                # Inline functions in headers are compiled into each file which includes them
+                self._add_function(path, name, source_identifiers(body) - {name},
+                                   static=static and path.suffix != ".h")
+            if not function_bodies(code) and path.suffix != ".h":
+                self.common[path] = source_identifiers(code)
+
+    def _add_function(self, path, name, identifiers, static):
+        self.functions[(path, name)] = identifiers
+        if not static:
+            self.symbols.setdefault(name, set()).add(path)
+
+    def _callees(self, path, identifiers):
+        """ The functions called from a file, preferring those defined in it """
+        callees = set()
+        for name in identifiers:
+            if (path, name) in self.functions:
+                callees.add((path, name))
+            else:
+                callees.update((p, name) for p in self.symbols.get(name, ()))
+        return callees
+
+    def files_defining(self, names):
+        return {path for name in names for path in self.symbols.get(name, ())}
+
+    def reached_from(self, names):
+        """ The files of the functions named and of every function they call, the common files, and the headers
+            these include
+        """
+        todo = [(path, name) for name in names for path in self.symbols.get(name, ())]
+        for path, identifiers in self.common.items():
+            todo.extend(self._callees(path, identifiers))
+        called = set()
+        while todo:
+            function = todo.pop()
+            if function not in called:
+                called.add(function)
+                todo.extend(self._callees(function[0], self.functions[function]) - called)
+
+        reached = {path for path, _ in called} | set(self.common)
+        todo = list(reached)
+        while todo:
+            for header in self._includes[todo.pop()] - reached:
+                reached.add(header)
+                todo.append(header)
+        return reached
+
+
+def width_matches(path, params):
+    """ Whether a file for one port width, named e.g. rmii_master_rx_pins_1b_body.S, is used by a profile. Files
+        without a width in their name are used by every profile.
+    """
+    stem = Path(path).stem
+    match = _WIDTH.search(stem)
+    if not match or params is None:
+        return True
+    width = match.group(1)
+    if _RX.search(stem):
+        sides = ["rx_width"]
+    elif _TX.search(stem):
+        sides = ["tx_width"]
+    else:
+        sides = ["rx_width", "tx_width"]
+    return any(str(params.get(side, "")).startswith(width) for side in sides)
+
+
+def _condition(expression, defines):
+    """ Value of an #if expression. Undefined names are 0, as in C, and anything not understood is true. """
+    def value(match):
+        text = defines.get(match.group(0), "0")
+        return text if text.isdigit() else "_unknown"
+    expression = _DEFINED.sub(lambda m: "1" if (m.group(1) or m.group(2)) in defines else "0", expression)
+    expression = re.sub(r"\b[A-Za-z_]\w*", value, expression)
+    expression = expression.replace("&&", " and ").replace("||", " or ")
+    expression = re.sub(r"!(?!=)", " not ", expression)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return bool(eval(expression, {"__builtins__": {}}))
+    except Exception:
+        return True
+
+
+def preprocess(text, defines, include=None):
+    """ The code of a C or XC file which its #if directives leave in. Its #define and #undef directives update
+        defines, and include(name), if given, returns the code to put in place of an #include or None to leave it.
+    """
+    lines = []
+    stack = [] # (enclosing block active, a branch taken)
+    active = True
+    for line in _COMMENT.sub(" ", text).splitlines():
+        match = _CONDITIONAL.match(line)
+        if match:
+            directive, expression = match.groups()
+            if directive in ("if", "ifdef", "ifndef"):
+                if directive == "if":
+                    taken = _condition(expression, defines)
+                else:
+                    names = expression.split()
+                    taken = bool(names) and (names[0] in defines) == (directive == "ifdef")
+                stack.append((active, taken))
+                active = active and taken
+            elif directive in ("elif", "else") and stack:
+                enclosing, taken_before = stack[-1]
+                taken = not taken_before and (directive == "else" or _condition(expression, defines))
+                stack[-1] = (enclosing, taken_before or taken)
+                active = enclosing and taken
+            elif directive == "endif" and stack:
+                active = stack.pop()[0]
+            continue
+        if not active:
+            continue
+        match = _DEFINE.match(line)
+        if match:
+            if match.group(1) == "define":
+                defines[match.group(2)] = match.group(3).strip()
+            else:
+                defines.pop(match.group(2), None)
+        match = _INCLUDE.match(line)
+        if match and include:
+            code = include(match.group(1))
+            if code is not None:
+                lines.append(code)
+                continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def profile_config(params):
+    """ The name the application CMakeLists.txt files give a profile's build, e.g. rt_rmii_rx1b_tx4b_lower_xs3, or
+        None for a profile which is not of a MAC
+    """
+    if "mac" not in params or "phy" not in params:
+        return None
+    config = f"{params['mac']}_{params['phy']}"
+    for side in ("rx", "tx"):
+        if f"{side}_width" in params:
+            config += f"_{side}{params[side + '_width']}"
+    arch = params.get("arch", "xs3")
+    return f"{config}_{arch[0] if isinstance(arch, list) else arch}"
+
+
+def profile_defines(params):
+    """ The defines the application CMakeLists.txt files, with helpers.cmake, give a profile's build """
+    defines = {}
+    for side in ("rx", "tx"):
+        width = str(params.get(f"{side}_width", ""))
+        if width:
+            defines[f"{side.upper()}_WIDTH"] = "4" if width.startswith("4b") else "1"
+        if width.endswith(("lower", "upper")):
+            defines[f"{side.upper()}_USE_{width[-5:].upper()}_2B"] = "1"
+    # As CMake does, these look for the strings anywhere in the profile
+    profile = json.dumps(params)
+    defines["RT"] = "1" if "rt" in profile else "0"
+    defines["ETHERNET_SUPPORT_HP_QUEUES"] = "1" if "hp" in profile else "0"
+    phy = str(params.get("phy", ""))
+    for name in ("rgmii", "rmii", "mii"):
+        if name in phy:
+            defines[name.upper()] = "1"
+            break
+    arch = params.get("arch", "xs3")
+    arch = arch[0] if isinstance(arch, list) else arch
+    defines[f"__{arch.upper()}A__"] = "1"
+    return defines
+
+
+class TestApp():
+    """ A DUT application in the tests directory and the library files its profiles reach
+
+        Parameters:
+        app_dir (Path): The application, with its sources in src
+        graph (SourceGraph): The library the application links
+    """
+
+    def __init__(self, app_dir, graph):
+        self.dir = Path(app_dir)
+        self.name = self.dir.name
+        self._graph = graph
+        cmake = self.dir / "CMakeLists.txt"
+        includes = read_cmake_list(cmake, "APP_INCLUDES") if cmake.exists() else []
+        # Defines the CMakeLists.txt sets which do not come from the profile, e.g. TWO_PORTS in test_smi
+        self._other_defines = set(_CMAKE_DEFINE.findall(cmake.read_text()) if cmake.exists() else []) - set(
+            PROFILE_DEFINES)
+        # The include path, for the application's own headers and the sources it includes, e.g. helpers.xc
+        self.dirs = list(dict.fromkeys([self.dir / "src"] + [(self.dir / d).resolve() for d in includes]))
+        self.sources = sorted(p for p in (self.dir / "src").rglob("*") if p.suffix in SOURCE_SUFFIXES
+                              and p.suffix != ".h")
+        self._calls = {}
+        self._reach = {}
+
+    def defines(self, params):
+        """ The defines of a profile's build: from its CMake build if there is one, else from the parameters.
+            Without the build, the application's other defines have unknown values, so every #if on them is taken.
+        """
+        config = profile_config(params) if params else None
+        flags = self.dir / "build" / "CMakeFiles" / f"{self.name}_{config}.dir" / "flags.make"
+        if config and flags.exists():
+            return {name: value or "1" for name, value in _FLAG_DEFINE.findall(flags.read_text())}
+        defines = profile_defines(params) if params else {}
+        defines.update((name, "?") for name in self._other_defines)
+        return defines
+
+    def _preprocess(self, path, defines, seen):
+        seen.add(path)
+        def include(name):
+            for d in self.dirs:
+                header = d / name
+                if header.is_file():
+                    return "" if header in seen else self._preprocess(header, defines, seen)
+            return None # A library or system header
+        return preprocess(path.read_text(errors="replace"), defines, include)
+
+    def calls(self, params):
+        """ The library functions a profile's build of the application calls """
+        defines = self.defines(params)
+        key = tuple(sorted(defines.items()))
+        if key not in self._calls:
+            identifiers = set()
+            for source in self.sources:
+                identifiers |= source_identifiers(self._preprocess(source, dict(defines), set()))
+            self._calls[key] = frozenset(identifiers & set(self._graph.symbols))
+        return self._calls[key]
+
+    def reach(self, params):
+        """ The library files built into a profile, given its test parameters (None for the app's only build) """
+        calls = self.calls(params)
+        if calls not in self._reach:
+            self._reach[calls] = self._graph.reached_from(calls)
+        return {path for path in self._reach[calls] if width_matches(path, params)}
+
+    def owns(self, path):
+        """ Whether a changed file is part of the application """
+        return any(d == path or d in path.parents for d in [self.dir] + self.dirs)
+
+
+def python_imports(path):
+    """ The local modules a Python file imports, directly or not """
+    seen = set()
+    todo = [Path(path).stem]
+    while todo:
+        module = todo.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+        source = TESTS_DIR / f"{module}.py"
+        if module != Path(path).stem and not source.exists():
+            continue
+        source = Path(path) if module == Path(path).stem else source
+        for match in _PY_IMPORT.finditer(source.read_text(errors="replace")):
+            names = [match.group(1)] if match.group(1) else [n.strip() for n in match.group(2).split(",")]
+            todo.extend(n for n in names if (TESTS_DIR / f"{n}.py").exists())
+    return seen
+
+
+def app_of_test(test_path):
+    """ The application directory of a test file, from its test_params.json, or a directory named after it """
+    test_path = Path(test_path)
+    match = _PARAMS_FILE.search(test_path.read_text(errors="replace"))
+    if match:
+        return test_path.parent / match.group(1)
+    app_dir = test_path.parent / test_path.stem
+    return app_dir if (app_dir / "CMakeLists.txt").exists() else None
+
+
+class ChangeSelector():
+    """ Decides which tests a set of changed files affects
+
+        Parameters:
+        changed (list): Paths of the changed files, relative to the repository or absolute
+        lib_dir (Path): The library, whose lib_build_info.cmake lists its source directories
+    """
+
+    def __init__(self, changed, lib_dir=LIB_DIR, repo_dir=REPO_DIR):
+        self.changed = {(Path(repo_dir) / p).resolve() for p in changed}
+        lib_dir = Path(lib_dir).resolve()
+        self.lib_dir = lib_dir
+        dirs = [lib_dir / d for d in read_cmake_list(lib_dir / "lib_build_info.cmake", "LIB_INCLUDES")]
+        self.graph = SourceGraph(dirs)
+        self.lib_changes = self.changed & set(self.graph.files)
+        self._apps = {}
+        self._imports = {}
+
+    def app(self, app_dir):
+        app_dir = Path(app_dir).resolve()
+        if app_dir not in self._apps:
+            self._apps[app_dir] = TestApp(app_dir, self.graph)
+        return self._apps[app_dir]
+
+    def build_change(self):
+        """ Why every test is affected, if a change is to the build of the tests or of the library, else None """
+        for path in sorted(self.changed):
+            if path.parent == TESTS_DIR and (path.name in ("CMakeLists.txt", "conftest.py") or path.suffix == ".cmake"):
+                return "test build changed"
+            # The library's dependent modules and the compiler flags of all its files
+            if self.lib_dir in path.parents and (path.name in ("CMakeLists.txt", "module_build_info")
+                                                 or path.suffix == ".cmake"):
+                return f"library build changed ({path.name})"
+        return None
+
+    def reason(self, test_path, params=None):
+        """ Why a test is affected by the changes, or None if it is not """
+        test_path = Path(test_path).resolve()
+        build_change = self.build_change()
+        if build_change:
+            return build_change
+
+        if test_path not in self._imports:
+            self._imports[test_path] = python_imports(test_path)
+        for path in self.changed:
+            if path.suffix == ".py" and path.parent == TESTS_DIR and path.stem in self._imports[test_path]:
+                return f"{path.name} changed"
+
+        app_dir = app_of_test(test_path)
+        if app_dir is None or not (app_dir / "CMakeLists.txt").exists():
+            return None
+        app = self.app(app_dir)
+        for path in sorted(self.changed):
+            if app.owns(path):
+                return f"{app.name} changed"
+        reached = self.lib_changes & app.reach(params)
+        if reached:
+            return f"builds {', '.join(sorted(p.name for p in reached))}"
+        return None
+
+
+def changed_files(since, cwd=REPO_DIR):
+    """ Files changed since a git revision, including uncommitted changes """
+    output = subprocess.run(["git", "diff", "--name-only", since], cwd=cwd, check=True,
+                            stdout=subprocess.PIPE, text=True).stdout
+    return [line for line in output.splitlines() if line]
+
+
+def expected_times(db_path):
+    """ Median wall time of each (test, profile) in the sim_metrics database """
+    if not os.path.exists(db_path):
+        return {}
+    from sim_metrics import SimMetricsDb
+    db = SimMetricsDb(db_path)
+    history = {}
+    for run in db.runs():
+        history.setdefault((run["test"], run["profile"]), []).append(run["wall_s"])
+    db.close()
+    return {key: statistics.median(values) for key, values in history.items()}
+
+
+def select(items, is_affected, expected_time, budget_s=None):
+    """ Orders items with the affected ones first, followed by as many of the rest, in order, as fit in the
+        budget. Returns (selected, deselected, number affected).
+    """
+    affected = [item for item in items if is_affected(item)]
+    affected_ids = {id(item) for item in affected}
+    rest = [item for item in items if id(item) not in affected_ids]
+    if budget_s is None:
+        return affected + rest, [], len(affected)
+    kept, deselected = [], []
+    remaining = budget_s
+    for item in rest:
+        time_s = expected_time(item)
+        if time_s <= remaining:
+            kept.append(item)
+            remaining -= time_s
+        else:
+            deselected.append(item)
+    return affected + kept, deselected, len(affected)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--changed-since", action="store", default=None,
+                     help="Run the tests affected by the files changed since this git revision first")
+    parser.addoption("--changed", action="append", default=[],
+                     help="A changed file, relative to the repository. Can be repeated")
+    parser.addoption("--time-budget", action="store", default=None, type=float,
+                     help="Seconds of expected run time for the tests not affected by the changes")
+
+
+def _item_params(item):
+    callspec = getattr(item, "callspec", None)
+    params = callspec.params.get("params") if callspec else None
+    return params if isinstance(params, dict) else None
+
+
+def pytest_collection_modifyitems(session, config, items):
+    since = config.getoption("--changed-since")
+    changed = list(config.getoption("--changed"))
+    if since is None and not changed:
+        return
+    if since is not None:
+        changed += changed_files(since)
+
+    selector = ChangeSelector(changed)
+    reasons = {}
+    def is_affected(item):
+        reason = selector.reason(item.path, _item_params(item))
+        if reason:
+            reasons[item.nodeid] = reason
+        return reason is not None
+
+    times = expected_times(config.getoption("--sim-metrics-db"))
+    default_time = statistics.median(times.values()) if times else DEFAULT_TEST_TIME_S
+    def expected_time(item):
+        callspec = getattr(item, "callspec", None)
+        key = (item.originalname, callspec.id if callspec else "")
+        if key in times:
+            return times[key]
+        # Only the tests of an application run the simulator
+        return default_time if app_of_test(item.path) else 0
+
+    selected, deselected, num_affected = select(items, is_affected, expected_time, config.getoption("--time-budget"))
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
+    config._change_selection = (len(changed), num_affected, len(selected) - num_affected, len(deselected))
+
+
+def pytest_report_collectionfinish(config):
+    summary = getattr(config, "_change_selection", None)
+    if summary:
+        return (f"change selection: {summary[0]} files changed, {summary[1]} tests affected, {summary[2]} others "
+                f"run, {summary[3]} deselected by the time budget")
+
+
+def expand_profiles(profiles):
+    """ (params, id) of each test case of the profiles in a test_params.json, one per arch, as
+        helpers.generate_tests() makes them
+    """
+    for profile in profiles:
+        archs = profile["arch"] if isinstance(profile["arch"], list) else [profile["arch"]]
+        for arch in archs:
+            params = {key: value for key, value in profile.items() if key != "arch"}
+            params["arch"] = arch
+            ids = [f"{key[:2]}{value}" if key in ("rx_width", "tx_width") else str(value)
+                   for key, value in params.items()]
+            yield params, "-".join(ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profiles of the test applications which changed files reach")
+    parser.add_argument("files", nargs="*", help="Changed files, relative to the repository")
+    parser.add_argument("--since", help="Also take the files changed since this git revision")
+    cmd_args = parser.parse_args()
+
+    files = list(cmd_args.files) + (changed_files(cmd_args.since) if cmd_args.since else [])
+    selector = ChangeSelector(files)
+    print(f"{len(selector.changed)} files changed, {len(selector.lib_changes)} in the library")
+    for params_file in sorted(TESTS_DIR.glob("*/test_params.json")):
+        app = selector.app(params_file.parent)
+        with open(params_file) as f:
+            cases = list(expand_profiles(json.load(f)["PROFILES"]))
+        owned = selector.build_change() or any(app.owns(p) for p in selector.changed)
+        hits = [name for params, name in cases if owned or selector.lib_changes & app.reach(params)]
+        if hits:
+            print(f"{app.name}: {len(hits)} of {len(cases)} profiles")
+            for hit in hits:
+                print(f"    {hit}")
@@ -0,0 +1,55 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Timing of a non ideal clock for mii_clock.Clock: a frequency offset in ppm, a slow drift of the frequency and
+cycle to cycle jitter. Everything random comes from the seed, so a test run with the same seed sees the same
+clock edges.
+"""
+
+import math
+import random
+
+
+class ClockTiming():
+    """ Period of each cycle of a clock
+
+        Parameters:
+        period (float): Nominal period, in sim ticks
+        ppm (float): Frequency offset in parts per million. +100 is a clock running 100ppm fast
+        drift_ppm (float): Amplitude of a slow sinusoidal wander of the frequency offset, in ppm
+        drift_period (float): Period of the wander, in sim ticks
+        jitter (float): Standard deviation of the period of each cycle, in sim ticks
+        seed (int): Seed for the jitter, and the phase of the wander
+    """
+
+    def __init__(self, period, ppm=0.0, drift_ppm=0.0, drift_period=None, jitter=0.0, seed=0):
+        assert not drift_ppm or drift_period, "A drift needs a drift_period"
+        self.nominal_period = period
+        self.ppm = ppm
+        self.drift_ppm = drift_ppm
+        self.drift_period = drift_period
+        self.jitter = jitter
+        self._rand = random.Random(seed)
+        self._drift_phase = self._rand.uniform(0, 2 * math.pi) if drift_ppm else 0.0
+
+    def is_ideal(self):
+        return not (self.ppm or self.drift_ppm or self.jitter)
+
+    def mean_period(self):
+        """ Period with the frequency offset, but without the drift or jitter """
+        return self.nominal_period / (1 + self.ppm * 1e-6)
+
+    def ppm_at(self, time):
+        ppm = self.ppm
+        if self.drift_ppm:
+            ppm += self.drift_ppm * math.sin(2 * math.pi * time / self.drift_period + self._drift_phase)
+        return ppm
+
+    def cycle_period(self, time):
+        """ Period of the cycle starting at time """
+        period = self.nominal_period / (1 + self.ppm_at(time) * 1e-6)
+        if self.jitter:
+            # Never let the jitter stop the clock
+            period = max(period + self._rand.gauss(0, self.jitter), period / 2)
+        return period
@@ -7,8 +7,21 @@ from pathlib import Path
 import subprocess
 import platform
 
+import sim_timeline
+import sim_trace
+
+try:
+    import Pyxsim as px
+except ImportError:
+    px = None
+
 pkg_dir = Path(__file__).parent
 
+# With --sim-metrics, records the wall and sim time of every simulator run (see sim_metrics.py), runs the tests
+# affected by --changed-since first (see change_selection.py) and, with --build-xe, builds the binaries they need (see
+# xe_cache.py)
+pytest_plugins = ["sim_metrics", "change_selection", "xe_cache"]
+
 def pytest_addoption(parser):
     parser.addoption(
         "--seed",
@@ -129,3 +142,21 @@ def seed(request):
 @pytest.fixture
 def level(pytestconfig):
     return pytestconfig.getoption("level")
+
+@pytest.fixture(autouse=True)
+def end_of_sim_runs(monkeypatch):
+    """ Closes the timeline and trace controller started for each simulator run as soon as the run ends, which puts
+        sys.stdout back
+    """
+    if px is None:
+        return
+    run_on_simulator_ = px.run_on_simulator_
+
+    def run_and_close(*args, **kwargs):
+        try:
+            return run_on_simulator_(*args, **kwargs)
+        finally:
+            # Each wraps sys.stdout, the timeline first, so they come off in the reverse order
+            sim_trace.run_finished()
+            sim_timeline.run_finished()
+    monkeypatch.setattr(px, "run_on_simulator_", run_and_close)
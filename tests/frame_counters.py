@@ -0,0 +1,116 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Counter based checking of the frames received from the DUT
+
+Rather than printing "Received packet N ok" for every frame and comparing the output line by line, the RX PHY
+checker marks each frame in a bitset and keeps the details of the first few mismatches. At the end of the test
+only a one line summary is printed, which the CounterTester checks. The per frame detail is only written out
+when the test fails.
+
+Enable it for the tests using do_rx_test() with helpers.args.counter_checks.
+"""
+
+import sys
+
+MAX_MISMATCH_RECORDS = 16
+
+
+class Bitset():
+    """ A fixed size set of frame indices """
+
+    def __init__(self, size):
+        self.size = size
+        self._bits = bytearray((size + 7) // 8)
+
+    def add(self, index):
+        self._bits[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, index):
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def __len__(self):
+        return sum(bin(b).count("1") for b in self._bits)
+
+    def indices(self):
+        return [i for i in range(self.size) if i in self]
+
+    def difference(self, other):
+        result = Bitset(self.size)
+        result._bits = bytearray(a & ~b & 0xff for a, b in zip(self._bits, other._bits))
+        return result
+
+
+class FrameCounters():
+    """ What the checker saw, against the frames the TX PHY sent
+
+        expected: frames the DUT should pass on
+        dropped: frames the DUT should drop
+        received: expected frames which were received and matched
+        mismatches: (index, received dump, expected dump) for the first frames which did not match
+        unexpected: number of frames received after all the expected ones
+    """
+
+    def __init__(self, packets):
+        self.expected = Bitset(len(packets))
+        self.dropped = Bitset(len(packets))
+        for i, packet in enumerate(packets):
+            (self.dropped if packet.dropped else self.expected).add(i)
+        self.received = Bitset(len(packets))
+        self.num_mismatches = 0
+        self.mismatches = []
+        self.num_unexpected = 0
+        self.unexpected = []
+
+    def frame_ok(self, index):
+        self.received.add(index)
+
+    def frame_mismatch(self, index, packet, expected):
+        self.num_mismatches += 1
+        if len(self.mismatches) < MAX_MISMATCH_RECORDS:
+            self.mismatches.append((index, packet.dump(), expected.dump()))
+
+    def frame_unexpected(self, packet):
+        self.num_unexpected += 1
+        if len(self.unexpected) < MAX_MISMATCH_RECORDS:
+            self.unexpected.append(packet.dump())
+
+    def missing(self):
+        return self.expected.difference(self.received)
+
+    def summary(self):
+        return (f"Received {len(self.received)}/{len(self.expected)} packets ok, "
+                f"{self.num_mismatches} mismatched, {self.num_unexpected} unexpected")
+
+    def expected_summary(self):
+        return f"Received {len(self.expected)}/{len(self.expected)} packets ok, 0 mismatched, 0 unexpected"
+
+    def dump(self, out=sys.stderr):
+        """ Write out the detail of what went wrong """
+        missing = self.missing().indices()
+        if missing:
+            out.write(f"Missing packets: {missing}\n")
+        for index, received, expected in self.mismatches:
+            out.write(f"Packet {index} does not match\nReceived:\n{received}Expected:\n{expected}")
+        if self.num_mismatches > len(self.mismatches):
+            out.write(f"... and {self.num_mismatches - len(self.mismatches)} more mismatches\n")
+        for received in self.unexpected:
+            out.write(f"Unexpected packet:\n{received}")
+
+
+class CounterTester():
+    """ Checks the output is just the checker's summary and "Test done", and dumps the detail if not """
+
+    def __init__(self, counters):
+        self.counters = counters
+
+    def run(self, output):
+        expected = [self.counters.expected_summary(), "Test done"]
+        lines = [line.strip() for line in output if line.strip()]
+        if lines == expected:
+            return True
+
+        sys.stderr.write(f"Expected:\n {expected}\nGot:\n {lines[:50]}\n")
+        self.counters.dump()
+        return False
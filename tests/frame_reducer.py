@@ -0,0 +1,430 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Shrinking the random traffic of a failing test to a minimal reproducer
+
+The seed driven tests (test_rx_queues, test_avb_traffic, test_time_rx, the 4.1.x suites) build a frame list from a
+seed and give it to the TX PHY with set_packets(). When the FRAME_EDIT environment variable names a FrameEdit
+file, set_packets() edits that list in place before the test builds its expect file from it: frames are removed,
+and IFGs longer than the minimum are cut to the minimum. The list is always generated in full first, so the random
+numbers drawn for the frames that are kept do not change. A test which gives more than one list (test_speed_change
+gives one to each TX PHY) has one of them reduced, by default the first, chosen with --list; the others are sent
+unedited.
+
+Running this file reruns a failing (test, profile, seed) under pytest with smaller and smaller edits, keeping each
+one that still fails:
+ 1. the shortest failing prefix of the frames, by a parallel bisection
+ 2. delta debugging (ddmin) over the bursts, then over the single frames left
+ 3. ddmin over the frames which keep an IFG longer than the minimum
+
+    python frame_reducer.py "test_rx_queues.py::test_rx_queues[rt-rgmii-125MHz-xs3-mixed]" --seed 1 -j 8
+
+Candidates are run in parallel, each in its own working directory of links to the tests as the tests write their
+expect files to fixed names. The result is saved as a FrameEdit file which replays the reduced traffic:
+
+    FRAME_EDIT=logs/reduced_....json python -m pytest "test_rx_queues.py::..." --seed 1
+
+A candidate reproduces the failure if pytest fails and, if --match is given, the output matches it. Without
+--match any failure counts, including one the reduction itself causes (e.g. an expect file which assumes a frame
+count), so give a pattern for the original error where the test can fail in more than one way.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+FRAME_EDIT_ENV = "FRAME_EDIT"
+
+DEFAULT_OUT_DIR = "logs"
+
+# Number of frame lists given to the TX PHYs so far by each test, to pick out the one a FrameEdit is for
+_num_lists = {}
+
+# Not linked into the working directory of a candidate, so that each run writes its own
+WORKER_PRIVATE = ("expect_temp", "logs", "__pycache__", ".pytest_cache")
+
+
+def frame_summary(packet):
+    """ The fields of a MiiPacket which matter for a reduction, for the record of the original frames """
+    return {
+        "dst": list(packet.dst_mac_addr or []),
+        "num_data_bytes": packet.num_data_bytes,
+        "tagged": bool(packet.vlan_prio_tag),
+        "ifg": packet.inter_frame_gap,
+        "dropped": packet.dropped,
+    }
+
+
+class FrameEdit():
+    """ Changes to make to the frame list of a test
+
+        Parameters:
+        keep (list): Indices of the frames to keep, None to keep all
+        keep_ifg (list): Indices of the frames which keep their IFG, the others have the minimum. None to keep all
+        record (str): Path to write the frame_summary() of every frame in the list before it is edited
+        list_index (int): Which of the frame lists given to the TX PHYs by the test to edit, in the order given
+    """
+
+    def __init__(self, keep=None, keep_ifg=None, record=None, list_index=0):
+        self.keep = None if keep is None else sorted(keep)
+        self.keep_ifg = None if keep_ifg is None else sorted(keep_ifg)
+        self.record = record
+        self.list_index = list_index
+
+    @classmethod
+    def load(cls, path):
+        # Ignores any other keys, so a saved reduction is also a FrameEdit
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("keep"), data.get("keep_ifg"), data.get("record"), data.get("list_index", 0))
+
+    def to_dict(self):
+        return {"keep": self.keep, "keep_ifg": self.keep_ifg, "record": self.record, "list_index": self.list_index}
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    def apply(self, packets, min_ifg):
+        """ Edits the list of packets in place """
+        if self.record:
+            with open(self.record, "w") as f:
+                json.dump([frame_summary(packet) for packet in packets], f)
+
+        if self.keep_ifg is not None:
+            keep_ifg = set(self.keep_ifg)
+            for i, packet in enumerate(packets):
+                if i not in keep_ifg and packet.inter_frame_gap > min_ifg:
+                    packet.inter_frame_gap = min_ifg
+
+        if self.keep is not None:
+            assert not self.keep or self.keep[-1] < len(packets), \
+                f"Frame edit keeps frame {self.keep[-1]} of {len(packets)}"
+            packets[:] = [packets[i] for i in self.keep]
+
+
+def apply_frame_edit(packets, clock):
+    """ Called by the TX PHYs with the packets they are given. Only frame lists are edited, not generators, and only
+        the one of the current test picked by the FrameEdit's list_index
+    """
+    path = os.environ.get(FRAME_EDIT_ENV)
+    if not path or not isinstance(packets, list):
+        return
+    test = os.environ.get("PYTEST_CURRENT_TEST", "").rsplit(" ", 1)[0] # Without the " (call)" of the phase
+    list_index = _num_lists.get(test, 0)
+    _num_lists[test] = list_index + 1
+    edit = FrameEdit.load(path)
+    if list_index == edit.list_index:
+        edit.apply(packets, clock.get_min_ifg())
+
+
+def find_bursts(frames):
+    """ Index lists of the runs of consecutive frames with the same destination, length and tagging, from
+        frame_summary()s. The tests send a burst as copies of one frame.
+    """
+    bursts = []
+    last = None
+    for i, frame in enumerate(frames):
+        key = (tuple(frame["dst"]), frame["num_data_bytes"], frame["tagged"])
+        if bursts and key == last:
+            bursts[-1].append(i)
+        else:
+            bursts.append([i])
+        last = key
+    return bursts
+
+
+class Reducer():
+    """ Finds a small set of units for which a test still fails
+
+        Parameters:
+        fails (callable): Given a list of units, returns whether the test fails with only those units
+        jobs (int): Number of candidates to test at once
+    """
+
+    def __init__(self, fails, jobs=1):
+        self._fails = fails
+        self.jobs = jobs
+        self.num_tests = 0
+        self._cache = {}
+
+    def _test_all(self, candidates):
+        """ Whether each candidate fails, testing up to jobs of them at a time. Results are cached. """
+        todo = [c for c in candidates if tuple(c) not in self._cache]
+        todo = list({tuple(c): c for c in todo}.values())
+        if todo:
+            self.num_tests += len(todo)
+            if self.jobs > 1:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                    results = list(pool.map(self._fails, todo))
+            else:
+                results = [self._fails(c) for c in todo]
+            for c, result in zip(todo, results):
+                self._cache[tuple(c)] = result
+        return [self._cache[tuple(c)] for c in candidates]
+
+    def _first_failing(self, candidates):
+        """ Index of the first candidate which fails, testing a batch of jobs at a time so later batches are not
+            run once one fails
+        """
+        for start in range(0, len(candidates), self.jobs):
+            results = self._test_all(candidates[start:start + self.jobs])
+            if any(results):
+                return start + results.index(True)
+        return None
+
+    def fails(self, units):
+        return self._test_all([list(units)])[0]
+
+    def shortest_prefix(self, units):
+        """ The shortest prefix of units which fails, given that all of them do. Tests jobs prefix lengths per
+            round, so each round narrows the range by a factor of jobs + 1.
+        """
+        lo, hi = 0, len(units) # The prefix of hi units fails, lo is the longest known to pass
+        while hi - lo > 1:
+            num_points = min(self.jobs, hi - lo - 1)
+            lengths = sorted({lo + (hi - lo) * (i + 1) // (num_points + 1) for i in range(num_points)})
+            results = self._test_all([units[:n] for n in lengths])
+            failing = [n for n, failed in zip(lengths, results) if failed]
+            if failing:
+                hi = failing[0]
+            passing = [n for n, failed in zip(lengths, results) if not failed and n < hi]
+            if passing:
+                lo = passing[-1]
+        return units[:hi]
+
+    def ddmin(self, units):
+        """ Zeller's delta debugging: a 1-minimal list of units which fails, given that all of them do """
+        units = list(units)
+        n = 2
+        while len(units) >= 2:
+            size = len(units)
+            chunks = [units[size * i // n:size * (i + 1) // n] for i in range(n)]
+            complements = [[u for j, chunk in enumerate(chunks) if j != i for u in chunk] for i in range(n)]
+            # With two chunks each complement is the other chunk
+            candidates = chunks + (complements if n > 2 else [])
+            index = self._first_failing(candidates)
+            if index is not None:
+                # Start again from two chunks of a failing chunk, or one fewer chunks of a complement
+                n = 2 if index < n else max(n - 1, 2)
+                units = candidates[index]
+            elif n >= size:
+                break
+            else:
+                n = min(2 * n, size)
+        return units
+
+
+class SimRunner():
+    """ Runs one pytest test with a FrameEdit, in a private working directory per parallel run
+
+        Parameters:
+        test (str): pytest node id, e.g. "test_rx_queues.py::test_rx_queues[rt-mii-xs2-hp_min_sz]"
+        seed (int): Passed to --seed, None for the tests with a fixed seed
+        match (str): Regex the output must match for a failure to count
+        timeout (float): Seconds before a run is abandoned and counts as not failing
+        pytest_args (list): Extra arguments for pytest
+        tests_dir (str): Directory of the tests
+        list_index (int): Which of the test's frame lists to edit, see FrameEdit
+    """
+
+    def __init__(self, test, seed=None, match=None, timeout=None, pytest_args=(), tests_dir=None, verbose=False,
+                 list_index=0):
+        self.test = test
+        self.seed = seed
+        self.list_index = list_index
+        self._match = re.compile(match) if match else None
+        self.timeout = timeout
+        self.pytest_args = list(pytest_args)
+        self.tests_dir = os.path.abspath(tests_dir or os.path.dirname(__file__))
+        self.verbose = verbose
+        self.num_runs = 0
+        self.run_time = 0.0
+        self._tmp = tempfile.mkdtemp(prefix="frame_reducer_")
+        self._free_dirs = []
+        self._num_dirs = 0
+        self._lock = threading.Lock()
+
+    def command(self):
+        # A short traceback, so that --match is not matched by the source of the test
+        cmd = [sys.executable, "-m", "pytest", self.test, "-q", "-x", "--tb=short", "-p", "no:cacheprovider"]
+        if self.seed is not None:
+            cmd += ["--seed", str(self.seed)]
+        return cmd + self.pytest_args
+
+    def _take_dir(self):
+        with self._lock:
+            if self._free_dirs:
+                return self._free_dirs.pop()
+            self._num_dirs += 1
+            work_dir = os.path.join(self._tmp, f"worker{self._num_dirs}")
+        os.makedirs(work_dir)
+        for name in os.listdir(self.tests_dir):
+            if name not in WORKER_PRIVATE and not name.endswith(".lock"):
+                os.symlink(os.path.join(self.tests_dir, name), os.path.join(work_dir, name))
+        return work_dir
+
+    def _give_dir(self, work_dir):
+        with self._lock:
+            self._free_dirs.append(work_dir)
+
+    def run(self, edit):
+        """ Returns (failed, output) for a run with the FrameEdit """
+        work_dir = self._take_dir()
+        try:
+            edit_path = os.path.join(work_dir, "frame_edit.json")
+            FrameEdit(edit.keep, edit.keep_ifg, edit.record, self.list_index).save(edit_path)
+            env = dict(os.environ)
+            env[FRAME_EDIT_ENV] = edit_path
+            start = time.perf_counter()
+            try:
+                proc = subprocess.run(self.command(), cwd=work_dir, env=env, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, text=True, timeout=self.timeout)
+                output = proc.stdout
+                # pytest exits with 1 when tests failed, other codes are errors running them
+                failed = proc.returncode == 1 and (self._match is None or bool(self._match.search(output)))
+            except subprocess.TimeoutExpired as e:
+                output = e.stdout or ""
+                failed = False
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.num_runs += 1
+                self.run_time += elapsed
+            if self.verbose:
+                kept = "all" if edit.keep is None else len(edit.keep)
+                print(f"  {kept} frames, {'fails' if failed else 'passes'} in {elapsed:.1f}s", flush=True)
+            return failed, output
+        finally:
+            self._give_dir(work_dir)
+
+    def record(self):
+        """ Runs the test unedited, returning (failed, frame summaries, wall time, output) """
+        record_path = os.path.join(self._tmp, "frames.json")
+        start = time.perf_counter()
+        failed, output = self.run(FrameEdit(record=record_path))
+        elapsed = time.perf_counter() - start
+        assert os.path.isfile(record_path), \
+            f"{self.test} gave no frame list {self.list_index} to a TX PHY:\n{output}"
+        with open(record_path) as f:
+            return failed, json.load(f), elapsed, output
+
+    def close(self):
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def reduce_test(runner, jobs=1, log=print):
+    """ Shrinks the frames of a failing test. Returns a dict with the FrameEdit of the reduction (keep and
+        keep_ifg) and the kept frames, or None if the test does not fail unedited.
+    """
+    log(f"Running {runner.test} (seed {runner.seed}) unedited")
+    failed, frames, original_time, output = runner.record()
+    if not failed:
+        log("The test does not fail unedited:\n" + output[-2000:])
+        return None
+    log(f"Fails with {len(frames)} frames in {original_time:.1f}s")
+
+    # Shared by the stages, which test some of the same frame sets
+    results = {tuple(range(len(frames))): True}
+
+    def frames_fail(keep):
+        keep = tuple(sorted(keep))
+        if keep not in results:
+            results[keep] = runner.run(FrameEdit(keep=keep))[0]
+        return results[keep]
+
+    keep = Reducer(frames_fail, jobs).shortest_prefix(list(range(len(frames))))
+    log(f"Shortest failing prefix: {len(keep)} frames")
+
+    bursts = [tuple(burst) for burst in find_bursts(frames[:len(keep)])]
+    bursts = Reducer(lambda units: frames_fail([i for burst in units for i in burst]), jobs).ddmin(bursts)
+    keep = [i for burst in bursts for i in burst]
+    log(f"{len(bursts)} bursts left, {len(keep)} frames")
+
+    keep = Reducer(frames_fail, jobs).ddmin(keep)
+    log(f"{len(keep)} frames left")
+
+    # Then the IFGs longer than the minimum of the frames left, keeping as few as possible. The record holds the
+    # IFG of each frame as it was generated, and the shortest is taken as the minimum.
+    min_ifg = min(frame["ifg"] for frame in frames)
+    keep_ifg = [i for i in keep if frames[i]["ifg"] > min_ifg]
+    if keep_ifg:
+        def ifgs_fail(kept_ifgs):
+            if tuple(kept_ifgs) == tuple(keep_ifg):
+                return True
+            return runner.run(FrameEdit(keep=keep, keep_ifg=kept_ifgs))[0]
+
+        ifg_reducer = Reducer(ifgs_fail, jobs)
+        keep_ifg = [] if ifg_reducer.fails([]) else ifg_reducer.ddmin(keep_ifg)
+    log(f"{len(keep_ifg)} frames keep a longer than minimum IFG")
+
+    return {
+        "test": runner.test,
+        "seed": runner.seed,
+        "list_index": runner.list_index,
+        "keep": list(keep),
+        "keep_ifg": list(keep_ifg),
+        "original_frames": len(frames),
+        "original_time_s": original_time,
+        "frames": [dict(frames[i], index=i) for i in keep],
+    }
+
+
+def default_out_path(test, seed):
+    name = re.sub(r"[^\w.-]+", "_", test.replace(".py::", "_")).strip("_")
+    return os.path.join(DEFAULT_OUT_DIR, f"reduced_{name}_{seed}.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shrink the random traffic of a failing test to a minimal reproducer")
+    parser.add_argument("test", help="pytest node id of the failing test and profile")
+    parser.add_argument("--seed", type=int, help="Seed the test failed with")
+    parser.add_argument("--list", type=int, default=0,
+                        help="Which frame list to reduce, in the order the test gives them to the TX PHYs")
+    parser.add_argument("--match", help="Regex of the failure, which reduced runs must print to count as failing")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Simulations to run at once")
+    parser.add_argument("--timeout", type=float, help="Seconds before a run counts as passing")
+    parser.add_argument("--out", help="Path of the reduction, by default in logs/")
+    parser.add_argument("--verbose", action="store_true", help="Print each run")
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER, help="Extra pytest arguments, after --")
+    cmd_args = parser.parse_args()
+
+    pytest_args = [a for a in cmd_args.pytest_args if a != "--"]
+    runner = SimRunner(cmd_args.test, cmd_args.seed, cmd_args.match, cmd_args.timeout, pytest_args,
+                       verbose=cmd_args.verbose, list_index=cmd_args.list)
+    start = time.perf_counter()
+    try:
+        result = reduce_test(runner, cmd_args.jobs)
+        if result is None:
+            sys.exit(1)
+
+        # Time the replay of the reduced traffic
+        replay_start = time.perf_counter()
+        replay_failed, _ = runner.run(FrameEdit(result["keep"], result["keep_ifg"]))
+        result["replay_time_s"] = time.perf_counter() - replay_start
+    finally:
+        runner.close()
+    result["replay_fails"] = replay_failed
+    result["runs"] = runner.num_runs
+    result["reduction_time_s"] = time.perf_counter() - start
+
+    out_path = cmd_args.out or default_out_path(cmd_args.test, cmd_args.seed)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=1)
+
+    seed_arg = f" --seed {cmd_args.seed}" if cmd_args.seed is not None else ""
+    print(f"{result['original_frames']} frames reduced to {len(result['keep'])} in {runner.num_runs} runs "
+          f"({result['reduction_time_s']:.0f}s), saved to {out_path}")
+    print(f"The test took {result['original_time_s']:.1f}s unedited and {result['replay_time_s']:.1f}s reduced")
+    print(f"Replay: {FRAME_EDIT_ENV}={out_path} python -m pytest \"{cmd_args.test}\"{seed_arg}")
+    if not replay_failed:
+        print("ERROR: the reduced traffic did not fail again, the failure may be intermittent")
@@ -10,12 +10,30 @@ import pytest
 import json
 import copy
 
+import sim_trace
+import sim_timeline
+from frame_counters import FrameCounters, CounterTester
+from xe_cache import find_xe
 from mii_clock import Clock
 from mii_phy import MiiTransmitter, MiiReceiver
 from rgmii_phy import RgmiiTransmitter, RgmiiReceiver
 from rmii_phy import RMiiTransmitter, RMiiReceiver
 
 args = SimpleNamespace( trace=False, # Set to True to enable VCD and instruction tracing for debug. Warning - it's about 5x slower with trace on and creates up to ~1GB of log files in tests/logs
+                        # With trace set, any of the following only keep the trace inside windows (see sim_trace.py)
+                        trace_start_packet=None, # Start recording at the start of this packet sent by the PHY
+                        trace_stop_packet=None, # Stop recording at the start of this packet sent by the PHY
+                        trace_start_time_us=None, # Start recording at this sim time
+                        trace_stop_time_us=None, # Stop recording at this sim time
+                        trace_on_error=False, # Record around the first ERROR printed by a checker
+                        trace_tiles=None, # List of tiles to trace. Defaults to tile[0], plus tile[1] for RGMII
+                        trace_ports=None, # List of regular expressions selecting the ports kept in the VCD
+                        counter_checks=False, # Set to True for do_rx_test() to count received frames rather than print a line for each (see frame_counters.py)
+                        timeline=False, # Set to True to write a Chrome trace/Perfetto timeline of each simulation to tests/logs
+                        tx_clk_ppm=0, # Frequency offset of the MII/RGMII TX PHY clocks, i.e. of the far end sending to the DUT (see clock_timing.py)
+                        tx_clk_drift_ppm=0, # Amplitude of a slow wander of that offset, over tx_clk_drift_period_us
+                        tx_clk_drift_period_us=1000,
+                        tx_clk_jitter_ps=0, # Standard deviation of the period of each TX PHY clock cycle
                         num_packets=100, # Number of packets in the test
                         weight_hp=50, # Weight of high priority traffic
                         weight_lp=25, # Weight of low priority traffic
@@ -35,6 +53,12 @@ def create_if_needed(folder):
             os.makedirs(folder)
         return folder
 
+def get_tx_clk_args(clock_seed):
+    """ Arguments for the Clock of a TX PHY, from the tx_clk_* args """
+    return dict(ppm=args.tx_clk_ppm, drift_ppm=args.tx_clk_drift_ppm,
+                drift_period=args.tx_clk_drift_period_us * px.Xsi.get_xsi_tick_freq_hz() / 1e6,
+                jitter=args.tx_clk_jitter_ps * px.Xsi.get_xsi_tick_freq_hz() / 1e12, seed=clock_seed)
+
 # A set of functions to create the clock and phy for tests. This set of functions
 # contains all the port mappings for the different phys.
 def get_mii_rx_clk_phy(packet_fn=None, verbose=False, test_ctrl=None):
@@ -47,8 +71,9 @@ def get_mii_rx_clk_phy(packet_fn=None, verbose=False, test_ctrl=None):
 
 def get_mii_tx_clk_phy(verbose=False, test_ctrl=None, do_timeout=True,
                        complete_fn=None, expect_loopback=True,
-                       dut_exit_time_us=(50 * px.Xsi.get_xsi_tick_freq_hz())/1e6, initial_delay_us=(85 * px.Xsi.get_xsi_tick_freq_hz())/1e6): # 50us and 85us
-    clk = Clock('tile[0]:XS1_PORT_1J', Clock.CLK_25MHz)
+                       dut_exit_time_us=(50 * px.Xsi.get_xsi_tick_freq_hz())/1e6, initial_delay_us=(85 * px.Xsi.get_xsi_tick_freq_hz())/1e6, # 50us and 85us
+                       clock_seed=0):
+    clk = Clock('tile[0]:XS1_PORT_1J', Clock.CLK_25MHz, **get_tx_clk_args(clock_seed))
     phy = MiiTransmitter('tile[0]:XS1_PORT_4E',
                          'tile[0]:XS1_PORT_1K',
                          'tile[0]:XS1_PORT_1P',
@@ -69,8 +94,9 @@ def get_rgmii_rx_clk_phy(clk_rate, packet_fn=None, verbose=False, test_ctrl=None
 
 def get_rgmii_tx_clk_phy(clk_rate, verbose=False, test_ctrl=None,
                           do_timeout=True, complete_fn=None, expect_loopback=True,
-                          dut_exit_time_us=(50 * px.Xsi.get_xsi_tick_freq_hz())/1e6, initial_delay_us=(130 * px.Xsi.get_xsi_tick_freq_hz())/1e6): # 50us and 135us
-    clk = Clock('tile[1]:XS1_PORT_1O', clk_rate)
+                          dut_exit_time_us=(50 * px.Xsi.get_xsi_tick_freq_hz())/1e6, initial_delay_us=(130 * px.Xsi.get_xsi_tick_freq_hz())/1e6, # 50us and 135us
+                          clock_seed=0):
+    clk = Clock('tile[1]:XS1_PORT_1O', clk_rate, **get_tx_clk_args(clock_seed))
     phy = RgmiiTransmitter('tile[1]:XS1_PORT_8A',
                            'tile[1]:XS1_PORT_4E',
                            'tile[1]:XS1_PORT_1B',
@@ -93,19 +119,19 @@ def run_parametrised_test_rx(capfd, test_fn, params, exclude_standard=False, ver
         if exclude_standard and params["mac"] == "standard":
             pytest.skip()
         (rx_clk_25, rx_mii) = get_mii_rx_clk_phy(packet_fn=check_received_packet)
-        (tx_clk_25, tx_mii) = get_mii_tx_clk_phy(verbose=verbose)
+        (tx_clk_25, tx_mii) = get_mii_tx_clk_phy(verbose=verbose, clock_seed=seed)
         test_fn(capfd, params["mac"], params["arch"], rx_clk_25, rx_mii, tx_clk_25, tx_mii, seed)
 
     elif params["phy"] == "rgmii":
         # Test 100 MBit - RGMII
         if params["clk"] == "25MHz":
             (rx_clk_25, rx_rgmii) = get_rgmii_rx_clk_phy(Clock.CLK_25MHz, packet_fn=check_received_packet)
-            (tx_clk_25, tx_rgmii) = get_rgmii_tx_clk_phy(Clock.CLK_25MHz, verbose=verbose)
+            (tx_clk_25, tx_rgmii) = get_rgmii_tx_clk_phy(Clock.CLK_25MHz, verbose=verbose, clock_seed=seed)
             test_fn(capfd, params["mac"], params["arch"], rx_clk_25, rx_rgmii, tx_clk_25, tx_rgmii, seed)
         # Test 1000 MBit - RGMII
         elif params["clk"] == "125MHz":
             (rx_clk_125, rx_rgmii) = get_rgmii_rx_clk_phy(Clock.CLK_125MHz, packet_fn=check_received_packet)
-            (tx_clk_125, tx_rgmii) = get_rgmii_tx_clk_phy(Clock.CLK_125MHz, verbose=verbose)
+            (tx_clk_125, tx_rgmii) = get_rgmii_tx_clk_phy(Clock.CLK_125MHz, verbose=verbose, clock_seed=seed)
             test_fn(capfd, params["mac"], params["arch"], rx_clk_125, rx_rgmii, tx_clk_125, tx_rgmii, seed)
 
         else:
@@ -146,7 +172,7 @@ def do_rx_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, packets, test_f
     profile = profile + f"_{arch}"
 
     dut_dir = override_dut_dir if override_dut_dir else testname
-    binary = f'{dut_dir}/bin/{profile}/{dut_dir}_{profile}.xe'
+    binary = find_xe(dut_dir, profile)
     assert os.path.isfile(binary), f"Missing .xe {binary}"
 
     tx_phy.set_packets(packets)
@@ -158,9 +184,12 @@ def do_rx_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, packets, test_f
     else:
         expect_filename = f'{expect_folder}/{testname}_{mac}_{tx_phy.get_name()}_{tx_clk.get_name()}_{arch}.expect'
 
-    create_expect(packets, expect_filename)
-
-    tester = px.testers.ComparisonTester(open(expect_filename))
+    if args.counter_checks:
+        rx_phy.frame_counters = FrameCounters(packets)
+        tester = CounterTester(rx_phy.frame_counters)
+    else:
+        create_expect(packets, expect_filename)
+        tester = px.testers.ComparisonTester(open(expect_filename))
 
     simargs = get_sim_args(testname, mac, tx_clk, tx_phy, arch)
     # with capfd.disabled():
@@ -190,9 +219,20 @@ def create_expect(packets, filename):
                 f.write("Received packet {} ok\n".format(i))
         f.write("Test done\n")
 
+def trace_windowed():
+    return (args.trace_start_packet is not None or args.trace_stop_packet is not None or
+            args.trace_start_time_us is not None or args.trace_stop_time_us is not None or
+            args.trace_on_error or args.trace_tiles or args.trace_ports)
+
 def get_sim_args(testname, mac, clk, phy, arch='xs2'):
     sim_args = []
 
+    if args and args.timeline:
+        log_folder = create_if_needed("logs")
+        sim_timeline.start("{log}/timeline_{test}_{mac}_{phy}_{clk}_{arch}.json".format(
+            log=log_folder, test=testname, mac=mac,
+            clk=clk.get_name(), phy=phy.get_name(), arch=arch))
+
     if args and args.trace:
         log_folder = create_if_needed("logs")
 
@@ -200,6 +240,23 @@ def get_sim_args(testname, mac, clk, phy, arch='xs2'):
             log=log_folder, test=testname, mac=mac,
             clk=clk.get_name(), phy=phy.get_name(), arch=arch)
 
+        # Frame boundaries for xsim_trace_analyser.py
+        sim_trace.start_frame_log('{0}.frames.csv'.format(filename))
+
+        if trace_windowed():
+            us = px.Xsi.get_xsi_tick_freq_hz() / 1e6
+            tiles = args.trace_tiles or (['tile[0]', 'tile[1]'] if phy.get_name() == 'rgmii' else ['tile[0]'])
+            controller = sim_trace.SimTraceController(
+                filename,
+                start_packet=args.trace_start_packet,
+                stop_packet=args.trace_stop_packet,
+                start_time=None if args.trace_start_time_us is None else args.trace_start_time_us * us,
+                stop_time=None if args.trace_stop_time_us is None else args.trace_stop_time_us * us,
+                on_error=args.trace_on_error,
+                tiles=tiles,
+                ports=args.trace_ports)
+            return controller.sim_args()
+
         sim_args += ['--trace-to', '{0}.txt'.format(filename), '--enable-fnop-tracing']
 
         vcd_args  = '-o {0}.vcd'.format(filename)
@@ -250,7 +307,20 @@ def check_received_packet(packet, phy):
 
     move_to_next_valid_packet(phy)
 
-    if phy.expect_packet_index < phy.num_expected_packets:
+    counters = phy.frame_counters
+    if counters and phy.expect_packet_index < phy.num_expected_packets:
+        expected = phy.expected_packets[phy.expect_packet_index]
+        if packet != expected:
+            counters.frame_mismatch(phy.expect_packet_index, packet, expected)
+        else:
+            counters.frame_ok(phy.expect_packet_index)
+        phy.expect_packet_index += 1
+        move_to_next_valid_packet(phy)
+
+    elif counters:
+        counters.frame_unexpected(packet)
+
+    elif phy.expect_packet_index < phy.num_expected_packets:
         expected = phy.expected_packets[phy.expect_packet_index]
         if packet != expected:
             print(f"ERROR: packet {phy.expect_packet_index} does not match expected packet {expected}")
@@ -273,6 +343,8 @@ def check_received_packet(packet, phy):
         sys.stdout.write(packet.dump())
 
     if phy.expect_packet_index >= phy.num_expected_packets:
+        if counters:
+            print(counters.summary())
         print("Test done")
         phy.xsi.terminate()
 
@@ -34,7 +34,8 @@ int main(int argc, char *argv[])
     std::future<void> future_signal = ready_signal.get_future();
 
     // Start sender and receiver threads
-    std::thread receiver(receive_packets, eth_if, cap_file, dut_mac_bytes, std::ref(ready_signal));
+    std::string no_rtt_file = "";
+    std::thread receiver(receive_packets, eth_if, cap_file, no_rtt_file, dut_mac_bytes, false, std::ref(ready_signal));
 
     future_signal.get(); // Wait for a ready signal from receiver before starting sender
     std::cout << "Socket receiver ready to receive on interface " << std::string(argv[1]) << std::endl;
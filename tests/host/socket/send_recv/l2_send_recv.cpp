@@ -15,9 +15,9 @@
 
 int main(int argc, char *argv[])
 {
-	if(argc != 6)
+	if(argc > 7 || argc < 6)
 	{
-		std::cerr << "Usage: " << argv[0] << " <eth interface> <send_duration_s> <packet_length (max, min or random)> <host mac address> <dut mac address>\n";
+		std::cerr << "Usage: " << argv[0] << " <eth interface> <send_duration_s> <packet_length (max, min or random)> <host mac address> <dut mac address> [rtt_file]\n";
 		exit(1);
 	}
     std::string host_mac = std::string(argv[4]);
@@ -31,7 +31,11 @@ int main(int argc, char *argv[])
     std::future<void> future_signal = ready_signal.get_future();
     // Start sender and receiver threads
     std::string no_capture_file = "";
-    std::thread receiver(receive_packets, std::string(argv[1]), no_capture_file, dut_mac_bytes[0], std::ref(ready_signal));
+    std::string rtt_file = "";
+    if(argc == 7){
+        rtt_file = std::string(argv[6]);
+    }
+    std::thread receiver(receive_packets, std::string(argv[1]), no_capture_file, rtt_file, dut_mac_bytes[0], true, std::ref(ready_signal));
 
     future_signal.get(); // Wait for a ready signal from receiver before starting sender
 
@@ -17,11 +17,15 @@
 
 
 #define BUFFER_SIZE 65536
+#define RECV_POLL_MS (100) // How often to check for a stop request from the harness when no packets are arriving
+#define RECV_INACTIVITY_TIMEOUT_MS (5000) // Stop receiving after this long without any packets
 unsigned recvd_packets = 0;
 
 void receive_packets(std::string eth_intf,
                         std::string cap_file,
+                        std::string rtt_file,
                         std::vector<unsigned char> target_mac,
+                        bool seq_id_big_endian,
                         std::promise<void>& ready_signal)
 {
     int sockfd;
@@ -56,8 +60,8 @@ void receive_packets(std::string eth_intf,
     }
 
     struct timeval timeout;
-    timeout.tv_sec = 5;
-    timeout.tv_usec = 0;
+    timeout.tv_sec = 0;
+    timeout.tv_usec = RECV_POLL_MS * 1000;
     setsockopt(sockfd, SOL_SOCKET, SO_RCVTIMEO, &timeout, sizeof(timeout));
 
     // Enable timestamping
@@ -82,6 +86,22 @@ void receive_packets(std::string eth_intf,
         std::cout << "Opened file for writing! - " << cap_file << std::endl;
     }
 
+    // Open RTT file if specified. For every frame received from the target one record is written of the form
+    // <seq_id (uint32), length (uint32), send_time_ns (uint64), recv_time_ns (uint64)>, all little endian.
+    std::ofstream rtt;
+    bool log_rtt = false;
+
+    if(!rtt_file.empty()){
+        log_rtt = true;
+        rtt.open(rtt_file, std::ios::binary);
+
+        if (!rtt.is_open()) {
+            std::cerr << "Error: Could not open file for writing! - " << rtt_file << std::endl;
+            return;
+        }
+        std::cout << "Opened file for writing! - " << rtt_file << std::endl;
+    }
+
     std::cout << "[Receiver] Listening for packets on " << eth_intf << "...\n";
     auto datum = std::chrono::high_resolution_clock::now(); // get time
 
@@ -100,20 +120,37 @@ void receive_packets(std::string eth_intf,
     msg.msg_control = control;
     msg.msg_controllen = sizeof(control);
 
+    host_stats_t *stats = host_stats_get();
+    uint64_t recvd_bytes = 0;
+    uint64_t drops = 0;
+    bool seq_id_valid = false;
+    uint32_t expected_seq_id = 0;
+    unsigned idle_ms = 0;
+
     ready_signal.set_value(); // Signal ready
+    host_stats_set_state(HOST_STATS_RX_READY);
 
     // Receive packets in a loop
     while (true) {
+        if (host_stats_stop_requested()) {
+            std::cout << "Stop requested\n";
+            break;
+        }
         //int bytes_received = recvfrom(sockfd, buffer, BUFFER_SIZE, 0, nullptr, nullptr);
         int bytes_received = recvmsg(sockfd, &msg, 0);
         if (bytes_received < 0) {
 	    if (errno == EAGAIN || errno == EWOULDBLOCK) {
+                idle_ms += RECV_POLL_MS;
+                if (idle_ms < RECV_INACTIVITY_TIMEOUT_MS) {
+                    continue;
+                }
                 std::cout << "recvfrom timed out!!\n";
                 break;
             }
             std::cout << "recvfrom failed. errno " << errno << std::endl;
             break;
         }
+        idle_ms = 0;
 
         // Extract Ethernet header
         struct ethhdr *eth = (struct ethhdr *)buffer;
@@ -121,6 +158,20 @@ void receive_packets(std::string eth_intf,
         if(memcmp(eth->h_source, target_mac.data(), 6) == 0)
         {
             recvd_packets += 1;
+            recvd_bytes += bytes_received;
+            host_stats_store(&stats->rx_frames, (uint64_t)recvd_packets);
+            host_stats_store(&stats->rx_bytes, recvd_bytes);
+
+            if (bytes_received >= (int)(SEQ_ID_OFFSET + sizeof(uint32_t))) {
+                uint32_t seq_id = get_seq_id(buffer, seq_id_big_endian);
+                if (seq_id_valid && (seq_id > expected_seq_id)) {
+                    drops += (seq_id - expected_seq_id);
+                    host_stats_store(&stats->rx_drops, drops);
+                }
+                seq_id_valid = true;
+                expected_seq_id = seq_id + 1;
+                host_stats_store(&stats->rx_last_seq_id, seq_id);
+            }
         }
             // Extract timestamp
         struct cmsghdr* cmsg;
@@ -133,6 +184,21 @@ void receive_packets(std::string eth_intf,
             }
         }
 
+        if(log_rtt && (memcmp(eth->h_source, target_mac.data(), 6) == 0) &&
+           (bytes_received >= (int)(SEND_TIME_OFFSET + sizeof(uint64_t))))
+        {
+            uint32_t seq_id = get_seq_id(buffer, seq_id_big_endian);
+            uint32_t length = (uint32_t)bytes_received;
+            uint64_t send_time_ns;
+            memcpy(&send_time_ns, &buffer[SEND_TIME_OFFSET], sizeof(send_time_ns));
+            uint64_t recv_time_ns = (uint64_t)ts.tv_sec * 1000000000ULL + (uint64_t)ts.tv_nsec;
+
+            rtt.write(reinterpret_cast<const char *>(&seq_id), sizeof(seq_id));
+            rtt.write(reinterpret_cast<const char *>(&length), sizeof(length));
+            rtt.write(reinterpret_cast<const char *>(&send_time_ns), sizeof(send_time_ns));
+            rtt.write(reinterpret_cast<const char *>(&recv_time_ns), sizeof(recv_time_ns));
+        }
+
         if(capture_to_file){
             size_t packet_save_len = 6 + 6 + 2 + 4; // dst, src, etype, seq_id, len
             memcpy(&buffer[packet_save_len], &bytes_received, sizeof(bytes_received));
@@ -148,8 +214,12 @@ void receive_packets(std::string eth_intf,
         }
     }
     printf("Receieved %u packets on ethernet interface %s\n", recvd_packets, eth_intf.c_str());
+    host_stats_set_state(HOST_STATS_RX_DONE);
     if(capture_to_file){
         file.close();
     }
+    if(log_rtt){
+        rtt.close();
+    }
     close(sockfd);
 }
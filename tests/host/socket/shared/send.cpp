@@ -13,6 +13,7 @@
 #include <arpa/inet.h>
 #include <sys/ioctl.h>
 #include <atomic>
+#include <time.h>
 #include "shared.h"
 
 #define ETHER_TYPE 0x2222 // IPv4 EtherType
@@ -24,6 +25,23 @@ int get_random_int(int min, int max) {
     return dist(rng);
 }
 
+// Write the current CLOCK_REALTIME time in ns into the payload, just after the seq_id. This is the same clock
+// that SO_TIMESTAMPNS uses on receive so a looped back frame carries everything needed to compute its round trip time.
+static inline void stamp_send_time(unsigned char *pkt_ptr)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_REALTIME, &ts);
+    uint64_t send_time_ns = (uint64_t)ts.tv_sec * 1000000000ULL + (uint64_t)ts.tv_nsec;
+    memcpy(pkt_ptr + SEND_TIME_OFFSET, &send_time_ns, sizeof(send_time_ns));
+}
+
+static inline void publish_tx_stats(host_stats_t *stats, uint64_t tx_frames, uint64_t tx_bytes, unsigned seq_id)
+{
+    host_stats_store(&stats->tx_frames, tx_frames);
+    host_stats_store(&stats->tx_bytes, tx_bytes);
+    host_stats_store(&stats->tx_last_seq_id, (uint32_t)seq_id);
+}
+
 // Function to send packets
 void send_packets(std::string eth_intf,
                   std::string test_duration_s_str, /*Test duration in seconds*/
@@ -120,6 +138,10 @@ void send_packets(std::string eth_intf,
     unsigned int payload_len;
     unsigned int num_packets;
 
+    host_stats_t *stats = host_stats_get();
+    uint64_t tx_frames = 0;
+    uint64_t tx_bytes = 0;
+
     if((packet_length_str == std::string("max")) || (packet_length_str == std::string("min")))
     {
         // payload_length is fixed so num_packets can be pre-computed
@@ -146,12 +168,16 @@ void send_packets(std::string eth_intf,
                 pkt_ptr[15] = (i >> 16) & 0xff;
                 pkt_ptr[16] = (i >> 8) & 0xff;
                 pkt_ptr[17] = (i >> 0) & 0xff;
+                stamp_send_time(pkt_ptr);
                 // 5. Send the packet
                 if (sendto(sockfd, pkt_ptr, (payload_len+14), 0, (struct sockaddr*)&socket_address, sizeof(socket_address)) == -1) {
                     perror("sendto");
                     close(sockfd);
                     exit(1);
                 }
+                tx_frames += 1;
+                tx_bytes += (payload_len+14);
+                publish_tx_stats(stats, tx_frames, tx_bytes, i);
             }
         }
     }
@@ -171,17 +197,22 @@ void send_packets(std::string eth_intf,
                 pkt_ptr[15] = (num_packets >> 16) & 0xff;
                 pkt_ptr[16] = (num_packets >> 8) & 0xff;
                 pkt_ptr[17] = (num_packets >> 0) & 0xff;
+                stamp_send_time(pkt_ptr);
                 // 5. Send the packet
                 if (sendto(sockfd, pkt_ptr, (payload_len+14), 0, (struct sockaddr*)&socket_address, sizeof(socket_address)) == -1) {
                     perror("sendto");
                     close(sockfd);
                     exit(1);
                 }
+                tx_frames += 1;
+                tx_bytes += (payload_len+14);
+                publish_tx_stats(stats, tx_frames, tx_bytes, num_packets);
             }
             total_bits_sent += ((14 + payload_len + 4)*8 + 64 + 96);
             num_packets += 1;
         }
     }
     printf("Socket: Sent %u packets to ethernet interface %s\n", num_packets, eth_intf.c_str());
+    host_stats_set_state(HOST_STATS_TX_DONE);
     close(sockfd);
 }
@@ -8,6 +8,51 @@
 #include <cstdint>
 #include <future>
 
+// Offsets of the fields the host tools embed in the start of the payload of every frame they send
+#define SEQ_ID_OFFSET (14)     // 4 byte big endian sequence id
+#define SEND_TIME_OFFSET (18)  // 8 byte little endian CLOCK_REALTIME send time in ns
+
+static inline uint32_t get_seq_id(const unsigned char *pkt_ptr, bool big_endian)
+{
+    const unsigned char *p = pkt_ptr + SEQ_ID_OFFSET;
+    if(big_endian) {
+        return ((uint32_t)p[0] << 24) | ((uint32_t)p[1] << 16) | ((uint32_t)p[2] << 8) | (uint32_t)p[3];
+    }
+    return ((uint32_t)p[3] << 24) | ((uint32_t)p[2] << 16) | ((uint32_t)p[1] << 8) | (uint32_t)p[0];
+}
+
+// Live counters published by the apps. The block is shared with the test harness by memory mapping the file
+// named by the HOST_STATS_FILE_ENV environment variable (see socket_host.py for the python side).
+// Counters are only ever written by the apps and stop_request is only ever written by the harness.
+#define HOST_STATS_FILE_ENV "L2_SOCKET_STATS_FILE"
+#define HOST_STATS_MAGIC (0x5453324c) // "L2ST"
+#define HOST_STATS_VERSION (1)
+
+#define HOST_STATS_TX_DONE (1 << 0)
+#define HOST_STATS_RX_READY (1 << 1)
+#define HOST_STATS_RX_DONE (1 << 2)
+
+typedef struct {
+    uint32_t magic;
+    uint32_t version;
+    uint64_t tx_frames;
+    uint64_t tx_bytes;
+    uint64_t rx_frames;      // Frames received from the target mac address
+    uint64_t rx_bytes;
+    uint64_t rx_drops;       // Gaps in the seq_id of frames received from the target
+    uint32_t tx_last_seq_id;
+    uint32_t rx_last_seq_id;
+    uint32_t state;          // HOST_STATS_* flags
+    uint32_t stop_request;   // Set non-zero by the harness to stop the receiver early
+} host_stats_t;
+
+host_stats_t *host_stats_get(void);
+
+static inline void host_stats_store(uint64_t *counter, uint64_t value) { __atomic_store_n(counter, value, __ATOMIC_RELAXED); }
+static inline void host_stats_store(uint32_t *counter, uint32_t value) { __atomic_store_n(counter, value, __ATOMIC_RELAXED); }
+static inline void host_stats_set_state(uint32_t flag) { __atomic_fetch_or(&host_stats_get()->state, flag, __ATOMIC_RELEASE); }
+static inline bool host_stats_stop_requested(void) { return __atomic_load_n(&host_stats_get()->stop_request, __ATOMIC_ACQUIRE) != 0; }
+
 void send_packets(std::string eth_intf,
                   std::string test_duration_s_str, /*Test duration in seconds*/
                   std::string packet_length_str, /* send packet length (max, min or random)*/
@@ -15,7 +60,9 @@ void send_packets(std::string eth_intf,
 
 void receive_packets(std::string eth_intf,
                         std::string cap_file,
+                        std::string rtt_file,
                         std::vector<unsigned char> target_mac,
+                        bool seq_id_big_endian, /* true for frames generated by send_packets() and looped back, false for frames generated by the DUT */
                         std::promise<void>& ready_signal);
 
 std::vector<unsigned char> parse_mac_address(const std::string mac);
@@ -0,0 +1,47 @@
+// Copyright 2025 XMOS LIMITED.
+// This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#include <iostream>
+#include <cstdlib>
+#include <cstring>
+#include <unistd.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include "shared.h"
+
+// Get the live counters block. If HOST_STATS_FILE_ENV names a file then the block is memory mapped from it
+// so that the test harness can poll the counters while the app is running. Otherwise a private block is
+// used so the callers don't need to check whether stats are enabled.
+host_stats_t *host_stats_get(void)
+{
+    static host_stats_t *stats = []() {
+        static host_stats_t local_stats;
+        host_stats_t *s = &local_stats;
+
+        const char *stats_file = std::getenv(HOST_STATS_FILE_ENV);
+        if(stats_file && stats_file[0])
+        {
+            int fd = open(stats_file, O_RDWR | O_CREAT, 0644);
+            if(fd < 0) {
+                perror("Opening stats file failed");
+                exit(1);
+            }
+            if(ftruncate(fd, sizeof(host_stats_t)) < 0) {
+                perror("Sizing stats file failed");
+                exit(1);
+            }
+            void *p = mmap(nullptr, sizeof(host_stats_t), PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+            close(fd);
+            if(p == MAP_FAILED) {
+                perror("Mapping stats file failed");
+                exit(1);
+            }
+            s = (host_stats_t *)p;
+            std::cout << "Publishing live counters to " << stats_file << std::endl;
+        }
+        memset((void *)s, 0, sizeof(host_stats_t));
+        s->version = HOST_STATS_VERSION;
+        __atomic_store_n(&s->magic, HOST_STATS_MAGIC, __ATOMIC_RELEASE); // Written last so readers know the block is valid
+        return s;
+    }();
+    return stats;
+}
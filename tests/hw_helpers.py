@@ -28,9 +28,11 @@ import Pyxsim as px
 import inspect
 from pcapng import FileScanner # I found a bug in rdpcap in scapy 2.6.1. This seems more robust: python-pcapng==2.1.1
 import shutil
+import numpy as np
+from wire_timing import PACKET_OVERHEAD_BYTES
 
 # Constants used in the tests
-packet_overhead = 8 + 4 + 12 # preamble, CRC and IFG
+packet_overhead = PACKET_OVERHEAD_BYTES # preamble, CRC and IFG
 line_speed = 100e6
 
 
@@ -676,6 +678,65 @@ def load_packet_file(filename):
 
     return structures
 
+# Record written by the socket_send_recv app for every frame received back from the DUT
+rtt_record_dtype = np.dtype([("seq_id", "<u4"), ("length", "<u4"), ("send_time_ns", "<u8"), ("recv_time_ns", "<u8")])
+
+def load_rtt_file(filename):
+    """
+    Load the round trip time file written by SocketHost.send_recv() when called with an rtt_file.
+
+    Returns:
+    numpy structured array with fields seq_id, length, send_time_ns and recv_time_ns, one entry per frame received, in order of arrival
+    """
+    return np.fromfile(filename, dtype=rtt_record_dtype)
+
+def analyse_rtt(records, num_packets_sent, percentiles=(50, 90, 99, 99.9)):
+    """
+    Summarise the per frame round trip times loaded with load_rtt_file().
+
+    Frames are matched by seq_id. Duplicates are only counted once for the latency statistics and a frame is
+    counted as reordered when it arrives after a frame with a higher seq_id.
+
+    Parameters:
+    records (numpy structured array): RTT records as returned by load_rtt_file()
+    num_packets_sent (int): Number of packets the host sent, as returned by SocketHost.send_recv()
+    percentiles (tuple of float): RTT percentiles to report
+
+    Returns:
+    dict: RTT statistics in microseconds along with loss, duplicate and reorder counts
+    """
+    seq_ids = records["seq_id"].astype(np.int64)
+    rtt_ns = records["recv_time_ns"].astype(np.int64) - records["send_time_ns"].astype(np.int64)
+
+    # Use the first arrival of each seq_id, ignoring anything the host never sent
+    unique_seq_ids, first_idx = np.unique(seq_ids, return_index=True)
+    valid = unique_seq_ids < num_packets_sent
+    first_idx = np.sort(first_idx[valid])
+    num_unique = len(first_idx)
+
+    summary = {
+        "sent": num_packets_sent,
+        "received": len(records),
+        "lost": num_packets_sent - num_unique,
+        "duplicates": len(records) - len(unique_seq_ids),
+        "reordered": int(np.count_nonzero(seq_ids[1:] < np.maximum.accumulate(seq_ids)[:-1])) if len(seq_ids) else 0,
+    }
+
+    if num_unique == 0:
+        return summary
+
+    rtt_us = rtt_ns[first_idx] / 1e3
+    summary["rtt_min_us"] = float(rtt_us.min())
+    summary["rtt_max_us"] = float(rtt_us.max())
+    summary["rtt_mean_us"] = float(rtt_us.mean())
+    for p, v in zip(percentiles, np.percentile(rtt_us, percentiles)):
+        summary[f"rtt_p{p}_us"] = float(v)
+    # Jitter as the standard deviation and as the mean change in RTT between consecutive frames (RFC 3550 style)
+    summary["rtt_std_us"] = float(rtt_us.std())
+    summary["jitter_us"] = float(np.abs(np.diff(rtt_us)).mean()) if num_unique > 1 else 0.0
+
+    return summary
+
 def rdpcap_to_packet_summary(packets):
     """
     Parse the .pcapng file captured by the ethernet debugger into the packet summary same as load_packet_file()
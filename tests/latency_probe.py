@@ -0,0 +1,116 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Frame latency through the DUT, from the TX PHY to the RX PHY
+
+The frames are tagged with a sequence number in their payload. The TX PHY records the sim time at which it sends
+the SFD of each tagged frame, and the RX PHY the time at which it receives the SFD of each tagged frame coming
+back from the DUT, so any loopback or forwarding app can be measured:
+
+    probe = LatencyProbe()
+    probe.tag_packets(packets)
+    probe.attach(tx_phy, rx_phy)
+    ... run the simulation ...
+    probe.report()
+"""
+
+import sys
+
+import numpy as np
+
+SIM_TICKS_PER_NS = 10**6 # xsim uses femtoseconds
+
+# Payload bytes of a tagged frame: 2 bytes of magic and a 4 byte big endian sequence number
+TAG_MAGIC = [0x4c, 0x50]
+TAG_BYTES = len(TAG_MAGIC) + 4
+
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyProbe():
+    """ Matches frames sent and received by the PHYs on their sequence tags
+
+        Parameters:
+        tag_offset (int): Offset of the tag in the payload, after the MAC addresses, any VLAN tag and the
+            length/type
+    """
+
+    def __init__(self, tag_offset=0):
+        self._tag_offset = tag_offset
+        self.tx_times = {}      # sequence number -> sim time of the SFD sent
+        self.rx_times = {}      # sequence number -> sim time of the first SFD received
+        self.num_duplicates = 0
+        self.num_untagged = 0
+
+    def tag_packets(self, packets, first_seq=0):
+        """ Write sequence tags into the payloads of the packets, numbering them from first_seq """
+        for seq, packet in enumerate(packets, first_seq):
+            assert packet.num_data_bytes >= self._tag_offset + TAG_BYTES, \
+                f"Packet {seq} payload too short for a latency tag"
+            packet.data_bytes[self._tag_offset:self._tag_offset + TAG_BYTES] = TAG_MAGIC + list(seq.to_bytes(4, "big"))
+        return packets
+
+    def attach(self, tx_phy, rx_phy):
+        tx_phy.latency_probe = self
+        rx_phy.latency_probe = self
+
+    def read_tag(self, packet):
+        """ The sequence number of a tagged packet, None if it isn't tagged """
+        tag = packet.data_bytes[self._tag_offset:self._tag_offset + TAG_BYTES]
+        if len(tag) < TAG_BYTES or tag[:len(TAG_MAGIC)] != TAG_MAGIC:
+            return None
+        return int.from_bytes(bytes(tag[len(TAG_MAGIC):]), "big")
+
+    def tx_sfd(self, packet, time):
+        """ Called by the TX PHYs as the SFD of a packet is sent """
+        seq = self.read_tag(packet)
+        if seq is not None:
+            self.tx_times[seq] = time
+
+    def rx_sfd(self, packet, time):
+        """ Called by the RX PHYs once a packet has been received, with the time of its SFD """
+        seq = self.read_tag(packet)
+        if seq is None or seq not in self.tx_times:
+            self.num_untagged += 1
+        elif seq in self.rx_times:
+            self.num_duplicates += 1
+        else:
+            self.rx_times[seq] = time
+
+    def latencies(self):
+        """ (sequence numbers, latencies in femtoseconds) of the frames received, in sequence order """
+        seqs = np.array(sorted(self.rx_times), dtype=np.int64)
+        latencies = np.array([self.rx_times[s] - self.tx_times[s] for s in seqs], dtype=np.float64)
+        return seqs, latencies
+
+    def lost(self):
+        return sorted(set(self.tx_times) - set(self.rx_times))
+
+    def stats(self, percentiles=DEFAULT_PERCENTILES):
+        """ Latency statistics in nanoseconds.
+
+            jitter is the standard deviation of the latency, pdv the mean difference in latency between
+            consecutive frames (as RFC 3550 interarrival jitter, without the smoothing).
+        """
+        seqs, latencies = self.latencies()
+        latencies = latencies / SIM_TICKS_PER_NS
+        result = {"sent": len(self.tx_times), "received": len(seqs), "lost": len(self.lost()),
+                  "duplicates": self.num_duplicates, "untagged": self.num_untagged}
+        if len(latencies):
+            result.update(min=latencies.min(), max=latencies.max(), mean=latencies.mean(),
+                          jitter=latencies.std(),
+                          pdv=np.abs(np.diff(latencies)).mean() if len(latencies) > 1 else 0.0)
+            for p, value in zip(percentiles, np.percentile(latencies, percentiles)):
+                result[f"p{p}"] = value
+        return result
+
+    def report(self, out=sys.stdout, percentiles=DEFAULT_PERCENTILES):
+        stats = self.stats(percentiles)
+        out.write(f"Latency: {stats['received']}/{stats['sent']} frames received, {stats['lost']} lost, "
+                  f"{stats['duplicates']} duplicates, {stats['untagged']} untagged\n")
+        if stats["received"]:
+            out.write(f"  min {stats['min']:.1f} ns, mean {stats['mean']:.1f} ns, max {stats['max']:.1f} ns, "
+                      f"jitter {stats['jitter']:.1f} ns, pdv {stats['pdv']:.1f} ns\n")
+            out.write("  " + ", ".join(f"p{p} {stats[f'p{p}']:.1f} ns" for p in percentiles) + "\n")
+        return stats
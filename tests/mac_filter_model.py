@@ -0,0 +1,276 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Reference model of the receive filtering of the MAC, for working out which client should receive each frame
+of a generated stream instead of keeping a hand written expect file.
+
+It follows lib_ethernet/src:
+  - mii_filter.xc drops runt, oversized and bad CRC frames and frames whose length field is longer than the
+    payload, then looks the destination MAC address up in the filter table (macaddr_filter.xc).
+  - The table result has a bit per client and the HP flag in bit 31. HP frames go to the HP client if bit 0 is
+    set, and are never offered to the LP clients; the others are offered to each LP client whose bit is set.
+  - An LP client with ethertype filters only takes frames with one of its ethertypes, read from after any VLAN
+    tag. The standard MAC only filters ethertypes, so it passes frames with a length field to every client.
+  - An LP client of the RT MAC with VLAN stripping enabled gets tagged frames without the 4 byte tag.
+
+The model assumes that the clients keep up, so the frames dropped because a client queue
+(ETHERNET_RX_CLIENT_QUEUE_SIZE) or the packet buffers are full are not modelled.
+
+    model = MacFilterModel(num_lp_clients=2)
+    model.add_macaddr_filter(0, False, dut_mac_address)
+    model.add_ethertype_filter(0, 0x1111)
+    expected = model.expected_deliveries(packets)
+    expected.write_expect(filename, "{client}: Received packet, type=0, len={len}, buf[15]={buf[15]:#x}.")
+"""
+
+# Values from lib_ethernet/api/ethernet.h, lib_ethernet/src/default_ethernet_conf.h and macaddr_filter.h
+ETHERNET_MAX_PACKET_SIZE = 1518
+ETHERNET_MIN_PACKET_SIZE = 60
+ETHERNET_MAX_ETHERTYPE_FILTERS = 2
+ETHERNET_MACADDR_FILTER_TABLE_SIZE = 30
+
+(ETHERNET_MACADDR_FILTER_SUCCESS, ETHERNET_MACADDR_FILTER_TABLE_FULL) = (0, 1)
+
+HP_RESULT_BIT = 1 << 31
+VLAN_TPID = 0x8100
+VLAN_TAG_BYTES = 4
+MIN_ETHERTYPE = 1536
+
+
+def filter_result_is_hp(result):
+    return bool(result & HP_RESULT_BIT)
+
+
+def filter_result_interfaces(result):
+    return result & ~HP_RESULT_BIT
+
+
+class FilterEntry():
+    __slots__ = ("addr", "result", "appdata")
+
+    def __init__(self):
+        self.addr = None
+        self.result = 0
+        self.appdata = 0
+
+
+class RxClient():
+    """ The receive configuration of one LP client """
+
+    def __init__(self):
+        self.etype_filters = []
+        self.strip_vlan_tags = False
+
+
+class Delivery():
+    """ A frame as a client receives it
+
+        index is the position of the frame in the stream, packet the frame sent, data the bytes the client gets
+        (the frame without CRC, and without the VLAN tag if stripped) and filter_data the appdata of the table
+        entry matched.
+    """
+
+    __slots__ = ("index", "packet", "data", "filter_data")
+
+    def __init__(self, index, packet, data, filter_data):
+        self.index = index
+        self.packet = packet
+        self.data = data
+        self.filter_data = filter_data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"Delivery({self.index}, len={len(self.data)})"
+
+
+class ExpectedDeliveries():
+    """ The frames each client is expected to receive, in order. lp[i] is for LP client i and hp for the HP
+        client. dropped holds the indices of the frames the MAC drops, and unclaimed those of the frames no
+        client wants.
+    """
+
+    def __init__(self, num_lp_clients):
+        self.lp = [[] for _ in range(num_lp_clients)]
+        self.hp = []
+        self.dropped = []
+        self.unclaimed = []
+
+    def lines(self, fmt, hp_fmt=None):
+        """ A line for each delivery, LP clients in turn then the HP client. The fields available to fmt are
+            client (the LP client number, counted from 1 as the test applications print them), index, len,
+            buf (the bytes received) and filter_data. HP deliveries are only listed if hp_fmt is given.
+        """
+        lines = []
+        for client, deliveries in enumerate(self.lp):
+            lines += [self._format(fmt, client + 1, d) for d in deliveries]
+        if hp_fmt is not None:
+            lines += [self._format(hp_fmt, 0, d) for d in self.hp]
+        return lines
+
+    def write_expect(self, filename, fmt, hp_fmt=None):
+        """ Writes an expect file of lines(), for an unordered ComparisonTester """
+        with open(filename, 'w') as f:
+            for line in self.lines(fmt, hp_fmt):
+                f.write(line + "\n")
+
+    def num_bytes(self, client=None):
+        """ Bytes received by LP client, or by the HP client if client is None """
+        deliveries = self.hp if client is None else self.lp[client]
+        return sum(len(d) for d in deliveries)
+
+    def summary(self):
+        text = ""
+        for client, deliveries in enumerate(self.lp):
+            text += f"LP client {client}: {len(deliveries)} frames, {self.num_bytes(client)} bytes\n"
+        text += f"HP client: {len(self.hp)} frames, {self.num_bytes()} bytes\n"
+        text += f"Dropped: {len(self.dropped)}, unclaimed: {len(self.unclaimed)}"
+        return text
+
+    @staticmethod
+    def _format(fmt, client, delivery):
+        return fmt.format(client=client, index=delivery.index, len=len(delivery.data), buf=delivery.data,
+                          filter_data=delivery.filter_data)
+
+
+class MacFilterModel():
+    """ The filter table and client configuration of a MAC
+
+        The configuration methods take the same arguments as the ethernet_cfg_if calls they model, with MAC
+        addresses as lists of bytes. Misconfigurations that the MAC asserts on raise an AssertionError.
+
+        Parameters:
+        num_lp_clients (int): Number of LP receive clients
+        mac (str): "rt" or "standard". The standard MAC has no HP queue and does not strip VLAN tags
+        max_ethertype_filters (int): ETHERNET_MAX_ETHERTYPE_FILTERS the application is built with
+        table_size (int): Entries in the filter table
+        check_crc (bool): Whether the MAC drops frames with a bad CRC (ETHERNET_RX_CRC_ERROR_CHECK)
+    """
+
+    def __init__(self, num_lp_clients, mac="rt", max_ethertype_filters=ETHERNET_MAX_ETHERTYPE_FILTERS,
+                 table_size=ETHERNET_MACADDR_FILTER_TABLE_SIZE, check_crc=True):
+        assert mac in ("rt", "standard"), f"Unknown MAC {mac}"
+        self.mac = mac
+        self.max_ethertype_filters = max_ethertype_filters
+        self.check_crc = check_crc
+        self.table = [FilterEntry() for _ in range(table_size)]
+        self.clients = [RxClient() for _ in range(num_lp_clients)]
+
+    def add_macaddr_filter(self, client_num, is_hp, addr, appdata=0):
+        assert not (is_hp and self.mac == "standard"), "The standard MAC has no HP client"
+        for entry in self.table:
+            if entry.result and entry.addr == list(addr):
+                assert filter_result_is_hp(entry.result) == bool(is_hp), \
+                    "Clients of different priorities cannot filter the same MAC address"
+                entry.result |= 1 << client_num
+                return ETHERNET_MACADDR_FILTER_SUCCESS
+
+        for entry in self.table:
+            if not entry.result:
+                entry.addr = list(addr)
+                entry.appdata = appdata
+                entry.result = (1 << client_num) | (HP_RESULT_BIT if is_hp else 0)
+                return ETHERNET_MACADDR_FILTER_SUCCESS
+
+        return ETHERNET_MACADDR_FILTER_TABLE_FULL
+
+    def del_macaddr_filter(self, client_num, is_hp, addr):
+        for entry in self.table:
+            if not entry.result or entry.addr != list(addr) or filter_result_is_hp(entry.result) != bool(is_hp):
+                continue
+            entry.result &= ~(1 << client_num)
+            if is_hp and not filter_result_interfaces(entry.result):
+                entry.result = 0
+
+    def del_all_macaddr_filters(self, client_num, is_hp):
+        for entry in self.table:
+            entry.result &= ~(1 << client_num)
+            if is_hp and not filter_result_interfaces(entry.result):
+                entry.result = 0
+
+    def add_ethertype_filter(self, client_num, ethertype):
+        client = self.clients[client_num]
+        assert len(client.etype_filters) < self.max_ethertype_filters, \
+            f"Client {client_num} already has {self.max_ethertype_filters} ethertype filters"
+        client.etype_filters.append(ethertype)
+
+    def del_ethertype_filter(self, client_num, ethertype):
+        client = self.clients[client_num]
+        client.etype_filters = [e for e in client.etype_filters if e != ethertype]
+
+    def enable_strip_vlan_tag(self, client_num):
+        assert self.mac == "rt", "VLAN tag stripping not supported in standard MII Ethernet MAC"
+        self.clients[client_num].strip_vlan_tags = True
+
+    def disable_strip_vlan_tag(self, client_num):
+        self.clients[client_num].strip_vlan_tags = False
+
+    def is_dropped(self, packet, frame):
+        """ Whether the MAC discards the frame before filtering it """
+        if getattr(packet, "dropped", False):
+            return True
+        if self.check_crc and (getattr(packet, "corrupt_crc", False) or getattr(packet, "error_nibbles", None)):
+            return True
+        if len(frame) < ETHERNET_MIN_PACKET_SIZE or len(frame) > ETHERNET_MAX_PACKET_SIZE:
+            return True
+        (len_type, header_len) = (frame[12] << 8 | frame[13], 14)
+        if len_type == VLAN_TPID:
+            (len_type, header_len) = (frame[16] << 8 | frame[17], 18)
+        return len_type < MIN_ETHERTYPE and len_type > len(frame) - header_len
+
+    def lookup(self, frame):
+        """ (result, appdata) of the filter table for the frame. As in ethernet_do_filtering the last matching
+            entry wins.
+        """
+        (result, appdata) = (0, 0)
+        dst = list(frame[:6])
+        for entry in self.table:
+            if entry.result and entry.addr == dst:
+                (result, appdata) = (entry.result, entry.appdata)
+        return result, appdata
+
+    def _client_wants(self, client, frame):
+        if not client.etype_filters:
+            return True
+        etype = frame[12] << 8 | frame[13]
+        if etype == VLAN_TPID:
+            etype = frame[16] << 8 | frame[17]
+        if self.mac == "standard" and etype < MIN_ETHERTYPE:
+            return True
+        return etype in client.etype_filters
+
+    def deliver(self, index, packet, expected):
+        """ Adds where the frame goes to expected """
+        frame = packet.get_packet_bytes()
+        if self.is_dropped(packet, frame):
+            expected.dropped.append(index)
+            return
+
+        (result, appdata) = self.lookup(frame)
+        claimed = False
+        if filter_result_is_hp(result):
+            # handle_incoming_hp_packets only sends an HP frame to the HP client if bit 0 of the result is set
+            if result & 1:
+                expected.hp.append(Delivery(index, packet, list(frame), appdata))
+                claimed = True
+        elif result:
+            tagged = (frame[12] << 8 | frame[13]) == VLAN_TPID
+            for i, client in enumerate(self.clients):
+                if not (result >> i) & 1 or not self._client_wants(client, frame):
+                    continue
+                data = list(frame)
+                if tagged and client.strip_vlan_tags:
+                    del data[12:12 + VLAN_TAG_BYTES]
+                expected.lp[i].append(Delivery(index, packet, data, appdata))
+                claimed = True
+        if not claimed:
+            expected.unclaimed.append(index)
+
+    def expected_deliveries(self, packets):
+        """ What each client should receive from the stream of packets """
+        expected = ExpectedDeliveries(len(self.clients))
+        for index, packet in enumerate(packets):
+            self.deliver(index, packet, expected)
+        return expected
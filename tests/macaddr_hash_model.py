@@ -0,0 +1,435 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Bit-exact Python model of the MAC address hash filter in lib_ethernet/src/macaddr_filter_hash.c
+
+Reproduces hash() using the xcore crc32 instruction, insert() with its cuckoo style relocation between the two
+hash functions, the polynomial changes in refill_backup_table() and the table swaps, including the quirks of the
+C code (for example a failed refill attempt is not cleared before retrying with new polynomials).
+
+simulate_capacity() inserts batches of random or real MAC addresses and reports how full the table gets before
+an insert needs the polynomials changing, and where it fails altogether. On hardware a failure is an endless
+refill loop, so the model gives up after max_refills.
+
+Run directly for a capacity report:
+    python macaddr_hash_model.py --trials 100 --multicast 0.5
+"""
+
+import argparse
+import numpy as np
+
+MII_MACADDR_HASH_TABLE_SIZE = 256
+DEFAULT_POLYS = (0xedb88320, 0xba75fe21)
+
+# Constants of the generator used to pick new polynomials in refill_backup_table()
+POLY_LCG_A = 1664525
+POLY_LCG_C = 1013904223
+
+
+class MacaddrHashTableFull(Exception):
+    pass
+
+
+def xcore_crc32(checksum, data, poly):
+    """ Model of the crc32 instruction. Works on ints or numpy uint64 arrays.
+    """
+    for i in range(32):
+        lsb = checksum & 1
+        checksum = (checksum >> 1) | (((data >> i) & 1) << 31)
+        checksum ^= poly * lsb
+    return checksum
+
+
+_crc_tables = {}
+
+
+def _crc32_bytewise(checksum, data, poly):
+    """ Same result as xcore_crc32() for ints, a byte at a time
+    """
+    table = _crc_tables.get(poly)
+    if table is None:
+        table = [_crc8_steps(i, poly) for i in range(256)]
+        _crc_tables[poly] = table
+    for _ in range(4):
+        checksum = ((checksum >> 8) | ((data & 0xff) << 24)) ^ table[checksum & 0xff]
+        data >>= 8
+    return checksum
+
+
+def _crc8_steps(value, poly):
+    for _ in range(8):
+        lsb = value & 1
+        value = (value >> 1) ^ (poly * lsb)
+    return value
+
+
+def macaddr_hash(key0, key1, poly, table_size=MII_MACADDR_HASH_TABLE_SIZE):
+    """ Model of hash(). Works on ints or numpy uint64 arrays.
+    """
+    crc32 = _crc32_bytewise if isinstance(key0, int) else xcore_crc32
+    x = crc32(key0, key1, poly)
+    x = crc32(x, 0, poly)
+    return x & (table_size - 1)
+
+
+def mac_to_bytes(mac):
+    return [int(b, 16) for b in mac.replace("-", ":").split(":")]
+
+
+def mac_to_keys(mac):
+    """ Model of entry_to_keys(). mac is a string such as "01:02:03:04:05:06" or a sequence of 6 bytes
+    """
+    if isinstance(mac, str):
+        mac = mac_to_bytes(mac)
+    key0 = mac[0] | mac[1] << 8 | mac[2] << 16 | mac[3] << 24
+    key1 = mac[4] | mac[5] << 8
+    return key0, key1
+
+
+def macs_to_keys(macs):
+    """ Vectorised mac_to_keys() for an (n, 6) array of address bytes
+    """
+    macs = np.asarray(macs, dtype=np.uint64).reshape(-1, 6)
+    key0 = macs[:, 0] | macs[:, 1] << 8 | macs[:, 2] << 16 | macs[:, 3] << 24
+    key1 = macs[:, 4] | macs[:, 5] << 8
+    return key0, key1
+
+
+def random_macs(num_macs, rng, multicast_fraction=0.0):
+    """ Returns an (n, 6) array of distinct random addresses with the multicast bit set on the given fraction
+    """
+    macs = np.empty((0, 6), dtype=np.uint8)
+    while len(macs) < num_macs:
+        new = rng.integers(0, 256, size=(num_macs, 6), dtype=np.uint8)
+        multicast = rng.random(num_macs) < multicast_fraction
+        new[:, 0] = np.where(multicast, new[:, 0] | 1, new[:, 0] & 0xfe)
+        macs = np.unique(np.concatenate((macs, new)), axis=0)
+    macs = macs[np.any(macs != 0, axis=1)] # The all zero address is never stored
+    return rng.permutation(macs)[:num_macs]
+
+
+def ethernet_filter_result_set_hp(value, is_hp):
+    return value | ((1 if is_hp else 0) << 31)
+
+
+def ethernet_filter_result_is_hp(value):
+    return 1 if value >> 31 else 0
+
+
+def ethernet_filter_result_interfaces(value):
+    return value & 0x7fffffff
+
+
+class MacaddrHashTable():
+    """ Model of mii_macaddr_hash_table_t. Each entry is [id0, id1, result, appdata]
+    """
+
+    def __init__(self, table_size=MII_MACADDR_HASH_TABLE_SIZE, polys=DEFAULT_POLYS):
+        self.table_size = table_size
+        self.default_polys = polys
+        self.clear()
+
+    def clear(self):
+        self.num_entries = 0
+        self.entries = [[0, 0, 0, 0] for _ in range(self.table_size)]
+        self.polys = list(self.default_polys)
+
+    def copy_from(self, other):
+        self.num_entries = other.num_entries
+        self.entries = [list(entry) for entry in other.entries]
+        self.polys = list(other.polys)
+
+    def hash(self, key0, key1, hashtype):
+        return macaddr_hash(key0, key1, self.polys[hashtype], self.table_size)
+
+    def fill_level(self):
+        return sum(1 for entry in self.entries if entry[0] or entry[1])
+
+
+class MacaddrHashFilter():
+    """ Model of the pair of tables and the operations on them in macaddr_filter_hash.c
+
+        Parameters:
+        table_size (int): MII_MACADDR_HASH_TABLE_SIZE
+        polys (tuple): Initial polynomials, as set by clear_table()
+        max_refills (int): Number of polynomial changes one add_entry() may make before giving up.
+            The C code loops forever.
+    """
+
+    def __init__(self, table_size=MII_MACADDR_HASH_TABLE_SIZE, polys=DEFAULT_POLYS, max_refills=1000):
+        self.hash_table = MacaddrHashTable(table_size, polys)
+        self.backup_table = MacaddrHashTable(table_size, polys)
+        self.max_refills = max_refills
+
+        # Statistics of the most recent add_entry(): probes inserting the new entry, probes re-inserting the
+        # existing entries in refills, probes of the insert that brings the other table into step, and refills
+        self.last_probes = 0
+        self.last_refill_probes = 0
+        self.last_sync_probes = 0
+        self.last_refills = 0
+
+    def lookup(self, mac):
+        """ Model of mii_macaddr_hash_lookup() on the table in use by the filter threads
+
+            Returns (result, appdata)
+        """
+        key0, key1 = mac_to_keys(mac)
+        if key0 == 0 and key1 == 0:
+            return 0, 0
+
+        table = self.hash_table
+        x = table.hash(key0, key1, 0)
+        y = table.hash(key0, key1, 1)
+        for index in (y, x):
+            entry = table.entries[index]
+            if entry[0] == key0 and entry[1] == key1:
+                return entry[2], entry[3]
+        return 0, 0
+
+    def _contains_different_entry(self, index, key):
+        entry = self.backup_table.entries[index]
+        empty = entry[0] == 0 and entry[1] == 0
+        different = entry[0] != key[0] or entry[1] != key[1]
+        return (not empty and different), empty
+
+    def _insert(self, key0, key1, result, set_not_or, appdata):
+        """ Model of insert() into the backup table. Returns (success, probes) """
+        table = self.backup_table
+        count = 0
+        conflict = False
+        hashtype = 0
+
+        current = [key0, key1, result, appdata]
+        while True:
+            index = table.hash(current[0], current[1], hashtype)
+
+            different, empty = self._contains_different_entry(index, current)
+            if not different:
+                entry = table.entries[index]
+                entry[0] = current[0]
+                entry[1] = current[1]
+                if set_not_or or empty:
+                    entry[2] = current[2]
+                else:
+                    entry[2] |= current[2]
+                entry[3] = current[3]
+                conflict = False
+            else:
+                conflict = True
+                if count == 0:
+                    hashtype = 1 - hashtype
+                else:
+                    tmp = list(table.entries[index])
+                    table.entries[index] = list(current)
+                    set_not_or = 1
+                    current = tmp
+                    hashtype = 1 - hashtype
+
+            count += 1
+            if not (conflict and count < table.num_entries + 10):
+                break
+
+        if not conflict:
+            table.num_entries += 1
+        return not conflict, count
+
+    def _refill_backup_table(self):
+        backup = self.backup_table
+        backup.num_entries = 0
+        for entry in backup.entries:
+            entry[0] = 0
+            entry[1] = 0
+
+        success = False
+        while not success:
+            if self.last_refills >= self.max_refills:
+                raise MacaddrHashTableFull(f"No polynomials found after {self.last_refills} attempts")
+            self.last_refills += 1
+            backup.polys = [(POLY_LCG_A * p + POLY_LCG_C) & 0xffffffff for p in backup.polys]
+            success = True
+            for entry in self.hash_table.entries:
+                if entry[0] != 0 or entry[1] != 0:
+                    success, count = self._insert(entry[0], entry[1], entry[2], 1, entry[3])
+                    self.last_refill_probes += count
+                    if not success:
+                        break
+
+    def _swap_tables(self, do_memcpy):
+        self.hash_table, self.backup_table = self.backup_table, self.hash_table
+        if do_memcpy:
+            self.backup_table.copy_from(self.hash_table)
+
+    def add_entry(self, client_num, is_hp, mac, appdata=0):
+        """ Model of mii_macaddr_hash_table_add_entry()
+
+            Returns the number of probes made inserting the new entry, not counting the re-inserts of any refills
+            (last_refill_probes) or the insert into the other table (last_sync_probes). Raises MacaddrHashTableFull if no polynomials can be found
+            within max_refills, which on hardware would never return.
+        """
+        key0, key1 = mac_to_keys(mac)
+        result = ethernet_filter_result_set_hp(1 << client_num, is_hp)
+        self.last_probes = 0
+        self.last_refill_probes = 0
+        self.last_sync_probes = 0
+        self.last_refills = 0
+
+        success = False
+        do_memcpy = False
+        while not success:
+            success, count = self._insert(key0, key1, result, 0, appdata)
+            self.last_probes += count
+            if success:
+                self._swap_tables(do_memcpy)
+            else:
+                self._refill_backup_table()
+                do_memcpy = True
+
+        if not do_memcpy:
+            self.last_sync_probes = self._insert(key0, key1, result, 0, appdata)[1]
+
+        return self.last_probes
+
+    def _delete_entry(self, client_num, is_hp, key0, key1):
+        if key0 == 0 and key1 == 0:
+            return False
+
+        backup = self.backup_table
+        x = backup.hash(key0, key1, 0)
+        if key0 != backup.entries[x][0] or key1 != backup.entries[x][1]:
+            x = self.hash_table.hash(key0, key1, 1) # As in the C code, uses the other table's polynomial
+        entry = backup.entries[x]
+        if key0 != entry[0] or key1 != entry[1]:
+            return False
+
+        result = entry[2]
+        if ethernet_filter_result_is_hp(result) != is_hp:
+            return False
+        result &= ~(1 << client_num)
+        if is_hp and ethernet_filter_result_interfaces(result) == 0:
+            result = 0
+        entry[2] = result
+        return True
+
+    def delete_entry(self, client_num, is_hp, mac):
+        """ Model of mii_macaddr_hash_table_delete_entry()
+        """
+        key0, key1 = mac_to_keys(mac)
+        if self._delete_entry(client_num, is_hp, key0, key1):
+            self._swap_tables(False)
+            self._delete_entry(client_num, is_hp, key0, key1)
+
+    def clear(self):
+        """ Model of mii_macaddr_hash_table_clear()
+        """
+        self.backup_table.clear()
+        self._swap_tables(False)
+        self.backup_table.clear()
+
+
+def count_collisions(macs, polys=DEFAULT_POLYS, table_size=MII_MACADDR_HASH_TABLE_SIZE):
+    """ Vectorised comparison of polynomials: returns, for each hash function, the number of addresses that
+        share a bucket with an earlier address
+    """
+    key0, key1 = macs_to_keys(macs)
+    collisions = []
+    for poly in polys:
+        buckets = macaddr_hash(key0, key1, np.uint64(poly), table_size)
+        collisions.append(len(buckets) - len(np.unique(buckets)))
+    return collisions
+
+
+def simulate_capacity(macs, table_size=MII_MACADDR_HASH_TABLE_SIZE, polys=DEFAULT_POLYS, max_refills=1000):
+    """ Add the addresses in order to an empty filter until one fails
+
+        Returns a dict of numpy arrays, one element per successful insert:
+            probes: probes inserting the address
+            refill_probes: probes re-inserting the existing addresses in refills
+            sync_probes: probes inserting the address into the other table
+            refills: number of times the polynomials had to be changed
+            fill: number of occupied buckets in the table afterwards
+        and
+            failed_at: number of addresses added before the first failure, or None
+            polys: polynomials in use at the end
+    """
+    model = MacaddrHashFilter(table_size, polys, max_refills)
+    probes = []
+    refill_probes = []
+    sync_probes = []
+    refills = []
+    fill = []
+    failed_at = None
+    for i, mac in enumerate(macs):
+        try:
+            probes.append(model.add_entry(0, False, list(int(b) for b in mac)))
+        except MacaddrHashTableFull:
+            failed_at = i
+            break
+        refill_probes.append(model.last_refill_probes)
+        sync_probes.append(model.last_sync_probes)
+        refills.append(model.last_refills)
+        fill.append(model.hash_table.fill_level())
+
+    return {"probes": np.array(probes, dtype=np.int64),
+            "refill_probes": np.array(refill_probes, dtype=np.int64),
+            "sync_probes": np.array(sync_probes, dtype=np.int64),
+            "refills": np.array(refills, dtype=np.int64),
+            "fill": np.array(fill, dtype=np.int64),
+            "failed_at": failed_at,
+            "polys": list(model.hash_table.polys)}
+
+
+def capacity_report(num_trials, num_macs, seed=1, multicast_fraction=0.0, table_size=MII_MACADDR_HASH_TABLE_SIZE,
+                    max_refills=1000, macs=None):
+    """ Run simulate_capacity() over random address sets (or the given one) and summarise the results
+    """
+    rng = np.random.default_rng(seed)
+    first_refill = []
+    failed_at = []
+    max_probes = []
+    max_refill_probes = []
+    for trial in range(num_trials):
+        trial_macs = macs if macs is not None else random_macs(num_macs, rng, multicast_fraction)
+        result = simulate_capacity(trial_macs, table_size, max_refills=max_refills)
+        refill_points = np.flatnonzero(result["refills"])
+        first_refill.append(refill_points[0] if len(refill_points) else len(result["refills"]))
+        failed_at.append(result["failed_at"] if result["failed_at"] is not None else len(trial_macs))
+        max_probes.append(result["probes"].max() if len(result["probes"]) else 0)
+        max_refill_probes.append(result["refill_probes"].max() if len(result["refill_probes"]) else 0)
+        if macs is not None:
+            break
+
+    first_refill = np.array(first_refill)
+    failed_at = np.array(failed_at)
+    return {"trials": len(failed_at),
+            "first_refill_min": int(first_refill.min()),
+            "first_refill_median": float(np.median(first_refill)),
+            "failed_at_min": int(failed_at.min()),
+            "failed_at_median": float(np.median(failed_at)),
+            "max_probes": int(max(max_probes)),
+            "max_refill_probes": int(max(max_refill_probes))}
+
+
+def load_macs(filename):
+    """ Reads one address per line, as "01:02:03:04:05:06"
+    """
+    with open(filename) as f:
+        return np.array([mac_to_bytes(line.strip()) for line in f if line.strip()], dtype=np.uint8)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MAC address hash filter capacity report")
+    parser.add_argument("--trials", type=int, default=20, help="Number of random address sets")
+    parser.add_argument("--num-macs", type=int, default=MII_MACADDR_HASH_TABLE_SIZE, help="Addresses per set")
+    parser.add_argument("--multicast", type=float, default=0.0, help="Fraction of multicast addresses")
+    parser.add_argument("--table-size", type=int, default=MII_MACADDR_HASH_TABLE_SIZE)
+    parser.add_argument("--max-refills", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--macs", type=str, default=None, help="File of addresses to insert instead of random sets")
+    args = parser.parse_args()
+
+    macs = load_macs(args.macs) if args.macs else None
+    report = capacity_report(args.trials, args.num_macs, args.seed, args.multicast, args.table_size,
+                             args.max_refills, macs)
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,331 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Python model of the RX buffering of the real-time MII/RMII MAC
+
+Models the mempool allocator (mii_reserve(), mii_reserve_at_least(), mii_commit() with the last_safe_wrptr wrap),
+the packet pointer queues (ETHERNET_NUM_PACKET_POINTERS slots with out of order mii_free_index()) and the fan out
+to the RX clients in mii_ethernet_server() (per client FIFOs of ETHERNET_RX_CLIENT_QUEUE_SIZE, tcount, and
+drop_lp_packets() once the free space falls below MII_RX_THRESHOLD_BYTES).
+
+Memory is modelled as byte addresses into the buffer passed to mii_init_mempool(). The filter and server threads
+are assumed to keep up with the RX pins, so a frame is filtered and fanned out as soon as it has been received.
+Clients take a new packet as soon as they have finished with the previous one.
+
+All times are in xsim ticks (femtoseconds).
+"""
+
+from collections import deque
+import numpy as np
+
+from wire_timing import WireTiming, SIM_TICKS_PER_SECOND, HEADER_BYTES, CRC_BYTES
+
+# Defaults from mii_buffering_defines.h, mii_buffering.c, default_ethernet_conf.h and mii_ethernet_rt_mac.xc
+MII_PACKET_HEADER_BYTES = 40
+MIN_USAGE = MII_PACKET_HEADER_BYTES + 4 + 12
+MEMPOOL_INFO_BYTES = 5 * 4
+ETHERNET_NUM_PACKET_POINTERS = 32
+ETHERNET_RX_CLIENT_QUEUE_SIZE = 4
+MII_RX_THRESHOLD_BYTES = 2000
+ETHERNET_MAX_PACKET_SIZE = 1518
+HP_FILTER_BIT = 1 << 31
+
+DUMMY_PACKET = -1 # mii_reserve() returns the dummy packet when there is no room
+
+# Reasons recorded against drops
+DROP_MEMPOOL = "mempool"            # Not enough space in the mempool, frame never written
+DROP_FILTER = "filter"              # Bad length or no client wants the frame
+DROP_HP_QUEUE = "hp_queue"          # rx_packets_hp pointers full
+DROP_LP_QUEUE = "lp_queue"          # rx_packets_lp pointers full
+DROP_CLIENT_QUEUE = "client_queue"  # The client FIFO was full
+DROP_LP_THRESHOLD = "lp_threshold"  # Removed by drop_lp_packets() to make room for HP
+
+
+class Mempool():
+    """ Model of mempool_info_t and the functions that operate on it
+    """
+
+    def __init__(self, size_bytes):
+        self.start = MEMPOOL_INFO_BYTES
+        self.end = size_bytes - 4
+        self.wrptr = self.start
+        self.last_safe_wrptr = self.end - ((MIN_USAGE + 3) // 4) * 4
+
+    @property
+    def size(self):
+        return self.end - self.start
+
+    def reserve(self, rdptr):
+        """ Model of mii_reserve(). Returns (buf, end_ptr) """
+        if rdptr > self.wrptr and rdptr - self.wrptr < MIN_USAGE:
+            return DUMMY_PACKET, None
+        return self.wrptr, rdptr
+
+    def reserve_at_least(self, rdptr, min_size):
+        """ Model of mii_reserve_at_least(). Returns whether there is room """
+        if not rdptr:
+            return True
+        space_left = rdptr - self.wrptr
+        if space_left <= 0:
+            space_left += self.size
+        return space_left >= min_size
+
+    def write(self, buf, end_ptr, num_words):
+        """ Model of the RX pins storing num_words words of a frame.
+
+            Returns the final dptr, or None if the end_ptr was reached and the frame will be dropped
+        """
+        if buf == DUMMY_PACKET:
+            return None
+        dptr = buf + MII_PACKET_HEADER_BYTES
+        if end_ptr:
+            words_to_end = ((end_ptr - dptr) % self.size) // 4
+            if words_to_end <= num_words:
+                return None
+        return self.start + (dptr - self.start + 4 * num_words) % self.size
+
+    def commit(self, end_ptr):
+        """ Model of mii_commit() """
+        if end_ptr > self.last_safe_wrptr:
+            end_ptr = self.start
+        self.wrptr = end_ptr
+
+    def used(self, rdptr):
+        """ Number of bytes between the oldest packet in use and the write pointer """
+        if not rdptr:
+            return 0
+        used = (self.wrptr - rdptr) % self.size
+        return used if used else self.size
+
+
+class PacketQueue():
+    """ Model of packet_queue_info_t and the functions that operate on it
+    """
+
+    def __init__(self, num_pointers=ETHERNET_NUM_PACKET_POINTERS):
+        self.num_pointers = num_pointers
+        self.rd_index = 0
+        self.wr_index = 0
+        self.ptrs = [0] * num_pointers
+
+    def full(self):
+        return self.ptrs[self.wr_index] != 0
+
+    def add(self, buf):
+        self.ptrs[self.wr_index] = buf
+        self.wr_index = (self.wr_index + 1) % self.num_pointers
+
+    def move_my_rd_index(self, rd_index):
+        while True:
+            rd_index = (rd_index + 1) % self.num_pointers
+            if rd_index == self.wr_index or self.ptrs[rd_index]:
+                return rd_index
+
+    def free_index(self, index):
+        if self.rd_index == index:
+            self.rd_index = self.move_my_rd_index(index)
+        self.ptrs[index] = 0
+        return self.rd_index
+
+    def get_my_next_buf(self, rd_index):
+        if self.rd_index == self.wr_index:
+            return 0
+        return self.ptrs[rd_index]
+
+    def rdptr(self):
+        return self.ptrs[self.rd_index]
+
+    def num_used(self):
+        return self.num_pointers - self.ptrs.count(0)
+
+
+class MiiBufferingModel():
+    """ Replays a received frame trace through the RX buffering of mii_ethernet_rt_mac / rmii_ethernet_rt_mac
+
+        Parameters:
+        rx_bufsize_words (int): As passed to the MAC (rx_bufsize_words)
+        num_clients (int): Number of LP RX clients (n_rx_lp)
+        client_packet_times (list): Time each LP client takes to process a packet. Defaults to 0
+        hp_client (bool): Whether c_rx_hp is connected. Without it HP frames are never consumed and the LP
+            threshold drops are disabled, as in the MAC.
+        client_queue_size, num_packet_pointers, rx_threshold_bytes: Build time configuration
+        line_rate_bps (float): Used to work out when each frame finishes
+    """
+
+    def __init__(self, rx_bufsize_words=4000, num_clients=1, client_packet_times=None, hp_client=True,
+                 client_queue_size=ETHERNET_RX_CLIENT_QUEUE_SIZE, num_packet_pointers=ETHERNET_NUM_PACKET_POINTERS,
+                 rx_threshold_bytes=MII_RX_THRESHOLD_BYTES, line_rate_bps=100e6):
+        self.mempool = Mempool(rx_bufsize_words * 4)
+        self.rx_packets_lp = PacketQueue(num_packet_pointers)
+        self.rx_packets_hp = PacketQueue(num_packet_pointers)
+        self.rd_index_lp = 0
+        self.rd_index_hp = 0
+        self.hp_client = hp_client
+        self.rx_threshold_bytes = rx_threshold_bytes
+        self.timing = WireTiming(SIM_TICKS_PER_SECOND / line_rate_bps)
+
+        self.num_clients = num_clients
+        self.client_packet_times = list(client_packet_times) if client_packet_times else [0] * num_clients
+        self.client_fifo_depth = client_queue_size - 1 # increment_and_wrap_to_zero() leaves one slot empty
+        self.client_fifos = [deque() for _ in range(num_clients)]
+        self.client_free_time = [0] * num_clients
+
+        self.clients_of = {}  # Client bitmask of each buffer
+        self.tcount = {}      # Remaining readers of each buffer minus one
+        self.frame_of = {}    # Frame index held in each buffer
+        self.drops = []       # (time, frame index, reason, client)
+        self.delivered = [0] * num_clients
+        self.hp_delivered = 0
+
+    def _drop(self, time, frame, reason, client=None):
+        self.drops.append((time, frame, reason, client))
+
+    def _rdptr(self):
+        """ Model of mii_get_next_rdptr() """
+        return self.rx_packets_lp.rdptr() or self.rx_packets_hp.rdptr()
+
+    def _serve(self, time):
+        """ The work done by each pass of the mii_ethernet_server() loop """
+        if self.hp_client:
+            queue = self.rx_packets_hp
+            while True:
+                buf = queue.get_my_next_buf(self.rd_index_hp)
+                if not buf:
+                    break
+                self.hp_delivered += 1
+                self.rd_index_hp = queue.free_index(self.rd_index_hp)
+
+        queue = self.rx_packets_lp
+        while True:
+            buf = queue.get_my_next_buf(self.rd_index_lp)
+            if not buf:
+                break
+            tcount = 0
+            clients = self.clients_of[buf]
+            for i in range(self.num_clients):
+                if (clients >> i) & 1:
+                    if len(self.client_fifos[i]) < self.client_fifo_depth:
+                        self.client_fifos[i].append((self.rd_index_lp, time))
+                        tcount += 1
+                    else:
+                        self._drop(time, self.frame_of[buf], DROP_CLIENT_QUEUE, i)
+            if tcount == 0:
+                queue.free_index(self.rd_index_lp)
+            else:
+                self.tcount[buf] = tcount - 1
+            self.rd_index_lp = queue.move_my_rd_index(self.rd_index_lp)
+
+        if self.hp_client:
+            while not self.mempool.reserve_at_least(self.rx_packets_lp.rdptr(), self.rx_threshold_bytes):
+                if not any(self.client_fifos):
+                    break
+                for i in range(self.num_clients):
+                    if self.client_fifos[i]:
+                        index, _ = self.client_fifos[i].popleft()
+                        self._drop(time, self.frame_of[queue.ptrs[index]], DROP_LP_THRESHOLD, i)
+                        self._release(index)
+
+    def _release(self, index):
+        """ Model of mii_get_and_dec_transmit_count() followed by the free when it reaches zero """
+        queue = self.rx_packets_lp
+        buf = queue.ptrs[index]
+        if self.tcount[buf] == 0:
+            queue.free_index(index)
+        else:
+            self.tcount[buf] -= 1
+
+    def _run_clients(self, until):
+        """ Let the clients take packets up to the given time """
+        while True:
+            client = None
+            take_time = until
+            for i in range(self.num_clients):
+                if self.client_fifos[i]:
+                    t = max(self.client_free_time[i], self.client_fifos[i][0][1])
+                    if t <= take_time:
+                        client, take_time = i, t
+            if client is None:
+                return
+            index, _ = self.client_fifos[client].popleft()
+            self._release(index)
+            self.delivered[client] += 1
+            self.client_free_time[client] = take_time + self.client_packet_times[client]
+            self._serve(take_time)
+
+    def receive(self, index, start_time, length, filter_result):
+        """ Receive one frame. length excludes the CRC, filter_result is as returned by the MAC filter
+            (client bitmask with bit 31 set for HP), after any ethertype filtering.
+        """
+        end_time = start_time + self.timing.frame_time(length - HEADER_BYTES)
+
+        self._run_clients(start_time)
+        buf, end_ptr = self.mempool.reserve(self._rdptr())
+        self._run_clients(end_time)
+
+        dptr = self.mempool.write(buf, end_ptr, (length + CRC_BYTES) // 4)
+        if dptr is None:
+            self._drop(end_time, index, DROP_MEMPOOL)
+            return end_time
+        self.mempool.commit(dptr)
+
+        # mii_ethernet_filter()
+        if length < 60 or length > ETHERNET_MAX_PACKET_SIZE or not filter_result:
+            self._drop(end_time, index, DROP_FILTER)
+            return end_time
+        queue = self.rx_packets_hp if filter_result & HP_FILTER_BIT else self.rx_packets_lp
+        if queue.full():
+            self._drop(end_time, index, DROP_HP_QUEUE if filter_result & HP_FILTER_BIT else DROP_LP_QUEUE)
+            return end_time
+        queue.add(buf)
+        self.clients_of[buf] = filter_result & ~HP_FILTER_BIT
+        self.frame_of[buf] = index
+
+        self._serve(end_time)
+        return end_time
+
+    def occupancy(self):
+        return (self.mempool.used(self._rdptr()), self.rx_packets_lp.num_used(), self.rx_packets_hp.num_used(),
+                [len(fifo) for fifo in self.client_fifos])
+
+
+def simulate_rx_buffering(start_times, lengths, filter_results, **kwargs):
+    """ Replay a trace of received frames through MiiBufferingModel
+
+        Parameters:
+        start_times (array): Time the first preamble bit of each frame arrives
+        lengths (array): Frame lengths in bytes excluding the CRC
+        filter_results (array): Client bitmask wanting each frame, with bit 31 set for HP frames
+        kwargs: Passed to MiiBufferingModel
+
+        Returns a dict with:
+            time, mempool_bytes, lp_pointers, hp_pointers: occupancy after each frame has been handled
+            client_fifo: (num_frames, num_clients) occupancy of the client FIFOs
+            drops: list of (time, frame index, reason, client)
+            first_drop: the first entry of drops or None
+            delivered: packets taken by each LP client, and hp_delivered
+    """
+    model = MiiBufferingModel(**kwargs)
+    num_frames = len(start_times)
+    times = np.empty(num_frames)
+    mempool_bytes = np.empty(num_frames, dtype=np.int64)
+    lp_pointers = np.empty(num_frames, dtype=np.int64)
+    hp_pointers = np.empty(num_frames, dtype=np.int64)
+    client_fifo = np.empty((num_frames, model.num_clients), dtype=np.int64)
+
+    for i, (start, length, result) in enumerate(zip(np.asarray(start_times).tolist(),
+                                                    np.asarray(lengths).tolist(),
+                                                    np.asarray(filter_results).tolist())):
+        times[i] = model.receive(i, start, length, result)
+        mempool_bytes[i], lp_pointers[i], hp_pointers[i], client_fifo[i] = model.occupancy()
+    model._run_clients(float("inf"))
+
+    return {"time": times,
+            "mempool_bytes": mempool_bytes,
+            "lp_pointers": lp_pointers,
+            "hp_pointers": hp_pointers,
+            "client_fifo": client_fifo,
+            "drops": model.drops,
+            "first_drop": model.drops[0] if model.drops else None,
+            "delivered": model.delivered,
+            "hp_delivered": model.hp_delivered}
@@ -4,6 +4,8 @@ import Pyxsim as px
 import sys
 import zlib
 
+from clock_timing import ClockTiming
+
 class Clock(px.SimThread):
 
     # Use the values that need to be presented in the RGMII data pins when DV inactive
@@ -11,8 +13,12 @@ class Clock(px.SimThread):
 
     # ifg = inter frame gap
     # bit_time = time per physical layer bit in femtoseconds
+    #
+    # By default the clock is ideal. ppm, drift_ppm/drift_period and jitter make it run off its nominal rate, as
+    # described in clock_timing.ClockTiming, deterministically from seed. The bit time and minimum IFG follow
+    # the ppm offset, as a far end PHY times its frames from its own clock.
 
-    def __init__(self, port, clk):
+    def __init__(self, port, clk, ppm=0.0, drift_ppm=0.0, drift_period=None, jitter=0.0, seed=0):
         self._running = True
         self._clk = clk
         sim_clock_rate = px.Xsi.get_xsi_tick_freq_hz() # xsim uses femotseconds
@@ -38,6 +44,10 @@ class Clock(px.SimThread):
             self._clock_cycle_to_bit_time_ratio = 2 # 1 clock cycle is 2 times a bit time
 
 
+        self._timing = ClockTiming(self._period, ppm=ppm, drift_ppm=drift_ppm, drift_period=drift_period,
+                                   jitter=jitter, seed=seed)
+        self._period = self._timing.mean_period()
+
         self._bit_time = self._period / self._clock_cycle_to_bit_time_ratio # xsim ticks per bit
         self._min_ifg = 96 * self._bit_time
 
@@ -45,8 +55,13 @@ class Clock(px.SimThread):
         self._port = port
 
     def run(self):
+        ideal = self._timing.is_ideal()
+        half_period = self._period/2
         while True:
-            self.wait_until(self.xsi.get_time() + self._period/2)
+            if not ideal and self._val == 0:
+                # Both halves of a cycle take the same time
+                half_period = self._timing.cycle_period(self.xsi.get_time())/2
+            self.wait_until(self.xsi.get_time() + half_period)
             self._val = 1 - self._val
 
             if self._running:
@@ -73,6 +88,9 @@ class Clock(px.SimThread):
     def get_bit_time(self):
         return self._bit_time
 
+    def get_ppm(self):
+        return self._timing.ppm
+
     def get_clock_cycle_to_bit_time_ratio(self):
         return self._clock_cycle_to_bit_time_ratio
 
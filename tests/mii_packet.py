@@ -54,6 +54,7 @@ class MiiPacket(object):
         blank = kwargs.pop('blank', False)
 
         self.dropped = False
+        self.sfd_time = None # Sim time the SFD was received, set by the RX PHYs
 
         if blank:
             self.num_preamble_nibbles = 0
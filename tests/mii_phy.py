@@ -5,6 +5,9 @@ import Pyxsim as px
 import sys
 import zlib
 from mii_packet import MiiPacket
+import sim_trace
+import sim_timeline
+import frame_reducer
 
 class TxPhy(px.SimThread):
 
@@ -26,6 +29,7 @@ class TxPhy(px.SimThread):
         self._complete_fn = complete_fn
         self._expect_loopback = expect_loopback
         self._dut_exit_time = dut_exit_time_us
+        self.latency_probe = None # Set to a LatencyProbe to record the time each tagged frame's SFD is sent
 
     def get_name(self):
         return self._name
@@ -83,6 +87,8 @@ class TxPhy(px.SimThread):
         self._clock = clock
 
     def set_packets(self, packets):
+        # Cut down by frame_reducer.py when reducing a failure
+        frame_reducer.apply_frame_edit(packets, self._clock)
         self._packets = packets
 
     def drive_error(self, value):
@@ -108,16 +114,24 @@ class MiiTransmitter(TxPhy):
         for i,packet in enumerate(self._packets):
             error_nibbles = packet.get_error_nibbles()
 
+            ifg_start_time = xsi.get_time()
             self.wait_until(xsi.get_time() + packet.inter_frame_gap)
+            frame_start_time = xsi.get_time()
+            frame_name = f"Packet {i}"
+            sim_trace.notify_packet(i, frame_start_time)
+            sim_timeline.complete(f"{self._name} tx", "IFG", ifg_start_time, frame_start_time)
 
             if self._verbose:
                 print(f"Sending packet {i}: {packet}")
                 sys.stdout.write(packet.dump())
 
+            sfd_index = len(packet.preamble_nibbles)
             for (i, nibble) in enumerate(packet.get_nibbles()):
                 self.wait(lambda x: self._clock.is_low())
                 xsi.drive_port_pins(self._rxdv, 1)
                 xsi.drive_port_pins(self._rxd, nibble)
+                if self.latency_probe and i == sfd_index:
+                    self.latency_probe.tx_sfd(packet, xsi.get_time())
 
                 # Signal an error if required
                 if i in error_nibbles:
@@ -130,6 +144,8 @@ class MiiTransmitter(TxPhy):
             self.wait(lambda x: self._clock.is_low())
             xsi.drive_port_pins(self._rxdv, 0)
             xsi.drive_port_pins(self._rxer, 0)
+            sim_timeline.complete(f"{self._name} tx", frame_name, frame_start_time, xsi.get_time(),
+                                  data_bytes=packet.num_data_bytes)
 
             if self._verbose:
                 print("Sent")
@@ -156,6 +172,9 @@ class RxPhy(px.SimThread):
         self.expected_packets = None
         self.expect_packet_index = 0
         self.num_expected_packets = 0
+        self.frame_counters = None # Set to a FrameCounters to count frames rather than print them
+        self.latency_probe = None # Set to a LatencyProbe to record the time each tagged frame's SFD is received
+        self.sfd_times = []       # Sim time of the SFD of each frame received
 
     def get_name(self):
         return self._name
@@ -204,11 +223,13 @@ class MiiReceiver(RxPhy):
             packet = MiiPacket(rand, blank=True)
 
             frame_start_time = self.xsi.get_time()
+            sim_trace.notify_rx_frame(frame_start_time)
             in_preamble = True
 
             if last_frame_end_time:
                 ifgap = frame_start_time - last_frame_end_time
                 packet.inter_frame_gap = ifgap
+                sim_timeline.complete(f"{self._name} rx", "IFG", last_frame_end_time, frame_start_time)
 
             while True:
                 # Wait for a falling clock edge or enable low
@@ -223,6 +244,7 @@ class MiiReceiver(RxPhy):
                 if in_preamble:
                     if nibble == 0xd:
                         packet.set_sfd_nibble(nibble)
+                        sfd_time = xsi.get_time()
                         in_preamble = False
                     else:
                         packet.append_preamble_nibble(nibble)
@@ -232,6 +254,14 @@ class MiiReceiver(RxPhy):
                 self.wait(lambda x: self._clock.is_high())
 
             packet.complete()
+            if not in_preamble:
+                packet.sfd_time = sfd_time
+                self.sfd_times.append(sfd_time)
+            if self.latency_probe and not in_preamble:
+                self.latency_probe.rx_sfd(packet, sfd_time)
+            sim_timeline.complete(f"{self._name} rx", f"Frame {packet_count}", frame_start_time, last_frame_end_time,
+                                  data_bytes=packet.num_data_bytes)
+            packet_count += 1
 
             if self._print_packets:
                 sys.stdout.write(packet.dump())
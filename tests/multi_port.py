@@ -0,0 +1,230 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Simulation of several PHYs connected to one DUT, e.g. both ports of the xk-eth-xu316-dual-100m board
+
+The single port helpers in helpers.py wire one RMII PHY pair to fixed ports. A MultiPortHarness creates an
+independent clock, TX PHY and RX PHY for each PortMap, and a TrafficMatrix generates the frames each port sends
+towards each of the others and checks where they come out:
+
+    matrix = TrafficMatrix([[0, 100], [100, 0]], seed=seed)    # 100 frames each way between the two ports
+    harness = MultiPortHarness(DUAL_100M_PORT_MAPS, matrix)
+    px.run_on_simulator_(binary, simthreads=harness.simthreads, ...)
+    assert not matrix.check(), matrix.summary()
+"""
+
+import random
+import sys
+
+from throughput_meter import ThroughputMeter
+
+# Payload bytes of a matrix frame: 2 bytes of magic, the ingress and egress port numbers and a 4 byte big endian
+# sequence number of the frame within its flow
+TAG_MAGIC = [0x4d, 0x50]
+TAG_BYTES = len(TAG_MAGIC) + 2 + 4
+
+SIM_BIT_TIME_100M = 10**7 # 100 Mb/s in femtoseconds
+
+
+class PortMap():
+    """ The DUT ports of one RMII PHY. rxd/rxdv/rxer are the DUT's inputs, driven by the simulated TX PHY, and
+        txd/txen its outputs, sampled by the simulated RX PHY. rxd and txd are either a 4 bit port, with the
+        2 bits used given by the pin assignment, or a list of two 1 bit ports. rxer is None if there is no pin.
+    """
+
+    def __init__(self, name, clk, rxd, rxdv, txd, txen, rxer=None,
+                 rxd_4b_port_pin_assignment="lower_2b", txd_4b_port_pin_assignment="lower_2b"):
+        self.name = name
+        self.clk = clk
+        self.rxd = rxd
+        self.rxdv = rxdv
+        self.rxer = rxer
+        self.txd = txd
+        self.txen = txen
+        self.rxd_4b_port_pin_assignment = rxd_4b_port_pin_assignment
+        self.txd_4b_port_pin_assignment = txd_4b_port_pin_assignment
+
+
+# The two PHYs of the xk-eth-xu316-dual-100m board, as in its .xn file
+DUAL_100M_PORT_MAPS = [
+    PortMap("phy0", 'tile[0]:XS1_PORT_1K',
+            rxd='tile[0]:XS1_PORT_4E', rxdv='tile[0]:XS1_PORT_1D',
+            txd='tile[0]:XS1_PORT_4F', txen='tile[0]:XS1_PORT_1A',
+            rxd_4b_port_pin_assignment="upper_2b", txd_4b_port_pin_assignment="upper_2b"),
+    PortMap("phy1", 'tile[0]:XS1_PORT_1P',
+            rxd=['tile[0]:XS1_PORT_1N', 'tile[0]:XS1_PORT_1O'], rxdv='tile[0]:XS1_PORT_1M',
+            txd=['tile[0]:XS1_PORT_1I', 'tile[0]:XS1_PORT_1J'], txen='tile[0]:XS1_PORT_1L'),
+]
+
+
+class FlowStats():
+    __slots__ = ("sent", "received", "out_of_order", "next_seq")
+
+    def __init__(self, sent):
+        self.sent = sent
+        self.received = 0
+        self.out_of_order = 0
+        self.next_seq = 0
+
+
+class TrafficMatrix():
+    """ Frames between ports, and the check of where they arrive
+
+        Parameters:
+        frames (list): frames[src][dst] is the number of frames which port src receives from its PHY to be
+            sent out of port dst
+        seed (int): Seed for the frame lengths and the order the flows are interleaved in
+        data_len (tuple): Range of the number of payload bytes, inclusive
+        dst_mac_fn: Returns the destination MAC address for the frames to a port
+        tag_offset (int): Offset of the tag in the payload
+        bit_time (float): Time of one bit on the wire, for the throughput of each egress port
+        packet_class: Class of the frames created, MiiPacket by default
+    """
+
+    def __init__(self, frames, seed=0, data_len=(46, 1500), dst_mac_fn=None, tag_offset=0,
+                 bit_time=SIM_BIT_TIME_100M, packet_class=None):
+        self.num_ports = len(frames)
+        assert all(len(row) == self.num_ports for row in frames), "The traffic matrix must be square"
+        self.frames = frames
+        self._rand = random.Random(seed)
+        self._data_len = data_len
+        self._dst_mac_fn = dst_mac_fn or (lambda dst: [0x02, 0, 0, 0, 0, dst])
+        self._tag_offset = tag_offset
+        self._packet_class = packet_class
+        self.flows = {(src, dst): FlowStats(frames[src][dst])
+                      for src in range(self.num_ports) for dst in range(self.num_ports) if frames[src][dst]}
+        self.meters = [ThroughputMeter(bit_time) for _ in range(self.num_ports)]
+        self.num_misrouted = 0
+        self.num_unknown = 0
+
+    def packets(self, src, ifg=None):
+        """ The frames for the PHY of port src to send, with the flows to each destination interleaved """
+        if self._packet_class is None:
+            from mii_packet import MiiPacket # Only needs Pyxsim when the default is used
+            self._packet_class = MiiPacket
+
+        dsts = [dst for dst in range(self.num_ports) for _ in range(self.frames[src][dst])]
+        self._rand.shuffle(dsts)
+        seqs = [0] * self.num_ports
+        packets = []
+        for dst in dsts:
+            num_data_bytes = self._rand.randint(*self._data_len)
+            data_bytes = [(seqs[dst] + i) & 0xff for i in range(num_data_bytes)]
+            data_bytes[self._tag_offset:self._tag_offset + TAG_BYTES] = \
+                TAG_MAGIC + [src, dst] + list(seqs[dst].to_bytes(4, "big"))
+            args = dict(dst_mac_addr=self._dst_mac_fn(dst), src_mac_addr=[0x02, 0, 0, 0, 1, src],
+                        data_bytes=data_bytes)
+            if ifg is not None:
+                args["inter_frame_gap"] = ifg
+            packets.append(self._packet_class(self._rand, **args))
+            seqs[dst] += 1
+        return packets
+
+    def read_tag(self, packet):
+        """ (src, dst, seq) of a matrix frame, None if the packet isn't one """
+        tag = packet.data_bytes[self._tag_offset:self._tag_offset + TAG_BYTES]
+        if len(tag) < TAG_BYTES or tag[:len(TAG_MAGIC)] != TAG_MAGIC:
+            return None
+        return tag[2], tag[3], int.from_bytes(bytes(tag[4:]), "big")
+
+    def receive(self, port, packet, time):
+        """ Called as the PHY of port receives packet from the DUT """
+        self.meters[port].add_frame(packet, time)
+        tag = self.read_tag(packet)
+        if tag is None or (tag[0], tag[1]) not in self.flows:
+            self.num_unknown += 1
+            return
+        (src, dst, seq) = tag
+        if dst != port:
+            self.num_misrouted += 1
+            return
+        flow = self.flows[(src, dst)]
+        flow.received += 1
+        if seq != flow.next_seq:
+            flow.out_of_order += 1
+        flow.next_seq = seq + 1
+
+    def check(self, allow_loss=False):
+        """ Returns a list describing each problem """
+        failures = []
+        for (src, dst), flow in sorted(self.flows.items()):
+            if flow.received < flow.sent and not allow_loss:
+                failures.append(f"Port {src} -> {dst}: {flow.sent - flow.received} of {flow.sent} frames lost")
+            if flow.received > flow.sent:
+                failures.append(f"Port {src} -> {dst}: {flow.received - flow.sent} extra frames")
+            if flow.out_of_order:
+                failures.append(f"Port {src} -> {dst}: {flow.out_of_order} frames out of order")
+        if self.num_misrouted:
+            failures.append(f"{self.num_misrouted} frames out of the wrong port")
+        if self.num_unknown:
+            failures.append(f"{self.num_unknown} unknown frames")
+        return failures
+
+    def summary(self):
+        text = ""
+        for (src, dst), flow in sorted(self.flows.items()):
+            text += f"Port {src} -> {dst}: {flow.received}/{flow.sent} frames, {flow.out_of_order} out of order\n"
+        total_mbps = 0.0
+        for port, meter in enumerate(self.meters):
+            text += f"Port {port} out: {meter.summary().splitlines()[0]}\n"
+            total_mbps += meter.mbps()
+        text += f"Aggregate {total_mbps:.2f} Mb/s"
+        return text
+
+    def report(self, out=sys.stdout):
+        out.write(self.summary() + "\n")
+
+
+class PhyPort():
+    """ The clock and PHY pair simulating one port """
+
+    def __init__(self, index, port_map, clock, tx_phy, rx_phy):
+        self.index = index
+        self.port_map = port_map
+        self.clock = clock
+        self.tx_phy = tx_phy
+        self.rx_phy = rx_phy
+
+
+class MultiPortHarness():
+    """ An RMII clock, TX PHY and RX PHY for each PortMap, all running independently
+
+        The TX PHY of each port sends matrix.packets(port) and the frames received are checked by the matrix.
+        complete_fn is called by each TX PHY when it has sent all its packets; by default the TX PHYs do not time
+        out, so the test ends when the DUT does. The remaining arguments are passed to the TX PHYs.
+    """
+
+    def __init__(self, port_maps, matrix, verbose=False, ifg=None, **tx_args):
+        # Imported here so that the traffic matrix can be used without Pyxsim
+        from mii_clock import Clock
+        from rmii_phy import RMiiTransmitter, RMiiReceiver
+
+        assert len(port_maps) == matrix.num_ports, "Need a port map for each port of the traffic matrix"
+        self.matrix = matrix
+        tx_args.setdefault("do_timeout", False)
+        tx_args.setdefault("expect_loopback", False)
+
+        self.ports = []
+        for index, port_map in enumerate(port_maps):
+            clock = Clock(port_map.clk, Clock.CLK_50MHz)
+            tx_phy = RMiiTransmitter(port_map.rxd, port_map.rxdv, port_map.rxer, clock,
+                                     rxd_4b_port_pin_assignment=port_map.rxd_4b_port_pin_assignment,
+                                     verbose=verbose, **tx_args)
+            rx_phy = RMiiReceiver(port_map.txd, port_map.txen, clock,
+                                  txd_4b_port_pin_assignment=port_map.txd_4b_port_pin_assignment,
+                                  packet_fn=self._packet_fn(index), verbose=verbose)
+            tx_phy.set_packets(matrix.packets(index, ifg if ifg is not None else clock.get_min_ifg()))
+            self.ports.append(PhyPort(index, port_map, clock, tx_phy, rx_phy))
+
+    def _packet_fn(self, index):
+        def receive(packet, phy, *args):
+            self.matrix.receive(index, packet, phy.xsi.get_time())
+        return receive
+
+    @property
+    def simthreads(self):
+        threads = []
+        for port in self.ports:
+            threads += [port.clock, port.rx_phy, port.tx_phy]
+        return threads
@@ -0,0 +1,161 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+PHY level loopback in simulation, the equivalent of the hw_test_rmii_loopback setup
+
+The DUT's TX pins are read by the usual RX PHY model and the frames it captures are replayed onto the DUT's RX
+pins by the usual TX PHY model, so the DUT can send itself traffic at line rate for as long as the test runs
+without a packet list being generated up front. Frames are stored and forwarded: each one is replayed a
+configurable delay after it has been captured, with the configured IFG before it, and errors can be injected.
+
+    loopback = get_loopback("rmii", rx_width="4b_lower", tx_width="1b", delay=1000 * 1e6, error_rate=0.01)
+    px.run_on_simulator_(binary, simthreads=loopback.simthreads + other_threads, ...)
+    print(loopback.queue.counts())
+"""
+
+import random
+from collections import deque
+
+
+
+class LoopbackQueue():
+    """ Frames captured from the DUT's TX pins waiting to be replayed onto its RX pins
+
+        Parameters:
+        delay (float): Time from the end of a frame being captured until it can be replayed (sim ticks)
+        ifg (float): Gap inserted before each replayed frame (sim ticks). get_loopback() defaults it to the
+            minimum for the clock
+        error_rate (float): Fraction of frames replayed with RX_ER asserted on one nibble
+        crc_error_rate (float): Fraction of frames replayed with a corrupt CRC
+        drop_rate (float): Fraction of frames not replayed
+        max_frames (int): Stop replaying after capturing this many frames, None to carry on for ever
+        seed (int): Seed for choosing which frames have errors
+    """
+
+    END = object() # Queued after max_frames to end the TX PHY's packets
+
+    def __init__(self, delay=0, ifg=None, error_rate=0, crc_error_rate=0, drop_rate=0, max_frames=None, seed=0):
+        self.delay = delay
+        self.ifg = ifg
+        self.error_rate = error_rate
+        self.crc_error_rate = crc_error_rate
+        self.drop_rate = drop_rate
+        self.max_frames = max_frames
+        self._rand = random.Random(seed)
+        self._frames = deque() # (time the frame can be sent, packet, error nibbles, corrupt CRC)
+        self.num_captured = 0
+        self.num_replayed = 0
+        self.num_dropped = 0
+        self.num_errors = 0
+        self.num_crc_errors = 0
+
+    def capture(self, packet, phy, *args):
+        """ The packet_fn of the RX PHY """
+        if self.max_frames is not None and self.num_captured >= self.max_frames:
+            return
+        self.num_captured += 1
+
+        if self._rand.random() < self.drop_rate:
+            self.num_dropped += 1
+        else:
+            error_nibbles = []
+            if self._rand.random() < self.error_rate:
+                # Somewhere after the SFD
+                first = len(packet.preamble_nibbles) + 1
+                error_nibbles = [self._rand.randint(first, first + 2 * len(packet.get_packet_bytes()) - 1)]
+                self.num_errors += 1
+            corrupt_crc = self._rand.random() < self.crc_error_rate
+            if corrupt_crc:
+                self.num_crc_errors += 1
+            # The RX PHY hasn't checked the packet yet, so it is only changed for sending when it is popped
+            self._frames.append((phy.xsi.get_time() + self.delay, packet, error_nibbles, corrupt_crc))
+
+        if self.max_frames is not None and self.num_captured == self.max_frames:
+            self._frames.append((0, self.END, None, None))
+
+    def pop_ready(self, time):
+        """ The next frame if it can be sent at time, END when there are no more, otherwise None """
+        if self._frames and self._frames[0][0] <= time:
+            (_, packet, error_nibbles, corrupt_crc) = self._frames.popleft()
+            if packet is not self.END:
+                if self.ifg is not None:
+                    packet.inter_frame_gap = self.ifg
+                packet.error_nibbles = error_nibbles
+                packet.corrupt_crc = corrupt_crc
+                self.num_replayed += 1
+            return packet
+        return None
+
+    def frames(self, thread):
+        """ Generator of the frames for a TX PHY to send, waiting in its thread until each one is ready """
+        while True:
+            thread.wait(lambda x: len(self._frames) > 0)
+            ready_time = self._frames[0][0]
+            if ready_time > thread.xsi.get_time():
+                thread.wait_until(ready_time)
+            packet = self.pop_ready(thread.xsi.get_time())
+            if packet is self.END:
+                return
+            yield packet
+
+    def counts(self):
+        return {"captured": self.num_captured, "replayed": self.num_replayed, "queued": len(self._frames),
+                "dropped": self.num_dropped, "errors": self.num_errors, "crc_errors": self.num_crc_errors}
+
+
+class PhyLoopback():
+    """ The clocks, RX PHY and TX PHY making up a loopback, joined by a LoopbackQueue """
+
+    def __init__(self, clocks, rx_phy, tx_phy, queue, polled=False):
+        self.clocks = clocks
+        self.rx_phy = rx_phy
+        self.tx_phy = tx_phy
+        self.queue = queue
+        if polled:
+            # The RMII transmitter polls the queue every clock
+            tx_phy.set_packets(queue)
+        else:
+            tx_phy.set_packets(queue.frames(tx_phy))
+
+    @property
+    def simthreads(self):
+        return self.clocks + [self.rx_phy, self.tx_phy]
+
+
+def get_loopback(phy, clk=None, rx_width=None, tx_width=None, verbose=False, complete_fn=None,
+                 **queue_args):
+    """ Create a loopback for the mii, rgmii or rmii DUT pins used by the test apps.
+
+        clk is only used for RGMII, 25MHz by default. For RMII rx_width and tx_width are the DUT's, as in the test_params.json
+        files ("4b_lower", "4b_upper" or "1b"). complete_fn is called by the TX PHY once max_frames have been
+        replayed. The remaining arguments are passed to LoopbackQueue.
+    """
+    # Imported here so that the queue can be used without Pyxsim
+    from mii_clock import Clock
+    from helpers import get_mii_rx_clk_phy, get_mii_tx_clk_phy, get_rgmii_rx_clk_phy, get_rgmii_tx_clk_phy
+    from helpers import get_rmii_clk, get_rmii_tx_phy, get_rmii_rx_phy
+
+    tx_args = dict(verbose=verbose, do_timeout=False, expect_loopback=False, complete_fn=complete_fn)
+
+    queue = LoopbackQueue(**queue_args)
+    if phy == "mii":
+        (rx_clk, rx_phy) = get_mii_rx_clk_phy(packet_fn=queue.capture, verbose=verbose)
+        (tx_clk, tx_phy) = get_mii_tx_clk_phy(**tx_args)
+        clocks = [rx_clk, tx_clk]
+    elif phy == "rgmii":
+        (rx_clk, rx_phy) = get_rgmii_rx_clk_phy(clk or Clock.CLK_25MHz, packet_fn=queue.capture, verbose=verbose)
+        (tx_clk, tx_phy) = get_rgmii_tx_clk_phy(clk or Clock.CLK_25MHz, **tx_args)
+        clocks = [rx_clk, tx_clk]
+    elif phy == "rmii":
+        rmii_clk = get_rmii_clk(Clock.CLK_50MHz)
+        tx_phy = get_rmii_tx_phy(rx_width, rmii_clk, **tx_args)
+        rx_phy = get_rmii_rx_phy(tx_width, rmii_clk, packet_fn=queue.capture, verbose=verbose)
+        clocks = [rmii_clk]
+    else:
+        assert 0, f"Invalid phy: {phy}"
+
+    if queue.ifg is None:
+        queue.ifg = tx_phy.get_clock().get_min_ifg()
+
+    return PhyLoopback(clocks, rx_phy, tx_phy, queue, polled=(phy == "rmii"))
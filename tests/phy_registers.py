@@ -0,0 +1,208 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Clause 22 register file of the PHYs on an MDIO bus, for the SMI slave model in smi.py
+
+Each PHY address has 32 16 bit registers. The basic control and status registers behave as in IEEE 802.3
+clause 22: reset and restart autonegotiation are self clearing, the status register is read only and its link
+status bit latches low. Link changes are scripted against sim time and take effect as the registers are
+accessed, so no extra SimThread is needed:
+
+    registers = PhyRegisters([0x05])
+    registers.connect(0x05, 100 * 10**9)      # Cable plugged in at 100us, autonegotiation starts
+    registers.disconnect(0x05, 900 * 10**9)   # and pulled out again at 900us
+    smi_slave = smi_master_checker(mdc_port, mdio_port, rst_n_port, speed_hz, registers=registers)
+"""
+
+import heapq
+
+# Register and bit numbers as in lib_ethernet/api/smi.h
+BASIC_CONTROL_REG = 0x0
+BASIC_STATUS_REG = 0x1
+PHY_ID1_REG = 0x2
+PHY_ID2_REG = 0x3
+AUTONEG_ADVERT_REG = 0x4
+AUTONEG_LINK_REG = 0x5
+AUTONEG_EXP_REG = 0x6
+GIGE_CONTROL_REG = 0x9
+
+BASIC_CONTROL_RESET_BIT = 15
+BASIC_CONTROL_LOOPBACK_BIT = 14
+BASIC_CONTROL_100_MBPS_BIT = 13
+BASIC_CONTROL_AUTONEG_EN_BIT = 12
+BASIC_CONTROL_POWER_DOWN_BIT = 11
+BASIC_CONTROL_RESTART_AUTONEG_BIT = 9
+BASIC_CONTROL_FULL_DUPLEX_BIT = 8
+BASIC_CONTROL_1000_MBPS_BIT = 6
+
+BASIC_STATUS_AUTONEG_COMPLETE_BIT = 5
+BASIC_STATUS_AUTONEG_ABILITY_BIT = 3
+BASIC_STATUS_LINK_BIT = 2
+
+AUTONEG_ADVERT_100BASE_TX_FULL_DUPLEX = 8
+AUTONEG_ADVERT_10BASE_TX_FULL_DUPLEX = 6
+
+AUTONEG_EXP_PAGE_RECEIVED_BIT = 1
+AUTONEG_EXP_LP_AUTONEG_ABLE_BIT = 0
+
+NUM_REGS = 32
+READ_ONLY_REGS = (BASIC_STATUS_REG, PHY_ID1_REG, PHY_ID2_REG, AUTONEG_LINK_REG, AUTONEG_EXP_REG)
+
+# Autonegotiation enabled at 100 Mb/s full duplex
+DEFAULT_BASIC_CONTROL = ((1 << BASIC_CONTROL_100_MBPS_BIT) | (1 << BASIC_CONTROL_AUTONEG_EN_BIT) |
+                         (1 << BASIC_CONTROL_FULL_DUPLEX_BIT))
+# 10/100 full and half duplex, autonegotiation able, extended capabilities
+DEFAULT_BASIC_STATUS = 0x7809
+# 10/100 full and half duplex, IEEE 802.3 selector
+DEFAULT_AUTONEG_ADVERT = 0x01e1
+
+DEFAULT_AUTONEG_TIME = 2 * 10**12 # 2ms in femtoseconds, rather than the seconds a real PHY takes
+NO_PHY_VALUE = 0xffff # Read from an address with no PHY, as MDIO is pulled up
+
+
+class Phy():
+    """ The registers and link state of the PHY at one address """
+
+    def __init__(self, phy_id):
+        self.phy_id = phy_id
+        self.reset()
+        self.cable = False
+        self.partner_advert = None
+
+    def reset(self):
+        self.regs = [0] * NUM_REGS
+        self.regs[BASIC_CONTROL_REG] = DEFAULT_BASIC_CONTROL
+        self.regs[BASIC_STATUS_REG] = DEFAULT_BASIC_STATUS
+        self.regs[PHY_ID1_REG] = (self.phy_id >> 16) & 0xffff
+        self.regs[PHY_ID2_REG] = self.phy_id & 0xffff
+        self.regs[AUTONEG_ADVERT_REG] = DEFAULT_AUTONEG_ADVERT
+        self.link_up = False
+        self.link_latched_low = False # Set when the link goes down, until the status register is read
+        self.autoneg_generation = 0 # Invalidates the completion of an autonegotiation which has been restarted
+
+    def control_bit(self, bit):
+        return (self.regs[BASIC_CONTROL_REG] >> bit) & 1
+
+
+class PhyRegisters():
+    """ The PHYs on an MDIO bus
+
+        Parameters:
+        phy_addresses (list): Addresses with a PHY. Reads from other addresses return 0xffff
+        phy_id (int): 32 bit value of PHY_ID1 and PHY_ID2
+        autoneg_time (float): Time autonegotiation takes once the cable is connected or it is restarted (sim ticks)
+    """
+
+    def __init__(self, phy_addresses=(0,), phy_id=0x00221560, autoneg_time=DEFAULT_AUTONEG_TIME):
+        self.phys = {address: Phy(phy_id) for address in phy_addresses}
+        self.autoneg_time = autoneg_time
+        self._events = [] # heap of (time, order, fn)
+        self._num_events = 0
+        self.log = [] # (time, phy address, event) of each link change
+
+    def _schedule(self, time, fn):
+        heapq.heappush(self._events, (time, self._num_events, fn))
+        self._num_events += 1
+
+    def update(self, time):
+        """ Apply the scripted events up to time """
+        while self._events and self._events[0][0] <= time:
+            (event_time, _, fn) = heapq.heappop(self._events)
+            fn(event_time)
+
+    def connect(self, phy_address, time, partner_advert=DEFAULT_AUTONEG_ADVERT):
+        """ Plug the cable in at time, to a link partner advertising partner_advert """
+        def plug(now):
+            phy = self.phys[phy_address]
+            phy.cable = True
+            phy.partner_advert = partner_advert
+            self._start_link(phy_address, now)
+        self._schedule(time, plug)
+
+    def disconnect(self, phy_address, time):
+        """ Pull the cable out at time """
+        def unplug(now):
+            phy = self.phys[phy_address]
+            phy.cable = False
+            phy.partner_advert = None
+            self._set_link(phy_address, False, now)
+        self._schedule(time, unplug)
+
+    def _start_link(self, phy_address, now):
+        """ Bring the link up, through autonegotiation if it is enabled """
+        phy = self.phys[phy_address]
+        self._set_link(phy_address, False, now)
+        if not phy.cable or phy.control_bit(BASIC_CONTROL_POWER_DOWN_BIT):
+            return
+        if not phy.control_bit(BASIC_CONTROL_AUTONEG_EN_BIT):
+            self._set_link(phy_address, True, now)
+            return
+
+        phy.autoneg_generation += 1
+        generation = phy.autoneg_generation
+
+        def complete(done_time):
+            if phy.autoneg_generation != generation or not phy.cable:
+                return
+            phy.regs[AUTONEG_LINK_REG] = phy.partner_advert
+            phy.regs[AUTONEG_EXP_REG] = (1 << AUTONEG_EXP_PAGE_RECEIVED_BIT) | (1 << AUTONEG_EXP_LP_AUTONEG_ABLE_BIT)
+            phy.regs[BASIC_STATUS_REG] |= 1 << BASIC_STATUS_AUTONEG_COMPLETE_BIT
+            self._set_link(phy_address, True, done_time)
+        self._schedule(now + self.autoneg_time, complete)
+
+    def _set_link(self, phy_address, up, now):
+        phy = self.phys[phy_address]
+        if not up:
+            phy.regs[BASIC_STATUS_REG] &= ~(1 << BASIC_STATUS_AUTONEG_COMPLETE_BIT)
+            phy.regs[AUTONEG_LINK_REG] = 0
+            phy.regs[AUTONEG_EXP_REG] = 0
+            if phy.link_up:
+                phy.link_latched_low = True
+        if up != phy.link_up:
+            self.log.append((now, phy_address, "link up" if up else "link down"))
+        phy.link_up = up
+
+    def read(self, phy_address, reg_address, time):
+        self.update(time)
+        phy = self.phys.get(phy_address)
+        if phy is None:
+            return NO_PHY_VALUE
+
+        value = phy.regs[reg_address]
+        if reg_address == BASIC_STATUS_REG:
+            # The link status latches low until it has been read
+            if phy.link_up and not phy.link_latched_low:
+                value |= 1 << BASIC_STATUS_LINK_BIT
+            phy.link_latched_low = False
+        elif reg_address == AUTONEG_EXP_REG:
+            phy.regs[AUTONEG_EXP_REG] &= ~(1 << AUTONEG_EXP_PAGE_RECEIVED_BIT) # Clear on read
+        return value
+
+    def write(self, phy_address, reg_address, value, time):
+        self.update(time)
+        phy = self.phys.get(phy_address)
+        if phy is None or reg_address in READ_ONLY_REGS:
+            return
+
+        if reg_address != BASIC_CONTROL_REG:
+            phy.regs[reg_address] = value
+            return
+
+        if value & (1 << BASIC_CONTROL_RESET_BIT):
+            # Self clearing. The registers return to their defaults and the link is renegotiated
+            self._set_link(phy_address, False, time)
+            phy.reset()
+            self._start_link(phy_address, time)
+            return
+
+        old = phy.regs[BASIC_CONTROL_REG]
+        phy.regs[BASIC_CONTROL_REG] = value & ~(1 << BASIC_CONTROL_RESTART_AUTONEG_BIT) # Self clearing
+        changed = old ^ value
+        restart = (value & (1 << BASIC_CONTROL_RESTART_AUTONEG_BIT)) and phy.control_bit(BASIC_CONTROL_AUTONEG_EN_BIT)
+        if restart or changed & ((1 << BASIC_CONTROL_AUTONEG_EN_BIT) | (1 << BASIC_CONTROL_POWER_DOWN_BIT)):
+            self._start_link(phy_address, time)
+
+    def set(self, phy_address, reg_address, value):
+        """ Set a register directly, including the read only ones, e.g. to set up vendor specific registers """
+        self.phys[phy_address].regs[reg_address] = value & 0xffff
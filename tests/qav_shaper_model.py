@@ -0,0 +1,252 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Python model of the Qav credit based shaper in lib_ethernet/src/shaper.h and shaper.xc
+
+The fixed point maths (16.16 idle slope per reference timer tick, 64 bit credit accumulation with the optional
+credit limit, 32 bit send slope) is reproduced exactly. The transmit scheduling follows the TX loop of the MACs:
+on every pass the HP queue head is offered to shaper_do_idle_slope() and if it is refused (or there is none) the
+LP queue head is sent instead. The MAC is assumed to evaluate the shaper on every reference timer tick while it
+is idle, so the departure times are the earliest reference timer tick the DUT could start each frame.
+
+The gap after each frame is that of the MAC's IFG timer (see MAC_IFG), which is read at a point in the sending of
+the frame and set to expire a fixed count of reference timer ticks later. The count allows for the instructions
+between the timer and the port, so the departures are only as accurate as that allowance (tx_latency_ticks).
+
+All times are in xsim ticks (femtoseconds) unless stated otherwise.
+"""
+
+import numpy as np
+
+from wire_timing import WireTiming, SIM_TICKS_PER_SECOND, HEADER_BYTES, PACKET_OVERHEAD_BYTES
+
+# Constants from ethernet.h and shaper.h
+MII_CREDIT_FRACTIONAL_BITS = 16
+XS1_TIMER_HZ = 100000000
+
+SIM_TICKS_PER_TIMER_TICK = SIM_TICKS_PER_SECOND // XS1_TIMER_HZ
+
+# The IFG timers of the 100Mb/s MACs, where one bit takes one reference timer tick. For each PHY, a function of the
+# frame length (no CRC) giving (ticks the IFG timer is set for, ticks from reading the timer to the end of the CRC on
+# the wire, the allowance in the count for the time from the timer to the port)
+MAC_IFG = {
+    # mii_master.xc: MII_ETHERNET_IFS_AS_REF_CLOCK_COUNT plus 8 ticks per tail byte, from the output of the last
+    # whole word, which leaves a word in the port, that word, the tail bytes and the CRC to go
+    "mii": lambda length: (96 + 96 - 9 + (length & 3) * 8, 96 + (length & 3) * 8, 9),
+    # rmii_master.xc: RMII_ETHERNET_IFG_AS_REF_CLOCK_COUNT_4b, _1b_TAIL_BYTES and _1b_NO_TAIL_BYTES, from the
+    # output of the CRC word
+    "rmii_4b": lambda length: (96 + 30 - 5, 30, 5),
+    "rmii_1b": lambda length: (96 + 38 - 11, 38, 11) if length & 3 else (96 + 62 - 11, 62, 11),
+}
+
+INT32_MAX = 0x7fffffff
+
+
+def to_int32(value):
+    value &= 0xffffffff
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def qav_idle_slope(limit_bps):
+    """ Returns the idle slope set by set_qav_idle_slope() for a reservation of limit_bps bits per second
+    """
+    slope = (int(limit_bps) << MII_CREDIT_FRACTIONAL_BITS) // XS1_TIMER_HZ
+    return to_int32(slope) # Stored as an unsigned into the int port_state->qav_idle_slope
+
+
+def qav_credit_limit(payload_limit_bytes):
+    """ Returns the credit limit set by set_qav_credit_limit(). 0 means no limit.
+
+        Note that, as in the C code, the limit is in bits and is compared directly against the credit
+        which has MII_CREDIT_FRACTIONAL_BITS fractional bits.
+    """
+    if payload_limit_bytes > 0:
+        return (payload_limit_bytes + PACKET_OVERHEAD_BYTES) * 8
+    return 0
+
+
+def shaper_do_idle_slope(credit, prev_time, current_time, hp_available, idle_slope, credit_limit=0):
+    """ Model of shaper_do_idle_slope()
+
+        Returns (hp_allowed, credit)
+    """
+    elapsed_ticks = (current_time - prev_time) & 0xffffffff
+    credit64 = elapsed_ticks * idle_slope + credit
+    if credit_limit:
+        credit64 = min(credit64, credit_limit)
+    else:
+        credit64 = min(credit64, INT32_MAX)
+    credit = to_int32(credit64)
+
+    if hp_available:
+        return credit >= 0, credit
+    if credit > 0:
+        credit = 0 # Annex L of Qav
+    return False, credit
+
+
+def shaper_do_send_slope(credit, len_bytes):
+    """ Model of shaper_do_send_slope()
+    """
+    return to_int32(credit - ((len_bytes + PACKET_OVERHEAD_BYTES) << (MII_CREDIT_FRACTIONAL_BITS + 3)))
+
+
+class QavShaperModel():
+    """ Transmit scheduler for one MAC port with the Qav shaper on the HP queue
+
+        Parameters:
+        idle_slope_bps (int): Reservation as passed to set_egress_qav_idle_slope_bps()
+        credit_limit_bytes (int): Payload limit as passed to set_egress_qav_credit_limit(). 0 for no limit
+        line_rate_bps (float): Line rate, used to work out how long each frame occupies the wire
+        idle_slope (int): Raw 16.16 slope as passed to set_egress_qav_idle_slope(). Overrides idle_slope_bps
+        phy (str): Key of MAC_IFG for the IFG timer of the MAC, or None for the minimum IFG at the line rate
+        tx_latency_ticks (int): With phy, the reference timer ticks the MAC really takes from its timers to the
+            port. By default the allowance made in MAC_IFG, which gives a 96 bit IFG
+    """
+
+    def __init__(self, idle_slope_bps=0, credit_limit_bytes=0, line_rate_bps=100e6, idle_slope=None, phy=None,
+                 tx_latency_ticks=None):
+        self.idle_slope = qav_idle_slope(idle_slope_bps) if idle_slope is None else idle_slope
+        self.credit_limit = qav_credit_limit(credit_limit_bytes)
+        self.line_rate_bps = line_rate_bps
+        self.timing = WireTiming(SIM_TICKS_PER_SECOND / line_rate_bps)
+        self.phy = phy
+        self.tx_latency_ticks = tx_latency_ticks
+
+    def ifg(self, length):
+        """ The gap the MAC leaves after a frame of length bytes (no CRC) """
+        if self.phy is None:
+            return self.timing.min_ifg
+        ifg_ticks, eof_ticks, allowance = MAC_IFG[self.phy](length)
+        latency = allowance if self.tx_latency_ticks is None else self.tx_latency_ticks
+        return (ifg_ticks - eof_ticks + latency) * SIM_TICKS_PER_TIMER_TICK
+
+    def _wire_time(self, lengths):
+        """ Time on the wire of frames of lengths bytes (header and payload, no CRC) and the IFG after them """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        frame_time = np.asarray(self.timing.frame_time(lengths - HEADER_BYTES), dtype=float)
+        ifg = np.array([self.ifg(length) for length in lengths.tolist()], dtype=float)
+        return np.rint(frame_time + ifg).astype(np.int64)
+
+    def _advance(self, credit, prev_tick, tick, hp_available, idle_without_hp):
+        """ Bring the credit from prev_tick up to the shaper evaluation at tick.
+
+            If the MAC has been idle with no HP frame queued, it will have been evaluating the shaper with a null
+            buffer on every tick in between, which stops the credit rising above zero.
+        """
+        if idle_without_hp and tick - prev_tick > 1:
+            credit = min(credit + (tick - 1 - prev_tick) * self.idle_slope, 0)
+            prev_tick = tick - 1
+        return shaper_do_idle_slope(credit, prev_tick, tick, hp_available, self.idle_slope, self.credit_limit)
+
+    def schedule(self, hp_arrivals, hp_lengths, lp_arrivals=(), lp_lengths=(), start_time=0):
+        """ Work out when each frame leaves the MAC.
+
+            Parameters:
+            hp_arrivals, lp_arrivals (array of int): Time each frame is queued in the MAC, in order
+            hp_lengths, lp_lengths (array of int): Frame length in bytes as passed to the send function (no CRC)
+            start_time (int): Time the MAC TX loop starts and reads the timer for the first time
+
+            Returns:
+            dict with numpy arrays:
+                hp_departures, lp_departures: start of preamble time of each frame
+                hp_credit: credit with which each HP frame was allowed to go
+                order: sequence of (0 for HP, 1 for LP, index) tuples in transmit order, as an (n, 2) array
+        """
+        hp_arrivals = np.asarray(hp_arrivals, dtype=np.int64)
+        lp_arrivals = np.asarray(lp_arrivals, dtype=np.int64)
+        hp_wire = self._wire_time(hp_lengths)
+        lp_wire = self._wire_time(lp_lengths)
+        hp_cost = (np.asarray(hp_lengths, dtype=np.int64) + PACKET_OVERHEAD_BYTES) << (MII_CREDIT_FRACTIONAL_BITS + 3)
+
+        num_hp = len(hp_arrivals)
+        num_lp = len(lp_arrivals)
+        hp_departures = []
+        lp_departures = []
+        hp_credit = []
+        order = []
+
+        # Python ints are much faster than numpy scalars in the loop
+        ha, hw, hc = hp_arrivals.tolist(), hp_wire.tolist(), hp_cost.tolist()
+        la, lw = lp_arrivals.tolist(), lp_wire.tolist()
+        slope = self.idle_slope
+        never = float("inf")
+
+        tick_len = SIM_TICKS_PER_TIMER_TICK
+        t = int(start_time)
+        credit = 0
+        prev_tick = t // tick_len
+        idle_without_hp = False
+        ih = il = 0
+
+        while ih < num_hp or il < num_lp:
+            # The MAC starts a frame on a reference timer tick
+            t = -(-t // tick_len) * tick_len
+            next_hp = ha[ih] if ih < num_hp else never
+            next_lp = la[il] if il < num_lp else never
+            hp_ready = next_hp <= t
+            lp_ready = next_lp <= t
+
+            if not hp_ready and not lp_ready:
+                # Nothing to send, wait for the next frame to be queued
+                t = max(t, min(next_hp, next_lp))
+                idle_without_hp = True
+                continue
+
+            tick = t // tick_len
+            hp_allowed, credit = self._advance(credit, prev_tick, tick, hp_ready, idle_without_hp)
+            prev_tick = tick
+            idle_without_hp = False
+
+            if hp_allowed:
+                hp_departures.append(t)
+                hp_credit.append(credit)
+                credit = to_int32(credit - hc[ih])
+                order.append((0, ih))
+                t += hw[ih]
+                ih += 1
+            elif lp_ready:
+                lp_departures.append(t)
+                order.append((1, il))
+                t += lw[il]
+                il += 1
+            else:
+                # HP is waiting for credit and there is no LP to send. Go to whichever comes first,
+                # the credit becoming non-negative or an LP frame being queued
+                if slope > 0:
+                    credit_ok = (tick + (-credit + slope - 1) // slope) * tick_len
+                else:
+                    credit_ok = never
+                t = min(credit_ok, next_lp)
+                if t == never:
+                    raise ValueError(f"HP frame {ih} can never be sent with idle slope {slope}")
+                continue
+
+        return {"hp_departures": np.array(hp_departures, dtype=np.int64),
+                "lp_departures": np.array(lp_departures, dtype=np.int64),
+                "hp_credit": np.array(hp_credit, dtype=np.int64),
+                "order": np.array(order, dtype=np.int64).reshape(-1, 2)}
+
+
+def compare_departures(expected, observed, tolerance, align=True):
+    """ Compare observed frame start times (from a sim PHY or a HW capture) against the model.
+
+        The path from the MAC to the observation point adds a fixed latency, so by default the observed times are
+        first aligned to the expected ones using the median offset.
+
+        Parameters:
+        expected, observed (array): Departure times of the same frames, in the same units
+        tolerance: Maximum allowed difference after alignment
+        align (bool): Remove the median offset before comparing
+
+        Returns:
+        (offset, indices of frames outside tolerance, array of differences)
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    observed = np.asarray(observed, dtype=np.float64)
+    assert len(expected) == len(observed), f"Comparing {len(observed)} observed frames with {len(expected)} expected"
+    diff = observed - expected
+    offset = float(np.median(diff)) if (align and len(diff)) else 0.0
+    diff -= offset
+    return offset, np.flatnonzero(np.abs(diff) > tolerance), diff
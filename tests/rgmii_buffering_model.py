@@ -0,0 +1,469 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Trace driven model of the buffering of the gigabit MAC in lib_ethernet/src/rgmii_buffering.xc, for choosing
+buffer counts without running the 125MHz RGMII simulations.
+
+Receive follows rgmii_buffer_manager() and rgmii_ethernet_rx_server():
+  - The RX pins always hold two of the RGMII_MAC_BUFFER_COUNT_RX buffers. As each frame ends the buffer manager
+    takes a free buffer to replace it; if there is none the frame is dropped and its buffer reused.
+  - Frames no client wants are freed at once. The others go on the HP or LP used queue.
+  - The HP client gets each HP frame as soon as it is free to. LP frames are handed one at a time to the queues
+    (ETHERNET_RX_CLIENT_QUEUE_SIZE) of the clients that want them, and are dropped for a client whose queue is
+    full. A buffer is freed once every client has fetched the frame.
+  - With an HP client, whenever RGMII_RX_BUFFERS_THRESHOLD or fewer buffers are free the oldest frame queued
+    for each LP client is dropped.
+
+Transmit follows rgmii_ethernet_tx_server(). Each LP send needs one of the RGMII_MAC_BUFFER_COUNT_TX LP buffers,
+and the server always holds an HP buffer ready for the next HP frame. Up to two frames are passed on to the TX
+pins, HP first, and a buffer is freed when its frame has been sent. A client sending with no buffer free waits
+rather than losing the frame, so the model reports these stalls.
+
+Times are in sim ticks (femtoseconds). Run directly for a sweep of RX buffer counts against line rate bursts:
+    python rgmii_buffering_model.py --burst 64 --client-mbps 400 --buffers 8 16 32 64
+"""
+
+import argparse
+import collections
+import heapq
+import random
+
+from wire_timing import SIM_TICKS_PER_SECOND, PREAMBLE_BYTES, CRC_BYTES, IFG_BITS
+
+SIM_BIT_TIME_1G = 10**6
+
+# Values from lib_ethernet/src/default_ethernet_conf.h and rgmii_buffering.xc
+RGMII_MAC_BUFFER_COUNT_RX = 32
+RGMII_MAC_BUFFER_COUNT_TX = 8
+ETHERNET_RX_CLIENT_QUEUE_SIZE = 16
+RX_PINS_BUFFERS = 2
+TX_PINS_BUFFERS = 2
+
+# Causes of an RX drop
+(NO_FREE_BUFFER, CLIENT_QUEUE_FULL, LP_THRESHOLD) = ("no free RX buffer", "client queue full",
+                                                    "LP dropped to keep buffers for HP")
+
+
+def wire_time(num_bytes, bit_time):
+    """ Time on the wire of a frame of num_bytes (without the CRC), from the preamble to the end of the IFG """
+    return ((PREAMBLE_BYTES + num_bytes + CRC_BYTES) * 8 + IFG_BITS) * bit_time
+
+
+class RxFrame():
+    """ A frame in an arrival trace
+
+        time is when the end of the frame reaches the MAC and num_bytes its length without the CRC. hp marks a
+        frame for the HP client, and clients lists the LP clients which want it.
+    """
+
+    __slots__ = ("time", "num_bytes", "hp", "clients", "index", "refs")
+
+    def __init__(self, time, num_bytes, hp=False, clients=(0,)):
+        self.time = time
+        self.num_bytes = num_bytes
+        self.hp = hp
+        self.clients = () if hp else tuple(clients)
+        self.index = None
+        self.refs = 0
+
+
+class TxFrame():
+    """ A frame in a send trace. time is when the client calls send_packet, client is the LP client number and
+        is ignored for hp frames.
+    """
+
+    __slots__ = ("time", "num_bytes", "hp", "client", "index")
+
+    def __init__(self, time, num_bytes, hp=False, client=0):
+        self.time = time
+        self.num_bytes = num_bytes
+        self.hp = hp
+        self.client = client
+        self.index = None
+
+
+class ClientRate():
+    """ How long a client takes over each frame: frame_time for every frame plus the frame at mbps """
+
+    def __init__(self, mbps=None, frame_time=0):
+        self.mbps = mbps
+        self.frame_time = frame_time
+
+    def service_time(self, num_bytes):
+        time = self.frame_time
+        if self.mbps:
+            time += num_bytes * 8 * SIM_TICKS_PER_SECOND / (self.mbps * 1e6)
+        return time
+
+
+class Drop():
+    __slots__ = ("time", "index", "cause", "client")
+
+    def __init__(self, time, index, cause, client=None):
+        self.time = time
+        self.index = index
+        self.cause = cause
+        self.client = client
+
+    def __str__(self):
+        client = "" if self.client is None else f" for LP client {self.client}"
+        return f"frame {self.index} at {self.time / 10**9:.3f}us{client}: {self.cause}"
+
+
+class Occupancy():
+    """ Number of buffers in use over time """
+
+    def __init__(self, num_buffers, in_use=0):
+        self.num_buffers = num_buffers
+        self.samples = [(0, in_use)]
+        self.max = in_use
+        self._area = 0
+
+    def record(self, time, in_use):
+        (last_time, last) = self.samples[-1]
+        self._area += (time - last_time) * last
+        if time == last_time:
+            self.samples[-1] = (time, in_use)
+        else:
+            self.samples.append((time, in_use))
+        self.max = max(self.max, in_use)
+
+    def mean(self):
+        end = self.samples[-1][0]
+        return self._area / end if end else self.samples[-1][1]
+
+    def summary(self):
+        return f"{self.max}/{self.num_buffers} buffers in use at most, {self.mean():.1f} on average"
+
+
+class _EventQueue():
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+
+    def push(self, time, fn, *args):
+        heapq.heappush(self._heap, (time, self._seq, fn, args))
+        self._seq += 1
+
+    def run(self):
+        while self._heap:
+            (time, _, fn, args) = heapq.heappop(self._heap)
+            fn(time, *args)
+            yield time
+
+
+class RgmiiRxBufferModel():
+    """ Receive buffering of the gigabit MAC
+
+        Parameters:
+        lp_clients (list): ClientRate of each LP client
+        hp_client (ClientRate): The HP client, None if the application has none
+        num_buffers (int): RGMII_MAC_BUFFER_COUNT_RX
+        queue_size (int): ETHERNET_RX_CLIENT_QUEUE_SIZE
+        threshold (int): RGMII_RX_BUFFERS_THRESHOLD, by default half the buffers
+        server_frame_time (float): Time the RX server takes to queue an LP frame for its clients
+    """
+
+    def __init__(self, lp_clients, hp_client=None, num_buffers=RGMII_MAC_BUFFER_COUNT_RX,
+                 queue_size=ETHERNET_RX_CLIENT_QUEUE_SIZE, threshold=None, server_frame_time=0):
+        assert num_buffers > RX_PINS_BUFFERS, f"The RX pins need {RX_PINS_BUFFERS} buffers"
+        self.lp_clients = lp_clients
+        self.hp_client = hp_client
+        self.num_buffers = num_buffers
+        self.queue_size = queue_size
+        self.threshold = num_buffers // 2 if threshold is None else threshold
+        self.server_frame_time = server_frame_time
+
+    def run(self, trace):
+        """ Replays the trace of RxFrames, in time order, and returns a BufferingReport """
+        self._events = _EventQueue()
+        self._free = self.num_buffers - RX_PINS_BUFFERS
+        self._used_lp = collections.deque()
+        self._used_hp = collections.deque()
+        self._server_busy = False
+        self._hp_busy = False
+        self._fifos = [collections.deque() for _ in self.lp_clients]
+        self._busy = [False] * len(self.lp_clients)
+        self.report = BufferingReport("RX", Occupancy(self.num_buffers, RX_PINS_BUFFERS))
+
+        for index, frame in enumerate(trace):
+            frame.index = index
+            self._events.push(frame.time, self._arrive, frame)
+        for time in self._events.run():
+            self._check_threshold(time)
+            self.report.occupancy.record(time, self.num_buffers - self._free)
+        self.report.num_frames = len(trace)
+        return self.report
+
+    def _release(self, time, frame):
+        frame.refs -= 1
+        if frame.refs == 0:
+            self._free += 1
+
+    def _arrive(self, time, frame):
+        if not self._free:
+            self.report.drop(Drop(time, frame.index, NO_FREE_BUFFER))
+            return
+        # The frame keeps the buffer it was received into, and the pins take a free one
+        self._free -= 1
+        if frame.hp and self.hp_client:
+            frame.refs = 1
+            self._used_hp.append(frame)
+            self._serve_hp(time)
+        elif frame.clients:
+            self._used_lp.append(frame)
+            self._serve_lp(time)
+        else:
+            self._free += 1
+
+    def _serve_hp(self, time):
+        if self._hp_busy or not self._used_hp:
+            return
+        frame = self._used_hp.popleft()
+        self._hp_busy = True
+        self._release(time, frame)
+        self._events.push(time + self.hp_client.service_time(frame.num_bytes), self._hp_done)
+
+    def _hp_done(self, time):
+        self._hp_busy = False
+        self._serve_hp(time)
+
+    def _serve_lp(self, time):
+        if self._server_busy or not self._used_lp:
+            return
+        self._server_busy = True
+        self._events.push(time + self.server_frame_time, self._queue_lp, self._used_lp.popleft())
+
+    def _queue_lp(self, time, frame):
+        self._server_busy = False
+        frame.refs = 1 # Held by the server until every client has it queued
+        for client in frame.clients:
+            # The client queue is a ring buffer which keeps one entry empty
+            if len(self._fifos[client]) >= self.queue_size - 1:
+                self.report.drop(Drop(time, frame.index, CLIENT_QUEUE_FULL, client))
+                continue
+            frame.refs += 1
+            self._fifos[client].append(frame)
+            self._serve_client(time, client)
+        self._release(time, frame)
+        self._serve_lp(time)
+
+    def _serve_client(self, time, client):
+        if self._busy[client] or not self._fifos[client]:
+            return
+        # get_packet() copies the frame out, so the buffer is released before the client works on it
+        frame = self._fifos[client].popleft()
+        self._busy[client] = True
+        self._release(time, frame)
+        self._events.push(time + self.lp_clients[client].service_time(frame.num_bytes), self._client_done, client)
+
+    def _client_done(self, time, client):
+        self._busy[client] = False
+        self._serve_client(time, client)
+
+    def _check_threshold(self, time):
+        if not self.hp_client:
+            return
+        while self._free <= self.threshold:
+            dropped = False
+            for client, fifo in enumerate(self._fifos):
+                if fifo:
+                    frame = fifo.popleft()
+                    self.report.drop(Drop(time, frame.index, LP_THRESHOLD, client))
+                    self._release(time, frame)
+                    dropped = True
+            if not dropped:
+                break
+
+
+class RgmiiTxBufferModel():
+    """ Transmit buffering of the gigabit MAC
+
+        Parameters:
+        num_buffers (int): RGMII_MAC_BUFFER_COUNT_TX, for each of the LP and HP pools
+        bit_time (float): Time of one bit on the wire
+        hp (bool): Whether the application has an HP sender, which holds one HP buffer at all times
+    """
+
+    def __init__(self, num_buffers=RGMII_MAC_BUFFER_COUNT_TX, bit_time=SIM_BIT_TIME_1G, hp=False):
+        self.num_buffers = num_buffers
+        self.bit_time = bit_time
+        self.hp = hp
+
+    def run(self, trace):
+        """ Replays the trace of TxFrames, in time order, and returns a BufferingReport. A client blocks while it
+            waits for a buffer, so a stalled frame delays that client's later frames.
+        """
+        self._events = _EventQueue()
+        self._free = {False: self.num_buffers, True: self.num_buffers - 1 if self.hp else 0}
+        self._in_use = int(self.hp)
+        self._waiting = {False: collections.deque(), True: collections.deque()}
+        self._blocked = collections.defaultdict(collections.deque) # Frames behind a stalled one, by client
+        self._used = {False: collections.deque(), True: collections.deque()}
+        self._in_flight = 0
+        self._wire_free = 0
+        self.report = BufferingReport("TX", Occupancy(self.num_buffers * (2 if self.hp else 1), self._in_use))
+
+        for index, frame in enumerate(trace):
+            frame.index = index
+            self._events.push(frame.time, self._send, frame)
+        for time in self._events.run():
+            self.report.occupancy.record(time, self._in_use)
+        self.report.num_frames = len(trace)
+        return self.report
+
+    @staticmethod
+    def _sender(frame):
+        return "hp" if frame.hp else frame.client
+
+    def _send(self, time, frame):
+        assert frame.hp <= self.hp, "HP frame sent without an HP sender"
+        blocked = self._blocked.get(self._sender(frame))
+        if blocked is not None:
+            blocked.append((time, frame))
+        elif not self._free[frame.hp]:
+            self._blocked[self._sender(frame)] = collections.deque()
+            self._waiting[frame.hp].append((time, frame))
+        else:
+            self._take(time, frame)
+
+    def _take(self, time, frame):
+        self._free[frame.hp] -= 1
+        self._in_use += 1
+        self._used[frame.hp].append(frame)
+        self._start_tx(time)
+
+    def _start_tx(self, time):
+        while self._in_flight < TX_PINS_BUFFERS and (self._used[True] or self._used[False]):
+            frame = (self._used[True] or self._used[False]).popleft()
+            self._in_flight += 1
+            start = max(time, self._wire_free)
+            self._wire_free = start + wire_time(frame.num_bytes, self.bit_time)
+            self._events.push(self._wire_free, self._sent, frame)
+
+    def _sent(self, time, frame):
+        self._in_flight -= 1
+        self._free[frame.hp] += 1
+        self._in_use -= 1
+        waiting = self._waiting[frame.hp]
+        if waiting:
+            (since, stalled) = waiting.popleft()
+            self.report.stall(since, time, stalled.index)
+            self._take(time, stalled)
+            # Let the client carry on with the frames it would have sent while it was blocked
+            for (_, later) in self._blocked.pop(self._sender(stalled)):
+                self._send(time, later)
+        self._start_tx(time)
+
+
+class BufferingReport():
+    """ Occupancy, drops and stalls of one direction """
+
+    def __init__(self, name, occupancy):
+        self.name = name
+        self.occupancy = occupancy
+        self.num_frames = 0
+        self.drops = []
+        self.num_stalls = 0
+        self.stall_time = 0
+        self.first_stall = None
+
+    def drop(self, drop):
+        self.drops.append(drop)
+
+    def stall(self, since, until, index):
+        self.num_stalls += 1
+        self.stall_time += until - since
+        if self.first_stall is None:
+            self.first_stall = (since, index)
+
+    @property
+    def first_drop(self):
+        return self.drops[0] if self.drops else None
+
+    def drops_by_cause(self):
+        return collections.Counter(drop.cause for drop in self.drops)
+
+    def summary(self):
+        text = f"{self.name}: {self.num_frames} frames, {self.occupancy.summary()}\n"
+        if self.drops:
+            causes = ", ".join(f"{n} {cause}" for cause, n in sorted(self.drops_by_cause().items()))
+            text += f"{len(self.drops)} drops ({causes}), first {self.first_drop}\n"
+        elif self.name == "RX":
+            text += "No drops\n"
+        if self.num_stalls:
+            (since, index) = self.first_stall
+            text += f"{self.num_stalls} sends waited {self.stall_time / 10**9:.3f}us for a buffer, " \
+                    f"first frame {index} at {since / 10**9:.3f}us\n"
+        return text.rstrip("\n")
+
+
+def rx_trace_from_packets(packets, bit_time=SIM_BIT_TIME_1G, filter_model=None, start_time=0):
+    """ RxFrames for packets as a TX PHY sends them, each after its inter_frame_gap. Routing comes from a
+        mac_filter_model.MacFilterModel if given, otherwise every frame goes to LP client 0.
+    """
+    if filter_model is not None:
+        expected = filter_model.expected_deliveries(packets)
+        hp = {d.index for d in expected.hp}
+        clients = collections.defaultdict(list)
+        for client, deliveries in enumerate(expected.lp):
+            for d in deliveries:
+                clients[d.index].append(client)
+
+    trace = []
+    time = start_time
+    for index, packet in enumerate(packets):
+        num_bytes = len(packet.get_packet_bytes())
+        time += packet.inter_frame_gap + (PREAMBLE_BYTES + num_bytes + CRC_BYTES) * 8 * bit_time
+        if filter_model is None:
+            trace.append(RxFrame(time, num_bytes))
+        else:
+            trace.append(RxFrame(time, num_bytes, hp=index in hp, clients=clients[index]))
+    return trace
+
+
+def burst_trace(num_bursts, burst_len, gap, num_bytes=(64, 1518), num_clients=1, hp_ratio=0.0,
+                bit_time=SIM_BIT_TIME_1G, seed=0):
+    """ Bursts of burst_len back to back frames, with gap between the bursts. Each frame is for the HP client
+        with probability hp_ratio, and otherwise for one of the LP clients.
+    """
+    rand = random.Random(seed)
+    trace = []
+    time = 0
+    for _ in range(num_bursts):
+        for _ in range(burst_len):
+            length = rand.randint(*num_bytes)
+            time += wire_time(length, bit_time)
+            if rand.random() < hp_ratio:
+                trace.append(RxFrame(time - IFG_BITS * bit_time, length, hp=True))
+            else:
+                trace.append(RxFrame(time - IFG_BITS * bit_time, length, clients=(rand.randrange(num_clients),)))
+        time += gap
+    return trace
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gigabit MAC RX buffer sweep against line rate bursts")
+    parser.add_argument("--bursts", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=64, help="Frames per burst")
+    parser.add_argument("--gap-us", type=float, default=100.0, help="Time between bursts")
+    parser.add_argument("--min-len", type=int, default=64)
+    parser.add_argument("--max-len", type=int, default=1518)
+    parser.add_argument("--clients", type=int, default=1, help="Number of LP clients")
+    parser.add_argument("--client-mbps", type=float, default=500.0, help="Rate each LP client handles frames at")
+    parser.add_argument("--client-frame-us", type=float, default=0.0, help="Time each LP client spends per frame")
+    parser.add_argument("--hp-ratio", type=float, default=0.0, help="Fraction of frames for the HP client")
+    parser.add_argument("--hp-mbps", type=float, default=1000.0)
+    parser.add_argument("--buffers", type=int, nargs="+", default=[RGMII_MAC_BUFFER_COUNT_RX])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rate = ClientRate(args.client_mbps, args.client_frame_us * 10**9)
+    hp_client = ClientRate(args.hp_mbps) if args.hp_ratio else None
+    for num_buffers in args.buffers:
+        trace = burst_trace(args.bursts, args.burst, args.gap_us * 10**9, (args.min_len, args.max_len),
+                            args.clients, args.hp_ratio, seed=args.seed)
+        model = RgmiiRxBufferModel([rate] * args.clients, hp_client, num_buffers=num_buffers)
+        print(f"RGMII_MAC_BUFFER_COUNT_RX={num_buffers}")
+        print(model.run(trace).summary())
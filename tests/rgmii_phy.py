@@ -7,6 +7,8 @@ import zlib
 from mii_phy import TxPhy, RxPhy
 from mii_packet import MiiPacket
 from mii_clock import Clock
+import sim_trace
+import sim_timeline
 
 def pairwise(t):
     it = iter(t)
@@ -56,12 +58,18 @@ class RgmiiTransmitter(TxPhy):
 
             error_nibbles = packet.get_error_nibbles()
 
+            ifg_start_time = xsi.get_time()
             self.wait_until(xsi.get_time() + packet.inter_frame_gap)
+            frame_start_time = xsi.get_time()
+            frame_name = f"Packet {i}"
+            sim_trace.notify_packet(i, frame_start_time)
+            sim_timeline.complete(f"{self._name} tx", "IFG", ifg_start_time, frame_start_time)
 
             if self._verbose:
                 print(f"Sending packet {i}: {packet}")
                 sys.stdout.write(packet.dump())
 
+            sfd_index = len(packet.preamble_nibbles)
             if packet_rate == Clock.CLK_125MHz:
                 # The RGMII phy puts a nibble on each edge at 1Gb/s. This is mapped
                 # to having a byte every clock by the shim in the DUT
@@ -71,6 +79,8 @@ class RgmiiTransmitter(TxPhy):
                     self.wait(lambda x: self._clock.is_low())
                     self.set_dv(1)
                     self.set_data(byte)
+                    if self.latency_probe and i == sfd_index & ~1:
+                        self.latency_probe.tx_sfd(packet, xsi.get_time())
 
                     # Signal an error if required
                     if i in error_nibbles or i+1 in error_nibbles:
@@ -87,6 +97,8 @@ class RgmiiTransmitter(TxPhy):
                     self.wait(lambda x: self._clock.is_low())
                     self.set_dv(1)
                     self.set_data(byte)
+                    if self.latency_probe and i == sfd_index:
+                        self.latency_probe.tx_sfd(packet, xsi.get_time())
 
                     # Signal an error if required
                     if i in error_nibbles:
@@ -102,6 +114,8 @@ class RgmiiTransmitter(TxPhy):
             self.set_data(self._phy_status)
             self.set_dv(0)
             xsi.drive_port_pins(self._rxer, 0)
+            sim_timeline.complete(f"{self._name} tx", frame_name, frame_start_time, xsi.get_time(),
+                                  data_bytes=packet.num_data_bytes)
 
             if self._verbose:
                 print("Sent")
@@ -141,12 +155,14 @@ class RgmiiReceiver(RxPhy):
             packet = MiiPacket(rand, blank=True)
 
             frame_start_time = self.xsi.get_time()
+            sim_trace.notify_rx_frame(frame_start_time)
             in_preamble = True
             packet_rate = self._clock.get_rate()
 
             if last_frame_end_time:
                 ifgap = frame_start_time - last_frame_end_time
                 packet.inter_frame_gap = ifgap
+                sim_timeline.complete(f"{self._name} rx", "IFG", last_frame_end_time, frame_start_time)
 
             while True:
                 # Wait for a falling clock edge or enable low
@@ -166,6 +182,7 @@ class RgmiiReceiver(RxPhy):
                         if byte == 0xd5:
                             packet.append_preamble_nibble(byte & 0xf)
                             packet.set_sfd_nibble(byte >> 4)
+                            sfd_time = xsi.get_time()
                             in_preamble = False
                         else:
                             packet.append_preamble_nibble(byte & 0xf)
@@ -178,6 +195,7 @@ class RgmiiReceiver(RxPhy):
                     if in_preamble:
                         if nibble == 0xd:
                             packet.set_sfd_nibble(nibble)
+                            sfd_time = xsi.get_time()
                             in_preamble = False
                         else:
                             packet.append_preamble_nibble(nibble)
@@ -187,6 +205,14 @@ class RgmiiReceiver(RxPhy):
                 self.wait(lambda x: self._clock.is_high())
 
             packet.complete()
+            if not in_preamble:
+                packet.sfd_time = sfd_time
+                self.sfd_times.append(sfd_time)
+            if self.latency_probe and not in_preamble:
+                self.latency_probe.rx_sfd(packet, sfd_time)
+            sim_timeline.complete(f"{self._name} rx", f"Frame {packet_count}", frame_start_time, last_frame_end_time,
+                                  data_bytes=packet.num_data_bytes)
+            packet_count += 1
 
             if self._print_packets:
                 sys.stdout.write(packet.dump())
@@ -5,6 +5,9 @@ import Pyxsim as px
 import sys
 import zlib
 from mii_packet import MiiPacket
+import sim_trace
+import sim_timeline
+import frame_reducer
 import re
 
 def get_port_width_from_name(port_name):
@@ -36,7 +39,7 @@ class RMiiTxPhy(px.SimThread):
             # 1b ports will always be in a length=2 list. 4b port can be a length=1 list or just a string
         self._rxd = rxd
         self._rxdv = rxdv
-        self._rxer = rxer
+        self._rxer = rxer # None if the board has no RX_ER pin
         self._packets = []
         self._clock = clock
         self._rxd_4b_port_pin_assignment = rxd_4b_port_pin_assignment
@@ -46,6 +49,7 @@ class RMiiTxPhy(px.SimThread):
         self._complete_fn = complete_fn
         self._expect_loopback = expect_loopback
         self._dut_exit_time = dut_exit_time_us
+        self.latency_probe = None # Set to a LatencyProbe to record the time each tagged frame's SFD is sent
         self._rxd_port_width = get_port_width_from_name(self._rxd[0])
         if len(self._rxd) == 2:
             assert self._rxd_port_width == 1, f"Only 1bit ports allowed when specifying 2 ports. {self._rxd}"
@@ -115,35 +119,57 @@ class RMiiTxPhy(px.SimThread):
         self._clock = clock
 
     def set_packets(self, packets):
+        # Cut down by frame_reducer.py when reducing a failure
+        frame_reducer.apply_frame_edit(packets, self._clock)
         self._packets = packets
 
     def drive_error(self, value):
-        self.xsi.drive_port_pins(self._rxer, value)
+        if self._rxer:
+            self.xsi.drive_port_pins(self._rxer, value)
 
 class PacketManager():
-    def __init__(self, packets, clock, data_type, verbose=False):
+    def __init__(self, packets, clock, data_type, verbose=False, packet_start_fn=None, sfd_fn=None, time_fn=None):
         assert data_type in ['crumb', 'nibble']
+        self._packet_start_fn = packet_start_fn # Called with the packet index as each packet starts
+        self._sfd_fn = sfd_fn # Called with the packet as its SFD is sent
         self._data_type = data_type # 'nibble' or 'crumb'
-        self._pkts = packets
-        self._num_pkts = len(self._pkts)
         self._pkt_ended = False # Flag indicating if the current packet has ended
         self._verbose = verbose
         self._clock = clock
 
+        # packets can also be a queue of frames arriving during the test (see phy_loopback.py), which is
+        # polled each clock using the sim time from time_fn
+        self._queue = packets if hasattr(packets, "pop_ready") else None
+        self._time_fn = time_fn
+        self._pkts = [] if self._queue else packets
+        self._num_pkts = None if self._queue else len(self._pkts)
+        self._pkt = None
+
         # Set up to do the first packet
         self._current_pkt_index = 0
         if len(self._pkts):
-            self._pkt = self._pkts[self._current_pkt_index]
-            self._nibbles = self._pkt.get_nibbles() # list of nibbles in the current packet
-            self._error_nibbles = self._pkt.get_error_nibbles()
-            self._nibble_index = 0 # nibble we're indexing in the current packet
-            self._crumb_index = 0 # alternates between 0 and 1
-            self._ifg_wait_cycles = 0
+            self._start_packet(self._pkts[self._current_pkt_index])
+
+    def _start_packet(self, pkt):
+        self._pkt = pkt
+        self._nibbles = self._pkt.get_nibbles() # list of nibbles in the current packet
+        self._error_nibbles = self._pkt.get_error_nibbles()
+        self._nibble_index = 0 # nibble we're indexing in the current packet
+        self._crumb_index = 0 # alternates between 0 and 1
+        self._ifg_wait_cycles = 0
 
     def get_data(self):
         if(self._current_pkt_index == self._num_pkts): # Finished all the packets
             return None, False, False
 
+        if self._queue and self._pkt is None:
+            pkt = self._queue.pop_ready(self._time_fn())
+            if pkt is None: # Nothing to send yet, idle as if in the IFG
+                return None, False, True
+            if pkt is self._queue.END:
+                return None, False, False
+            self._start_packet(pkt)
+
         # From IFG in xsi ticks, derive IFG in clock cycles.
         # IFG_xsi_ticks/xsi_ticks_per_bit = IFG_in_no_of_bits
         # IFG_in_no_of_bits/bits_per_clock_cycle = ifg_in_clock_cycles
@@ -158,6 +184,13 @@ class PacketManager():
         else:
             error = False
 
+        if self._packet_start_fn and self._nibble_index == 0 and (self._data_type == 'nibble' or self._crumb_index == 0):
+            self._packet_start_fn(self._current_pkt_index)
+
+        if (self._sfd_fn and self._nibble_index == len(self._pkt.preamble_nibbles) and
+                (self._data_type == 'nibble' or self._crumb_index == 0)):
+            self._sfd_fn(self._pkt)
+
         if self._data_type == 'nibble':
             if self._verbose and self._nibble_index == 0:
                 print(f"Sending packet {self._current_pkt_index}: {self._pkt}")
@@ -178,13 +211,10 @@ class PacketManager():
             if self._verbose:
                 print(f"Sent")
             self._current_pkt_index = self._current_pkt_index + 1
-            if self._current_pkt_index < self._num_pkts:
-                self._pkt = self._pkts[self._current_pkt_index]
-                self._nibbles = self._pkt.get_nibbles()
-                self._error_nibbles = self._pkt.get_error_nibbles()
-                self._nibble_index = 0
-                self._crumb_index = 0
-                self._ifg_wait_cycles = 0
+            if self._queue:
+                self._pkt = None
+            elif self._current_pkt_index < self._num_pkts:
+                self._start_packet(self._pkts[self._current_pkt_index])
 
 
         return dataval, error, False
@@ -210,7 +240,22 @@ class RMiiTransmitter(RMiiTxPhy):
 
     def run(self):
         xsi = self.xsi
-        pkt_manager = PacketManager(self._packets, self._clock, "crumb", verbose=self._verbose) # read packet data at crumb granularity
+        frame = {} # index and start time of the packet being sent, end time of the last one
+
+        def packet_start(index):
+            frame_start_time = xsi.get_time()
+            sim_trace.notify_packet(index, frame_start_time)
+            if "end" in frame:
+                sim_timeline.complete(f"{self._name} tx", "IFG", frame["end"], frame_start_time)
+            frame.update(index=index, start=frame_start_time)
+
+        def sfd(packet):
+            if self.latency_probe:
+                self.latency_probe.tx_sfd(packet, xsi.get_time())
+
+        pkt_manager = PacketManager(self._packets, self._clock, "crumb", verbose=self._verbose,
+                                    packet_start_fn=packet_start, sfd_fn=sfd,
+                                    time_fn=xsi.get_time) # read packet data at crumb granularity
         self.start_test()
 
         while True:
@@ -218,7 +263,11 @@ class RMiiTransmitter(RMiiTxPhy):
 
             if pkt_manager.pkt_ended():
                 xsi.drive_port_pins(self._rxdv, 0)
-                xsi.drive_port_pins(self._rxer, 0)
+                self.drive_error(0)
+                if "start" in frame:
+                    frame["end"] = xsi.get_time()
+                    sim_timeline.complete(f"{self._name} tx", f"Packet {frame['index']}", frame.pop("start"),
+                                          frame["end"])
 
 
             data, drive_error, ifg_wait = pkt_manager.get_data()
@@ -239,10 +288,7 @@ class RMiiTransmitter(RMiiTxPhy):
                     xsi.drive_port_pins(self._rxd[1], (data >> 1) & 0x1)
 
                 # Signal an error if required
-                if drive_error == True:
-                    xsi.drive_port_pins(self._rxer, 1)
-                else:
-                    xsi.drive_port_pins(self._rxer, 0)
+                self.drive_error(1 if drive_error else 0)
 
             self.wait(lambda x: self._clock.is_low())
 
@@ -287,6 +333,9 @@ class RMiiRxPhy(px.SimThread):
         self.expected_packets = None
         self.expect_packet_index = 0
         self.num_expected_packets = 0
+        self.frame_counters = None # Set to a FrameCounters to count frames rather than print them
+        self.latency_probe = None # Set to a LatencyProbe to record the time each tagged frame's SFD is received
+        self.sfd_times = []       # Sim time of the SFD of each frame received
         #print(f"self._txd = {self._txd}, self._txd_port_width = {self._txd_port_width}, self._txd_4b_port_pin_assignment = {self._txd_4b_port_pin_assignment}")
 
     def get_name(self):
@@ -318,8 +367,10 @@ class RMiiReceiver(RMiiRxPhy):
     def run(self):
         rand = random.Random()
         last_frame_end_time = None
+        packet_count = 0
         nibble = 0
         crumb_index = 0
+        sfd_time = None
 
         xsi = self.xsi
         self.wait(lambda x: xsi.sample_port_pins(self._txen) == 0)
@@ -332,6 +383,7 @@ class RMiiReceiver(RMiiRxPhy):
                 if txen_new == 1:
                     packet = MiiPacket(rand, blank=True)
                     frame_start_time = self.xsi.get_time()
+                    sim_trace.notify_rx_frame(frame_start_time)
                     if self._verbose:
                         print(f"Frame start = {frame_start_time/1e6} ns")
                     in_preamble = True
@@ -339,11 +391,20 @@ class RMiiReceiver(RMiiRxPhy):
                     if last_frame_end_time:
                         ifgap = frame_start_time - last_frame_end_time
                         packet.inter_frame_gap = ifgap
+                        sim_timeline.complete(f"{self._name} rx", "IFG", last_frame_end_time, frame_start_time)
                 else:
                     last_frame_end_time = self.xsi.get_time()
                     if self._verbose:
                         print(f"Frame end = {last_frame_end_time/1e6} ns. crumb_index = {crumb_index}")
                     packet.complete()
+                    if not in_preamble:
+                        packet.sfd_time = sfd_time
+                        self.sfd_times.append(sfd_time)
+                    if self.latency_probe and not in_preamble:
+                        self.latency_probe.rx_sfd(packet, sfd_time)
+                    sim_timeline.complete(f"{self._name} rx", f"Frame {packet_count}", frame_start_time,
+                                          last_frame_end_time, data_bytes=packet.num_data_bytes)
+                    packet_count += 1
 
                     if self._print_packets:
                         sys.stdout.write(packet.dump())
@@ -377,6 +438,7 @@ class RMiiReceiver(RMiiRxPhy):
                     if in_preamble:
                         if nibble == 0xd:
                             packet.set_sfd_nibble(nibble)
+                            sfd_time = xsi.get_time()
                             in_preamble = False
                         else:
                             packet.append_preamble_nibble(nibble)
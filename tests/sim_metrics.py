@@ -0,0 +1,403 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Simulation performance metrics
+
+A pytest plugin (loaded from conftest.py) which, with --sim-metrics, wraps every px.run_on_simulator_() call in a
+test and records:
+ - wall time of the run
+ - sim time reached, from xsi.get_time() when the simulation is terminated
+ - the sim to real time ratio
+ - wall time spent running the Python SimThreads, rather than in xsim
+ - frames sent and received by the PHY models
+ - how much the run raised the peak RSS of the test process and of its child processes
+for each (test, profile), where the profile is the parametrisation id of the test. Each run is appended to an
+sqlite database so that slowdowns of the harness or of the DUT simulation show up as data. It is off by default
+as timing every SimThread wait predicate makes the simulations slower.
+
+With --profile-simthreads as well, the host time and wakeups of each SimThread, and of each place in it which waits, are
+also written to a report next to the database (see SimThreadProfiler).
+
+Running this file prints the latest run of each profile against the median of the runs before it:
+    python sim_metrics.py [logs/sim_metrics.db] [--test test_shaper] [--threshold 1.2]
+"""
+
+import argparse
+import datetime
+import os
+import platform
+import re
+import resource
+import sqlite3
+import statistics
+import sys
+import time
+
+import pytest
+
+import sim_trace
+
+try:
+    import Pyxsim as px
+except ImportError:
+    px = None
+
+DEFAULT_DB = "logs/sim_metrics.db"
+
+SIM_TICKS_PER_SECOND = 10**15 # xsim uses femtoseconds
+
+# The SimThread methods which hand control back to xsim
+SIMTHREAD_WAIT_METHODS = ("wait", "wait_until", "wait_for_port_pins_change", "wait_for_next_cycle")
+
+COLUMNS = (("timestamp", "TEXT"), ("host", "TEXT"), ("test", "TEXT"), ("profile", "TEXT"), ("binary", "TEXT"),
+           ("wall_s", "REAL"), ("sim_fs", "INTEGER"), ("sim_to_real", "REAL"), ("simthread_s", "REAL"),
+           ("frames_tx", "INTEGER"), ("frames_rx", "INTEGER"), ("peak_rss_rise_kb", "INTEGER"),
+           ("child_peak_rss_rise_kb", "INTEGER"), ("result", "TEXT"))
+
+
+class SimMetricsDb():
+    """ Appends run metrics to, and reads them back from, an sqlite database """
+
+    def __init__(self, filename=DEFAULT_DB):
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Several xdist workers may write at once, sqlite serialises them
+        self._conn = sqlite3.connect(filename, timeout=60)
+        columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, {columns})")
+        # Columns added since the database was created
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for name, kind in COLUMNS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+        self._conn.commit()
+
+    def add(self, **metrics):
+        names = [name for name, _ in COLUMNS if name in metrics]
+        self._conn.execute(f"INSERT INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                           [metrics[name] for name in names])
+        self._conn.commit()
+
+    def runs(self, test=None):
+        """ All runs, oldest first, as dicts """
+        query = "SELECT * FROM runs" + (" WHERE test = ?" if test else "") + " ORDER BY id"
+        cursor = self._conn.execute(query, (test,) if test else ())
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def close(self):
+        self._conn.close()
+
+
+class SimThreadProfiler():
+    """ Host time and wakeups for each SimThread, and each line in a SimThread which waits
+
+        A SimThread is charged with the time from returning from one wait to calling the next, which is
+        attributed to the line of the wait it returned from. The predicates passed to wait() are evaluated by
+        Pyxsim while other threads are blocked, so their evaluations are counted and timed separately.
+    """
+
+    def __init__(self):
+        self.threads = {}   # id -> [name, host seconds, wakeups, predicate calls, predicate seconds]
+        self.sites = {}     # (id, "file:line") -> [host seconds after waking, wakeups, predicate calls, predicate s]
+        self._resumed = {}  # id -> (time, site) of the last return from a wait
+        self._saved = []
+
+    @staticmethod
+    def thread_name(thread):
+        name = type(thread).__name__
+        if hasattr(thread, "get_name"):
+            name += f" {thread.get_name()}"
+        return name
+
+    def _wrap_predicate(self, predicate, thread_stats, site_stats):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return predicate(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                thread_stats[3] += 1
+                thread_stats[4] += elapsed
+                site_stats[2] += 1
+                site_stats[3] += elapsed
+        return wrapper
+
+    def _wrap_wait(self, wait):
+        profiler = self
+
+        def wrapper(thread, *args, **kwargs):
+            now = time.perf_counter()
+            key = id(thread)
+            caller = sys._getframe(1)
+            site = f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno}"
+            thread_stats = profiler.threads.setdefault(key, [profiler.thread_name(thread), 0.0, 0, 0, 0.0])
+            site_stats = profiler.sites.setdefault((key, site), [0.0, 0, 0, 0.0])
+
+            if key in profiler._resumed:
+                resumed_time, resumed_site = profiler._resumed[key]
+                thread_stats[1] += now - resumed_time
+                profiler.sites[(key, resumed_site)][0] += now - resumed_time
+
+            if args and callable(args[0]):
+                args = (profiler._wrap_predicate(args[0], thread_stats, site_stats),) + args[1:]
+            try:
+                return wait(thread, *args, **kwargs)
+            finally:
+                thread_stats[2] += 1
+                site_stats[1] += 1
+                profiler._resumed[key] = (time.perf_counter(), site)
+        return wrapper
+
+    def install(self):
+        for name in SIMTHREAD_WAIT_METHODS:
+            if hasattr(px.SimThread, name):
+                original = getattr(px.SimThread, name)
+                self._saved.append((name, original))
+                setattr(px.SimThread, name, self._wrap_wait(original))
+
+    def uninstall(self):
+        while self._saved:
+            name, original = self._saved.pop()
+            setattr(px.SimThread, name, original)
+
+    def report(self, out=sys.stdout):
+        total = sum(t[1] + t[4] for t in self.threads.values())
+        out.write(f"{'thread':32} {'host s':>9} {'%':>6} {'wakeups':>10} {'pred calls':>11} {'pred s':>9}\n")
+        for key, (name, host_s, wakeups, calls, pred_s) in sorted(self.threads.items(),
+                                                                    key=lambda t: -(t[1][1] + t[1][4])):
+            percent = 100 * (host_s + pred_s) / total if total else 0
+            out.write(f"{name:32} {host_s:9.3f} {percent:6.1f} {wakeups:10} {calls:11} {pred_s:9.3f}\n")
+
+        out.write(f"\n{'thread':32} {'wait site':28} {'after s':>9} {'wakeups':>10} {'pred calls':>11} "
+                  f"{'pred s':>9}\n")
+        for (key, site), (host_s, wakeups, calls, pred_s) in sorted(self.sites.items(),
+                                                                    key=lambda s: -(s[1][0] + s[1][3])):
+            name = self.threads[key][0]
+            out.write(f"{name:32} {site:28} {host_s:9.3f} {wakeups:10} {calls:11} {pred_s:9.3f}\n")
+
+
+class SimRunRecorder():
+    """ Measures the px.run_on_simulator_() calls made while it is installed """
+
+    def __init__(self, db, test, profile, profile_dir=None):
+        self._db = db
+        self._test = test
+        self._profile = profile
+        self._profile_dir = profile_dir
+        self._num_runs = 0
+        self._saved = []
+
+    def _patch(self, owner, name, replacement):
+        self._saved.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def install(self):
+        self._patch(px, "run_on_simulator_", self._wrap_run(px.run_on_simulator_))
+
+    def uninstall(self):
+        while self._saved:
+            owner, name, original = self._saved.pop()
+            setattr(owner, name, original)
+
+    def _wrap_run(self, run):
+        def run_on_simulator_(binary, *args, **kwargs):
+            return self._measure_run(run, binary, *args, **kwargs)
+        return run_on_simulator_
+
+    def _measure_run(self, run, binary, *args, **kwargs):
+        state = {"sim_fs": None, "latest_fs": 0, "frames_tx": 0, "frames_rx": 0, "simthread_s": 0.0}
+        resumed = {}
+        # ru_maxrss is the peak of the whole process so far, so a run is measured by how much it raises it
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        child_peak_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        start = time.perf_counter()
+
+        def wrap_terminate(terminate):
+            def wrapper(xsi, *a, **kw):
+                if state["sim_fs"] is None:
+                    state["sim_fs"] = xsi.get_time()
+                return terminate(xsi, *a, **kw)
+            return wrapper
+
+        def wrap_predicate(predicate):
+            def wrapper(*a, **kw):
+                predicate_start = time.perf_counter()
+                try:
+                    return predicate(*a, **kw)
+                finally:
+                    state["simthread_s"] += time.perf_counter() - predicate_start
+            return wrapper
+
+        def wrap_thread_run(thread):
+            run = thread.run
+
+            def wrapper(*a, **kw):
+                resumed[id(thread)] = time.perf_counter()
+                return run(*a, **kw)
+            return wrapper
+
+        def wrap_wait(wait):
+            # Time between a SimThread resuming (or entering run()) and its next wait, and the time spent in its
+            # wait predicates, is spent in Python. Only one SimThread runs at a time, so these add up to the
+            # Python share of the wall time. A thread not seen entering run() is counted from its first wait
+            def wrapper(thread, *a, **kw):
+                now = time.perf_counter()
+                state["simthread_s"] += now - resumed.get(id(thread), now)
+                if a and callable(a[0]):
+                    a = (wrap_predicate(a[0]),) + a[1:]
+                try:
+                    return wait(thread, *a, **kw)
+                finally:
+                    resumed[id(thread)] = time.perf_counter()
+            return wrapper
+
+        def wrap_notify(notify, counter):
+            def wrapper(*a, **kw):
+                state[counter] += 1
+                state["latest_fs"] = max(state["latest_fs"], a[-1])
+                return notify(*a, **kw)
+            return wrapper
+
+        num_saved = len(self._saved)
+        self._patch(px.Xsi, "terminate", wrap_terminate(px.Xsi.terminate))
+        for name in SIMTHREAD_WAIT_METHODS:
+            if hasattr(px.SimThread, name):
+                self._patch(px.SimThread, name, wrap_wait(getattr(px.SimThread, name)))
+        self._patch(sim_trace, "notify_packet", wrap_notify(sim_trace.notify_packet, "frames_tx"))
+        self._patch(sim_trace, "notify_rx_frame", wrap_notify(sim_trace.notify_rx_frame, "frames_rx"))
+        for thread in kwargs.get("simthreads", []):
+            self._patch(thread, "run", wrap_thread_run(thread))
+
+        profiler = None
+        if self._profile_dir:
+            profiler = SimThreadProfiler()
+            profiler.install()
+
+        result = None
+        try:
+            result = run(binary, *args, **kwargs)
+            return result
+        finally:
+            wall_s = time.perf_counter() - start
+            if profiler:
+                profiler.uninstall()
+                self._write_profile(profiler)
+            while len(self._saved) > num_saved:
+                owner, name, original = self._saved.pop()
+                setattr(owner, name, original)
+
+            sim_fs = state["sim_fs"] if state["sim_fs"] is not None else state["latest_fs"]
+            self._db.add(timestamp=datetime.datetime.now().isoformat(timespec="seconds"),
+                         host=platform.node(),
+                         test=self._test,
+                         profile=self._profile,
+                         binary=str(binary),
+                         wall_s=wall_s,
+                         sim_fs=int(sim_fs),
+                         sim_to_real=(sim_fs / SIM_TICKS_PER_SECOND) / wall_s if wall_s else None,
+                         simthread_s=state["simthread_s"],
+                         frames_tx=state["frames_tx"],
+                         frames_rx=state["frames_rx"],
+                         peak_rss_rise_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak_rss_kb,
+                         child_peak_rss_rise_kb=(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss -
+                                                 child_peak_rss_kb),
+                         result="pass" if result is True else "fail")
+
+
+    def _write_profile(self, profiler):
+        self._num_runs += 1
+        name = re.sub(r"[^\w.-]", "_", f"{self._test}_{self._profile}_{self._num_runs}")
+        with open(os.path.join(self._profile_dir, f"simthread_profile_{name}.txt"), "w") as f:
+            f.write(f"{self._test}[{self._profile}] run {self._num_runs}\n\n")
+            profiler.report(f)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--sim-metrics-db",
+        action="store",
+        default=DEFAULT_DB,
+        help="Database to append the simulator run metrics to",
+    )
+    parser.addoption(
+        "--sim-metrics",
+        action="store_true",
+        help="Record simulator run metrics. Timing the SimThreads slows the simulations down",
+    )
+    parser.addoption(
+        "--profile-simthreads",
+        action="store_true",
+        help="With --sim-metrics, write a report of the host time taken by each SimThread next to the metrics database",
+    )
+
+
+@pytest.fixture(autouse=True)
+def sim_metrics(request):
+    """ Records every simulator run made by the test """
+    if px is None or not request.config.getoption("--sim-metrics"):
+        yield None
+        return
+
+    db_filename = request.config.getoption("--sim-metrics-db")
+    db = SimMetricsDb(db_filename)
+    callspec = getattr(request.node, "callspec", None)
+    profile_dir = None
+    if request.config.getoption("--profile-simthreads"):
+        profile_dir = os.path.dirname(db_filename) or "."
+    recorder = SimRunRecorder(db, request.node.originalname, callspec.id if callspec else "", profile_dir)
+    recorder.install()
+    try:
+        yield recorder
+    finally:
+        recorder.uninstall()
+        db.close()
+
+
+def find_regressions(runs, threshold=1.2, metric="sim_to_real", min_history=3):
+    """ Compare the latest run of each (test, profile) with the median of the earlier ones.
+
+        Returns a list of (test, profile, latest, median) where the latest run is threshold times slower.
+    """
+    history = {}
+    for run in runs:
+        if run[metric] is not None:
+            history.setdefault((run["test"], run["profile"]), []).append(run[metric])
+
+    regressions = []
+    for (test, profile), values in sorted(history.items()):
+        if len(values) <= min_history:
+            continue
+        latest = values[-1]
+        median = statistics.median(values[:-1])
+        # Lower is worse for a sim to real ratio, higher is worse for times
+        slower = latest * threshold < median if metric == "sim_to_real" else latest > median * threshold
+        if slower:
+            regressions.append((test, profile, latest, median))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report simulator performance from the metrics database")
+    parser.add_argument("db", nargs="?", default=DEFAULT_DB)
+    parser.add_argument("--test", help="Only report this test")
+    parser.add_argument("--metric", default="sim_to_real", choices=["sim_to_real", "wall_s", "simthread_s"])
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown to flag as a regression")
+    cmd_args = parser.parse_args()
+
+    db = SimMetricsDb(cmd_args.db)
+    runs = db.runs(cmd_args.test)
+    latest = {}
+    for run in runs:
+        latest[(run["test"], run["profile"])] = run
+    print(f"{'test':24} {'profile':40} {'wall s':>9} {'sim us':>10} {'sim/real':>10} {'python s':>9} {'frames':>7}")
+    for (test, profile), run in sorted(latest.items()):
+        sim_to_real = f"{run['sim_to_real']:10.2e}" if run["sim_to_real"] is not None else f"{'':10}"
+        print(f"{test:24} {profile:40} {run['wall_s']:9.1f} {run['sim_fs'] / 1e9:10.1f} {sim_to_real} "
+              f"{run['simthread_s']:9.1f} {run['frames_tx'] + run['frames_rx']:7}")
+
+    regressions = find_regressions(runs, cmd_args.threshold, cmd_args.metric)
+    for test, profile, value, median in regressions:
+        print(f"REGRESSION: {test}[{profile}] {cmd_args.metric} {value:.3g} vs median {median:.3g}")
+    db.close()
@@ -0,0 +1,142 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Simulation event timeline
+
+SimThreads record what they are doing against sim time: frames and IFGs on the PHYs, clock speed changes,
+checker ticks and the lines printed by the SimThreads. Events are appended to an in-memory list and written out at the end as a
+Chrome trace (JSON) which can be opened in https://ui.perfetto.dev or chrome://tracing, with one track for each
+PHY, clock and checker.
+
+The module level functions do nothing unless a timeline has been started, so they are cheap enough to leave in
+the PHY models. Enable it for the simulator tests with helpers.args.timeline. The DUT's output is written by
+xsim straight to the process's stdout, not through sys.stdout, so it is not on the timeline.
+"""
+
+import atexit
+import json
+import sys
+
+SIM_TICKS_PER_US = 10**9 # xsim uses femtoseconds, the Chrome trace format microseconds
+
+# The timeline of the current simulation
+_active = None
+
+
+def start(filename, record_stdout=True):
+    """ Start recording events, to be written to filename when the simulator run ends (see run_finished()) """
+    global _active
+    if _active:
+        _active.close()
+    _active = Timeline(filename, record_stdout)
+    return _active
+
+
+def run_finished():
+    """ Called when the simulator run ends: saves the timeline and stops recording sys.stdout """
+    if _active:
+        _active.close()
+
+
+def instant(track, name, time, **args):
+    """ A point event, e.g. a checker tick """
+    if _active:
+        _active.events.append(("i", track, name, time, None, args))
+        _active.latest_time = time
+
+
+def complete(track, name, start_time, end_time, **args):
+    """ An event with a duration, e.g. a frame or an IFG """
+    if _active:
+        _active.events.append(("X", track, name, start_time, end_time - start_time, args))
+        _active.latest_time = end_time
+
+
+def counter(track, name, time, **values):
+    """ Values plotted against time, e.g. the current clock rate """
+    if _active:
+        _active.events.append(("C", track, name, time, None, values))
+        _active.latest_time = time
+
+
+class _StdoutRecorder():
+    """ Wraps sys.stdout to put each line printed from Python (by the SimThreads) on the "stdout" track at the
+        latest sim time seen
+    """
+
+    def __init__(self, stream, timeline):
+        self._stream = stream
+        self._timeline = timeline
+        self._partial = ""
+
+    def write(self, text):
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            if line:
+                self._timeline.events.append(("i", "stdout", line, self._timeline.latest_time, None, {}))
+        return self._stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class Timeline():
+    """ Buffered events of one simulation
+
+        Each event is a tuple of (phase, track, name, time, duration, args) with times in femtoseconds
+    """
+
+    def __init__(self, filename, record_stdout=True):
+        self.filename = filename
+        self.events = []
+        self.latest_time = 0
+        self._stdout = None
+        if record_stdout:
+            self._stdout = sys.stdout
+            sys.stdout = _StdoutRecorder(sys.stdout, self)
+
+    def tracks(self):
+        tracks = {}
+        for event in self.events:
+            tracks.setdefault(event[1], len(tracks) + 1)
+        return tracks
+
+    def to_chrome_trace(self):
+        tracks = self.tracks()
+        trace_events = [{"ph": "M", "pid": 1, "name": "process_name", "args": {"name": "xsim"}}]
+        for track, tid in tracks.items():
+            trace_events.append({"ph": "M", "pid": 1, "tid": tid, "name": "thread_name", "args": {"name": track}})
+            trace_events.append({"ph": "M", "pid": 1, "tid": tid, "name": "thread_sort_index",
+                                 "args": {"sort_index": tid}})
+
+        for phase, track, name, time, duration, args in self.events:
+            event = {"ph": phase, "pid": 1, "tid": tracks[track], "name": name, "ts": time / SIM_TICKS_PER_US}
+            if phase == "X":
+                event["dur"] = duration / SIM_TICKS_PER_US
+            elif phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ns"}
+
+    def save(self, filename=None):
+        with open(filename or self.filename, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+    def close(self):
+        global _active
+        if self._stdout:
+            sys.stdout = self._stdout
+            self._stdout = None
+        self.save()
+        if _active is self:
+            _active = None
+
+
+@atexit.register
+def _close_active():
+    if _active:
+        _active.close()
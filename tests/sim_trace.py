@@ -0,0 +1,411 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Windowed and triggered xsim tracing
+
+Rather than writing the instruction trace and VCD for the whole run, xsim writes them into named pipes which are
+read by filter processes (this file run as a script). The filters only keep the parts of the trace inside the
+recording windows. The windows are opened and closed by the Python PHY threads:
+ - on a packet index (start_packet / stop_packet)
+ - on a sim time window (start_time / stop_time)
+ - when a checker prints an "ERROR" line, with some history before it and some time after it
+
+The controller publishes the windows to the filters as a list of (sim time, on/off) transitions in a small shared
+memory file. VCD output contains its own timestamps, so it is windowed exactly and starts each window with a dump
+of every signal value. Instruction trace lines have no sim time, so they are windowed using the latest time
+reported by the PHY threads and keep a number of lines from before each window.
+
+Tracing still slows xsim down while it is running, but the log files only contain the parts of interest.
+"""
+
+import atexit
+import mmap
+import os
+import re
+import struct
+import subprocess
+import sys
+from collections import deque
+
+CONTROL_MAGIC = 0x57525453
+CONTROL_HEADER = struct.Struct("<IIQ")  # magic, num_transitions, latest sim time
+CONTROL_TRANSITION = struct.Struct("<QQ") # sim time, state
+MAX_TRANSITIONS = 1024
+
+SIM_TICKS_PER_SECOND = 10**15 # xsim uses femtoseconds
+
+VCD_DEFAULT_OPTIONS = ["-ports", "-ports-detailed", "-instructions", "-functions", "-cycles", "-clock-blocks", "-pads"]
+
+# The controller of the current simulation, notified by the PHY threads
+_active = None
+
+# Where the PHY threads record frame boundaries for xsim_trace_analyser.py
+_frame_log = None
+
+
+def notify_packet(index, time):
+    """ Called by the PHY threads at the start of each packet they send """
+    if _frame_log:
+        _frame_log.add("tx", index, time)
+    if _active:
+        _active.on_packet(index, time)
+
+
+def notify_time(time):
+    """ Called by any thread to keep the controller's view of sim time up to date """
+    if _active:
+        _active.on_time(time)
+
+
+def notify_rx_frame(time):
+    """ Called by the PHY threads at the start of each frame they receive from the DUT """
+    if _frame_log:
+        _frame_log.add("rx", None, time)
+    notify_time(time)
+
+
+class FrameLog():
+    """ CSV of (source, index, sim time) for the start of each frame sent ("tx") or received ("rx") by the PHYs """
+
+    def __init__(self, filename):
+        self._file = open(filename, "w")
+        self._file.write("source,index,time\n")
+        self._num_rx = 0
+
+    def add(self, source, index, time):
+        if index is None:
+            index = self._num_rx
+            self._num_rx += 1
+        self._file.write(f"{source},{index},{time}\n")
+
+    def close(self):
+        self._file.close()
+
+
+def start_frame_log(filename):
+    """ Record the frame boundaries of the next simulation into filename """
+    global _frame_log
+    if _frame_log:
+        _frame_log.close()
+    _frame_log = FrameLog(filename)
+
+
+class SimTraceControl():
+    """ The shared memory recording windows, written by the controller and read by the filters """
+
+    SIZE = CONTROL_HEADER.size + MAX_TRANSITIONS * CONTROL_TRANSITION.size
+
+    def __init__(self, filename, create=False):
+        with open(filename, "r+b" if not create else "w+b") as f:
+            if create:
+                f.truncate(self.SIZE)
+            self._mm = mmap.mmap(f.fileno(), self.SIZE)
+        if create:
+            CONTROL_HEADER.pack_into(self._mm, 0, CONTROL_MAGIC, 0, 0)
+        self._num_read = 0
+        self._transitions = []
+
+    def add_transition(self, sim_time, state):
+        magic, count, latest = CONTROL_HEADER.unpack_from(self._mm, 0)
+        if count == MAX_TRANSITIONS:
+            print(f"WARNING: sim trace window limit reached, ignoring transition at {sim_time}")
+            return
+        CONTROL_TRANSITION.pack_into(self._mm, CONTROL_HEADER.size + count * CONTROL_TRANSITION.size,
+                                     int(sim_time), 1 if state else 0)
+        CONTROL_HEADER.pack_into(self._mm, 0, magic, count + 1, latest)
+
+    def set_time(self, sim_time):
+        magic, count, _ = CONTROL_HEADER.unpack_from(self._mm, 0)
+        CONTROL_HEADER.pack_into(self._mm, 0, magic, count, int(sim_time))
+
+    def latest_time(self):
+        return CONTROL_HEADER.unpack_from(self._mm, 0)[2]
+
+    def state_at(self, sim_time):
+        """ Whether recording is on at sim_time. The last transition at or before sim_time wins """
+        count = CONTROL_HEADER.unpack_from(self._mm, 0)[1]
+        while self._num_read < count:
+            offset = CONTROL_HEADER.size + self._num_read * CONTROL_TRANSITION.size
+            self._transitions.append(CONTROL_TRANSITION.unpack_from(self._mm, offset))
+            self._transitions.sort()
+            self._num_read += 1
+
+        state = False
+        for transition_time, transition_state in self._transitions:
+            if transition_time > sim_time:
+                break
+            state = bool(transition_state)
+        return state
+
+    def close(self):
+        self._mm.close()
+
+
+class _ErrorWatch():
+    """ Wraps sys.stdout to spot checker ERROR lines """
+
+    def __init__(self, stream, controller):
+        self._stream = stream
+        self._controller = controller
+
+    def write(self, text):
+        if "ERROR" in text:
+            self._controller.on_error()
+        return self._stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class SimTraceController():
+    """ Creates the pipes and filter processes for one simulation and opens/closes the recording windows
+
+        Parameters:
+        filename (str): Base name of the log files, without extension
+        start_packet, stop_packet (int): Record from the start of packet start_packet until the start of
+            packet stop_packet, as sent by the PHY threads
+        start_time, stop_time (float): Record between these sim times (femtoseconds)
+        on_error (bool): Start recording when an ERROR line is printed
+        pre_error_time (float): With on_error, how much VCD history to keep from before the error
+        post_error_time (float): With on_error, how long to keep recording after the error
+        pre_lines (int): Number of instruction trace lines to keep from before each window
+        tiles (list): Tiles to trace, e.g. ["tile[0]"]
+        ports (list): Regular expressions matching the port names to keep in the VCD. All if None
+        vcd_options (list): Options for each tile in --vcd-tracing
+    """
+
+    def __init__(self, filename, start_packet=None, stop_packet=None, start_time=None, stop_time=None,
+                 on_error=False, pre_error_time=20e9, post_error_time=20e9, pre_lines=10000,
+                 tiles=("tile[0]",), ports=None, vcd_options=VCD_DEFAULT_OPTIONS):
+        self._filename = filename
+        self._start_packet = start_packet
+        self._stop_packet = stop_packet
+        self._on_error = on_error
+        self._pre_error_time = pre_error_time
+        self._post_error_time = post_error_time
+        self._pre_lines = pre_lines
+        self._tiles = list(tiles)
+        self._ports = ports
+        self._vcd_options = vcd_options
+        self._recording = False
+        self._latest_time = 0
+        self._error_seen = False
+        self._filters = []
+        self._stdout = None
+
+        self._control_file = f"{filename}.ctrl"
+        self._control = SimTraceControl(self._control_file, create=True)
+        if start_time is not None:
+            self._control.add_transition(start_time, True)
+        if stop_time is not None:
+            self._control.add_transition(stop_time, False)
+        if start_packet is None and start_time is None and not on_error:
+            self._set_recording(True, 0)
+
+    def _set_recording(self, state, sim_time):
+        if state != self._recording:
+            self._recording = state
+            self._control.add_transition(max(sim_time, 0), state)
+
+    def _start_filter(self, kind, pipe, output):
+        if os.path.exists(pipe):
+            os.remove(pipe)
+        os.mkfifo(pipe)
+        cmd = [sys.executable, os.path.abspath(__file__), kind, pipe, output, self._control_file,
+               "--pre-lines", str(self._pre_lines), "--pre-time", str(self._pre_error_time if self._on_error else 0)]
+        for tile in self._tiles:
+            cmd += ["--tile", tile]
+        for port in self._ports or []:
+            cmd += ["--port", port]
+        self._filters.append(subprocess.Popen(cmd))
+
+    def sim_args(self):
+        """ Start the filters and return the xsim arguments that write into them """
+        global _active
+        if _active:
+            _active.close()
+        _active = self
+
+        self._start_filter("insn", f"{self._filename}.txt.pipe", f"{self._filename}.txt")
+        self._start_filter("vcd", f"{self._filename}.vcd.pipe", f"{self._filename}.vcd")
+
+        vcd_args = f"-o {self._filename}.vcd.pipe"
+        for tile in self._tiles:
+            vcd_args += f" -tile {tile} " + " ".join(self._vcd_options)
+
+        if self._on_error:
+            self._stdout = sys.stdout
+            sys.stdout = _ErrorWatch(sys.stdout, self)
+
+        return ['--trace-to', f"{self._filename}.txt.pipe", '--enable-fnop-tracing', '--vcd-tracing', vcd_args]
+
+    def on_time(self, sim_time):
+        self._latest_time = sim_time
+        self._control.set_time(sim_time)
+
+    def on_packet(self, index, sim_time):
+        self.on_time(sim_time)
+        # A window may have been opened or closed by start_time/stop_time
+        self._recording = self._control.state_at(sim_time)
+        if self._start_packet is not None and index == self._start_packet:
+            self._set_recording(True, sim_time)
+        if self._stop_packet is not None and index == self._stop_packet:
+            self._set_recording(False, sim_time)
+
+    def on_error(self):
+        if self._error_seen:
+            return
+        self._error_seen = True
+        self._recording = self._control.state_at(self._latest_time)
+        if not self._recording:
+            self._control.add_transition(max(self._latest_time - self._pre_error_time, 0), True)
+        self._control.add_transition(self._latest_time + self._post_error_time, False)
+        self._recording = True
+
+    def close(self, timeout_s=60):
+        """ Wait for the filters to finish writing. They exit when xsim closes the pipes """
+        global _active
+        if self._stdout:
+            sys.stdout = self._stdout
+            self._stdout = None
+        for f in self._filters:
+            try:
+                f.wait(timeout_s)
+            except subprocess.TimeoutExpired:
+                f.kill()
+        self._filters = []
+        self._control.close()
+        if _active is self:
+            _active = None
+
+
+def run_finished(timeout_s=60):
+    """ Called when the simulator run ends: waits for the filters and stops watching sys.stdout """
+    if _active:
+        _active.close(timeout_s)
+
+
+@atexit.register
+def _close_active():
+    if _active:
+        _active.close(timeout_s=5)
+    if _frame_log:
+        _frame_log.close()
+
+
+def filter_instructions(fin, fout, control, tiles, pre_lines):
+    """ Copy the instruction trace lines of the selected tiles while recording, with pre_lines of history """
+    prefixes = tuple(f"{tile}@" for tile in tiles)
+    history = deque(maxlen=pre_lines)
+    for line in fin:
+        if prefixes and not line.startswith(prefixes):
+            continue
+        if control.state_at(control.latest_time()):
+            if history:
+                fout.writelines(history)
+                history.clear()
+            fout.write(line)
+        elif pre_lines:
+            history.append(line)
+
+
+VCD_TIMESCALE_UNITS = {"s": 10**15, "ms": 10**12, "us": 10**9, "ns": 10**6, "ps": 10**3, "fs": 1}
+
+
+def filter_vcd(fin, fout, control, port_patterns, pre_time):
+    """ Copy the VCD header (restricted to the matching signals) and the value changes inside the windows.
+
+        Each window starts with the value of every signal. The changes are delayed by pre_time so that
+        windows which start in the past (on an error) can still be honoured.
+    """
+    patterns = [re.compile(p) for p in port_patterns]
+    keep_ids = None if not patterns else set()
+    fs_per_unit = 1000
+
+    # Header
+    for line in fin:
+        words = line.split()
+        if words[:1] == ["$timescale"]:
+            text = line
+            while "$end" not in text:
+                text += next(fin)
+            match = re.search(r"(\d+)\s*([a-z]+)", text.replace("$timescale", "").replace("$end", ""))
+            if match:
+                fs_per_unit = int(match.group(1)) * VCD_TIMESCALE_UNITS.get(match.group(2), 1000)
+            fout.write(text)
+            continue
+        if words[:1] == ["$var"] and keep_ids is not None:
+            # $var type size id reference $end
+            if any(p.search(" ".join(words[4:-1])) for p in patterns):
+                keep_ids.add(words[3])
+            else:
+                continue
+        fout.write(line)
+        if words[:1] == ["$enddefinitions"]:
+            break
+
+    values = {}
+    pending = deque()   # (time, [changes]) not yet old enough to decide on
+    recording = False
+    pre_units = pre_time / fs_per_unit
+
+    def change_id(change):
+        return change[1:] if change[0] in "01xXzZ" else change.split()[-1]
+
+    def decide(vcd_time, changes):
+        nonlocal recording
+        state = control.state_at(vcd_time * fs_per_unit)
+        if state and not recording:
+            fout.write(f"#{vcd_time}\n$dumpvars\n")
+            fout.writelines(f"{v}\n" for v in values.values())
+            fout.write("$end\n")
+        elif state and changes:
+            fout.write(f"#{vcd_time}\n")
+        recording = state
+        for change in changes:
+            if state:
+                fout.write(f"{change}\n")
+            values[change_id(change)] = change
+
+    vcd_time = 0
+    changes = []
+    for line in fin:
+        line = line.strip()
+        if not line or line.startswith("$"):
+            continue
+        if line[0] == "#":
+            pending.append((vcd_time, changes))
+            vcd_time = int(line[1:])
+            changes = []
+            while pending and pending[0][0] + pre_units < vcd_time:
+                decide(*pending.popleft())
+            continue
+        if keep_ids is None or change_id(line) in keep_ids:
+            changes.append(line)
+
+    pending.append((vcd_time, changes))
+    while pending:
+        decide(*pending.popleft())
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Filter an xsim trace pipe into a log file")
+    parser.add_argument("kind", choices=["insn", "vcd"])
+    parser.add_argument("pipe")
+    parser.add_argument("output")
+    parser.add_argument("control")
+    parser.add_argument("--tile", action="append", default=[])
+    parser.add_argument("--port", action="append", default=[])
+    parser.add_argument("--pre-lines", type=int, default=0)
+    parser.add_argument("--pre-time", type=float, default=0)
+    cmd_args = parser.parse_args()
+
+    control = SimTraceControl(cmd_args.control)
+    with open(cmd_args.pipe) as fin, open(cmd_args.output, "w") as fout:
+        if cmd_args.kind == "insn":
+            filter_instructions(fin, fout, control, cmd_args.tile, cmd_args.pre_lines)
+        else:
+            filter_vcd(fin, fout, control, cmd_args.port, cmd_args.pre_time)
+    os.remove(cmd_args.pipe)
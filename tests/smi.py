@@ -4,15 +4,32 @@
 import Pyxsim as px
 from bitstring import BitArray, BitStream
 
+from phy_registers import PhyRegisters, NO_PHY_VALUE
+
 VERBOSE = False
 
+# Bit numbers, counted from the first bit of the preamble, at which each field of the frame has been shifted in
+PREAMBLE_END_BIT = 31
+HEADER_END_BIT = 45     # Start of frame, op code, PHY address and register address
+TURNAROUND_END_BIT = 47
+FRAME_END_BIT = 63
+
+START_OF_FRAME = 0b01
+OP_CODE_READ = 0b10
+OP_CODE_WRITE = 0b01
+
 class smi_master_checker(px.SimThread):
     """"
     This simulator thread will act as SMI slave and check any transactions
     sent by the master.
+
+    The bits are shifted into an integer and the fields decoded with masks at the end of each part of the frame.
+    Reads and writes are served by a PhyRegisters register file, unless tx_data is given, in which case reads
+    return its words in order.
     """
 
-    def __init__(self, mdc_port, mdio_port, rst_n_port, expected_speed_hz, tx_data=[], mdc_mdio_bit_pos=None):
+    def __init__(self, mdc_port, mdio_port, rst_n_port, expected_speed_hz, tx_data=[], mdc_mdio_bit_pos=None,
+                 registers=None):
       # ports and data
       self._mdc_port = mdc_port
       self._mdio_port = mdio_port
@@ -20,7 +37,8 @@ class smi_master_checker(px.SimThread):
       self._rst_n_port = rst_n_port
 
       # Data to send
-      self._tx_data =[[int(bit) for bit in BitArray(uint=tx_word, length=16).bin] for tx_word in tx_data]
+      self._tx_data = list(tx_data) if tx_data else None
+      self._registers = registers if registers is not None else PhyRegisters()
 
       # Bit rate
       self._expected_speed_hz = expected_speed_hz
@@ -49,17 +67,12 @@ class smi_master_checker(px.SimThread):
       self._bit_times = []
       self._prev_fall_time = None
 
-      # Packet info
-      self._data = [] # Running data accumulator
-      self._state = "idle"
-      self._preamble = None
-      self._start_of_frame = None
+      # Frame info
+      self._shift = 0 # Bits shifted in, most recent in bit 0
       self._op_code = None
       self._phy_addr = None
       self._reg_addr = None
-      self._turnaround = None
-      self._read_data = None
-      self._write_data = None
+      self._tx_word = None
 
     def _calculate_ave_bit_time(self):
       # we have 63 periods in between the bit times here (fencepost thing) not 64
@@ -178,102 +191,62 @@ class smi_master_checker(px.SimThread):
 
     # This all happens on the rising edge
     def decode_frame_on_rising(self):
-      # start of transaction
-      if self._bit_num == 0:
-          self._state = "preamble"
-
-      # end of preamble
-      elif self._bit_num == 31:
-          self._preamble = self._data
-          self._data = []
-          if self._preamble != [1] * 32:
-             self.error(f"Invalid preamble: {self._preamble}")
-          self._state = "start_of_frame"
-
-      # end of SoF
-      elif self._bit_num == 33:
-          self._start_of_frame = self._data
-          self._data = []
-          if self._preamble != [1] * 32:
-             self.error(f"Invalid start_of_frame: {self._start_of_frame}")
-          self._state = "op_code"
-      
-      # end of opcode
-      elif self._bit_num == 35:
-          self._op_code = self._data
-          self._data = []
-
-          # read
-          if self._op_code == [1, 0]:
-            if(len(self._tx_data) < 1):
+      if self._bit_num == PREAMBLE_END_BIT:
+          if self._shift != 0xffffffff:
+             self.error(f"Invalid preamble: 0x{self._shift:08x}")
+          self._shift = 0
+
+      elif self._bit_num == HEADER_END_BIT:
+          header = self._shift
+          self._shift = 0
+          start_of_frame = (header >> 12) & 0x3
+          self._op_code = (header >> 10) & 0x3
+          self._phy_addr = (header >> 5) & 0x1f
+          self._reg_addr = header & 0x1f
+          if start_of_frame != START_OF_FRAME:
+             self.error(f"Invalid start_of_frame: {start_of_frame:02b}")
+
+          if self._op_code == OP_CODE_READ:
+            if self._tx_data is None:
+              self._tx_word = self._registers.read(self._phy_addr, self._reg_addr, self.xsi.get_time())
+            elif self._tx_data:
+              self._tx_word = self._tx_data.pop(0)
+            else:
               self.error("Run out of data to transmit / SMI read")
-            self._tx_word = self._tx_data[0]
-            del self._tx_data[0]
-          # write
-          elif self._op_code == [0, 1]:
-            pass
-          else:
-             self.error(f"Invalid opcode: {self._op_code}")
-          self._state = "phy_address"
-
-      # end of phy_address
-      elif self._bit_num == 40:
-          self._phy_addr = self._data
-          self._data = []
-          self._state = "reg_address"
-
-      #end of reg address
-      elif self._bit_num == 45:
-          self._reg_addr = self._data
-          self._data = []
-          self._state = "turnaround"
-
-      # Turnaround
-      elif self._bit_num == 47:
-          self._turnaround = self._data
-          self._data = []
-          if self._op_code == [1, 0]:
-              self._state = "read"
-          elif self._op_code == [0, 1]:
-              self._state = "write"
-          else:
-              self._state = "invalid_op_code"
-
-      elif self._bit_num == 63:
-          if self._state == "write":
-              self._write_data = self._data
-              self._data = []
-              written_data = BitArray(self._write_data).uint
-              print(f"DUT WRITE: 0x{written_data:x}")
+              self._tx_word = NO_PHY_VALUE
+          elif self._op_code != OP_CODE_WRITE:
+             self.error(f"Invalid opcode: {self._op_code:02b}")
 
+      elif self._bit_num == TURNAROUND_END_BIT:
+          self._shift = 0
 
-          elif self._state == "read":
-              pass            
+      elif self._bit_num == FRAME_END_BIT:
+          if self._op_code == OP_CODE_WRITE:
+              written_data = self._shift & 0xffff
+              self._registers.write(self._phy_addr, self._reg_addr, written_data, self.xsi.get_time())
+              print(f"DUT WRITE: 0x{written_data:x}")
 
           self._calculate_ave_bit_time()
           self._reset_smi_state_machine()
           self._bit_num = -1
 
-      elif self._bit_num > 63:
+      elif self._bit_num > FRAME_END_BIT:
           self.error("Bit number exceed 63")
 
 
     def drive_frame_on_rising(self):
-      # Start read 
-      if self._bit_num >= 46 and self._state == "read":
-        value = self._tx_word[0]
-        self.drive_mdio(value);
-        # print(f"sending mdio: {value} {self.xsi.get_time()/1e9:.2f}us driving: {self.xsi.is_port_driving(self._mdio_port)}")
-        del self._tx_word[0]
+      # Drive the read data, most significant bit first, once the turnaround has passed
+      if self._op_code == OP_CODE_READ and TURNAROUND_END_BIT <= self._bit_num < FRAME_END_BIT:
+        value = (self._tx_word >> (FRAME_END_BIT - 1 - self._bit_num)) & 1
+        self.drive_mdio(value)
 
     def move_to_next_state(self, mdc_changed, mdio_changed):
       if mdc_changed:
         # Rising edge of MDC
         if self._mdc_value == 1:
-          # print(f"Got MDIO bit {self._bit_num}: {self._mdio_value} at time {self._mdc_change_time}")
-          self._data.append(self._mdio_value)
+          self._shift = ((self._shift << 1) | self._mdio_value) & 0xffffffff
           self.decode_frame_on_rising()
-          self.drive_frame_on_rising()          
+          self.drive_frame_on_rising()
           self._bit_num += 1
 
         if self._mdc_value == 0:
@@ -4,6 +4,11 @@ import subprocess
 import platform
 from pathlib import Path
 import re
+import os
+import mmap
+import struct
+import tempfile
+from types import SimpleNamespace
 from scapy.all import *
 from hw_helpers import mii2scapy
 from conftest import build_socket_host
@@ -12,6 +17,66 @@ import time
 pkg_dir = Path(__file__).parent
 
 
+class SocketHostStats():
+    """
+    Live counters published by the C++ socket host applications while they are running.
+
+    The applications memory map the file named by the L2_SOCKET_STATS_FILE environment variable and keep
+    the counters in it up to date, so they can be polled here without waiting for the application to exit.
+    The layout must match host_stats_t in host/socket/shared/shared.h.
+    """
+    STATS_FILE_ENV = "L2_SOCKET_STATS_FILE"
+    MAGIC = 0x5453324c
+    VERSION = 1
+    (TX_DONE, RX_READY, RX_DONE) = (0x1, 0x2, 0x4)
+
+    _layout = struct.Struct("<II5Q4I")
+    _fields = ("magic", "version", "tx_frames", "tx_bytes", "rx_frames", "rx_bytes", "rx_drops",
+               "tx_last_seq_id", "rx_last_seq_id", "state", "stop_request")
+    _stop_request_offset = _layout.size - 4
+
+    def __init__(self):
+        fd, self.filename = tempfile.mkstemp(prefix="l2_socket_stats_", suffix=".bin")
+        os.write(fd, bytes(self._layout.size))
+        self._mmap = mmap.mmap(fd, self._layout.size)
+        os.close(fd)
+
+    def env(self):
+        """
+        Returns the environment to launch an application with so that it publishes its counters to this object
+        """
+        env = dict(os.environ)
+        env[self.STATS_FILE_ENV] = self.filename
+        return env
+
+    def read(self):
+        """
+        Returns a SimpleNamespace of the current counters, or None if the application hasn't initialised them yet
+        """
+        stats = SimpleNamespace(**dict(zip(self._fields, self._layout.unpack_from(self._mmap, 0))))
+        if stats.magic != self.MAGIC:
+            return None
+        assert stats.version == self.VERSION, f"Unexpected socket host stats version {stats.version}"
+        stats.tx_done = bool(stats.state & self.TX_DONE)
+        stats.rx_ready = bool(stats.state & self.RX_READY)
+        stats.rx_done = bool(stats.state & self.RX_DONE)
+        return stats
+
+    def request_stop(self):
+        """
+        Ask the receiver to stop without waiting for its 5 second inactivity timeout
+        """
+        struct.pack_into("<I", self._mmap, self._stop_request_offset, 1)
+
+    def close(self):
+        if not self._mmap.closed:
+            self._mmap.close()
+            os.remove(self.filename)
+
+    def __del__(self):
+        self.close()
+
+
 class SocketHost():
     """
     Class implementing functions to transmit and receive Layer 2 Ethernet packets using a raw socket on Linux.
@@ -40,6 +105,8 @@ class SocketHost():
         self.dut_mac_addr = dut_mac_addr
         self.send_proc = None
         self.num_packets_sent = None
+        self.send_stats = None
+        self.recv_stats = None
         self.verbose = verbose
 
         assert platform.system() in ["Linux"], f"Sending using sockets only supported on Linux"
@@ -128,11 +195,15 @@ class SocketHost():
         if self.verbose:
             print(f"subprocess Popen: {' '.join([str(c) for c in self.send_cmd])}")
 
+        if self.send_stats:
+            self.send_stats.close()
+        self.send_stats = SocketHostStats()
         self.send_proc = subprocess.Popen(
                 self.send_cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                text=True,
+                env=self.send_stats.env()
             )
         # Parse number of sent packets from the stdout
 
@@ -140,7 +211,7 @@ class SocketHost():
         """
         Checks whether the Layer 2 packet send application, started in send_asynch_start(), has completed execution.
 
-        If completed, updates self.num_packets_sent with the number of packets sent, extracted from the application's stdout output.
+        If completed, updates self.num_packets_sent with the number of packets sent, read from the counters the application publishes (see SocketHostStats).
 
         Returns:
         running (bool): True if still running, False if completed.
@@ -162,13 +233,18 @@ class SocketHost():
                 + f"\nstderr:\n{self. send_proc_stderr}"
             )
 
-            self.num_packets_sent = self.get_num_pkts_sent_from_stdout(self.send_proc_stdout)
+            stats = self.send_stats.read()
+            assert stats and stats.tx_done, ("Socket send didn't publish its final counters"
+            + f"\nstdout:\n{self.send_proc_stdout}")
+            # Packets to each destination MAC address, as the application reports in its stdout. The sequence ID
+            # is the same for the copy of a packet sent to each address
+            self.num_packets_sent = stats.tx_last_seq_id + 1 if stats.tx_frames else 0
             self.send_proc = None
         return running
 
 
 
-    def send_recv(self, test_duration_s, payload_len="max"):
+    def send_recv(self, test_duration_s, payload_len="max", rtt_file=None):
         """
         Send and receive Layer 2 Ethernet packets over a raw socket. This wrapper function executes the C++ application to handle both sending and receiving packets simultaneously.
 
@@ -179,6 +255,8 @@ class SocketHost():
         Parameters:
         test_duration_s (float): Test duration in seconds
         payload_len (str, optional, one of ["max", "min", "random"], default="max"): The socket send app generates max, min or random sized payload packets depending on this argument.
+        rtt_file (str, optional, default=None): If specified, the app writes a round trip time record for every packet received back from the DUT to this file.
+        Use hw_helpers.load_rtt_file() and hw_helpers.analyse_rtt() to process it.
 
         Returns:
         int, int: number of packets sent by the host, number of packets received by the host
@@ -186,6 +264,8 @@ class SocketHost():
         self.set_cap_net_raw(self.socket_send_recv_app)
 
         cmd = [self.socket_send_recv_app, self.eth_intf, str(test_duration_s), payload_len, self.host_mac_addr , *(self.dut_mac_addr.split())]
+        if rtt_file:
+            cmd.append(str(rtt_file))
         ret = subprocess.run(cmd,
                              capture_output = True,
                              text = True)
@@ -224,10 +304,14 @@ class SocketHost():
         self.recv_cmd = [self.socket_recv_app, self.eth_intf, self.host_mac_addr , self.dut_mac_addr, capture_file]
         if self.verbose:
             print(f"subprocess Popen: {' '.join([str(c) for c in self.recv_cmd])}")
+        if self.recv_stats:
+            self.recv_stats.close()
+        self.recv_stats = SocketHostStats()
         self.recv_proc = subprocess.Popen(self.recv_cmd,
                                             stdout=subprocess.PIPE,
                                             stderr=subprocess.PIPE,
-                                            text=True)
+                                            text=True,
+                                            env=self.recv_stats.env())
 
         # Only return once the receiver signals it is ready. Check stdout for receiver ready msg
         timeout = 10 # timeout in 10 sec
@@ -243,17 +327,54 @@ class SocketHost():
                 assert False, "Timed out waiting for socket receiver's ready signal"
 
 
-    def recv_asynch_wait_complete(self):
+    def get_send_stats(self):
+        """
+        Get the live counters of the send application started in send_asynch_start().
+
+        Returns:
+        SimpleNamespace with tx_frames, tx_bytes, tx_last_seq_id and tx_done, or None if the application hasn't started sending yet.
+        """
+        assert self.send_stats
+        return self.send_stats.read()
+
+    def get_recv_stats(self):
+        """
+        Get the live counters of the receive application started in recv_asynch_start().
+
+        Returns:
+        SimpleNamespace with rx_frames, rx_bytes, rx_drops (gaps in seq_id), rx_last_seq_id, rx_ready and rx_done,
+        or None if the application hasn't started yet.
+        """
+        assert self.recv_stats
+        return self.recv_stats.read()
+
+    def recv_asynch_wait_complete(self, expected_packets=None, quiet_s=0.5):
         """
         Wait for the Layer 2 packet receive application, started in recv_asynch_start(), to complete execution.
 
         When completed, return the number of received packets, extracted from the host application's stdout output.
 
+        Parameters:
+        expected_packets (int, optional, default=None): If specified, stop the receiver once at least this many packets
+        have been received and no more have arrived for quiet_s, rather than waiting for it to time out after 5 seconds
+        of inactivity. Packets arriving after the expected ones within quiet_s are still counted.
+        quiet_s (float, optional, default=0.5): See expected_packets.
+
         Returns:
         int: Number of packets received.
         """
         assert self.recv_proc
+        last_rx_frames = None
+        last_rx_time = None
         while True:
+            if expected_packets is not None:
+                stats = self.recv_stats.read()
+                if stats and stats.rx_frames >= expected_packets:
+                    if stats.rx_frames != last_rx_frames:
+                        last_rx_frames = stats.rx_frames
+                        last_rx_time = time.time()
+                    elif time.time() - last_rx_time >= quiet_s:
+                        self.recv_stats.request_stop()
             running = (self.recv_proc.poll() == None)
             if not running:
                 self.recv_proc_stdout, self.recv_proc_stderr = self.recv_proc.communicate(timeout=60)
@@ -16,6 +16,7 @@ from helpers import do_rx_test, get_dut_mac_address, check_received_packet, pack
 from helpers import get_sim_args, get_mii_tx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_tx_phy
+from xe_cache import find_xe
 
 
 def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
@@ -30,7 +31,7 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
         with capfd.disabled():
             print(f"Running {testname}: {tx_phy.get_name()} phy at {tx_clk.get_name()}, (seed {seed})")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
 
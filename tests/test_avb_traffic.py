@@ -15,6 +15,8 @@ from helpers import choose_small_frame_size, check_received_packet
 from helpers import get_mii_tx_clk_phy, get_rgmii_tx_clk_phy, create_if_needed, get_sim_args
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_tx_phy
+from wire_timing import WireTiming, MIN_DATA_BYTES
+from xe_cache import find_xe
 
 debug_fill = 0 # print extra debug information
 
@@ -22,13 +24,7 @@ def choose_data_size(rand, data_len_min, data_len_max):
     return rand.randint(int(data_len_min), int(data_len_max))
 
 def get_min_packet_time(bit_time):
-    preamble_bytes = 8
-    header_bytes = 14
-    crc_bytes = 4
-    ifg_bytes = 12
-    min_data_bytes = 46
-    total_bytes = preamble_bytes + header_bytes + min_data_bytes + crc_bytes + ifg_bytes
-    return total_bytes * 8 * bit_time
+    return WireTiming(bit_time).packet_time(MIN_DATA_BYTES)
 
 
 class RxLpControl(px.SimThread):
@@ -195,7 +191,7 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, seed,
             print(f"Running {testname}: {tx_phy.get_name()} phy at {tx_clk.get_name()} (seed {seed})")
 
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
 
@@ -0,0 +1,110 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the change aware test selection. These do not need the simulator.
+
+from pathlib import Path
+
+import pytest
+
+import change_selection
+from change_selection import ChangeSelector, preprocess, select, width_matches, TESTS_DIR
+
+RX_PARAMS = Path(__file__).parent / "test_rx.py"
+
+
+def rmii(rx_width, tx_width="4b_lower"):
+    return {"phy": "rmii", "clk": "50MHz", "mac": "rt", "rx_width": rx_width, "tx_width": tx_width, "arch": "xs3"}
+
+
+MII_STANDARD = {"phy": "mii", "clk": "25MHz", "mac": "standard", "arch": "xs2"}
+MII_RT = {"phy": "mii", "clk": "25MHz", "mac": "rt", "arch": "xs3"}
+RGMII = {"phy": "rgmii", "clk": "125MHz", "mac": "rt", "arch": "xs2"}
+
+
+def test_preprocess():
+    code = preprocess("#if RMII\nrmii_mac();\n#elif RT\nrt_mac();\n#else\nmac();\n#endif\n"
+                      "#ifndef X\n#define X 2\n#endif\n#if X == 2 && !defined(Y)\nx();\n#endif", {"RT": "1"})
+    assert code.split() == ["rt_mac();", "#define", "X", "2", "x();"]
+    # What it cannot evaluate is taken
+    assert preprocess("#if FOO(1)\nfoo();\n#endif", {}).split() == ["foo();"]
+    # Only the headers include() returns code for are put in
+    defines = {"RT": "1"}
+    headers = {"a.h": "#if RT\na();\n#endif"}
+    include = lambda name: preprocess(headers[name], defines) if name in headers else None
+    assert preprocess('#include "a.h"\n#include <xs1.h>', defines, include).split() == ["a();", "#include", "<xs1.h>"]
+
+
+def test_width_matches():
+    assert width_matches("rmii_master_rx_pins_1b_body.S", rmii("1b"))
+    assert not width_matches("rmii_master_rx_pins_1b_body.S", rmii("4b_upper", "1b"))
+    assert width_matches("rmii_master_tx_pins_4b.xc", rmii("1b"))
+    assert width_matches("mii_master.xc", MII_RT)
+
+
+@pytest.fixture(scope="module")
+def selector():
+    return ChangeSelector(["lib_ethernet/src/rmii_master_rx_pins_1b_body.S", "lib_ethernet/src/rgmii_tx_lld.S",
+                           "lib_ethernet/src/mii_lite_lld.S", "lib_ethernet/src/smi.xc"])
+
+
+def reached(selector, params, app="test_rx"):
+    return {p.name for p in selector.lib_changes & selector.app(TESTS_DIR / app).reach(params)}
+
+
+def test_profiles_reached(selector):
+    assert reached(selector, rmii("1b")) == {"rmii_master_rx_pins_1b_body.S"}
+    assert reached(selector, rmii("4b_lower", "1b")) == set()
+    assert reached(selector, RGMII) == {"rgmii_tx_lld.S"}
+    assert reached(selector, MII_STANDARD) == {"mii_lite_lld.S"}
+    assert reached(selector, MII_RT) == set()
+    # The application includes each MAC's main under #if
+    assert reached(selector, MII_RT, "test_time_rx") == set()
+    assert reached(selector, {"type": "two_port", "arch": "xs3"}, "test_smi") == {"smi.xc"}
+
+
+def test_reason(selector):
+    assert selector.reason(RX_PARAMS, rmii("1b")) == "builds rmii_master_rx_pins_1b_body.S"
+    assert selector.reason(RX_PARAMS, MII_RT) is None
+    # A Python module the test imports, directly or not
+    assert ChangeSelector(["tests/mii_packet.py"]).reason(RX_PARAMS, MII_RT) == "mii_packet.py changed"
+    assert ChangeSelector(["tests/test_rx/src/main.xc"]).reason(RX_PARAMS, MII_RT) == "test_rx changed"
+    assert ChangeSelector(["tests/helpers.cmake"]).reason(RX_PARAMS, MII_RT) == "test build changed"
+    assert ChangeSelector(["README.rst"]).reason(RX_PARAMS, MII_RT) is None
+
+
+def test_library_build_change():
+    # The library's build file sets the flags of every file it compiles
+    selector = ChangeSelector(["lib_ethernet/lib_build_info.cmake"])
+    assert selector.lib_changes == set()
+    assert selector.reason(RX_PARAMS, MII_RT) == "library build changed (lib_build_info.cmake)"
+    assert selector.reason(Path(__file__).parent / "test_smi.py", {"type": "two_port", "arch": "xs3"}) is not None
+
+
+def test_app_defines(tmp_path):
+    app_dir = tmp_path / "test_app"
+    (app_dir / "src").mkdir(parents=True)
+    (app_dir / "CMakeLists.txt").write_text("set(APP_INCLUDES src)\nlist(APPEND FLAGS -DONE_PORT=1)\n")
+    app = change_selection.TestApp(app_dir, ChangeSelector([]).graph)
+    defines = app.defines(rmii("1b", "4b_upper"))
+    assert defines["RMII"] == "1" and defines["RT"] == "1" and "MII" not in defines
+    assert defines["RX_WIDTH"] == "1" and defines["TX_USE_UPPER_2B"] == "1"
+    # Set by the application's CMakeLists.txt, but not from the profile
+    assert defines["ONE_PORT"] == "?"
+
+    # A configured build gives the defines
+    flags = app_dir / "build" / "CMakeFiles" / "test_app_rt_rmii_rx1b_tx4b_upper_xs3.dir" / "flags.make"
+    flags.parent.mkdir(parents=True)
+    flags.write_text("XC_DEFINES = -DRMII=1 -DRT=1 -DONE_PORT\n")
+    assert app.defines(rmii("1b", "4b_upper")) == {"RMII": "1", "RT": "1", "ONE_PORT": "1"}
+
+
+def test_select():
+    items = list(range(8))
+    times = {0: 10, 1: 50, 2: 10, 3: 10, 4: 30, 5: 10, 6: 10, 7: 10}
+    selected, deselected, num_affected = select(items, lambda i: i in (3, 6), times.get, budget_s=40)
+    assert selected == [3, 6, 0, 2, 5, 7]
+    assert deselected == [1, 4]
+    assert num_affected == 2
+    # Without a budget everything runs, affected first
+    assert select(items, lambda i: i == 5, times.get) == ([5, 0, 1, 2, 3, 4, 6, 7], [], 1)
@@ -6,11 +6,12 @@ import sys
 from pathlib import Path
 import pytest
 import Pyxsim as px
+from xe_cache import find_xe
 
 pkg_dir = Path(__file__).parent
 def test_check_ifg_wait(capfd):
     testname = 'test_check_ifg_wait'
-    binary = pkg_dir / testname / 'bin' / f'{testname}.xe'
+    binary = pkg_dir / find_xe(testname)
     assert os.path.isfile(binary)
     expect_filename = pkg_dir / f'{testname}.expect'
     tester = px.testers.ComparisonTester(open(expect_filename))
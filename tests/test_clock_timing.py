@@ -0,0 +1,60 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the clock timing model used by mii_clock.Clock. These do not need the simulator.
+
+import statistics
+
+import pytest
+
+from clock_timing import ClockTiming
+
+PERIOD_25MHZ = 40 * 10**6 # femtoseconds
+
+
+def run(timing, num_cycles):
+    time = 0
+    periods = []
+    for _ in range(num_cycles):
+        period = timing.cycle_period(time)
+        periods.append(period)
+        time += period
+    return time, periods
+
+
+def test_ideal():
+    timing = ClockTiming(PERIOD_25MHZ)
+    assert timing.is_ideal()
+    assert timing.mean_period() == PERIOD_25MHZ
+    assert run(timing, 10)[1] == [PERIOD_25MHZ] * 10
+
+
+def test_ppm_offset():
+    fast = ClockTiming(PERIOD_25MHZ, ppm=100)
+    slow = ClockTiming(PERIOD_25MHZ, ppm=-100)
+    assert not fast.is_ideal()
+    # A clock 100ppm fast gets through 100 more cycles in a million
+    (fast_time, _) = run(fast, 10**5)
+    (slow_time, _) = run(slow, 10**5)
+    assert (10**5 * PERIOD_25MHZ) / fast_time == pytest.approx(1 + 100e-6)
+    assert (10**5 * PERIOD_25MHZ) / slow_time == pytest.approx(1 - 100e-6)
+    assert fast.mean_period() < PERIOD_25MHZ < slow.mean_period()
+
+
+def test_drift_stays_within_amplitude():
+    drift_period = 10**4 * PERIOD_25MHZ
+    timing = ClockTiming(PERIOD_25MHZ, ppm=50, drift_ppm=20, drift_period=drift_period, seed=4)
+    ppms = [timing.ppm_at(t * drift_period / 100) for t in range(100)]
+    assert max(ppms) == pytest.approx(70, abs=0.5)
+    assert min(ppms) == pytest.approx(30, abs=0.5)
+    with pytest.raises(AssertionError):
+        ClockTiming(PERIOD_25MHZ, drift_ppm=20)
+
+
+def test_jitter_is_seeded():
+    jitter = 100 * 10**3 # 100ps
+    (_, periods) = run(ClockTiming(PERIOD_25MHZ, jitter=jitter, seed=7), 10000)
+    assert statistics.mean(periods) == pytest.approx(PERIOD_25MHZ, rel=1e-4)
+    assert statistics.stdev(periods) == pytest.approx(jitter, rel=0.05)
+    assert run(ClockTiming(PERIOD_25MHZ, jitter=jitter, seed=7), 100)[1] == periods[:100]
+    assert run(ClockTiming(PERIOD_25MHZ, jitter=jitter, seed=8), 100)[1] != periods[:100]
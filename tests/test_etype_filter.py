@@ -16,6 +16,7 @@ from helpers import do_rx_test, get_dut_mac_address, check_received_packet
 from helpers import get_sim_args, get_mii_tx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_tx_phy
+from xe_cache import find_xe
 
 def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
     testname = 'test_etype_filter'
@@ -32,7 +33,7 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
             print(f"Running {testname}: {mac} {tx_phy.get_name()} phy, {arch} arch at {tx_clk.get_name()} (seed {seed})")
         profile = f'{mac}_{tx_phy.get_name()}_{arch}'
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     dut_mac_address = get_dut_mac_address()
@@ -0,0 +1,51 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the counter based frame checking. These do not need the simulator.
+
+import io
+
+from frame_counters import Bitset, FrameCounters, CounterTester
+
+
+class Frame():
+    def __init__(self, index):
+        self.index = index
+        self.dropped = False
+
+    def dump(self):
+        return f"frame {self.index}\n"
+
+
+def test_bitset():
+    bits = Bitset(20)
+    for i in (0, 7, 8, 19):
+        bits.add(i)
+    assert len(bits) == 4 and 8 in bits and 9 not in bits
+    other = Bitset(20)
+    other.add(7)
+    assert bits.difference(other).indices() == [0, 8, 19]
+
+
+def test_counter_tester():
+    packets = [Frame(i) for i in range(10)]
+    packets[3].dropped = True
+
+    counters = FrameCounters(packets)
+    for i in (0, 1, 2, 4, 5, 6, 7, 8, 9):
+        counters.frame_ok(i)
+    assert CounterTester(counters).run([counters.summary(), "Test done"])
+
+    # A mismatch, a missing frame and an unexpected one all fail, and are described in the dump
+    counters = FrameCounters(packets)
+    for i in (0, 1, 2, 4, 5, 6, 7):
+        counters.frame_ok(i)
+    counters.frame_mismatch(8, packets[9], packets[8])
+    counters.frame_unexpected(packets[0])
+    assert counters.summary() == "Received 7/9 packets ok, 1 mismatched, 1 unexpected"
+    assert not CounterTester(counters).run([counters.summary(), "Test done"])
+
+    out = io.StringIO()
+    counters.dump(out)
+    assert "Missing packets: [8, 9]" in out.getvalue()
+    assert "Packet 8 does not match" in out.getvalue()
@@ -2,16 +2,22 @@
 # This Software is subject to the terms of the XMOS Public Licence: Version 1.
 from scapy.all import *
 from pathlib import Path
-from hw_helpers import get_mac_address, hw_eth_debugger
+from hw_helpers import get_mac_address, hw_eth_debugger, load_rtt_file, analyse_rtt
 import pytest
 from xcore_app_control import XcoreAppControl
 from socket_host import SocketHost
 import re
 import platform
+import os
+import time
 
 
 pkg_dir = Path(__file__).parent
 
+# Upper bound on the round trip time of every frame through the host's raw sockets and the DUT. A max size frame takes
+# about 120us on the wire at 100Mb/s in each direction, the rest is the host network stack
+MAX_RTT_US = 10000
+
 recvd_packet_count = 0 # TODO find a better way than using globals
 def sniff_pkt(intf, target_mac_addr, timeout_s, seq_ids):
     def packet_callback(packet):
@@ -101,7 +107,11 @@ def test_hw_loopback(request, send_method):
         stdout = xcoreapp.xscope_host.xscope_controller_cmd_set_dut_macaddr(0, dut_mac_address_str)
 
         if send_method == "socket":
-            num_packets_sent, host_received_packets = socket_host.send_recv(test_duration_s)
+            log_dir = pkg_dir / "logs"
+            log_dir.mkdir(exist_ok=True)
+            # Unique to the run so that parallel and repeated runs keep their own file
+            rtt_file = log_dir / f"{request.node.name}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_rtt.bin"
+            num_packets_sent, host_received_packets = socket_host.send_recv(test_duration_s, rtt_file=rtt_file)
 
         print("Retrive status and shutdown DUT")
         stdout = xcoreapp.xscope_host.xscope_controller_cmd_shutdown()
@@ -109,7 +119,18 @@ def test_hw_loopback(request, send_method):
         print("Terminating!!!")
 
 
+    if send_method == "socket":
+        rtt_summary = analyse_rtt(load_rtt_file(rtt_file), num_packets_sent)
+        print(f"Round trip latency through the DUT: {rtt_summary}")
+
     errors = []
+    if send_method == "socket":
+        for count in ("lost", "duplicates", "reordered"):
+            if rtt_summary[count]:
+                errors.append(f"ERROR: {rtt_summary[count]} {count} sequence numbers in the frames looped back")
+        if rtt_summary.get("rtt_max_us", 0) > MAX_RTT_US:
+            errors.append(f"ERROR: Round trip time up to {rtt_summary['rtt_max_us']:.1f}us, over {MAX_RTT_US}us")
+
     if host_received_packets != num_packets_sent:
         errors.append(f"ERROR: Host received back fewer than it sent. Sent {num_packets_sent}, received back {host_received_packets}")
 
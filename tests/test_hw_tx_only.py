@@ -111,7 +111,9 @@ def test_hw_tx_only(request, send_method, tx_config):
 
             print(f"DUT sending packets for {test_duration_s}s..")
 
-            host_received_packets = socket_host.recv_asynch_wait_complete()
+            # Stop once the LP packets are in and the DUT has gone quiet. The HP packets are counted too, so this is
+            # only the least number to wait for
+            host_received_packets = socket_host.recv_asynch_wait_complete(expected_packets=expected_packet_count)
 
             packet_summary = load_packet_file(capture_file)
             errors, _, _, _ = parse_packet_summary(  packet_summary,
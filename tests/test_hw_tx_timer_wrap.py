@@ -22,13 +22,15 @@ def recv_packet_from_dut(socket_host, xcoreapp, lp_client_id, hp_client_id, verb
     stdout = xcoreapp.xscope_host.xscope_controller_cmd_set_dut_tx_packets(hp_client_id, 0, 0) # no tx hp
     stdout = xcoreapp.xscope_host.xscope_controller_cmd_set_dut_tx_packets(lp_client_id, 1, expected_packet_len)
 
-    host_received_packets = socket_host.recv_asynch_wait_complete()
+    # Wait for a quiet period after the first packet rather than stopping at it, so that any extra or repeated frames
+    # sent by the DUT after the timer wrap are counted
+    host_received_packets = socket_host.recv_asynch_wait_complete(expected_packets=1, quiet_s=1)
     if verbose:
         print(f"Host Received packets: {host_received_packets}")
     """
     Socket receiver times out after 5s of inactivity. So just receiving a packet at this point indicates that the dut didn't have a > 5s latency in sending
     """
-    assert(host_received_packets == 1)
+    assert host_received_packets == 1, f"Expected 1 packet from the DUT, received {host_received_packets}"
     packet_summary = load_packet_file(capture_file)
     return packet_summary[0][5], packet_summary[0][6]
 
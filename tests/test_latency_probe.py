@@ -0,0 +1,42 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the frame latency probe. These do not need the simulator.
+
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from latency_probe import LatencyProbe
+
+
+def frame(num_data_bytes):
+    return SimpleNamespace(data_bytes=[0] * num_data_bytes, num_data_bytes=num_data_bytes)
+
+
+def test_latency_probe():
+    probe = LatencyProbe(tag_offset=2)
+    packets = probe.tag_packets([frame(46) for _ in range(5)], first_seq=10)
+    assert [probe.read_tag(p) for p in packets] == [10, 11, 12, 13, 14]
+    assert probe.read_tag(frame(46)) is None
+    with pytest.raises(AssertionError):
+        probe.tag_packets([frame(7)])
+
+    for i, packet in enumerate(packets):
+        probe.tx_sfd(packet, i * 10**9)
+    # Frame 12 is lost, frame 13 comes back twice and an untagged frame appears
+    for i, latency_ns in ((0, 1000), (1, 1200), (3, 1100), (3, 1100), (4, 1000)):
+        probe.rx_sfd(packets[i], i * 10**9 + latency_ns * 10**6)
+    probe.rx_sfd(frame(46), 0)
+
+    stats = probe.stats(percentiles=(50,))
+    assert (stats["sent"], stats["received"], stats["lost"]) == (5, 4, 1)
+    assert (stats["duplicates"], stats["untagged"]) == (1, 1)
+    assert probe.lost() == [12]
+    assert (stats["min"], stats["max"], stats["mean"], stats["p50"]) == (1000, 1200, 1075, 1050)
+    assert stats["pdv"] == pytest.approx((200 + 100 + 100) / 3)
+
+    out = io.StringIO()
+    probe.report(out, percentiles=(50,))
+    assert "4/5 frames received, 1 lost" in out.getvalue()
@@ -13,6 +13,7 @@ from mii_packet import MiiPacket
 from helpers import get_sim_args, get_mii_tx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_tx_phy
+from xe_cache import find_xe
 
 
 def do_test(capfd, mac, arch, tx_clk, tx_phy, rx_width=None):
@@ -29,7 +30,7 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, rx_width=None):
 
 
     capfd.readouterr() # clear capfd buffer
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     tester = px.testers.ComparisonTester(open(f'{testname}.expect'))
@@ -0,0 +1,156 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the MAC receive filtering model. These do not need the simulator.
+
+import random
+
+import pytest
+
+from mac_filter_model import MacFilterModel, ETHERNET_MACADDR_FILTER_SUCCESS, ETHERNET_MACADDR_FILTER_TABLE_FULL
+
+DUT_MAC = [0, 1, 2, 3, 4, 5]
+HP_MAC = [0x02, 0, 0, 0, 0, 0x11]
+VLAN_TAG = [0x81, 0x00, 0x00, 0x00]
+VLAN_STRIP_FMT = "{client}: Received packet, type=0, len={len}, buf[12]={buf[12]:#x}, buf[13]={buf[13]:#x}, " \
+                 "buf[14]={buf[14]:#x}."
+
+
+class Frame():
+    """ Enough of an MiiPacket for the model """
+
+    def __init__(self, dst_mac_addr, ether_len_type, data_bytes, vlan_prio_tag=None, dropped=False):
+        self.dst_mac_addr = dst_mac_addr
+        self.src_mac_addr = [0] * 6
+        self.vlan_prio_tag = vlan_prio_tag
+        self.ether_len_type = ether_len_type
+        self.data_bytes = data_bytes
+        self.dropped = dropped
+        self.corrupt_crc = False
+        self.error_nibbles = []
+
+    def get_packet_bytes(self):
+        return self.dst_mac_addr + self.src_mac_addr + (self.vlan_prio_tag or []) + self.ether_len_type + \
+            self.data_bytes
+
+
+def etype_model(mac, etypes, strip=()):
+    model = MacFilterModel(len(etypes), mac=mac)
+    for client, etype in enumerate(etypes):
+        model.add_macaddr_filter(client, False, DUT_MAC)
+        model.add_ethertype_filter(client, etype)
+        if client in strip:
+            model.enable_strip_vlan_tag(client)
+    return model
+
+
+def test_etype_filter_expect():
+    packets = [Frame(DUT_MAC, [0x11, 0x11], [1, 2, 3, 4] + [0] * 50),
+               Frame(DUT_MAC, [0x22, 0x22], [5, 6, 7, 8] + [0] * 60)]
+    expected = etype_model("rt", [0x1111, 0x2222]).expected_deliveries(packets)
+    with open("test_etype_filter.expect") as f:
+        expect = [line.strip() for line in f if "Received" in line]
+    assert expected.lines("{client}: Received packet, type=0, len={len}, buf[15]={buf[15]:#x}.") == expect
+
+
+def test_vlan_strip_expect():
+    packets = [Frame(DUT_MAC, [0x11, 0x11], [1, 2, 3, 4] + [0] * 60, VLAN_TAG),
+               Frame(DUT_MAC, [0x22, 0x22], [5, 6, 7, 8] + [0] * 60),
+               Frame(DUT_MAC, [0x33, 0x33], [4, 3, 2, 1] + [0] * 60, VLAN_TAG),
+               Frame(DUT_MAC, [0x44, 0x44], [8, 7, 6, 5] + [0] * 60)]
+    model = etype_model("rt", [0x1111, 0x2222, 0x3333, 0x4444], strip=(0, 1))
+    with open("test_vlan_strip_mii_rt.expect") as f:
+        expect = sorted(line.strip() for line in f if "Received" in line)
+    assert sorted(model.expected_deliveries(packets).lines(VLAN_STRIP_FMT)) == expect
+
+
+def test_standard_mac_filters_inner_ethertype():
+    model = etype_model("standard", [0x1111])
+    with pytest.raises(AssertionError):
+        model.enable_strip_vlan_tag(0)
+    packets = [Frame(DUT_MAC, [0x11, 0x11], [0] * 50, VLAN_TAG),
+               Frame(DUT_MAC, [0x00, 50], [0] * 50),
+               Frame(DUT_MAC, [0x22, 0x22], [0] * 50, VLAN_TAG)]
+    expected = model.expected_deliveries(packets)
+    # The ethertype is read from after the VLAN tag, and lengths are not filtered
+    assert [d.index for d in expected.lp[0]] == [0, 1]
+    assert expected.unclaimed == [2]
+
+
+def test_hp_routing_and_table():
+    model = MacFilterModel(2, table_size=3)
+    assert model.add_macaddr_filter(0, True, HP_MAC, appdata=7) == ETHERNET_MACADDR_FILTER_SUCCESS
+    assert model.add_macaddr_filter(0, False, DUT_MAC) == ETHERNET_MACADDR_FILTER_SUCCESS
+    assert model.add_macaddr_filter(1, False, DUT_MAC) == ETHERNET_MACADDR_FILTER_SUCCESS
+    with pytest.raises(AssertionError):
+        model.add_macaddr_filter(1, True, DUT_MAC)
+    assert model.add_macaddr_filter(1, False, [0xff] * 6) == ETHERNET_MACADDR_FILTER_SUCCESS
+    assert model.add_macaddr_filter(1, False, [0x01] * 6) == ETHERNET_MACADDR_FILTER_TABLE_FULL
+
+    packets = [Frame(HP_MAC, [0x88, 0xf7], [0] * 46),
+               Frame(DUT_MAC, [0x08, 0x00], [0] * 46),
+               Frame([0xff] * 6, [0x08, 0x06], [0] * 46),
+               Frame(DUT_MAC, [0x08, 0x00], [0] * 45),
+               Frame(DUT_MAC, [0x00, 100], [0] * 46),
+               Frame(DUT_MAC, [0x08, 0x00], [0] * 46, dropped=True),
+               Frame([0x01] * 6, [0x08, 0x00], [0] * 46)]
+    expected = model.expected_deliveries(packets)
+    assert [(d.index, d.filter_data) for d in expected.hp] == [(0, 7)]
+    assert [d.index for d in expected.lp[0]] == [1]
+    assert [d.index for d in expected.lp[1]] == [1, 2]
+    assert expected.dropped == [3, 4, 5]
+    assert expected.unclaimed == [6]
+    assert expected.num_bytes() == 60
+
+    model.del_macaddr_filter(0, True, HP_MAC)
+    model.del_all_macaddr_filters(1, False)
+    expected = model.expected_deliveries(packets)
+    assert expected.hp == []
+    assert [d.index for d in expected.lp[0]] == [1]
+    assert expected.lp[1] == []
+
+
+def test_hp_frames_need_bit_0():
+    model = MacFilterModel(2)
+    model.add_macaddr_filter(1, True, HP_MAC)
+    expected = model.expected_deliveries([Frame(HP_MAC, [0x88, 0xf7], [0] * 46)])
+    # An HP match without bit 0 is thrown away by the HP client thread, not offered to the LP clients
+    assert expected.hp == []
+    assert expected.lp == [[], []]
+    assert expected.unclaimed == [0]
+
+
+def test_ethertype_filter_limit():
+    model = MacFilterModel(1, max_ethertype_filters=2)
+    model.add_ethertype_filter(0, 0x0800)
+    model.add_ethertype_filter(0, 0x0806)
+    with pytest.raises(AssertionError):
+        model.add_ethertype_filter(0, 0x86dd)
+    model.del_ethertype_filter(0, 0x0800)
+    model.add_ethertype_filter(0, 0x86dd)
+    assert model.clients[0].etype_filters == [0x0806, 0x86dd]
+
+
+def test_random_stream():
+    rand = random.Random(1)
+    etypes = [0x0800, 0x0806, 0x86dd, 0x22f0]
+    model = etype_model("rt", etypes[:3], strip=(1,))
+    packets = []
+    for _ in range(10000):
+        tag = VLAN_TAG if rand.random() < 0.3 else None
+        dst = rand.choice([DUT_MAC, HP_MAC])
+        packets.append(Frame(dst, list(rand.choice(etypes).to_bytes(2, "big")), [0] * rand.randint(46, 1500), tag))
+    expected = model.expected_deliveries(packets)
+
+    total = 0
+    for client, deliveries in enumerate(expected.lp):
+        for d in deliveries:
+            frame = d.packet.get_packet_bytes()
+            assert frame[:6] == DUT_MAC
+            stripped = client == 1 and d.packet.vlan_prio_tag
+            assert len(d) == len(frame) - (4 if stripped else 0)
+        total += len(deliveries)
+    assert total + len(expected.dropped) + len(expected.unclaimed) == len(packets)
+    # Tagged frames of up to 1500 payload bytes are too long
+    assert all(len(packets[i].get_packet_bytes()) > 1518 for i in expected.dropped)
+    assert "LP client 1" in expected.summary()
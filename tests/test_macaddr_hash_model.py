@@ -0,0 +1,77 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the Python MAC address hash filter model. These do not need the simulator.
+
+import struct
+import zlib
+import numpy as np
+
+from macaddr_hash_model import (MacaddrHashFilter, xcore_crc32, macaddr_hash, mac_to_keys, random_macs,
+                                simulate_capacity, DEFAULT_POLYS, POLY_LCG_A, POLY_LCG_C)
+
+
+def test_crc32_instruction():
+    # The MACs generate the frame CRC with crc32 starting from an inverted first word and ending with ~0
+    data = bytes(range(64))
+    words = struct.unpack("<16I", data)
+    crc = xcore_crc32(0, ~words[0] & 0xffffffff, DEFAULT_POLYS[0])
+    for word in words[1:]:
+        crc = xcore_crc32(crc, word, DEFAULT_POLYS[0])
+    assert xcore_crc32(crc, 0xffffffff, DEFAULT_POLYS[0]) == zlib.crc32(data)
+
+    # Scalar and vectorised hashes agree
+    rng = np.random.default_rng(1)
+    key0, key1 = mac_to_keys(list(rng.integers(0, 256, 6)))
+    assert macaddr_hash(key0, key1, DEFAULT_POLYS[1]) == \
+           int(macaddr_hash(np.uint64(key0), np.uint64(key1), np.uint64(DEFAULT_POLYS[1])))
+
+
+def test_add_lookup_delete():
+    model = MacaddrHashFilter()
+    # One probe into each table, counted separately
+    assert model.add_entry(0, False, "01:02:03:04:05:06", 5) == 1
+    assert (model.last_refill_probes, model.last_sync_probes) == (0, 1)
+    model.add_entry(1, False, "01:02:03:04:05:06", 6)
+    model.add_entry(2, True, "10:20:30:40:50:60", 7)
+
+    assert model.lookup("01:02:03:04:05:06") == (0b11, 6)
+    assert model.lookup("10:20:30:40:50:60") == ((1 << 31) | (1 << 2), 7)
+    assert model.lookup("01:02:03:04:05:07") == (0, 0)
+
+    model.delete_entry(2, True, "10:20:30:40:50:60")
+    assert model.lookup("10:20:30:40:50:60")[0] == 0
+    model.clear()
+    assert model.lookup("01:02:03:04:05:06") == (0, 0)
+
+
+def test_capacity():
+    rng = np.random.default_rng(2)
+    macs = random_macs(100, rng, multicast_fraction=0.5)
+    result = simulate_capacity(macs, max_refills=100)
+    num_added = len(result["fill"])
+    assert num_added > 0
+
+    # Everything added can be found in the table in use by the filters
+    model = MacaddrHashFilter(max_refills=100)
+    for mac in macs[:num_added]:
+        model.add_entry(0, False, list(int(b) for b in mac))
+    for mac in macs[:num_added]:
+        assert model.lookup(list(int(b) for b in mac))[0] == 1
+
+    # The polynomials only change in refill_backup_table(), by stepping the generator
+    poly = DEFAULT_POLYS[0]
+    for _ in range(result["refills"].sum()):
+        poly = (POLY_LCG_A * poly + POLY_LCG_C) & 0xffffffff
+    assert result["polys"][0] == poly
+
+
+def test_refill_probes():
+    # A small table needs refills. Only the inserts that refilled re-insert the existing entries, and they copy the
+    # table instead of inserting into the other one
+    rng = np.random.default_rng(2)
+    result = simulate_capacity(random_macs(100, rng, multicast_fraction=0.5), table_size=64, max_refills=100)
+    refilled = result["refills"] > 0
+    assert refilled.any()
+    assert (result["refill_probes"][refilled] > 0).all() and (result["refill_probes"][~refilled] == 0).all()
+    assert (result["sync_probes"][refilled] == 0).all() and (result["sync_probes"][~refilled] > 0).all()
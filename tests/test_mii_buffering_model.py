@@ -0,0 +1,82 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the Python MII RX buffering model. These do not need the simulator.
+
+import numpy as np
+
+from mii_buffering_model import (Mempool, PacketQueue, simulate_rx_buffering, MIN_USAGE, MEMPOOL_INFO_BYTES,
+                                 HP_FILTER_BIT, DUMMY_PACKET, DROP_CLIENT_QUEUE, DROP_MEMPOOL,
+                                 DROP_HP_QUEUE)
+
+
+def back_to_back(lengths, bit_time=1e7):
+    wire_time = (8 + np.asarray(lengths) + 4 + 12) * 8 * bit_time
+    return np.concatenate(([0], np.cumsum(wire_time)[:-1]))
+
+
+def test_mempool():
+    mempool = Mempool(4000)
+    assert mempool.wrptr == MEMPOOL_INFO_BYTES
+
+    # Nothing in use, frames can always be written
+    buf, end_ptr = mempool.reserve(0)
+    dptr = mempool.write(buf, end_ptr, 100)
+    mempool.commit(dptr)
+    assert mempool.wrptr == buf + 40 + 400
+
+    # Too close to the read pointer gets the dummy packet
+    assert mempool.reserve(mempool.wrptr + MIN_USAGE - 4)[0] == DUMMY_PACKET
+    assert mempool.write(*mempool.reserve(mempool.wrptr + MIN_USAGE - 4), 1) is None
+
+    # Packets that would run into the read pointer are dropped
+    rdptr = mempool.wrptr + 200
+    buf, end_ptr = mempool.reserve(rdptr)
+    assert mempool.write(buf, end_ptr, 40) is None
+    assert mempool.write(buf, end_ptr, 30) is not None
+
+    # Committing past the last safe point wraps to the start
+    mempool.commit(mempool.last_safe_wrptr + 4)
+    assert mempool.wrptr == mempool.start
+
+
+def test_packet_queue():
+    queue = PacketQueue(4)
+    for buf in (100, 200, 300, 400):
+        assert not queue.full()
+        queue.add(buf)
+    assert queue.full()
+
+    # Freeing out of order only moves rd_index when the oldest goes
+    queue.free_index(1)
+    assert queue.rd_index == 0 and queue.full()
+    queue.free_index(0)
+    assert queue.rd_index == 2 and queue.rdptr() == 300
+
+
+def test_clients_keep_up():
+    rng = np.random.default_rng(1)
+    lengths = rng.integers(60, 1519, 2000)
+    filter_results = np.where(rng.random(2000) < 0.3, HP_FILTER_BIT | 1, 1)
+    result = simulate_rx_buffering(back_to_back(lengths), lengths, filter_results)
+    assert result["first_drop"] is None
+    assert result["delivered"][0] + result["hp_delivered"] == 2000
+
+
+def test_slow_client_drops():
+    lengths = np.full(1000, 100)
+    result = simulate_rx_buffering(back_to_back(lengths), lengths, np.ones(1000, dtype=np.int64),
+                                   client_packet_times=[100e9])
+    assert result["first_drop"][2] == DROP_CLIENT_QUEUE
+    num_dropped = sum(1 for drop in result["drops"] if drop[2] == DROP_CLIENT_QUEUE)
+    assert num_dropped + result["delivered"][0] == 1000
+    assert result["client_fifo"].max() == 3
+
+    # Without an HP client, HP frames are never freed. Small frames use up the pointers, large ones the mempool
+    filter_results = np.full(1000, HP_FILTER_BIT | 1)
+    result = simulate_rx_buffering(back_to_back(lengths), lengths, filter_results, hp_client=False)
+    assert result["first_drop"][:3] == (result["time"][32], 32, DROP_HP_QUEUE)
+
+    lengths = np.full(1000, 1500)
+    result = simulate_rx_buffering(back_to_back(lengths), lengths, filter_results, hp_client=False)
+    assert result["first_drop"][2] == DROP_MEMPOOL
@@ -0,0 +1,85 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the multi port traffic matrix. These do not need the simulator.
+
+import copy
+
+from multi_port import TrafficMatrix, DUAL_100M_PORT_MAPS
+
+BIT_TIME = 10**7 # 100 Mb/s in femtoseconds
+
+
+class Frame():
+    """ Enough of an MiiPacket for the matrix """
+
+    def __init__(self, rand, dst_mac_addr, src_mac_addr, data_bytes, inter_frame_gap=0):
+        self.dst_mac_addr = dst_mac_addr
+        self.src_mac_addr = src_mac_addr
+        self.data_bytes = data_bytes
+        self.inter_frame_gap = inter_frame_gap
+
+    def get_packet_bytes(self):
+        return self.dst_mac_addr + self.src_mac_addr + [0, 0] + self.data_bytes
+
+
+def forward(matrix, time=0):
+    """ A DUT forwarding every frame out of the port its MAC address is for """
+    received = {port: [] for port in range(matrix.num_ports)}
+    for src in range(matrix.num_ports):
+        for packet in matrix.packets(src, ifg=96 * BIT_TIME):
+            received[packet.dst_mac_addr[5]].append(packet)
+    for port, packets in received.items():
+        for packet in packets:
+            time += (len(packet.get_packet_bytes()) + 4 + 8 + 12) * 8 * BIT_TIME
+            matrix.receive(port, packet, time)
+
+
+def test_dual_port_forwarding():
+    matrix = TrafficMatrix([[0, 30], [20, 0]], seed=1, packet_class=Frame)
+    forward(matrix)
+    assert matrix.check() == []
+    assert matrix.flows[(0, 1)].received == 30
+    assert matrix.flows[(1, 0)].received == 20
+    summary = matrix.summary()
+    assert "Port 0 -> 1: 30/30 frames" in summary
+    assert "Aggregate" in summary
+    assert 90 < matrix.meters[0].mbps() <= 100
+
+
+def test_packets_interleave_flows():
+    matrix = TrafficMatrix([[5, 5, 5], [0, 0, 0], [0, 0, 0]], seed=2, packet_class=Frame)
+    packets = matrix.packets(0)
+    tags = [matrix.read_tag(p) for p in packets]
+    assert sorted(tags) == [(0, dst, seq) for dst in range(3) for seq in range(5)]
+    assert tags != sorted(tags)
+    # Each flow is numbered in order
+    for dst in range(3):
+        assert [seq for _, d, seq in tags if d == dst] == list(range(5))
+
+
+def test_loss_misrouting_and_reordering():
+    matrix = TrafficMatrix([[0, 4], [0, 0]], seed=3, packet_class=Frame)
+    packets = matrix.packets(0)
+    matrix.receive(1, packets[0], 1)
+    matrix.receive(1, packets[2], 2)
+    matrix.receive(0, packets[3], 3)
+    unknown = copy.copy(packets[1])
+    unknown.data_bytes = [0] * 46
+    matrix.receive(1, unknown, 4)
+
+    failures = matrix.check()
+    assert "Port 0 -> 1: 2 of 4 frames lost" in failures
+    assert "Port 0 -> 1: 1 frames out of order" in failures
+    assert "1 frames out of the wrong port" in failures
+    assert "1 unknown frames" in failures
+    assert "Port 0 -> 1: 2 of 4 frames lost" not in matrix.check(allow_loss=True)
+
+
+def test_dual_100m_port_maps():
+    assert [p.name for p in DUAL_100M_PORT_MAPS] == ["phy0", "phy1"]
+    pins = []
+    for port_map in DUAL_100M_PORT_MAPS:
+        for ports in (port_map.rxd, port_map.txd, [port_map.clk, port_map.rxdv, port_map.txen]):
+            pins += ports if isinstance(ports, list) else [ports]
+    assert len(pins) == len(set(pins)), "Ports used twice"
@@ -0,0 +1,125 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the loopback queue between the RX and TX PHYs. These do not need the simulator.
+
+from types import SimpleNamespace
+
+from phy_loopback import LoopbackQueue, PhyLoopback
+
+IFG = 960 * 10**6
+
+
+class FakeXsi():
+    def __init__(self):
+        self.time = 0
+
+    def get_time(self):
+        return self.time
+
+
+class FakeThread():
+    """ Enough of a SimThread for LoopbackQueue.frames(). wait() can't block, so the predicate must hold """
+
+    def __init__(self, xsi):
+        self.xsi = xsi
+        self.packets = None
+
+    def wait(self, fn):
+        assert fn(None)
+
+    def wait_until(self, time):
+        assert time >= self.xsi.time
+        self.xsi.time = time
+
+    def set_packets(self, packets):
+        self.packets = packets
+
+
+def frame(index):
+    return SimpleNamespace(index=index, preamble_nibbles=[5] * 15, inter_frame_gap=0.0, error_nibbles=[],
+                           corrupt_crc=False, get_packet_bytes=lambda: [0] * 60)
+
+
+def test_delay_and_ifg():
+    xsi = FakeXsi()
+    phy = SimpleNamespace(xsi=xsi)
+    queue = LoopbackQueue(delay=1000, ifg=IFG)
+
+    xsi.time = 5000
+    queue.capture(frame(0), phy)
+    assert queue.pop_ready(5999) is None
+    packet = queue.pop_ready(6000)
+    assert packet.index == 0
+    assert packet.inter_frame_gap == IFG
+    assert queue.pop_ready(10**9) is None
+
+
+def test_frames_waits_until_ready():
+    xsi = FakeXsi()
+    phy = SimpleNamespace(xsi=xsi)
+    thread = FakeThread(xsi)
+    queue = LoopbackQueue(delay=1000, ifg=IFG, max_frames=3)
+    loopback = PhyLoopback([], phy, thread, queue)
+
+    for i in range(3):
+        queue.capture(frame(i), phy)
+        xsi.time += 10
+    # Captured after max_frames, so ignored
+    queue.capture(frame(3), phy)
+
+    sent = []
+    for packet in thread.packets:
+        sent.append((packet.index, xsi.time))
+    assert sent == [(0, 1000), (1, 1010), (2, 1020)]
+    assert queue.counts() == {"captured": 3, "replayed": 3, "queued": 0, "dropped": 0, "errors": 0,
+                              "crc_errors": 0}
+    assert loopback.simthreads == [phy, thread]
+
+
+def test_polled():
+    xsi = FakeXsi()
+    phy = SimpleNamespace(xsi=xsi)
+    thread = FakeThread(xsi)
+    queue = LoopbackQueue(max_frames=1)
+    PhyLoopback([], phy, thread, queue, polled=True)
+    assert thread.packets is queue
+
+    queue.capture(frame(0), phy)
+    assert queue.pop_ready(0).index == 0
+    assert queue.pop_ready(0) is LoopbackQueue.END
+
+
+def test_error_injection():
+    phy = SimpleNamespace(xsi=FakeXsi())
+    queue = LoopbackQueue(error_rate=0.25, crc_error_rate=0.25, drop_rate=0.1, seed=1)
+    for i in range(1000):
+        queue.capture(frame(i), phy)
+
+    counts = queue.counts()
+    assert counts["captured"] == 1000
+    assert 50 < counts["dropped"] < 150
+    assert 150 < counts["errors"] < 350
+    assert 150 < counts["crc_errors"] < 350
+    assert counts["queued"] == 1000 - counts["dropped"]
+
+    replayed = []
+    while (packet := queue.pop_ready(0)) is not None:
+        replayed.append(packet)
+    assert sum(1 for p in replayed if p.corrupt_crc) == counts["crc_errors"]
+    errored = [p for p in replayed if p.error_nibbles]
+    assert len(errored) == counts["errors"]
+    # Only ever after the preamble and SFD, and within the MAC frame
+    assert all(16 <= p.error_nibbles[0] < 16 + 120 for p in errored)
+
+
+def test_same_seed_same_errors():
+    def errors(seed):
+        phy = SimpleNamespace(xsi=FakeXsi())
+        queue = LoopbackQueue(error_rate=0.5, seed=seed)
+        for i in range(100):
+            queue.capture(frame(i), phy)
+        return [queue.pop_ready(0).error_nibbles for i in range(100)]
+
+    assert errors(7) == errors(7)
+    assert errors(7) != errors(8)
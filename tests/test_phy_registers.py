@@ -0,0 +1,102 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the PHY register file used by the SMI slave model. These do not need the simulator.
+
+from phy_registers import PhyRegisters, DEFAULT_AUTONEG_ADVERT, NO_PHY_VALUE
+from phy_registers import BASIC_CONTROL_REG, BASIC_STATUS_REG, PHY_ID1_REG, PHY_ID2_REG
+from phy_registers import AUTONEG_ADVERT_REG, AUTONEG_LINK_REG, GIGE_CONTROL_REG
+from phy_registers import BASIC_CONTROL_RESET_BIT, BASIC_CONTROL_AUTONEG_EN_BIT, BASIC_CONTROL_POWER_DOWN_BIT
+from phy_registers import BASIC_CONTROL_RESTART_AUTONEG_BIT, BASIC_STATUS_LINK_BIT, BASIC_STATUS_AUTONEG_COMPLETE_BIT
+
+PHY = 0x05
+US = 10**9
+AN_TIME = 100 * US
+
+
+def link_up(registers, time):
+    return (registers.read(PHY, BASIC_STATUS_REG, time) >> BASIC_STATUS_LINK_BIT) & 1
+
+
+def autoneg_complete(registers, time):
+    return (registers.read(PHY, BASIC_STATUS_REG, time) >> BASIC_STATUS_AUTONEG_COMPLETE_BIT) & 1
+
+
+def test_defaults():
+    registers = PhyRegisters([PHY], phy_id=0x0007c0f1)
+    assert registers.read(PHY, PHY_ID1_REG, 0) == 0x0007
+    assert registers.read(PHY, PHY_ID2_REG, 0) == 0xc0f1
+    assert registers.read(PHY, AUTONEG_ADVERT_REG, 0) == DEFAULT_AUTONEG_ADVERT
+    assert registers.read(PHY + 1, BASIC_CONTROL_REG, 0) == NO_PHY_VALUE
+    assert link_up(registers, 0) == 0
+
+
+def test_read_only_and_plain_registers():
+    registers = PhyRegisters([PHY])
+    status = registers.read(PHY, BASIC_STATUS_REG, 0)
+    registers.write(PHY, BASIC_STATUS_REG, 0xffff, 0)
+    assert registers.read(PHY, BASIC_STATUS_REG, 0) == status
+    registers.write(PHY, GIGE_CONTROL_REG, 0x0300, 0)
+    assert registers.read(PHY, GIGE_CONTROL_REG, 0) == 0x0300
+    registers.write(PHY + 1, GIGE_CONTROL_REG, 0x0300, 0) # No PHY, ignored
+
+
+def test_autoneg_on_connect():
+    registers = PhyRegisters([PHY], autoneg_time=AN_TIME)
+    registers.connect(PHY, 10 * US, partner_advert=0x0101)
+    assert link_up(registers, 10 * US) == 0
+    assert autoneg_complete(registers, 10 * US + AN_TIME - 1) == 0
+    assert link_up(registers, 10 * US + AN_TIME) == 1
+    assert autoneg_complete(registers, 10 * US + AN_TIME) == 1
+    assert registers.read(PHY, AUTONEG_LINK_REG, 10 * US + AN_TIME) == 0x0101
+    assert registers.log == [(10 * US + AN_TIME, PHY, "link up")]
+
+
+def test_link_status_latches_low():
+    registers = PhyRegisters([PHY], autoneg_time=AN_TIME)
+    registers.connect(PHY, 0)
+    registers.disconnect(PHY, 200 * US)
+    registers.connect(PHY, 210 * US)
+    assert link_up(registers, 150 * US) == 1
+    # The link has been down since the last read, although it is back up by now
+    assert link_up(registers, 400 * US) == 0
+    assert link_up(registers, 400 * US) == 1
+    assert [event for _, _, event in registers.log] == ["link up", "link down", "link up"]
+
+
+def test_restart_autoneg_self_clears():
+    registers = PhyRegisters([PHY], autoneg_time=AN_TIME)
+    registers.connect(PHY, 0)
+    assert link_up(registers, AN_TIME) == 1
+
+    control = registers.read(PHY, BASIC_CONTROL_REG, AN_TIME)
+    registers.write(PHY, BASIC_CONTROL_REG, control | (1 << BASIC_CONTROL_RESTART_AUTONEG_BIT), 200 * US)
+    assert registers.read(PHY, BASIC_CONTROL_REG, 200 * US) == control
+    assert link_up(registers, 200 * US) == 0
+    assert link_up(registers, 200 * US + AN_TIME) == 1
+
+
+def test_autoneg_disabled_and_power_down():
+    registers = PhyRegisters([PHY], autoneg_time=AN_TIME)
+    control = registers.read(PHY, BASIC_CONTROL_REG, 0) & ~(1 << BASIC_CONTROL_AUTONEG_EN_BIT)
+    registers.write(PHY, BASIC_CONTROL_REG, control, 0)
+    registers.connect(PHY, 10 * US)
+    link_up(registers, 10 * US) # Clear the latched low status
+    assert link_up(registers, 10 * US) == 1
+
+    registers.write(PHY, BASIC_CONTROL_REG, control | (1 << BASIC_CONTROL_POWER_DOWN_BIT), 20 * US)
+    link_up(registers, 20 * US)
+    assert link_up(registers, 20 * US) == 0
+    registers.write(PHY, BASIC_CONTROL_REG, control, 30 * US)
+    link_up(registers, 30 * US)
+    assert link_up(registers, 30 * US) == 1
+
+
+def test_reset():
+    registers = PhyRegisters([PHY], autoneg_time=AN_TIME)
+    registers.connect(PHY, 0)
+    registers.write(PHY, AUTONEG_ADVERT_REG, 0x0021, 0)
+    registers.write(PHY, BASIC_CONTROL_REG, 1 << BASIC_CONTROL_RESET_BIT, 200 * US)
+    assert not registers.read(PHY, BASIC_CONTROL_REG, 200 * US) & (1 << BASIC_CONTROL_RESET_BIT)
+    assert registers.read(PHY, AUTONEG_ADVERT_REG, 200 * US) == DEFAULT_AUTONEG_ADVERT
+    assert link_up(registers, 200 * US + AN_TIME) == 1
@@ -0,0 +1,81 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the Python Qav shaper reference model. These do not need the simulator.
+
+import numpy as np
+import pytest
+
+from qav_shaper_model import (QavShaperModel, qav_idle_slope, qav_credit_limit, shaper_do_idle_slope,
+                              shaper_do_send_slope, INT32_MAX, SIM_TICKS_PER_TIMER_TICK)
+from wire_timing import SIM_TICKS_PER_SECOND, PACKET_OVERHEAD_BYTES
+
+
+def test_qav_fixed_point():
+    # Same arithmetic as set_qav_idle_slope() / set_qav_credit_limit()
+    assert qav_idle_slope(5 * 1024 * 1024) == 3435
+    assert qav_idle_slope(75000000) == 49152
+    assert qav_credit_limit(0) == 0
+    assert qav_credit_limit(1500) == (1500 + PACKET_OVERHEAD_BYTES) * 8
+
+    # Unlimited credit saturates at INT_MAX, elapsed time is 32 bit
+    allowed, credit = shaper_do_idle_slope(0, 0, 0x7fffffff, True, 49152)
+    assert allowed and credit == INT32_MAX
+    allowed, credit = shaper_do_idle_slope(-100, 0xfffffff0, 0x10, True, 10)
+    assert allowed and credit == 220
+
+    # Positive credit is discarded when there is no HP frame, negative credit is kept
+    assert shaper_do_idle_slope(0, 0, 10, False, 49152) == (False, 0)
+    assert shaper_do_idle_slope(-1000000, 0, 10, False, 49152) == (False, -1000000 + 491520)
+
+    assert shaper_do_send_slope(0, 40) == -((40 + PACKET_OVERHEAD_BYTES) << 19)
+
+
+@pytest.mark.parametrize("idle_slope_bps", [1000000, 5 * 1024 * 1024, 75000000])
+def test_qav_saturated_hp_rate(idle_slope_bps):
+    num_frames = 2000
+    model = QavShaperModel(idle_slope_bps)
+    result = model.schedule(np.zeros(num_frames), np.full(num_frames, 100))
+
+    departures = result["hp_departures"]
+    assert np.all(np.diff(departures) > 0)
+    rate_bps = (100 + PACKET_OVERHEAD_BYTES) * 8 * (num_frames - 1) / ((departures[-1] - departures[0]) / SIM_TICKS_PER_SECOND)
+    expected_bps = model.idle_slope * 100000000 / (1 << 16)
+    assert abs(rate_bps - expected_bps) / expected_bps < 0.001, f"{rate_bps} vs {expected_bps}"
+    assert np.all(result["hp_credit"] >= 0)
+
+
+def test_qav_lp_fills_gaps():
+    num_frames = 500
+    model = QavShaperModel(5 * 1024 * 1024)
+    result = model.schedule(np.zeros(num_frames), np.full(num_frames, 100),
+                            np.zeros(num_frames), np.full(num_frames, 1500))
+
+    # Saturated LP traffic goes whenever HP has no credit, so HP never goes twice in a row after the first frame
+    kinds = result["order"][:, 0]
+    last_lp = np.flatnonzero(kinds == 1)[-1]
+    hp_positions = np.flatnonzero(kinds == 0)
+    assert hp_positions[0] == 0
+    assert np.all(np.diff(hp_positions[hp_positions < last_lp]) > 1)
+
+    # Back to back on the wire until the LP frames run out
+    starts = np.sort(np.concatenate((result["hp_departures"], result["lp_departures"])))[:last_lp + 1]
+    lengths = np.where(kinds == 0, 100, 1500)[:last_lp]
+    assert np.array_equal(np.diff(starts), (lengths + PACKET_OVERHEAD_BYTES) * 8 * 10**7)
+
+
+@pytest.mark.parametrize("phy", ["mii", "rmii_4b", "rmii_1b"])
+def test_mac_ifg(phy):
+    # The MACs' IFG timer counts make a 96 bit gap when their allowance for the TX latency holds
+    model = QavShaperModel(phy=phy)
+    for length in (100, 101, 102, 103):
+        assert model.ifg(length) == 96 * SIM_TICKS_PER_TIMER_TICK
+    assert QavShaperModel(phy=phy, tx_latency_ticks=20).ifg(100) > 96 * SIM_TICKS_PER_TIMER_TICK
+
+    # Departures are on reference timer ticks, with the MAC's gap between back to back frames
+    model = QavShaperModel(phy=phy, tx_latency_ticks=12)
+    result = model.schedule([], [], [12345678, 12345678], [100, 101])
+    departures = result["lp_departures"]
+    assert np.all(departures % SIM_TICKS_PER_TIMER_TICK == 0) and departures[0] == 2 * SIM_TICKS_PER_TIMER_TICK
+    assert departures[1] - departures[0] == (100 + 12) * 8 * 10**7 + model.ifg(100)
+
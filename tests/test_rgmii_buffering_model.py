@@ -0,0 +1,117 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the gigabit MAC buffering model. These do not need the simulator.
+
+from mac_filter_model import MacFilterModel
+from rgmii_buffering_model import RgmiiRxBufferModel, RgmiiTxBufferModel, RxFrame, TxFrame, ClientRate
+from rgmii_buffering_model import burst_trace, rx_trace_from_packets, wire_time
+from rgmii_buffering_model import NO_FREE_BUFFER, CLIENT_QUEUE_FULL, LP_THRESHOLD, SIM_BIT_TIME_1G
+
+US = 10**9 # femtoseconds
+
+
+def back_to_back(num_frames, num_bytes=1514, **kwargs):
+    step = wire_time(num_bytes, SIM_BIT_TIME_1G)
+    return [RxFrame((i + 1) * step, num_bytes, **kwargs) for i in range(num_frames)]
+
+
+def test_fast_client_never_drops():
+    report = RgmiiRxBufferModel([ClientRate(mbps=2000)]).run(burst_trace(20, 100, 50 * US))
+    assert report.drops == []
+    # Short frames still queue up behind a long one
+    assert 2 < report.occupancy.max <= 8
+    assert "No drops" in report.summary()
+
+
+def test_client_queue_fills_first():
+    # A stalled client holds ETHERNET_RX_CLIENT_QUEUE_SIZE - 1 frames, fewer than the free buffers
+    report = RgmiiRxBufferModel([ClientRate(frame_time=1000 * US)]).run(back_to_back(40))
+    assert report.first_drop.cause == CLIENT_QUEUE_FULL
+    assert report.first_drop.index == 16
+    assert report.first_drop.client == 0
+    # The pins, the queue and the frame being dropped
+    assert report.occupancy.max == 2 + 15 + 1
+
+
+def test_buffers_run_out_with_two_clients():
+    # Frames alternate between two stalled clients, so the buffers run out before either queue is full
+    trace = [RxFrame(f.time, f.num_bytes, clients=(i % 2,)) for i, f in enumerate(back_to_back(30))]
+    model = RgmiiRxBufferModel([ClientRate(frame_time=1000 * US)] * 2, num_buffers=16)
+    report = model.run(trace)
+    assert report.first_drop.cause == NO_FREE_BUFFER
+    # Each client has fetched its first frame, and the next 14 fill the buffers not at the pins
+    assert report.first_drop.index == 16
+    assert report.occupancy.max == 16
+
+    report = RgmiiRxBufferModel([ClientRate(frame_time=1000 * US)] * 2, num_buffers=64).run(trace)
+    assert report.drops == []
+
+
+def test_hp_threshold_drops_lp():
+    trace = back_to_back(40)
+    lp = [ClientRate(frame_time=1000 * US)]
+    report = RgmiiRxBufferModel(lp, hp_client=ClientRate(mbps=1000), queue_size=32).run(trace)
+    assert report.first_drop.cause == LP_THRESHOLD
+    assert NO_FREE_BUFFER not in report.drops_by_cause()
+    # The threshold keeps more than half the buffers free
+    assert report.occupancy.max == 32 - 16 - 1
+
+
+def test_server_time_builds_used_queue():
+    trace = back_to_back(60, num_bytes=60)
+    report = RgmiiRxBufferModel([ClientRate()], server_frame_time=10 * US).run(trace)
+    assert report.first_drop.cause == NO_FREE_BUFFER
+    # The server has queued two frames, making room for two more
+    assert report.first_drop.index == 32
+    assert report.occupancy.max == 32
+
+
+def test_unwanted_frames_free_their_buffer():
+    trace = back_to_back(100, clients=())
+    report = RgmiiRxBufferModel([ClientRate(frame_time=1000 * US)]).run(trace)
+    assert report.drops == []
+    assert report.occupancy.max == 2
+
+
+class Frame():
+    def __init__(self, dst_mac_addr, inter_frame_gap):
+        self.dst_mac_addr = dst_mac_addr
+        self.inter_frame_gap = inter_frame_gap
+        self.dropped = False
+
+    def get_packet_bytes(self):
+        return self.dst_mac_addr + [0] * 6 + [0x08, 0x00] + [0] * 46
+
+
+def test_trace_from_packets():
+    filter_model = MacFilterModel(2)
+    filter_model.add_macaddr_filter(0, True, [1] * 6)
+    filter_model.add_macaddr_filter(1, False, [2] * 6)
+    ifg = 96 * SIM_BIT_TIME_1G
+    trace = rx_trace_from_packets([Frame([1] * 6, ifg), Frame([2] * 6, ifg), Frame([3] * 6, ifg)],
+                                  filter_model=filter_model)
+    assert [(f.hp, f.clients) for f in trace] == [(True, ()), (False, (1,)), (False, ())]
+    assert trace[1].time - trace[0].time == wire_time(60, SIM_BIT_TIME_1G)
+
+
+def test_tx_stalls_when_buffers_run_out():
+    # A client queueing frames faster than line rate uses up the TX buffers and then waits for each one
+    step = wire_time(1514, SIM_BIT_TIME_1G) // 4
+    trace = [TxFrame(i * step, 1514) for i in range(20)]
+    report = RgmiiTxBufferModel().run(trace)
+    assert report.occupancy.max == 8
+    # Two frames have been sent by the time the 11th is queued
+    assert report.first_stall[1] == 10
+    assert report.num_stalls == 10
+    assert "waited" in report.summary()
+
+    report = RgmiiTxBufferModel(num_buffers=32).run(trace)
+    assert report.num_stalls == 0
+
+
+def test_tx_hp_holds_a_buffer():
+    trace = [TxFrame(0, 1514, hp=True) for _ in range(8)]
+    report = RgmiiTxBufferModel(hp=True).run(trace)
+    # The server holds one HP buffer, so only seven are left for the frames
+    assert report.first_stall[1] == 7
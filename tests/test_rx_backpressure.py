@@ -16,6 +16,7 @@ from helpers import choose_small_frame_size, check_received_packet, args
 from helpers import get_mii_rx_clk_phy, get_mii_tx_clk_phy, get_rgmii_rx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_tx_phy
+from xe_cache import find_xe
 
 class OutputChecker():
     """ Check that every line from the DUT is an increasing packet size received
@@ -75,7 +76,7 @@ def do_rx_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, packets, test_f
         with capfd.disabled():
             print(f"Running {testname}: {mac} mac, {tx_phy.get_name()} phy, {arch} arch sending {len(packets)} packets at {tx_clk.get_name()} (seed {seed})")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
 
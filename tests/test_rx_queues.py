@@ -28,6 +28,8 @@ from helpers import choose_small_frame_size, check_received_packet
 from helpers import get_mii_tx_clk_phy, get_rgmii_tx_clk_phy, create_if_needed, get_sim_args
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_tx_phy
+from wire_timing import WireTiming
+from xe_cache import find_xe
 
 
 def choose_data_size(rand, data_len_min, data_len_max):
@@ -42,18 +44,11 @@ class DataLimiter(object):
     def __init__(self, limited_hp_mbps, bit_time):
         self._limited_hp_mbps = limited_hp_mbps
         self._credit = 0
-        self._bit_time = bit_time
-        max_bits_per_xsi_tick = 1/bit_time # bit_time is in xsi ticks per bit
-        self._max_mbps = max_bits_per_xsi_tick * px.Xsi.get_xsi_tick_freq_hz() * 1e-6
+        self._timing = WireTiming(bit_time)
+        self._max_mbps = self._timing.line_mbps()
 
     def get_ifg(self, packet_type, num_data_bytes, tag):
-        preamble_bytes = 8
-        header_bytes = 14
-        tag_bytes = 4 if tag else 0
-        crc_bytes = 4
-        ifg_bytes = 12
-        num_packet_bytes = preamble_bytes + header_bytes + tag_bytes + num_data_bytes + crc_bytes + ifg_bytes
-        packet_time = num_packet_bytes * 8 * self._bit_time
+        packet_time = self._timing.packet_time(num_data_bytes, bool(tag))
 
         self._credit += packet_time
 
@@ -64,13 +59,13 @@ class DataLimiter(object):
             self._credit -= data_limited_time
 
             if self._credit < 0:
-                ifg_time = -self._credit + ifg_bytes * 8 * self._bit_time
+                ifg_time = -self._credit + self._timing.min_ifg
                 self._credit = 0
             else:
-                ifg_time = ifg_bytes * 8 * self._bit_time
+                ifg_time = self._timing.min_ifg
         else:
             data_limited_time = packet_time
-            ifg_time = ifg_bytes * 8 * self._bit_time
+            ifg_time = self._timing.min_ifg
 
         if 0:
             print("Packet {n} bytes {ns} ns, limited means {scaled}ns -> {ifg}".format(
@@ -139,7 +134,7 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, test_id,
             print("Running {test}: {phy} phy at {clk} (seed {seed})".format(test=testname, phy=tx_phy.get_name(), clk=tx_clk.get_name(), seed=seed))
             expect_filename = f'{expect_folder}/{testname}_{mac}_{tx_phy.get_name()}_{tx_clk.get_name()}_{arch}_{test_id}.expect'
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     with capfd.disabled():
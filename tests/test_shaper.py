@@ -3,6 +3,7 @@
 import pytest
 from pathlib import Path
 import Pyxsim as px
+import sim_timeline
 import os
 import sys
 
@@ -15,6 +16,9 @@ from helpers import get_mii_rx_clk_phy, get_rgmii_rx_clk_phy
 from helpers import get_mii_tx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import generate_tests
 from helpers import get_rmii_clk, get_rmii_rx_phy
+from wire_timing import WireTiming, PACKET_OVERHEAD_BYTES
+from qav_shaper_model import QavShaperModel
+from xe_cache import find_xe
 
 
 high_priority_mac_addr = [0, 1, 2, 3, 4, 5]
@@ -22,6 +26,7 @@ high_priority_mac_addr = [0, 1, 2, 3, 4, 5]
 def packet_checker(packet, phy):
     if phy._verbose:
         sys.stdout.write(packet.dump())
+    phy.frames.append((packet.sfd_time, packet.dst_mac_addr == high_priority_mac_addr, len(packet.get_packet_bytes())))
     if packet.dst_mac_addr == high_priority_mac_addr:
         if phy._verbose: print(f"HP recvd time {phy.xsi.get_time_ns()} ns")
         phy.n_hp_packets += 1
@@ -50,6 +55,7 @@ class TimeoutMonitor(px.SimThread):
 
         self._packet_count += 1
         self._seen_packets += 1
+        sim_timeline.instant("timeout monitor", "HP packet", xsi.get_time(), seen_packets=self._seen_packets)
         print(f"{xsi._xsi.get_time()}: Received HP packet {self._packet_count}")
         if self._verbose:
             print(f"{xsi._xsi.get_time()} ns: HP seen_packets {self._seen_packets}")
@@ -73,6 +79,7 @@ class TimeoutMonitor(px.SimThread):
         while True:
             self.wait_until(xsi.get_time() + self._packet_period)
             self._seen_packets -= 1
+            sim_timeline.instant("timeout monitor", "tick", xsi.get_time(), seen_packets=self._seen_packets)
 
             if self._verbose:
                 print(f"{xsi.get_time()}: seen_packets {self._seen_packets}")
@@ -98,21 +105,16 @@ def do_test(capfd, mac, clkname, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=
         with capfd.disabled():
             print(f"Running {testname}: {rx_phy.get_name()} phy at {rx_clk.get_name()}")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
 
     # MAC request 5Mb/s
     slope = 5 * 1024 * 1024
 
-    bit_time = rx_phy.get_clock().get_bit_time() # bit_time is in xsi_ticks/bit
-    bit_rate = px.Xsi.get_xsi_tick_freq_hz() / bit_time
+    bit_rate = WireTiming.from_clock(rx_phy.get_clock()).line_mbps() * 1e6
     data_bytes = 100
-    ifg_bytes = 96/8
-    preamble_bytes = 8
-    crc_bytes = 4
-    packet_bytes = ifg_bytes + preamble_bytes + data_bytes + crc_bytes
-    packet_bits = packet_bytes * 8
+    packet_bits = (data_bytes + PACKET_OVERHEAD_BYTES) * 8
     packets_per_second = slope / packet_bits
     packet_period_xsi_ticks = px.Xsi.get_xsi_tick_freq_hz() / packets_per_second
 
@@ -126,6 +128,7 @@ def do_test(capfd, mac, clkname, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=
     rx_phy.timeout_monitor = timeout_monitor
     rx_phy.n_hp_packets = 0
     rx_phy.n_lp_packets = 0
+    rx_phy.frames = [] # (SFD time, HP, length) of each frame received
 
     if tx_clk and tx_phy:
         simthreads = [rx_clk, rx_phy, tx_clk, tx_phy, timeout_monitor]
@@ -156,6 +159,27 @@ def do_test(capfd, mac, clkname, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=
 
 
     assert result is True, f"{result}"
+    check_hp_period(rx_phy, slope, bit_rate, tx_width)
+
+
+def check_hp_period(rx_phy, slope, bit_rate, tx_width=None):
+    """ Check the mean gap between the HP frames against the Qav shaper model, given the LP frames the DUT sent.
+        The first HP frame goes with whatever credit the shaper started with, so it is left out.
+    """
+    if rx_phy.get_name() == "rmii":
+        phy = "rmii_1b" if tx_width == "1b" else "rmii_4b"
+    else:
+        phy = rx_phy.get_name() if rx_phy.get_name() == "mii" else None
+    hp_times = [t for t, hp, _ in rx_phy.frames if hp]
+    hp_lengths = [length for _, hp, length in rx_phy.frames if hp]
+    lp_lengths = [length for _, hp, length in rx_phy.frames if not hp]
+
+    model = QavShaperModel(slope, line_rate_bps=bit_rate, phy=phy)
+    hp_departures = model.schedule([0] * len(hp_times), hp_lengths, [0] * len(lp_lengths), lp_lengths)["hp_departures"]
+    measured = (hp_times[-1] - hp_times[1]) / (len(hp_times) - 2)
+    expected = (hp_departures[-1] - hp_departures[1]) / (len(hp_departures) - 2)
+    assert abs(measured - expected) / expected < 0.01, (
+        f"Mean HP frame period {measured / 1e6:.1f} ns, the shaper model gives {expected / 1e6:.1f} ns")
 
 
 def create_expect(filename, num_expected_packets):
@@ -0,0 +1,110 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the simulator metrics database and regression report. These do not need the simulator.
+
+import io
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import sim_metrics
+from sim_metrics import SimMetricsDb, SimRunRecorder, SimThreadProfiler, find_regressions
+
+
+def test_metrics_db_regressions(tmp_path):
+    db = SimMetricsDb(str(tmp_path / "logs" / "metrics.db"))
+    for sim_to_real in (1e-4, 1.1e-4, 0.9e-4, 1e-4, 0.5e-4):
+        db.add(test="test_shaper", profile="mii_rt", wall_s=10.0, sim_fs=10**12, sim_to_real=sim_to_real,
+               simthread_s=2.0, frames_tx=10, frames_rx=10, result="pass")
+    for wall_s in (10.0, 10.0, 10.0, 10.0, 11.0):
+        db.add(test="test_rx", profile="rmii", wall_s=wall_s, sim_fs=10**12, sim_to_real=1e-4)
+
+    runs = db.runs()
+    assert len(runs) == 10 and runs[0]["test"] == "test_shaper"
+    assert len(db.runs("test_rx")) == 5
+    db.close()
+
+    # A database made before a column was added gets the column
+    with sqlite3.connect(tmp_path / "old.db") as conn:
+        conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, test TEXT, wall_s REAL)")
+    old = SimMetricsDb(str(tmp_path / "old.db"))
+    old.add(test="test_rx", wall_s=1.0, peak_rss_rise_kb=10)
+    assert old.runs()[0]["peak_rss_rise_kb"] == 10
+    old.close()
+
+    assert find_regressions(runs) == [("test_shaper", "mii_rt", 0.5e-4, 1e-4)]
+    assert find_regressions(runs, metric="wall_s") == []
+    assert find_regressions(runs, threshold=1.05, metric="wall_s") == [("test_rx", "rmii", 11.0, 10.0)]
+
+
+def test_simthread_profiler(monkeypatch):
+    class SimThread():
+        def wait(self, predicate):
+            while not predicate(self):
+                pass
+
+    class Clock(SimThread):
+        def get_name(self):
+            return "25Mhz"
+
+        def run(self):
+            self.ticks = 0
+            for _ in range(3):
+                self.wait(self.tick)
+
+        def tick(self, _):
+            self.ticks += 1
+            return self.ticks % 2 == 0
+
+    monkeypatch.setattr(sim_metrics, "px", SimpleNamespace(SimThread=SimThread))
+    profiler = SimThreadProfiler()
+    profiler.install()
+    Clock().run()
+    profiler.uninstall()
+    assert SimThread.wait.__name__ == "wait"
+
+    (name, _, wakeups, calls, _), = profiler.threads.values()
+    assert (name, wakeups, calls) == ("Clock 25Mhz", 3, 6)
+    (_, site), = profiler.sites
+    assert site.startswith("test_sim_metrics.py:")
+
+    out = io.StringIO()
+    profiler.report(out)
+    assert "Clock 25Mhz" in out.getvalue()
+
+
+def test_run_recorder_simthread_time(monkeypatch):
+    class SimThread():
+        def wait(self, predicate):
+            while not predicate(self):
+                pass
+
+    class Worker(SimThread):
+        def run(self):
+            time.sleep(0.05)
+            self.wait(lambda _: time.sleep(0.05) or True)
+
+    def run_on_simulator_(binary, simthreads):
+        # Launching xsim is not Python time
+        time.sleep(0.2)
+        for thread in simthreads:
+            thread.run()
+        return True
+
+    monkeypatch.setattr(sim_metrics, "px", SimpleNamespace(SimThread=SimThread, Xsi=SimpleNamespace(terminate=None),
+                                                           run_on_simulator_=run_on_simulator_))
+    db = SimpleNamespace(add=lambda **metrics: runs.append(metrics))
+    runs = []
+    recorder = SimRunRecorder(db, "test_rx", "mii_rt")
+    recorder.install()
+    worker = Worker()
+    assert sim_metrics.px.run_on_simulator_("app.xe", simthreads=[worker])
+    recorder.uninstall()
+
+    run, = runs
+    # The time in run() before the first wait and in the predicate, but not before run()
+    assert 0.1 <= run["simthread_s"] < 0.2
+    assert run["wall_s"] >= 0.3 and run["result"] == "pass"
+    assert run["peak_rss_rise_kb"] >= 0
+    assert SimThread.wait.__name__ == "wait"
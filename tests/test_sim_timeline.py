@@ -0,0 +1,37 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the simulation timeline export. These do not need the simulator.
+
+import json
+import sys
+
+import sim_timeline
+
+
+def test_chrome_trace_export(tmp_path):
+    # Nothing is recorded until a timeline is started
+    sim_timeline.instant("checker", "ignored", 0)
+
+    filename = tmp_path / "timeline.json"
+    stdout = sys.stdout
+    sim_timeline.start(filename)
+    sim_timeline.complete("mii tx", "Packet 0", 1000 * 10**6, 7000 * 10**6, data_bytes=46)
+    sim_timeline.counter("clock control", "rate", 2000 * 10**6, MHz=125)
+    print("Received packet 0 ok")
+    sim_timeline.instant("timeout monitor", "tick", 3000 * 10**6)
+    sim_timeline.run_finished()
+    assert sim_timeline._active is None
+    # Nothing printed after the run is recorded
+    assert sys.stdout is stdout
+
+    events = json.loads(filename.read_text())["traceEvents"]
+    tracks = {e["args"]["name"]: e["tid"] for e in events if e["name"] == "thread_name"}
+    assert list(tracks) == ["mii tx", "clock control", "stdout", "timeout monitor"]
+
+    packet, rate, line, tick = [e for e in events if e["ph"] != "M"]
+    assert (packet["ts"], packet["dur"], packet["args"]) == (1.0, 6.0, {"data_bytes": 46})
+    assert rate["args"] == {"MHz": 125}
+    # Printed lines are placed at the latest sim time recorded
+    assert (line["name"], line["ts"], line["tid"]) == ("Received packet 0 ok", 2.0, tracks["stdout"])
+    assert tick["ts"] == 3.0
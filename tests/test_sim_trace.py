@@ -0,0 +1,80 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the windowed trace filters. These do not need the simulator.
+
+import io
+
+import pytest
+
+from sim_trace import SimTraceControl, SimTraceController, filter_instructions, filter_vcd
+
+NS = 10**6 # Femtoseconds
+
+VCD_HEADER = """$timescale 1 ns $end
+$scope module tile[0] $end
+$var wire 1 ! tile[0]_XS1_PORT_1A $end
+$var wire 1 " tile[0]_XS1_PORT_1B $end
+$upscope $end
+$enddefinitions $end
+"""
+
+
+@pytest.fixture
+def control(tmp_path):
+    control = SimTraceControl(tmp_path / "trace.ctrl", create=True)
+    yield control
+    control.close()
+
+
+def test_time_window_stops_at_packet(tmp_path):
+    controller = SimTraceController(str(tmp_path / "trace"), start_time=100, stop_packet=3)
+    control = controller._control
+    controller.on_packet(2, 150)
+    controller.on_packet(3, 200)
+    assert control.state_at(150) and not control.state_at(200)
+    controller.close()
+
+
+def test_filter_instructions(control):
+    control.add_transition(100, True)
+    control.add_transition(200, False)
+
+    def trace():
+        # The PHY threads move the latest time on while the trace is read
+        for time, line in [(0, "tile[0]@0 a\n"), (50, "tile[1]@0 b\n"), (60, "tile[0]@0 c\n"),
+                           (70, "tile[0]@0 d\n"), (100, "tile[0]@0 e\n"), (150, "tile[1]@0 f\n"),
+                           (200, "tile[0]@0 g\n")]:
+            control.set_time(time)
+            yield line
+
+    out = io.StringIO()
+    filter_instructions(trace(), out, control, ["tile[0]"], pre_lines=2)
+    # Two lines of history before the window, and only the selected tile
+    assert out.getvalue() == "tile[0]@0 c\ntile[0]@0 d\ntile[0]@0 e\n"
+
+
+def test_filter_vcd(control):
+    control.add_transition(20 * NS, True)
+    control.add_transition(40 * NS, False)
+    changes = "#0\n0!\n0\"\n#10\n1!\n#20\n1\"\n#30\n0!\n#50\n1!\n"
+
+    out = io.StringIO()
+    filter_vcd(io.StringIO(VCD_HEADER + changes), out, control, ["PORT_1A"], pre_time=0)
+    assert out.getvalue() == VCD_HEADER.replace('$var wire 1 " tile[0]_XS1_PORT_1B $end\n', "") + (
+        # The window starts with the value of every kept signal
+        "#20\n$dumpvars\n1!\n$end\n"
+        "#30\n0!\n")
+
+
+def test_filter_vcd_past_window(control):
+    # An error at 35ns opens a window 15ns in the past, after the changes at 20ns have been read
+    def vcd():
+        yield from io.StringIO(VCD_HEADER + "#0\n0!\n#20\n1!\n#30\n")
+        control.add_transition(20 * NS, True)
+        control.add_transition(40 * NS, False)
+        yield from io.StringIO("0!\n#50\n1!\n")
+
+    out = io.StringIO()
+    filter_vcd(vcd(), out, control, [], pre_time=15 * NS)
+    assert out.getvalue() == VCD_HEADER + "#20\n$dumpvars\n0!\n$end\n1!\n#30\n0!\n"
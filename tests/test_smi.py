@@ -8,6 +8,7 @@ from pathlib import Path
 
 from smi import smi_master_checker, smi_make_packet
 from helpers import generate_tests, create_if_needed
+from xe_cache import find_xe
 
 
 def do_test(capfd, ptype, arch):
@@ -19,7 +20,7 @@ def do_test(capfd, ptype, arch):
     profile = f"{ptype}_{arch}"
 
     capfd.readouterr() # clear capfd buffer
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     tester = px.testers.ComparisonTester(open(f'{testname}.expect'), regexp=True, ordered=False)
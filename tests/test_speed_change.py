@@ -7,6 +7,7 @@ from pathlib import Path
 import pytest
 import random
 import Pyxsim as px
+import sim_timeline
 
 from mii_packet import MiiPacket
 from mii_clock import Clock
@@ -14,6 +15,7 @@ from helpers import do_rx_test, packet_processing_time, get_dut_mac_address, arg
 from helpers import choose_small_frame_size, check_received_packet
 from helpers import get_rgmii_tx_clk_phy, create_if_needed, get_sim_args
 from helpers import generate_tests
+from xe_cache import find_xe
 
 
 initial_delay_us = 100000 * 1e6
@@ -38,6 +40,7 @@ class ClockControl(px.SimThread):
         self.tx_clk_125.stop()
         # Drive the status onto the data pins
         self.tx_rgmii_25.set_data(self.tx_rgmii_25._phy_status)
+        sim_timeline.counter("clock control", "rate", xsi.get_time(), MHz=25)
 
 
         # Change clock speeds 1/2 window before the packets
@@ -51,6 +54,7 @@ class ClockControl(px.SimThread):
             self.tx_clk_25.stop()
             self.tx_clk_125.start()
             self.tx_rgmii_125.set_data(self.tx_rgmii_125._phy_status)
+            sim_timeline.counter("clock control", "rate", xsi.get_time(), MHz=125)
 
             # Wait for packets to be sent
             self.wait_until(xsi.get_time() + self.speed_change_time)
@@ -59,6 +63,7 @@ class ClockControl(px.SimThread):
             self.tx_clk_25.start()
             self.tx_clk_125.stop()
             self.tx_rgmii_25.set_data(self.tx_rgmii_25._phy_status)
+            sim_timeline.counter("clock control", "rate", xsi.get_time(), MHz=25)
 
 
 def create_packets(rand, clk, dut_mac_address, speed_change_time,
@@ -91,7 +96,7 @@ def do_test(capfd, mac, arch, tx_clk_25, tx_rgmii_25, tx_clk_125, tx_rgmii_125,
     testname = 'test_speed_change'
 
     profile = f'{mac}_rgmii_{arch}'
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     with capfd.disabled():
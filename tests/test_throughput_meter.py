@@ -0,0 +1,47 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the throughput meter. These do not need the simulator.
+
+from types import SimpleNamespace
+
+import pytest
+
+from throughput_meter import ThroughputMeter
+
+BIT_TIME = 10**7 # 100 Mb/s in femtoseconds
+
+
+def frame(num_data_bytes, src=1, vlan=False):
+    packet_bytes = [0] * (14 + (4 if vlan else 0) + num_data_bytes)
+    return SimpleNamespace(data_bytes=[0] * num_data_bytes, src_mac_addr=[0, 0, 0, 0, 0, src],
+                           get_packet_bytes=lambda: packet_bytes)
+
+
+def test_line_rate():
+    meter = ThroughputMeter(BIT_TIME, window=50 * 10**9, min_efficiency=99)
+    time = 0
+    for i in range(100):
+        packet = frame(46 if i % 2 else 1500, src=i % 3, vlan=i % 5 == 0)
+        frame_bits = (len(packet.get_packet_bytes()) + 4) * 8
+        # Back to back with the preamble and the minimum IFG
+        time += (64 + frame_bits) * BIT_TIME
+        meter.add_frame(packet, time)
+        time += 96 * BIT_TIME
+
+    assert meter.num_packets == 100
+    assert meter.efficiency() < 100 and meter.efficiency() > 95
+    assert meter.line_utilisation() == pytest.approx(100)
+    assert meter.window_mbps() < 100 and meter.window_mbps() > 90
+    assert meter.check() == []
+    assert sum(s.frames for s in meter.sources.values()) == 100 and len(meter.sources) == 3
+
+
+def test_thresholds():
+    meter = ThroughputMeter(BIT_TIME, min_mbps=50, min_efficiency=50)
+    for i in range(10):
+        # One 64 byte frame every 20us is 25.6 Mb/s
+        meter.add_frame(frame(46), (i + 1) * 20 * 10**9)
+    assert meter.mbps() == pytest.approx(64 * 8 * 10 / (9 * 20 + 64 * 8 * 0.01))
+    failures = meter.check()
+    assert len(failures) == 2 and failures[0].startswith("Throughput")
@@ -17,8 +17,9 @@ from helpers import get_sim_args, create_if_needed, get_mii_tx_clk_phy, args
 from helpers import get_rgmii_tx_clk_phy
 from helpers import get_rmii_clk, get_rmii_tx_phy
 from helpers import generate_tests
+from xe_cache import find_xe
 
-def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
+def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None, run_name='test_time_rx'):
     rand = random.Random()
     rand.seed(seed)
 
@@ -33,7 +34,7 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
         with capfd.disabled():
             print(f"Running {testname}: {mac} {tx_phy.get_name()} phy at {tx_clk.get_name()} for {arch} arch (seed {seed})")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     dut_mac_address = get_dut_mac_address()
@@ -78,14 +79,14 @@ def do_test(capfd, mac, arch, tx_clk, tx_phy, seed, rx_width=None):
 
     expect_folder = create_if_needed("expect_temp")
     if rx_width:
-        expect_filename = f'{expect_folder}/{testname}_{mac}_{tx_phy.get_name()}_rx{rx_width}_{tx_clk.get_name()}_{arch}'
+        expect_filename = f'{expect_folder}/{run_name}_{mac}_{tx_phy.get_name()}_rx{rx_width}_{tx_clk.get_name()}_{arch}'
     else:
-        expect_filename = f'{expect_folder}/{testname}_{mac}_{tx_phy.get_name()}_{tx_clk.get_name()}_{arch}'
+        expect_filename = f'{expect_folder}/{run_name}_{mac}_{tx_phy.get_name()}_{tx_clk.get_name()}_{arch}'
 
     create_expect(packets, expect_filename)
     tester = px.testers.ComparisonTester(open(expect_filename))
 
-    simargs = get_sim_args(testname, mac, tx_clk, tx_phy)
+    simargs = get_sim_args(run_name, mac, tx_clk, tx_phy)
 
     result = px.run_on_simulator_(  binary,
                                     simthreads=[tx_clk, tx_phy],
@@ -113,6 +114,19 @@ def create_expect(packets, filename):
 test_params_file = Path(__file__).parent / "test_time_rx/test_params.json"
 @pytest.mark.parametrize("params", generate_tests(test_params_file)[0], ids=generate_tests(test_params_file)[1])
 def test_time_rx(capfd, seed, params):
+    run_time_rx(capfd, seed, params)
+
+
+# A far end clock 100ppm fast sends back to back frames faster than the DUT's nominal line rate. RMII is left out as
+# its one clock is shared by both directions (see helpers.get_tx_clk_args())
+fast_far_end_params = [(p, id) for p, id in zip(*generate_tests(test_params_file)) if p["phy"] != "rmii"]
+@pytest.mark.parametrize("params", [p for p, _ in fast_far_end_params], ids=[id for _, id in fast_far_end_params])
+def test_time_rx_fast_far_end(capfd, seed, params, monkeypatch):
+    monkeypatch.setattr(args, "tx_clk_ppm", 100)
+    run_time_rx(capfd, seed, params, run_name="test_time_rx_fast_far_end")
+
+
+def run_time_rx(capfd, seed, params, run_name='test_time_rx'):
     verbose = False
     if seed == None:
         seed = random.randint(0, sys.maxsize)
@@ -121,13 +135,13 @@ def test_time_rx(capfd, seed, params):
     # Test 100 MBit - MII XS2
     if params["phy"] == "mii":
         (tx_clk_25, tx_mii) = get_mii_tx_clk_phy(verbose=verbose, test_ctrl='tile[0]:XS1_PORT_1C')
-        do_test(capfd, params["mac"], params["arch"], tx_clk_25, tx_mii, seed)
+        do_test(capfd, params["mac"], params["arch"], tx_clk_25, tx_mii, seed, run_name=run_name)
 
     elif params["phy"] == "rgmii":
         # Test 100 MBit - RGMII
         if params["clk"] == "25MHz":
             (tx_clk_25, tx_rgmii) = get_rgmii_tx_clk_phy(Clock.CLK_25MHz, verbose=verbose, test_ctrl='tile[0]:XS1_PORT_1C')
-            do_test(capfd, params["mac"], params["arch"],tx_clk_25, tx_rgmii, seed)
+            do_test(capfd, params["mac"], params["arch"],tx_clk_25, tx_rgmii, seed, run_name=run_name)
         # Test 1000 MBit - RGMII
         elif params["clk"] == "125MHz":
             # The RGMII application cannot keep up with line-rate gigabit data
@@ -141,6 +155,7 @@ def test_time_rx(capfd, seed, params):
                                       verbose=verbose,
                                       test_ctrl="tile[0]:XS1_PORT_1M"
                                       )
-        do_test(capfd, params["mac"], params["arch"], clk, tx_rmii_phy, seed, rx_width=params["rx_width"])
+        do_test(capfd, params["mac"], params["arch"], clk, tx_rmii_phy, seed, rx_width=params["rx_width"],
+                run_name=run_name)
     else:
         assert 0, f"Invalid params: {params}"
@@ -7,8 +7,6 @@ import random
 import sys
 from pathlib import Path
 import pytest
-import subprocess
-from filelock import FileLock
 import re
 
 from mii_clock import Clock
@@ -20,19 +18,23 @@ from helpers import get_sim_args, create_if_needed, get_mii_tx_clk_phy, get_mii_
 from helpers import get_rgmii_tx_clk_phy, get_rgmii_rx_clk_phy
 from helpers import get_rmii_clk, get_rmii_tx_phy, get_rmii_rx_phy
 from helpers import generate_tests
+from throughput_meter import ThroughputMeter
+from xe_cache import build_xe
 
 tx_complete = False
 rx_complete = False
 num_test_packets = 75
 
+# The packets are sent at line rate, so anything less than this is a gross regression in MAC throughput
+min_efficiency_percent = 50
+
 def start_test(phy):
     global tx_complete, rx_complete
 
     tx_complete = False
     rx_complete = False
     phy.num_packets = 0
-    phy.num_bytes = 0
-    phy.start_time = 0
+    phy.meter = ThroughputMeter(phy.get_clock().get_bit_time(), min_efficiency=min_efficiency_percent)
     phy.end_time = 0
 
 def set_tx_complete(phy):
@@ -42,28 +44,7 @@ def set_tx_complete(phy):
 def packet_checker(packet, phy, test_ctrl):
     global rx_complete
 
-    time_now = phy.xsi.get_time()
-
-    # The CRC is not included in the packet bytes
-    num_packet_bytes = len(packet.get_packet_bytes()) + 4
-
-    clock = phy.get_clock()
-    bit_time = clock.get_bit_time()
-
-    if not phy.start_time:
-        packet_time = num_packet_bytes * 8 * bit_time
-        phy.start_time = time_now - packet_time
-
     phy.num_packets += 1
-    phy.num_bytes += num_packet_bytes
-
-    time_delta = time_now - phy.start_time
-    mega_bits_per_second = ((phy.num_bytes * 8.0) * px.Xsi.get_xsi_tick_freq_hz()) / (time_delta * 1e6)
-
-    if phy.num_packets > 1:
-        efficiency = ((((phy.num_bytes * 8) + ((phy.num_packets - 1) * 96)) * bit_time) / time_delta) * 100
-    else:
-        efficiency = (((phy.num_bytes * 8) * bit_time) / time_delta) * 100
 
     if phy.num_packets > num_test_packets:
         if rx_complete and tx_complete:
@@ -83,22 +64,17 @@ def packet_checker(packet, phy, test_ctrl):
             phy.xsi.terminate()
 
     else:
-        print(f"Packet {phy.num_packets} received; bytes: {num_packet_bytes}, ifg: {packet.get_ifg():.2f} => {mega_bits_per_second:.2f} Mb/s, efficiency {efficiency:.2f}%")
+        meter = phy.meter
+        meter.add_frame(packet, phy.xsi.get_time())
+
+        # The CRC is not included in the packet bytes
+        num_packet_bytes = len(packet.get_packet_bytes()) + 4
+        print(f"Packet {phy.num_packets} received; bytes: {num_packet_bytes}, ifg: {packet.get_ifg():.2f} => {meter.mbps():.2f} Mb/s, efficiency {meter.efficiency():.2f}%")
 
         if phy.num_packets == num_test_packets:
             rx_complete = True
 
 
-def build_xccm(testname, config):
-    lock_path = f"{testname}.lock"
-    # xdist can cause race conditions so use a lock
-    with FileLock(lock_path):
-        result = subprocess.run('cmake -B build -G "Unix Makefiles"', shell=True, cwd=testname)
-        result.check_returncode()
-        result = subprocess.run(f'xmake -j 8 -C build {config}', shell=True, cwd=testname)
-        result.check_returncode()
-
-
 # I had problems with the comparison tester putting a newline in the expected regex so wrote custom one and replaced create_expect
 class mytester:
     def __init__(self, packets):
@@ -147,8 +123,9 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, seed, rx_width=Non
     rand.seed(seed)
     start_test(rx_phy) # setup globs used in checkers
 
-    # Generate an include file to define the seed
-    with open(os.path.join("include", "seed.inc"), "w") as f:
+    # Generate an include file to define the seed. It is kept in this application's own source so that a new seed
+    # does not change the inputs of the other applications which use ../include (see xe_cache.py)
+    with open(os.path.join("test_time_rx_tx", "src", "seed.inc"), "w") as f:
         f.write("#define SEED {}".format(seed))
 
     testname = 'test_time_rx_tx'
@@ -162,9 +139,10 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, seed, rx_width=Non
         with capfd.disabled():
             print(f"Running {testname}: {tx_phy.get_name()} phy at {tx_clk.get_name()} (seed {seed}) for {arch} arch")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    # Only rebuilt when the seed, or anything else it is built from, has changed (see xe_cache.py). Each seed is a
+    # different binary, so they are not kept in the cache.
     with capfd.disabled():
-        build_xccm(testname, profile)
+        binary = build_xe(testname, profile, cache=False)
 
     assert os.path.isfile(binary)
 
@@ -220,6 +198,9 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, seed, rx_width=Non
 
     assert result is True, f"{result}"
 
+    failures = rx_phy.meter.check()
+    assert not failures, f"{failures}\n{rx_phy.meter.summary()}"
+
 
 test_params_file = Path(__file__).parent / "test_time_rx_tx/test_params.json"
 @pytest.mark.parametrize("params", generate_tests(test_params_file)[0], ids=generate_tests(test_params_file)[1])
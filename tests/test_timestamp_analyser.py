@@ -0,0 +1,95 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the TX timestamp analyser. These do not need the simulator.
+
+import io
+
+import pytest
+
+from timestamp_analyser import TimestampAnalyser, TimestampTap, SIM_TICKS_PER_NS, REF_TIMER_BITS
+
+NS = SIM_TICKS_PER_NS
+
+
+def analyser_with_offsets(offsets_ns, **kwargs):
+    analyser = TimestampAnalyser("rt mii", **kwargs)
+    for i, offset in enumerate(offsets_ns):
+        sfd_ns = 10000 + i * 6720
+        analyser.add_sfd_times([sfd_ns * NS])
+        analyser.add_timestamp((sfd_ns + offset) // 10)
+    return analyser
+
+
+def test_offsets_and_stats():
+    analyser = analyser_with_offsets([100, 110, 100, 90])
+    assert list(analyser.offsets()) == [100, 110, 100, 90]
+    stats = analyser.stats()
+    assert stats["mean"] == pytest.approx(100)
+    assert stats["median"] == pytest.approx(100)
+    assert stats["p2p"] == pytest.approx(20)
+    assert stats["jitter"] == pytest.approx(50 ** 0.5)
+    assert analyser.check(max_offset_ns=110, max_jitter_ns=10, max_outliers=0) == []
+    assert len(analyser.check(max_offset_ns=100)) == 1
+
+
+def test_outliers():
+    analyser = analyser_with_offsets([100, 100, 200, 100, 80])
+    assert list(analyser.outliers()) == [2]
+    failures = analyser.check(max_outliers=0)
+    assert failures == ["1 outliers, frames [2]"]
+    assert "1 outliers" in analyser.summary()
+
+
+def test_count_mismatch():
+    analyser = analyser_with_offsets([100, 100])
+    analyser.add_sfd_times([30000 * NS])
+    # The pairs still line up, but a frame has no timestamp
+    assert len(analyser.offsets()) == 2
+    assert analyser.check() == ["3 frames received but 2 timestamps"]
+
+    empty = TimestampAnalyser()
+    assert empty.check() == ["No timestamps to check"]
+    assert "no timestamps paired" in empty.summary()
+
+
+def test_timer_wrap():
+    # An SFD just after the 32 bit timer wraps
+    wrap_ns = (1 << REF_TIMER_BITS) * 10
+    analyser = TimestampAnalyser()
+    analyser.add_sfd_times([(wrap_ns + 1000) * NS])
+    analyser.add_timestamp(110)
+    assert list(analyser.offsets()) == [100]
+
+
+def test_output_parsing():
+    analyser = TimestampAnalyser()
+    analyser.add_output(["Sent packet at time 1234", "Received packet", "Sent packet at time 5678\n"])
+    assert analyser.timestamps == [1234, 5678]
+
+
+class FakeTester():
+    def __init__(self):
+        self.result = None
+        self.output = None
+
+    def run(self, output):
+        self.output = output
+        self.result = True
+        return True
+
+
+def test_tap():
+    tester = FakeTester()
+    analyser = TimestampAnalyser()
+    tap = TimestampTap(tester, analyser)
+    assert tap.run(["Sent packet at time 7"])
+    assert tester.output == ["Sent packet at time 7"]
+    assert analyser.timestamps == [7]
+    # Everything else is the tester's
+    assert tap.result is True
+
+    out = io.StringIO()
+    analyser.add_sfd_times([0])
+    analyser.report(out)
+    assert out.getvalue().startswith("1 timestamps, offset mean 70.0ns")
@@ -14,6 +14,8 @@ from helpers import get_mii_rx_clk_phy, get_rgmii_rx_clk_phy
 from helpers import get_mii_tx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import get_rmii_clk, get_rmii_rx_phy
 from helpers import generate_tests
+from timestamp_analyser import TimestampAnalyser, TimestampTap
+from xe_cache import find_xe
 
 def packet_checker(packet, phy, test_ctrl):
     # Ignore the CRC bytes (-4)
@@ -45,12 +47,14 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=None):
         with capfd.disabled():
             print(f"Running {testname}: {mac} {rx_phy.get_name()} phy, {arch} arch at {rx_clk.get_name()}")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     capfd.readouterr() # clear capfd buffer
 
-    tester = px.testers.ComparisonTester(open(f'{testname}.expect'), regexp=True)
+    # Measure how far each reported timestamp is from the SFD the RX PHY saw
+    analyser = TimestampAnalyser(f"{mac} {rx_phy.get_name()} {rx_clk.get_name()}")
+    tester = TimestampTap(px.testers.ComparisonTester(open(f'{testname}.expect'), regexp=True), analyser)
 
     simargs = get_sim_args(testname, mac, rx_clk, rx_phy)
 
@@ -69,6 +73,12 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=None):
 
     assert result is True, f"{result}"
 
+    analyser.add_sfd_times(rx_phy.sfd_times)
+    with capfd.disabled():
+        analyser.report()
+    failures = analyser.check()
+    assert not failures, failures
+
 test_params_file = Path(__file__).parent / "test_timestamp_tx/test_params.json"
 @pytest.mark.parametrize("params", generate_tests(test_params_file)[0], ids=generate_tests(test_params_file)[1])
 def test_timestamp_tx(capfd, params):
@@ -0,0 +1,102 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the traffic generator. These do not need the simulator.
+
+import pytest
+
+from traffic_generator import Stream, TrafficGenerator, frame_wire_bits, IFG_BITS
+
+BIT_TIME = 10**7 # 100 Mb/s in femtoseconds
+US = 10**9
+
+
+class Frame():
+    """ Enough of an MiiPacket for the generator """
+
+    def __init__(self, rand, dst_mac_addr, vlan_prio_tag, inter_frame_gap, create_data_args):
+        self.dst_mac_addr = dst_mac_addr
+        self.vlan_prio_tag = vlan_prio_tag
+        self.inter_frame_gap = inter_frame_gap
+        (self.seq, self.num_data_bytes) = create_data_args[1]
+
+    def get_packet_bytes(self):
+        return [0] * (14 + (4 if self.vlan_prio_tag else 0) + self.num_data_bytes)
+
+
+def send(generator):
+    """ (start time, frame) as a TX PHY following its own account of time would send them """
+    time = 0
+    frames = []
+    for packet in generator:
+        start = time + packet.inter_frame_gap
+        frames.append((start, packet))
+        time = start + frame_wire_bits(packet.num_data_bytes, packet.vlan_prio_tag is not None) * BIT_TIME
+    return frames
+
+
+def test_cbr():
+    stream = Stream("hp", [1] * 6, mbps=10, data_len=(46, 46))
+    frames = send(TrafficGenerator([stream], BIT_TIME, max_frames=10, packet_class=Frame))
+    starts = [start for start, _ in frames]
+    interval = (frame_wire_bits(46) + IFG_BITS) * BIT_TIME * 10
+    assert starts == pytest.approx([IFG_BITS * BIT_TIME + i * interval for i in range(10)])
+
+
+def test_line_rate_fill():
+    stream = Stream("other", [2] * 6, weight=1, vlan_ratio=0.5)
+    generator = TrafficGenerator([stream], BIT_TIME, seed=3, duration=1000 * US, packet_class=Frame)
+    frames = send(generator)
+    assert all(packet.inter_frame_gap == IFG_BITS * BIT_TIME for _, packet in frames)
+    assert 0.3 < sum(1 for _, p in frames if p.vlan_prio_tag) / len(frames) < 0.7
+    assert frames[-1][0] < 1000 * US + IFG_BITS * BIT_TIME
+    assert [p.seq for _, p in frames] == list(range(len(frames)))
+
+
+def test_mixed_rates():
+    hp = Stream("hp", [1] * 6, mbps=20, vlan_ratio=1)
+    lp = Stream("lp", [2] * 6, mbps=30, arrival="poisson", burst_len=(1, 8), burst_ratio=0.2)
+    other = Stream("other", [3] * 6, weight=1, data_len=(46, 100))
+    generator = TrafficGenerator([hp, lp, other], BIT_TIME, seed=1, duration=20000 * US, packet_class=Frame)
+    frames = send(generator)
+
+    # No overlaps, and never less than the minimum IFG
+    assert all(p.inter_frame_gap >= IFG_BITS * BIT_TIME for _, p in frames)
+    line_share = {s.name: (s.wire_time + s.num_frames * IFG_BITS * BIT_TIME) / generator.elapsed()
+                  for s in (hp, lp, other)}
+    assert line_share["hp"] == pytest.approx(0.2, rel=0.05)
+    assert line_share["lp"] == pytest.approx(0.3, rel=0.15)
+    assert line_share["other"] > 0.4
+    assert all(p.vlan_prio_tag for _, p in frames if p.dst_mac_addr == [1] * 6)
+    assert "hp: " in generator.summary()
+
+
+def test_bursts_are_back_to_back():
+    stream = Stream("lp", [2] * 6, mbps=5, burst_len=(4, 4), burst_ratio=1)
+    frames = send(TrafficGenerator([stream], BIT_TIME, max_frames=8, packet_class=Frame))
+    lengths = [p.num_data_bytes for _, p in frames]
+    assert lengths[:4] == [lengths[0]] * 4 and lengths[4:] == [lengths[4]] * 4
+    assert [p.inter_frame_gap for _, p in frames[1:4]] == [IFG_BITS * BIT_TIME] * 3
+    assert frames[4][1].inter_frame_gap > IFG_BITS * BIT_TIME
+
+
+def test_pop_ready():
+    stream = Stream("hp", [1] * 6, mbps=50, data_len=(46, 46))
+    generator = TrafficGenerator([stream], BIT_TIME, max_frames=2, packet_class=Frame)
+    ifg = IFG_BITS * BIT_TIME
+    wire_time = frame_wire_bits(46) * BIT_TIME
+    assert generator.pop_ready(0).inter_frame_gap == ifg
+    # Asked for as the first frame ends, the second starts at half line rate
+    first_end = ifg + wire_time
+    assert generator.pop_ready(first_end).inter_frame_gap == pytest.approx(ifg + 2 * (wire_time + ifg) - first_end)
+    assert generator.pop_ready(200 * US) is TrafficGenerator.END
+
+
+def test_same_seed_same_traffic():
+    def traffic(seed):
+        streams = [Stream("lp", [2] * 6, mbps=30, arrival="poisson"), Stream("other", [3] * 6, weight=1)]
+        frames = send(TrafficGenerator(streams, BIT_TIME, seed=seed, max_frames=50, packet_class=Frame))
+        return [(start, p.num_data_bytes) for start, p in frames]
+
+    assert traffic(5) == traffic(5)
+    assert traffic(5) != traffic(6)
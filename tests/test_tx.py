@@ -15,6 +15,7 @@ from helpers import get_mii_rx_clk_phy, get_rgmii_rx_clk_phy
 from helpers import get_mii_tx_clk_phy, get_rgmii_tx_clk_phy
 from helpers import get_rmii_clk, get_rmii_rx_phy
 from helpers import generate_tests
+from xe_cache import find_xe
 
 def packet_checker(packet, phy, test_ctrl):
     print("Packet received:")
@@ -50,7 +51,7 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=None):
         with capfd.disabled():
             print(f"Running {testname}: {mac} {rx_phy.get_name()} phy, {arch} arch at {rx_clk.get_name()}")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     capfd.readouterr() # clear capfd buffer
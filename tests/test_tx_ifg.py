@@ -15,6 +15,7 @@ from helpers import get_rmii_clk, get_rmii_rx_phy
 from helpers import generate_tests
 from collections import defaultdict
 from hw_helpers import log_ifg_summary
+from xe_cache import find_xe
 
 
 num_test_packets = (1514-60+1)*2 # 2 packets for each valid payload length. Takes about 15mins to run in sim
@@ -96,7 +97,7 @@ def do_test(capfd, mac, arch, rx_clk, rx_phy, tx_clk, tx_phy, tx_width=None, tes
         with capfd.disabled():
             print(f"Running {testname}: {mac} {test_type} phy at {rx_clk.get_name()} for {arch} arch")
 
-    binary = f'{testname}/bin/{profile}/{testname}_{profile}.xe'
+    binary = find_xe(testname, profile)
     assert os.path.isfile(binary)
 
     simargs = get_sim_args(testname, mac, rx_clk, rx_phy)
@@ -0,0 +1,70 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the wire timing engine. These do not need the simulator.
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from wire_timing import WireTiming, frame_bytes, frame_wire_bits, PACKET_OVERHEAD_BYTES, MIN_DATA_BYTES
+
+
+def test_frame_sizes():
+    assert frame_bytes(46) == 60
+    assert frame_bytes(1500, tagged=True) == 1518
+    assert frame_wire_bits(46) == (8 + 60 + 4) * 8
+    assert isinstance(frame_wire_bits(46), int)
+    assert list(frame_wire_bits(np.array([46, 46]), np.array([False, True]))) == [576, 608]
+    assert PACKET_OVERHEAD_BYTES == 24
+
+
+@pytest.mark.parametrize("mbps", [10, 100, 1000])
+def test_speeds(mbps):
+    timing = WireTiming.for_speed(mbps)
+    assert timing.line_mbps() == pytest.approx(mbps)
+    # The smallest frame and IFG take 672 bit times
+    assert timing.packet_time(MIN_DATA_BYTES) == pytest.approx(672 * timing.bit_time)
+    assert timing.max_fps(MIN_DATA_BYTES) == pytest.approx(mbps * 1e6 / 672)
+    assert timing.max_mbps(1500) == pytest.approx(mbps * 1518 / 1538)
+    assert timing.max_mbps(1500, payload=True) == pytest.approx(mbps * 1500 / 1538)
+
+
+def test_from_clock():
+    # 25MHz MII clock, 4 bits per cycle
+    clock = SimpleNamespace(get_bit_time=lambda: 40e6 / 4)
+    assert WireTiming.from_clock(clock).line_mbps() == pytest.approx(100)
+
+
+def test_ifg_for_rate():
+    timing = WireTiming.for_speed(100)
+    lens = np.array([46, 500, 1500])
+    ifg = timing.ifg_for_rate(lens, 10)
+    # Each frame and its minimum IFG take a tenth of the time
+    schedule = timing.schedule(lens, ifg=ifg)
+    assert np.allclose(ifg + timing.frame_time(lens), 10 * timing.packet_time(lens))
+    assert schedule.conforms().all()
+    assert timing.ifg_for_rate(46, 1000) == timing.min_ifg
+
+
+def test_schedule():
+    timing = WireTiming.for_speed(1000)
+    lens = np.array([46, 100, 1500, 46])
+    ifg = np.array([96, 96, 40, 200]) * timing.bit_time
+    schedule = timing.schedule(lens, tagged=[False, True, False, False], ifg=ifg, start_time=1000)
+    assert schedule.start[0] == 1000 + ifg[0]
+    assert np.allclose(schedule.end - schedule.start, schedule.wire_bits * timing.bit_time)
+    assert np.allclose(schedule.start[1:] - schedule.end[:-1], ifg[1:])
+    assert list(schedule.violations()) == [2]
+    assert schedule.wire_bits[1] == frame_wire_bits(100, True)
+
+
+def test_schedule_rates():
+    timing = WireTiming.for_speed(100)
+    schedule = timing.schedule(np.full(1000, 1500))
+    assert schedule.line_utilisation() == pytest.approx(100)
+    # Preambles are not counted in the throughput
+    assert schedule.mbps() == pytest.approx(100 * 1518 / 1538, rel=1e-4)
+    assert schedule.payload_mbps() == pytest.approx(100 * 1500 / 1538, rel=1e-4)
+    assert timing.schedule(np.full(100, 46), ifg=2 * 672 * timing.bit_time).line_utilisation() < 50
@@ -0,0 +1,156 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the incremental build of the test applications, with stand-in configure and build commands. These do
+# not need the tools or the simulator.
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from xe_cache import XeCache, binary_path, named_test_files
+
+CONFIGURE = '''
+print("-- Building cfg_name: rt_mii_xs3")
+print("-- Building cfg_name: rt_rmii_xs3")
+print("-- Building cfg_name: rt_mii_xs3")
+'''
+
+BUILD = '''
+import os, sys
+with open("../builds.txt", "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+for config in sys.argv[1:]:
+    os.makedirs(f"bin/{config}", exist_ok=True)
+    with open(f"bin/{config}/test_app_{config}.xe", "w") as f:
+        f.write(open("../include/seed.inc").read() + config)
+'''
+
+CONFIGS = ["rt_mii_xs3", "rt_rmii_xs3"]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    tests_dir = tmp_path / "tests"
+    (tests_dir / "test_app" / "src").mkdir(parents=True)
+    (tests_dir / "include").mkdir()
+    (tests_dir / "test_app" / "CMakeLists.txt").write_text("set(APP_INCLUDES ../include src)\n")
+    (tests_dir / "test_app" / "src" / "main.xc").write_text("int main() { return 0; }\n")
+    (tests_dir / "include" / "seed.inc").write_text("#define SEED 1\n")
+    (tests_dir / "configure.py").write_text(CONFIGURE)
+    (tests_dir / "build.py").write_text(BUILD)
+    lib_dir = tmp_path / "lib_ethernet"
+    (lib_dir / "src").mkdir(parents=True)
+    (lib_dir / "lib_build_info.cmake").write_text("set(LIB_INCLUDES api src)\n")
+    (lib_dir / "src" / "mii.xc").write_text("void mii() {}\n")
+    return tests_dir, lib_dir
+
+
+def make_cache(tree, tmp_path):
+    tests_dir, lib_dir = tree
+    return XeCache(tests_dir, lib_dir, cache_dir=tmp_path / "cache",
+                   configure_cmd=f"{sys.executable} ../configure.py",
+                   build_cmd=f"{sys.executable} ../build.py {{targets}}")
+
+
+def builds(tree):
+    path = tree[0] / "builds.txt"
+    return path.read_text().splitlines() if path.exists() else []
+
+
+def test_build_once(tree, tmp_path):
+    cache = make_cache(tree, tmp_path)
+    assert cache.configs("test_app") == CONFIGS
+    assert cache.stale("test_app") == CONFIGS
+    assert cache.ensure("test_app", log=lambda s: None) == {c: "built" for c in CONFIGS}
+    # Every stale config in one build
+    assert builds(tree) == [" ".join(CONFIGS)]
+
+    assert make_cache(tree, tmp_path).ensure("test_app") == {}
+    assert make_cache(tree, tmp_path).stale("test_app") == []
+    assert len(builds(tree)) == 1
+    index = json.loads((tree[0] / "logs" / "xe_index.json").read_text())
+    assert index["binaries"]["test_app/rt_mii_xs3"]["binary"] == str(binary_path("test_app", "rt_mii_xs3"))
+    assert cache.binary("test_app", "rt_rmii_xs3") == binary_path("test_app", "rt_rmii_xs3")
+
+
+def test_rebuild_when_changed(tree, tmp_path):
+    tests_dir, lib_dir = tree
+    make_cache(tree, tmp_path).ensure("test_app", log=lambda s: None)
+    seed = tests_dir / "include" / "seed.inc"
+
+    # Changing an included file changes every key
+    seed.write_text("#define SEED 2\n")
+    cache = make_cache(tree, tmp_path)
+    assert cache.stale("test_app") == CONFIGS
+    assert cache.ensure("test_app", ["rt_rmii_xs3"], log=lambda s: None) == {"rt_rmii_xs3": "built"}
+    assert builds(tree)[-1] == "rt_rmii_xs3"
+
+    # Back to the first build: the binary left alone is up to date, and the other is copied from the cache
+    seed.write_text("#define SEED 1\n")
+    cache = make_cache(tree, tmp_path)
+    assert cache.ensure("test_app", log=lambda s: None) == {"rt_rmii_xs3": "cached"}
+    assert len(builds(tree)) == 2
+    assert "SEED 1" in (tests_dir / binary_path("test_app", "rt_rmii_xs3")).read_text()
+
+    (lib_dir / "src" / "mii.xc").write_text("void mii() { }\n")
+    assert make_cache(tree, tmp_path).stale("test_app") == CONFIGS
+
+
+def test_adopt_existing(tree, tmp_path):
+    tests_dir, _ = tree
+    for config in CONFIGS:
+        path = tests_dir / binary_path("test_app", config)
+        path.parent.mkdir(parents=True)
+        path.write_text("xe")
+    # One binary is older than a source
+    old = time.time() - 100
+    os.utime(tests_dir / binary_path("test_app", "rt_mii_xs3"), (old, old))
+    cache = make_cache(tree, tmp_path)
+    assert cache.ensure("test_app", log=lambda s: None) == {"rt_mii_xs3": "built", "rt_rmii_xs3": "adopted"}
+    assert builds(tree) == ["rt_mii_xs3"]
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+
+def test_reconfigure(tree, tmp_path):
+    tests_dir, _ = tree
+    cache = make_cache(tree, tmp_path)
+    assert cache.configs("test_app") == CONFIGS
+    # Listed from the index until the CMake files change
+    (tests_dir / "configure.py").write_text('print("-- Building cfg_name: std_mii_xs2")')
+    assert cache.configs("test_app") == CONFIGS
+    (tests_dir / "test_app" / "CMakeLists.txt").write_text("set(APP_INCLUDES src)\n")
+    assert cache.configs("test_app") == ["std_mii_xs2"]
+
+
+def test_generated_seed_key(tree, tmp_path):
+    # test_time_rx_tx writes a new seed into its own source before each run
+    tests_dir, _ = tree
+    (tests_dir / "test_time_rx_tx" / "src").mkdir(parents=True)
+    (tests_dir / "test_time_rx_tx" / "CMakeLists.txt").write_text("set(APP_INCLUDES ../include src)\n")
+    seed = tests_dir / "test_time_rx_tx" / "src" / "seed.inc"
+    seed.write_text("#define SEED 1")
+    keys = {app: make_cache(tree, tmp_path).key(app, "rt_mii_xs3") for app in ("test_app", "test_time_rx_tx")}
+
+    seed.write_text("#define SEED 2")
+    cache = make_cache(tree, tmp_path)
+    assert cache.key("test_app", "rt_mii_xs3") == keys["test_app"]
+    assert cache.key("test_time_rx_tx", "rt_mii_xs3") != keys["test_time_rx_tx"]
+
+
+def test_without_cache(tree, tmp_path):
+    tests_dir, lib_dir = tree
+    cache = XeCache(tests_dir, lib_dir, cache_dir=None, configure_cmd=f"{sys.executable} ../configure.py",
+                    build_cmd=f"{sys.executable} ../build.py {{targets}}")
+    assert cache.ensure("test_app", log=lambda s: None) == {c: "built" for c in CONFIGS}
+    assert not (tmp_path / "cache").exists()
+
+
+def test_named_test_files(tmp_path):
+    for name in ("test_a.py", "test_b.py", "helpers.py"):
+        (tmp_path / name).write_text("")
+    assert named_test_files(["."], tmp_path) == [tmp_path / "test_a.py", tmp_path / "test_b.py"]
+    assert named_test_files(["test_b.py::test_x[mii]", "missing.py"], tmp_path) == [tmp_path / "test_b.py"]
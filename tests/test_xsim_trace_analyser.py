@@ -0,0 +1,44 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+#
+# Checks of the xsim instruction trace analyser on a made up trace. These do not need the simulator.
+
+import io
+
+from xsim_trace_analyser import TraceAnalyser, load_frame_starts
+
+
+def trace_line(core, address, function, offset, insn, time):
+    return f"tile[0]@{core}-P-SI A-.----{address:08x} ({function:20} + {offset:2x}) : {insn:30} @{time}\n"
+
+
+def test_function_cycles_and_frames(tmp_path):
+    analyser = TraceAnalyser(frame_starts=[0, 100])
+    analyser.add_line("tile[0]@0- Some other output\n")
+    lines = []
+    # Core 1 spends 10 ticks per instruction, blocking for 50 in the IN of the second frame
+    for frame, start in enumerate((0, 100)):
+        lines.append(trace_line(1, 0x80100, "rmii_master_rx_pins_4b", 0, "in r0, res[r1]", start))
+        lines.append(trace_line(1, 0x80104, "rmii_master_rx_pins_4b", 4, "add r0, r0, 1", start + 10 + 50 * frame))
+        lines.append(trace_line(1, 0x80200, "mii_ethernet_filter", 0, "ldw r1, sp[0]", start + 20 + 50 * frame))
+        lines.append(trace_line(2, 0x80300, "rgmii_rx_lld", 0, "nop", start + 5))
+    for line in lines:
+        analyser.add_line(line)
+    analyser.finish()
+
+    assert analyser.num_lines == 8 and analyser.num_unparsed == 1
+    rx = analyser.functions[("tile[0]@1", "rmii_master_rx_pins_4b")]
+    assert rx.instructions == 4
+    assert rx.ticks == 10 + 10 + 60 + 10
+    assert (rx.worst_frame_ticks, rx.worst_frame) == (70, 1)
+    assert analyser.addresses[0x80100][:2] == [2, 70]
+    assert analyser.core_totals()["tile[0]@2"] == [2, 100]
+
+    out = io.StringIO()
+    analyser.report(out=out)
+    assert "mii_ethernet_filter" in out.getvalue()
+
+    frames = tmp_path / "frames.csv"
+    frames.write_text("source,index,time\ntx,0,2000\nrx,0,1000\ntx,1,3000\n")
+    assert load_frame_starts(frames, "tx", 1000) == [2, 3]
+    assert load_frame_starts(frames) == [1000, 2000, 3000]
@@ -0,0 +1,134 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Throughput and line efficiency of the frames received by an RX PHY
+
+An RX PHY's packet_fn feeds each received frame to a ThroughputMeter, which keeps cumulative and sliding window
+throughput, the line efficiency and a breakdown by source MAC address. Thresholds can be given so that a test
+can assert on the numbers once the simulation is done:
+
+    meter = ThroughputMeter(clock.get_bit_time(), min_efficiency=90)
+    ... in the packet_fn: meter.add_frame(packet, phy.xsi.get_time())
+    assert not meter.check(), meter.summary()
+"""
+
+from collections import deque
+
+from wire_timing import SIM_TICKS_PER_SECOND, PREAMBLE_BYTES, CRC_BYTES, IFG_BITS
+
+
+class SourceStats():
+    __slots__ = ("frames", "bytes")
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+
+class ThroughputMeter():
+    """ Measures the frames received by an RX PHY
+
+        Parameters:
+        bit_time (float): Time of one bit on the wire, in sim ticks (Clock.get_bit_time())
+        window (float): Length of the sliding window in sim ticks, None to only keep cumulative figures
+        min_mbps (float): Lowest acceptable cumulative throughput, in Mb/s
+        min_efficiency (float): Lowest acceptable line efficiency, in percent
+        source_fn: Returns the key for the per source breakdown of a packet. Defaults to its source MAC address
+    """
+
+    def __init__(self, bit_time, window=None, min_mbps=None, min_efficiency=None, source_fn=None):
+        self.bit_time = bit_time
+        self.window = window
+        self.min_mbps = min_mbps
+        self.min_efficiency = min_efficiency
+        self._source_fn = source_fn or (lambda packet: ":".join(f"{b:02x}" for b in packet.src_mac_addr))
+
+        self.num_packets = 0
+        self.num_bytes = 0          # Frame bytes including the CRC, as counted by efficiency()
+        self.num_payload_bytes = 0  # Excluding MAC header, VLAN tag and CRC
+        self.start_time = None
+        self.last_time = None
+        self.sources = {}
+        self._window_frames = deque() # (end time, frame bits)
+        self._window_bits = 0
+        self._window_start = None
+
+    def add_frame(self, packet, time_now):
+        """ Add a frame which finished arriving at time_now """
+        num_frame_bytes = len(packet.get_packet_bytes()) + CRC_BYTES
+        frame_bits = num_frame_bytes * 8
+
+        if self.start_time is None:
+            self.start_time = time_now - frame_bits * self.bit_time
+        self.last_time = time_now
+
+        self.num_packets += 1
+        self.num_bytes += num_frame_bytes
+        self.num_payload_bytes += len(packet.data_bytes)
+
+        source = self.sources.setdefault(self._source_fn(packet), SourceStats())
+        source.frames += 1
+        source.bytes += num_frame_bytes
+
+        if self.window:
+            self._window_frames.append((time_now, frame_bits))
+            self._window_bits += frame_bits
+            while self._window_frames[0][0] <= time_now - self.window:
+                self._window_bits -= self._window_frames.popleft()[1]
+            self._window_start = self._window_frames[0][0] - self._window_frames[0][1] * self.bit_time
+
+    def elapsed(self):
+        return self.last_time - self.start_time if self.num_packets else 0
+
+    def mbps(self):
+        """ Cumulative throughput of frame bytes (including the CRC) """
+        elapsed = self.elapsed()
+        if not elapsed:
+            return 0.0
+        return (self.num_bytes * 8.0 * SIM_TICKS_PER_SECOND) / (elapsed * 1e6)
+
+    def window_mbps(self):
+        """ Throughput of the frames which finished in the last window of sim time, from the start of the first """
+        if not self.window or not self.num_packets:
+            return 0.0
+        window = self.last_time - self._window_start
+        return (self._window_bits * SIM_TICKS_PER_SECOND) / (window * 1e6)
+
+    def efficiency(self):
+        """ Percentage of the time used by frames and the minimum IFG between them. The preamble is not counted """
+        elapsed = self.elapsed()
+        if not elapsed:
+            return 0.0
+        bits = self.num_bytes * 8 + (self.num_packets - 1) * IFG_BITS
+        return (bits * self.bit_time / elapsed) * 100
+
+    def line_utilisation(self):
+        """ Percentage of the line time used, counting the preamble as well as the IFG. 100% at line rate """
+        elapsed = self.elapsed()
+        if not elapsed:
+            return 0.0
+        preamble_bits = PREAMBLE_BYTES * 8
+        bits = self.num_bytes * 8 + self.num_packets * preamble_bits + (self.num_packets - 1) * IFG_BITS
+        return (bits * self.bit_time / (elapsed + preamble_bits * self.bit_time)) * 100
+
+    def payload_fraction(self):
+        """ Percentage of the frame bytes which are payload, i.e. not the MAC header, VLAN tag or CRC """
+        return 100.0 * self.num_payload_bytes / self.num_bytes if self.num_bytes else 0.0
+
+    def check(self):
+        """ Returns a list describing each threshold which has not been met """
+        failures = []
+        if self.min_mbps is not None and self.mbps() < self.min_mbps:
+            failures.append(f"Throughput {self.mbps():.2f} Mb/s below {self.min_mbps} Mb/s")
+        if self.min_efficiency is not None and self.efficiency() < self.min_efficiency:
+            failures.append(f"Efficiency {self.efficiency():.2f}% below {self.min_efficiency}%")
+        return failures
+
+    def summary(self):
+        text = (f"{self.num_packets} packets, {self.num_bytes} bytes => {self.mbps():.2f} Mb/s, "
+                f"efficiency {self.efficiency():.2f}%, line utilisation {self.line_utilisation():.2f}%, "
+                f"payload {self.payload_fraction():.2f}%")
+        for source, stats in sorted(self.sources.items()):
+            text += f"\n  {source}: {stats.frames} packets, {stats.bytes} bytes"
+        return text
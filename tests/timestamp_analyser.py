@@ -0,0 +1,147 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Accuracy of the TX timestamps reported by the MAC
+
+The RX PHYs record the sim time of the SFD of each frame they receive from the DUT (RxPhy.sfd_times). A
+TimestampAnalyser pairs these, in order, with the timestamps the DUT reports for the frames it sends, either
+parsed from its output or added directly (e.g. from xscope), and measures the offset of each timestamp from the
+SFD it should mark:
+
+    analyser = TimestampAnalyser("rt mii")
+    tester = TimestampTap(px.testers.ComparisonTester(...), analyser)  # Parses the DUT output for timestamps
+    px.run_on_simulator_(binary, simthreads=[rx_clk, rx_phy], tester=tester, ...)
+    analyser.add_sfd_times(rx_phy.sfd_times)
+    print(analyser.summary())
+
+The DUT timestamps are reference timer ticks of 10ns, which run from the start of the simulation, so the offset
+includes any egress latency the application has configured.
+"""
+
+import re
+import sys
+
+import numpy as np
+
+SIM_TICKS_PER_NS = 10**6 # xsim uses femtoseconds
+REF_TIMER_TICK_NS = 10   # 100MHz reference timer
+REF_TIMER_BITS = 32
+
+DEFAULT_TIMESTAMP_PATTERN = r"Sent packet at time (\d+)"
+
+
+class TimestampAnalyser():
+    """ Offset of reported TX timestamps from the SFD times seen by the RX PHY
+
+        Parameters:
+        name (str): Name in the summary, e.g. the MAC and PHY
+        pattern (str): Regex with one group for the timestamp, for add_output()
+        outlier_ns (float): An offset further than this from the median is an outlier. By default two timer
+            ticks, as a timestamp can be a tick either side of the SFD
+        tick_ns (float): Period of the timer of the timestamps
+    """
+
+    def __init__(self, name="", pattern=DEFAULT_TIMESTAMP_PATTERN, outlier_ns=2 * REF_TIMER_TICK_NS,
+                 tick_ns=REF_TIMER_TICK_NS):
+        self.name = name
+        self._pattern = re.compile(pattern)
+        self.outlier_ns = outlier_ns
+        self.tick_ns = tick_ns
+        self.sfd_times = []  # Sim ticks
+        self.timestamps = [] # Timer ticks
+
+    def add_sfd_times(self, times):
+        self.sfd_times.extend(times)
+
+    def add_timestamp(self, timestamp):
+        self.timestamps.append(timestamp)
+
+    def add_output(self, lines):
+        """ Picks the timestamps out of lines of DUT output """
+        for line in lines:
+            match = self._pattern.search(line)
+            if match:
+                self.add_timestamp(int(match.group(1)))
+
+    def offsets(self):
+        """ Timestamp minus SFD time of each pair, in ns. Timestamps are unwrapped to the timer period nearest
+            the SFD time.
+        """
+        num_pairs = min(len(self.sfd_times), len(self.timestamps))
+        sfd_ns = np.asarray(self.sfd_times[:num_pairs], dtype=float) / SIM_TICKS_PER_NS
+        ts_ns = np.asarray(self.timestamps[:num_pairs], dtype=float) * self.tick_ns
+        wrap_ns = (1 << REF_TIMER_BITS) * self.tick_ns
+        ts_ns += np.round((sfd_ns - ts_ns) / wrap_ns) * wrap_ns
+        return ts_ns - sfd_ns
+
+    def outliers(self):
+        """ Indices of the pairs whose offset is far from the median """
+        offsets = self.offsets()
+        if not len(offsets):
+            return np.array([], dtype=int)
+        return np.flatnonzero(np.abs(offsets - np.median(offsets)) > self.outlier_ns)
+
+    def stats(self):
+        """ Offset statistics in ns: mean, median, jitter (standard deviation), min, max and peak to peak """
+        offsets = self.offsets()
+        if not len(offsets):
+            return None
+        return {
+            "mean": float(offsets.mean()),
+            "median": float(np.median(offsets)),
+            "jitter": float(offsets.std()),
+            "min": float(offsets.min()),
+            "max": float(offsets.max()),
+            "p2p": float(offsets.max() - offsets.min()),
+        }
+
+    def check(self, max_offset_ns=None, max_jitter_ns=None, max_outliers=None):
+        """ Returns a list describing each problem. Every SFD must have a timestamp, and the other limits are
+            only checked if given
+        """
+        failures = []
+        if len(self.sfd_times) != len(self.timestamps):
+            failures.append(f"{len(self.sfd_times)} frames received but {len(self.timestamps)} timestamps")
+        stats = self.stats()
+        if stats is None:
+            failures.append("No timestamps to check")
+            return failures
+        if max_offset_ns is not None and max(abs(stats["min"]), abs(stats["max"])) > max_offset_ns:
+            failures.append(f"Offset {stats['min']:.1f}..{stats['max']:.1f}ns beyond {max_offset_ns}ns")
+        if max_jitter_ns is not None and stats["jitter"] > max_jitter_ns:
+            failures.append(f"Jitter {stats['jitter']:.2f}ns above {max_jitter_ns}ns")
+        outliers = self.outliers()
+        if max_outliers is not None and len(outliers) > max_outliers:
+            failures.append(f"{len(outliers)} outliers, frames {outliers[:10].tolist()}")
+        return failures
+
+    def summary(self):
+        stats = self.stats()
+        name = f"{self.name}: " if self.name else ""
+        if stats is None:
+            return f"{name}no timestamps paired ({len(self.sfd_times)} SFDs, {len(self.timestamps)} timestamps)"
+        return (f"{name}{len(self.offsets())} timestamps, offset mean {stats['mean']:.1f}ns median "
+                f"{stats['median']:.1f}ns, jitter {stats['jitter']:.2f}ns, range {stats['min']:.1f}.."
+                f"{stats['max']:.1f}ns, {len(self.outliers())} outliers")
+
+    def report(self, out=sys.stdout):
+        out.write(self.summary() + "\n")
+
+
+class TimestampTap():
+    """ Wraps a Pyxsim tester, giving the DUT output to a TimestampAnalyser before the tester checks it """
+
+    def __init__(self, tester, analyser):
+        self.tester = tester
+        self.analyser = analyser
+
+    def run(self, output):
+        self.analyser.add_output(output)
+        return self.tester.run(output)
+
+    def __getattr__(self, name):
+        # Anything else Pyxsim asks of the tester. Only called for attributes not set in __init__
+        if name == "tester":
+            raise AttributeError(name)
+        return getattr(self.tester, name)
@@ -0,0 +1,217 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Traffic generated while the simulation runs, from a declarative profile
+
+Rather than building the whole packet list up front with bespoke rate maths (as test_rx_queues.DataLimiter,
+test_avb_traffic.PacketFiller and the burst loop of test_time_rx do), a TrafficGenerator creates each frame as
+the TX PHY asks for the next one. The inter frame gap of each frame is set so that it starts on the wire at the
+time the profile calls for:
+
+    hp = Stream("hp", dut_mac_address, vlan_ratio=1, mbps=20)                       # constant bit rate
+    lp = Stream("lp", lp_mac_address, mbps=30, arrival="poisson", burst_len=(1, 16), burst_ratio=0.2)
+    other = Stream("other", other_mac_address, weight=1, data_len=(46, 100))        # fills the remaining gaps
+    generator = TrafficGenerator([hp, lp, other], clock.get_bit_time(), seed=seed, duration=10 * 10**9)
+    tx_phy.set_packets(generator)
+
+The generator is iterable for the MII and RGMII TX PHYs, and has pop_ready() for the RMII TX PHY. It is used up
+once it has been iterated, so the TX PHY should be created with expect_loopback=False.
+"""
+
+import random
+
+from wire_timing import SIM_TICKS_PER_SECOND, CRC_BYTES, IFG_BITS, frame_wire_bits
+
+
+class Stream():
+    """ One class of traffic in a profile
+
+        Parameters:
+        name (str): Name in the statistics
+        dst_mac_addr (list): Destination MAC address of the frames
+        mbps (float): Rate of the stream in Mb/s of line bandwidth, i.e. including the preamble and minimum IFG
+            of each frame. None for a stream which fills the gaps left by the rate controlled streams
+        arrival (str): "cbr" for frames at a constant rate, "poisson" for exponentially distributed intervals
+        weight (float): For gap filling streams, the chance of this stream being chosen relative to the others
+        vlan_ratio (float): Fraction of the frames with a VLAN tag
+        data_len (tuple): Range of the number of payload bytes, inclusive
+        burst_len (tuple): Range of the number of back to back frames of the same length in a burst, inclusive
+        burst_ratio (float): Fraction of the times the stream is chosen that a burst is sent, not one frame
+        packet_args (dict): Any other MiiPacket arguments
+    """
+
+    def __init__(self, name, dst_mac_addr, mbps=None, arrival="cbr", weight=0, vlan_ratio=0.0, data_len=(46, 1500),
+                 burst_len=(1, 1), burst_ratio=0.0, packet_args=None):
+        assert arrival in ("cbr", "poisson"), f"Invalid arrival: {arrival}"
+        assert mbps is not None or weight > 0, f"Stream {name} needs a rate or a weight"
+        self.name = name
+        self.dst_mac_addr = dst_mac_addr
+        self.mbps = mbps
+        self.arrival = arrival
+        self.weight = weight
+        self.vlan_ratio = vlan_ratio
+        self.data_len = data_len
+        self.burst_len = burst_len
+        self.burst_ratio = burst_ratio
+        self.packet_args = packet_args or {}
+
+        self.next_due = None # Sim time the next frame of a rate controlled stream should start
+        self.num_frames = 0
+        self.num_bytes = 0   # Frame bytes including the CRC
+        self.wire_time = 0   # Time on the wire, from the preamble to the CRC
+
+    def is_rate_controlled(self):
+        return self.mbps is not None
+
+
+class TrafficGenerator():
+    """ Creates frames for a TX PHY from a list of Streams
+
+        Parameters:
+        streams (list): The Streams making up the traffic
+        bit_time (float): Time of one bit on the wire, in sim ticks (Clock.get_bit_time())
+        seed (int): Seed for the random choices
+        max_frames (int): Stop after this many frames, None for no limit
+        duration (float): Stop sending frames this long after the first one could start, in sim ticks
+        packet_class: Class of the frames created, MiiPacket by default
+    """
+
+    END = object() # Returned by pop_ready() once all the frames have been sent
+
+    def __init__(self, streams, bit_time, seed=0, max_frames=None, duration=None, packet_class=None):
+        if packet_class is None:
+            from mii_packet import MiiPacket # Only needs Pyxsim when the default is used
+            packet_class = MiiPacket
+        self._streams = streams
+        self._rate_streams = [s for s in streams if s.is_rate_controlled()]
+        self._fill_streams = [s for s in streams if not s.is_rate_controlled()]
+        self._bit_time = bit_time
+        self._min_ifg = IFG_BITS * bit_time
+        self._rand = random.Random(seed)
+        self._max_frames = max_frames
+        self._duration = duration
+        self._packet_class = packet_class
+        self._time_fn = None
+        self._burst = None  # (stream, num_data_bytes, tagged, frames left) while a burst is being sent
+        self._start_time = None
+        self._end_time = None # End of the last frame created
+        self.num_frames = 0
+
+    def set_time_fn(self, time_fn):
+        """ Use the sim time when the TX PHY asks for each frame, rather than the generator's own account of it """
+        self._time_fn = time_fn
+
+    def attach(self, tx_phy):
+        """ Feed the TX PHY, following the sim time of its thread """
+        self.set_time_fn(lambda: tx_phy.xsi.get_time())
+        tx_phy.set_packets(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        now = self._time_fn() if self._time_fn else self._end_time or 0
+        packet = self._next_frame(now)
+        if packet is None:
+            raise StopIteration
+        return packet
+
+    def pop_ready(self, time):
+        """ The next frame, as the RMII TX PHY asks for it at time, or END """
+        packet = self._next_frame(time)
+        return self.END if packet is None else packet
+
+    def _wire_time(self, num_data_bytes, tagged):
+        return frame_wire_bits(num_data_bytes, tagged) * self._bit_time
+
+    def _interval(self, stream, wire_time):
+        """ Time between frames of a rate controlled stream for a frame taking wire_time """
+        line_time = wire_time + self._min_ifg
+        mean = line_time * (SIM_TICKS_PER_SECOND / self._bit_time) / (stream.mbps * 1e6)
+        if stream.arrival == "poisson":
+            return self._rand.expovariate(1 / mean)
+        return mean
+
+    def _choose_frame(self, stream):
+        num_data_bytes = self._rand.randint(*stream.data_len)
+        tagged = self._rand.random() < stream.vlan_ratio
+        return num_data_bytes, tagged
+
+    def _choose_fill(self, start, gap_end):
+        """ A gap filling stream and frame which ends before gap_end, or None """
+        if not self._fill_streams:
+            return None
+        stream = self._rand.choices(self._fill_streams, weights=[s.weight for s in self._fill_streams])[0]
+        num_data_bytes, tagged = self._choose_frame(stream)
+        if gap_end is not None:
+            space = gap_end - start - self._wire_time(0, tagged) - self._min_ifg
+            num_data_bytes = min(num_data_bytes, int(space // (8 * self._bit_time)))
+            if num_data_bytes < stream.data_len[0]:
+                return None
+        return stream, num_data_bytes, tagged
+
+    def _next_frame(self, now):
+        if self._start_time is None:
+            self._start_time = now
+            for stream in self._rate_streams:
+                stream.next_due = now + self._min_ifg
+
+        if self._max_frames is not None and self.num_frames >= self._max_frames:
+            return None
+
+        start = now + self._min_ifg
+        if self._burst:
+            (stream, num_data_bytes, tagged, left) = self._burst
+            self._burst = (stream, num_data_bytes, tagged, left - 1) if left > 1 else None
+        else:
+            if self._duration is not None and start >= self._start_time + self._duration:
+                return None
+
+            due = min(self._rate_streams, key=lambda s: s.next_due) if self._rate_streams else None
+            fill = None
+            if due is None or due.next_due > start:
+                fill = self._choose_fill(start, due.next_due if due else None)
+            if fill:
+                (stream, num_data_bytes, tagged) = fill
+            else:
+                stream = due
+                start = max(start, stream.next_due)
+                (num_data_bytes, tagged) = self._choose_frame(stream)
+
+            if stream.burst_ratio and self._rand.random() < stream.burst_ratio:
+                burst_len = self._rand.randint(*stream.burst_len)
+                if burst_len > 1:
+                    self._burst = (stream, num_data_bytes, tagged, burst_len - 1)
+
+        wire_time = self._wire_time(num_data_bytes, tagged)
+        if stream.is_rate_controlled():
+            stream.next_due += self._interval(stream, wire_time)
+
+        tag = [0x81, 0x00, self._rand.randint(0, 0xff), self._rand.randint(0, 0xff)] if tagged else None
+        packet = self._packet_class(self._rand,
+                                    dst_mac_addr=stream.dst_mac_addr,
+                                    vlan_prio_tag=tag,
+                                    inter_frame_gap=start - now,
+                                    create_data_args=['same', (stream.num_frames, num_data_bytes)],
+                                    **stream.packet_args)
+
+        stream.num_frames += 1
+        stream.num_bytes += len(packet.get_packet_bytes()) + CRC_BYTES
+        stream.wire_time += wire_time
+        self.num_frames += 1
+        self._end_time = start + wire_time
+        return packet
+
+    def elapsed(self):
+        return self._end_time - self._start_time if self.num_frames else 0
+
+    def summary(self):
+        elapsed = self.elapsed()
+        text = f"{self.num_frames} frames in {elapsed / 10**9:.2f} us"
+        for stream in self._streams:
+            mbps = (stream.num_bytes * 8 * SIM_TICKS_PER_SECOND) / (elapsed * 1e6) if elapsed else 0.0
+            utilisation = 100.0 * stream.wire_time / elapsed if elapsed else 0.0
+            text += (f"\n  {stream.name}: {stream.num_frames} frames, {stream.num_bytes} bytes => {mbps:.2f} Mb/s, "
+                     f"{utilisation:.2f}% of the line")
+        return text
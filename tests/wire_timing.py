@@ -0,0 +1,172 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Time on the wire of Ethernet frames, shared by the traffic builders
+
+Every function takes scalars or numpy arrays, so the schedule of a long traffic mix is one array operation:
+
+    timing = WireTiming.from_clock(clock)                  # or WireTiming.for_speed(1000)
+    schedule = timing.schedule(data_lens, tagged=tags, ifg=ifgs)
+    assert schedule.conforms().all(), f"IFG below 96 bits before frames {schedule.violations()}"
+
+Lengths are of the MAC client data (the payload after the length/type field), as MiiPacket.data_bytes, and
+times are in sim ticks. A frame on the wire is the preamble and SFD, the header, an optional VLAN tag, the data
+and the CRC. The IFG of a frame is the gap before it, as the TX PHYs wait for packet.inter_frame_gap before
+sending each packet. Bit times only depend on the rate, so the same sums hold for MII, RMII and RGMII.
+"""
+
+import numpy as np
+
+SIM_TICKS_PER_SECOND = 10**15 # xsim uses femtoseconds
+
+PREAMBLE_BYTES = 8 # Including the SFD
+HEADER_BYTES = 14
+VLAN_TAG_BYTES = 4
+CRC_BYTES = 4
+IFG_BITS = 96
+IFG_BYTES = IFG_BITS // 8
+MIN_DATA_BYTES = 46
+MAX_DATA_BYTES = 1500
+
+# Per frame overhead around the header and data: preamble, CRC and minimum IFG
+PACKET_OVERHEAD_BYTES = PREAMBLE_BYTES + CRC_BYTES + IFG_BYTES
+
+
+def _result(value):
+    """ Plain Python numbers for scalar arguments, arrays otherwise """
+    return value.item() if isinstance(value, (np.ndarray, np.generic)) and np.ndim(value) == 0 else value
+
+
+def frame_bytes(num_data_bytes, tagged=False):
+    """ Bytes of a frame from the destination address to the end of the data, i.e. without the CRC """
+    return _result(HEADER_BYTES + np.asarray(num_data_bytes) + np.where(tagged, VLAN_TAG_BYTES, 0))
+
+
+def frame_wire_bits(num_data_bytes, tagged=False):
+    """ Bits on the wire for a frame, from the preamble to the CRC """
+    return _result((PREAMBLE_BYTES + np.asarray(frame_bytes(num_data_bytes, tagged)) + CRC_BYTES) * 8)
+
+
+def bit_time_for_speed(mbps):
+    return SIM_TICKS_PER_SECOND / (mbps * 1e6)
+
+
+class WireTiming():
+    """ Frame timings at one line rate
+
+        Parameters:
+        bit_time (float): Time of one bit on the wire, in sim ticks (Clock.get_bit_time())
+    """
+
+    def __init__(self, bit_time):
+        self.bit_time = bit_time
+        self.min_ifg = IFG_BITS * bit_time
+
+    @classmethod
+    def from_clock(cls, clock):
+        return cls(clock.get_bit_time())
+
+    @classmethod
+    def for_speed(cls, mbps):
+        """ For a nominal line rate of 10, 100 or 1000 Mb/s """
+        return cls(bit_time_for_speed(mbps))
+
+    def line_mbps(self):
+        return SIM_TICKS_PER_SECOND / (self.bit_time * 1e6)
+
+    def frame_time(self, num_data_bytes, tagged=False):
+        """ Time from the start of the preamble to the end of the CRC """
+        return _result(np.asarray(frame_wire_bits(num_data_bytes, tagged)) * self.bit_time)
+
+    def packet_time(self, num_data_bytes, tagged=False, ifg=None):
+        """ Time of a frame and the IFG before it, by default the minimum """
+        return _result(np.asarray(self.frame_time(num_data_bytes, tagged)) + (self.min_ifg if ifg is None else ifg))
+
+    def max_fps(self, num_data_bytes, tagged=False):
+        """ Frames per second at line rate with the minimum IFG """
+        return _result(SIM_TICKS_PER_SECOND / np.asarray(self.packet_time(num_data_bytes, tagged)))
+
+    def max_mbps(self, num_data_bytes, tagged=False, payload=False):
+        """ Highest throughput of frame bytes, including the CRC but not the preamble, or of the data bytes if
+            payload is set
+        """
+        if payload:
+            bits = np.asarray(num_data_bytes) * 8
+        else:
+            bits = (np.asarray(frame_bytes(num_data_bytes, tagged)) + CRC_BYTES) * 8
+        return _result(bits * np.asarray(self.max_fps(num_data_bytes, tagged)) * 1e-6)
+
+    def ifg_for_rate(self, num_data_bytes, mbps, tagged=False):
+        """ The IFG which sends frames at mbps of line bandwidth, i.e. counting the preamble and minimum IFG of
+            each frame as the traffic generator does. Never less than the minimum IFG.
+        """
+        interval = (np.asarray(frame_wire_bits(num_data_bytes, tagged)) + IFG_BITS) * bit_time_for_speed(mbps)
+        return _result(np.maximum(interval - np.asarray(self.frame_time(num_data_bytes, tagged)), self.min_ifg))
+
+    def schedule(self, num_data_bytes, tagged=False, ifg=None, start_time=0):
+        """ The WireSchedule of frames sent back to back, each after its IFG (by default the minimum). The first
+            IFG starts at start_time.
+        """
+        num_data_bytes = np.atleast_1d(num_data_bytes)
+        tagged = np.broadcast_to(tagged, num_data_bytes.shape)
+        ifg = np.broadcast_to(self.min_ifg if ifg is None else ifg, num_data_bytes.shape).astype(float)
+        wire_bits = np.asarray(frame_wire_bits(num_data_bytes, tagged))
+        end = start_time + np.cumsum(ifg + wire_bits * self.bit_time)
+        return WireSchedule(self, num_data_bytes, tagged, ifg, end - wire_bits * self.bit_time, end, wire_bits)
+
+
+class WireSchedule():
+    """ Start and end times on the wire of a sequence of frames
+
+        start is the start of each preamble and end the end of each CRC. ifg is the gap before each frame and
+        wire_bits its bits from the preamble to the CRC.
+    """
+
+    def __init__(self, timing, num_data_bytes, tagged, ifg, start, end, wire_bits):
+        self.timing = timing
+        self.num_data_bytes = num_data_bytes
+        self.tagged = tagged
+        self.ifg = ifg
+        self.start = start
+        self.end = end
+        self.wire_bits = wire_bits
+
+    def __len__(self):
+        return len(self.start)
+
+    def ifg_bits(self):
+        return self.ifg / self.timing.bit_time
+
+    def conforms(self):
+        """ Whether the gap before each frame is at least the 96 bit minimum. Allows for rounding of the times """
+        return self.ifg_bits() >= IFG_BITS - 1e-6
+
+    def violations(self):
+        """ Indices of the frames sent too soon after the one before """
+        return np.flatnonzero(~self.conforms())
+
+    def duration(self):
+        """ From the start of the first frame to the end of the last """
+        return self.end[-1] - self.start[0] if len(self) else 0
+
+    def frame_bits(self):
+        """ Bits of each frame including the CRC, as counted by ThroughputMeter """
+        return self.wire_bits - PREAMBLE_BYTES * 8
+
+    def mbps(self):
+        """ Throughput of frame bytes, including the CRC but not the preamble """
+        duration = self.duration()
+        return float(self.frame_bits().sum()) * SIM_TICKS_PER_SECOND / (duration * 1e6) if duration else 0.0
+
+    def payload_mbps(self):
+        duration = self.duration()
+        return float(self.num_data_bytes.sum()) * 8 * SIM_TICKS_PER_SECOND / (duration * 1e6) if duration else 0.0
+
+    def line_utilisation(self):
+        """ Percentage of the time from the first preamble to the last CRC used by frames and the minimum IFG """
+        duration = self.duration()
+        if not duration:
+            return 0.0
+        bits = float(self.wire_bits.sum()) + (len(self) - 1) * IFG_BITS
+        return bits * self.timing.bit_time / duration * 100
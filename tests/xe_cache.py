@@ -0,0 +1,339 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Incremental builds of the test applications
+
+Each application is built for every config of its profiles, to {app}/bin/{config}/{app}_{config}.xe, and many of
+these builds are the same sources with different defines. XeCache only builds what has changed:
+ - the key of a binary is a hash of its config and of what it is built from: the application sources and the
+   APP_INCLUDES of its CMakeLists.txt, the library sources, the CMake files which give the config its defines and
+   the version of the tools
+ - an index, logs/xe_index.json, records the key and path of each binary, so tests find them without scanning and
+   a binary is rebuilt only when its key changes
+ - if $XE_CACHE_DIR is set, each binary built is also kept there by its key, so an identical build is copied
+   rather than rebuilt, e.g. after switching branches or on a CI runner which restores the cache. Nothing is
+   evicted from it, and the binaries of test_time_rx_tx, which change with every seed, are not kept
+ - a binary already in place which the index does not know, e.g. from a full CMake build, is taken if it is newer
+   than everything it is built from
+ - the configs of an application which are missing or stale are built by one xmake, in parallel
+
+    pytest --build-xe --xe-jobs 8    # First brings the binaries of the applications of the tests given up to date
+
+Running this file brings the binaries of the applications given, or of every application, up to date:
+    python xe_cache.py [--check] [-j 8] [apps...]
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+from filelock import FileLock
+
+from change_selection import LIB_DIR, TESTS_DIR, app_of_test, read_cmake_list
+
+DEFAULT_INDEX = "logs/xe_index.json"
+
+CONFIGURE_CMD = 'cmake -B build -G "Unix Makefiles"'
+BUILD_CMD = "xmake -C build -j {jobs} {targets}"
+
+# Files which can be compiled or included into a binary
+BUILD_INPUT_SUFFIXES = (".xc", ".c", ".cpp", ".S", ".h", ".inc", ".xn")
+# The CMake files every application includes
+SHARED_CMAKE_FILES = ("helpers.cmake", "test_deps.cmake")
+
+_CONFIG_NAME = re.compile(r"Building cfg_name: (\S+)")
+
+
+def binary_path(app, config=None):
+    """ Where xmake puts the binary of a config, relative to the tests directory """
+    if config is None:
+        return Path(app) / "bin" / f"{app}.xe"
+    return Path(app) / "bin" / config / f"{app}_{config}.xe"
+
+
+def _hash_files(digest, paths, root):
+    for path in paths:
+        digest.update(str(path.relative_to(root)).encode())
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+
+
+def _input_files(dirs):
+    files = set()
+    for d in dirs:
+        if d.is_dir():
+            files.update(p for p in d.rglob("*") if p.suffix in BUILD_INPUT_SUFFIXES and p.is_file())
+    return sorted(files)
+
+
+class XeCache():
+    """ The binaries of the test applications, their keys and the cache of earlier builds
+
+        Parameters:
+        tests_dir (Path): Directory of the applications
+        lib_dir (Path): The library, whose lib_build_info.cmake lists its source directories
+        index (str): The index, relative to tests_dir
+        cache_dir (Path): Cache of binaries by key, or None for no cache
+        configure_cmd, build_cmd (str): Commands run in an application directory. The build command is formatted
+            with jobs and targets, the configs to build
+    """
+
+    def __init__(self, tests_dir=TESTS_DIR, lib_dir=LIB_DIR, index=DEFAULT_INDEX,
+                 cache_dir=os.environ.get("XE_CACHE_DIR"), configure_cmd=CONFIGURE_CMD,
+                 build_cmd=BUILD_CMD):
+        self.tests_dir = Path(tests_dir).resolve()
+        self.lib_dir = Path(lib_dir).resolve()
+        self.index_path = self.tests_dir / index
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.configure_cmd = configure_cmd
+        self.build_cmd = build_cmd
+        self._app_inputs = {}
+        self._lib_inputs = None
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return {"apps": {}, "binaries": {}}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _update_index(self, update):
+        """ Applies update(index) to the index, locked against other processes """
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(f"{self.index_path}.lock"):
+            index = self._load_index()
+            update(index)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    def binary(self, app, config=None):
+        """ The binary of a config, from the index, relative to the tests directory """
+        entry = self._load_index()["binaries"].get(self._name(app, config))
+        return Path(entry["binary"]) if entry else binary_path(app, config)
+
+    @staticmethod
+    def _name(app, config):
+        return app if config is None else f"{app}/{config}"
+
+    def _lib_files(self):
+        if self._lib_inputs is None:
+            dirs = [self.lib_dir / d for d in read_cmake_list(self.lib_dir / "lib_build_info.cmake", "LIB_INCLUDES")]
+            self._lib_inputs = [self.lib_dir / "lib_build_info.cmake"] + _input_files(dirs)
+        return self._lib_inputs
+
+    def _cmake_files(self, app):
+        """ The files which decide the configs of an application and their defines """
+        files = [self.tests_dir / app / "CMakeLists.txt", self.tests_dir / app / "test_params.json"]
+        files += [self.tests_dir / name for name in SHARED_CMAKE_FILES]
+        return [p for p in files if p.exists()]
+
+    def _inputs(self, app):
+        """ (files hashed for every config of an application, their digest) """
+        if app not in self._app_inputs:
+            app_dir = self.tests_dir / app
+            includes = read_cmake_list(app_dir / "CMakeLists.txt", "APP_INCLUDES")
+            dirs = [app_dir / "src"] + [(app_dir / d).resolve() for d in includes]
+            app_files = self._cmake_files(app) + _input_files(dirs)
+            digest = hashlib.sha256()
+            _hash_files(digest, app_files, self.tests_dir.parent)
+            _hash_files(digest, self._lib_files(), self.lib_dir)
+            # The tools, which a build directory on another machine can have in another place
+            digest.update(os.path.basename(os.environ.get("XMOS_TOOL_PATH", "").rstrip("/")).encode())
+            self._app_inputs[app] = (app_files + self._lib_files(), digest.hexdigest())
+        return self._app_inputs[app]
+
+    def key(self, app, config=None):
+        return hashlib.sha256(f"{self._inputs(app)[1]}:{config}".encode()).hexdigest()[:32]
+
+    def _cmake_key(self, app):
+        digest = hashlib.sha256()
+        _hash_files(digest, self._cmake_files(app), self.tests_dir)
+        return digest.hexdigest()[:32]
+
+    def _configure(self, app):
+        result = subprocess.run(self.configure_cmd, shell=True, cwd=self.tests_dir / app, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True)
+        if result.returncode:
+            raise RuntimeError(f"Configuring {app} failed:\n{result.stdout}")
+        return result.stdout
+
+    def configs(self, app):
+        """ The configs of an application, [None] for one with a single build. Configures the application if its
+            CMake files have changed since the configs were last listed.
+        """
+        cmake_key = self._cmake_key(app)
+        entry = self._load_index()["apps"].get(app)
+        if entry and entry["cmake"] == cmake_key:
+            return list(entry["configs"]) or [None]
+        configs = list(dict.fromkeys(_CONFIG_NAME.findall(self._configure(app))))
+        self._update_index(lambda index: index["apps"].__setitem__(app, {"cmake": cmake_key, "configs": configs}))
+        return configs or [None]
+
+    def _fresh(self, app, config, index):
+        """ Whether a binary is up to date: its key is in the index, or the index does not know it and it is newer
+            than every input
+        """
+        path = self.tests_dir / binary_path(app, config)
+        if not path.exists():
+            return False
+        entry = index["binaries"].get(self._name(app, config))
+        if entry:
+            return entry["key"] == self.key(app, config)
+        return path.stat().st_mtime >= max(p.stat().st_mtime for p in self._inputs(app)[0])
+
+    def stale(self, app, configs=None):
+        """ The configs of an application whose binaries are missing or out of date """
+        index = self._load_index()
+        configs = self.configs(app) if configs is None else configs
+        return [c for c in configs if not self._fresh(app, c, index)]
+
+    def _cached(self, key):
+        return self.cache_dir / f"{key}.xe" if self.cache_dir else None
+
+    @staticmethod
+    def _store(path, cached):
+        if cached and not cached.exists():
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cached.with_suffix(f".{os.getpid()}.tmp")
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, cached)
+
+    def _record(self, app, results):
+        """ Adds {config: how the binary was made} to the index """
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        def update(index):
+            for config, how in results.items():
+                index["binaries"][self._name(app, config)] = {
+                    "key": self.key(app, config), "binary": str(binary_path(app, config)), "from": how,
+                    "time": now}
+        self._update_index(update)
+
+    def ensure(self, app, configs=None, jobs=os.cpu_count(), log=print):
+        """ Brings the binaries of an application up to date, all of its configs by default. Returns
+            {config: "built", "cached" or "adopted"} for those which were not already up to date.
+        """
+        with FileLock(str(self.tests_dir / f"{app}.lock")):
+            index = self._load_index()
+            configs = self.configs(app) if configs is None else configs
+            results = {}
+            to_build = []
+            for config in configs:
+                path = self.tests_dir / binary_path(app, config)
+                cached = self._cached(self.key(app, config))
+                if self._fresh(app, config, index):
+                    if self._name(app, config) not in index["binaries"]:
+                        results[config] = "adopted"
+                        self._store(path, cached)
+                    continue
+                if cached and cached.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(cached, path)
+                    results[config] = "cached"
+                else:
+                    to_build.append(config)
+
+            if to_build:
+                if not (self.tests_dir / app / "build").exists():
+                    self._configure(app)
+                targets = " ".join(c for c in to_build if c is not None)
+                log(f"Building {app}: {len(to_build)} of {len(configs)} configs")
+                start = time.monotonic()
+                result = subprocess.run(self.build_cmd.format(jobs=jobs, targets=targets), shell=True,
+                                        cwd=self.tests_dir / app, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        text=True)
+                if result.returncode:
+                    raise RuntimeError(f"Building {app} failed:\n{result.stdout}")
+                log(f"Built {app} in {time.monotonic() - start:.1f}s")
+                for config in to_build:
+                    path = self.tests_dir / binary_path(app, config)
+                    if not path.exists():
+                        raise RuntimeError(f"Building {app} did not make {path}")
+                    results[config] = "built"
+                    self._store(path, self._cached(self.key(app, config)))
+
+            if results:
+                self._record(app, results)
+            return results
+
+
+def apps_of_tests(paths):
+    """ The applications which a set of test files run """
+    apps = set()
+    for path in paths:
+        app_dir = app_of_test(path)
+        if app_dir is not None and (app_dir / "CMakeLists.txt").exists():
+            apps.add(app_dir.name)
+    return sorted(apps)
+
+
+def named_test_files(args, invocation_dir):
+    """ The test files which pytest arguments (files, directories or node ids) name """
+    files = set()
+    for arg in args:
+        path = Path(invocation_dir) / arg.split("::")[0]
+        if path.is_dir():
+            files.update(path.glob("test_*.py"))
+        elif path.suffix == ".py" and path.exists():
+            files.add(path)
+    return sorted(files)
+
+
+def find_xe(app, config=None):
+    """ The path of a config's binary, relative to the tests directory, from the index """
+    return str(XeCache().binary(app, config))
+
+
+def build_xe(app, config=None, cache=True):
+    """ Brings the binary of one config up to date and returns its path. With cache False the binary is not kept
+        in $XE_CACHE_DIR, for builds which are unlikely to be made again.
+    """
+    XeCache(**({} if cache else {"cache_dir": None})).ensure(app, [config])
+    return find_xe(app, config)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--build-xe", action="store_true",
+                     help="Build the missing or stale binaries of the applications of the tests given before running")
+    parser.addoption("--xe-jobs", action="store", default=os.cpu_count(), type=int,
+                     help="Parallel jobs for --build-xe")
+
+
+def pytest_sessionstart(session):
+    # Before collection, so once in the xdist controller, which does not collect, rather than in every worker
+    config = session.config
+    if not config.getoption("--build-xe") or hasattr(config, "workerinput"):
+        return
+    cache = XeCache()
+    counts = {}
+    for app in apps_of_tests(named_test_files(config.args, config.invocation_params.dir)):
+        for how in cache.ensure(app, jobs=config.getoption("--xe-jobs")).values():
+            counts[how] = counts.get(how, 0) + 1
+    print(f"xe cache: {', '.join(f'{n} {how}' for how, n in sorted(counts.items())) or 'all up to date'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bring the binaries of the test applications up to date")
+    parser.add_argument("apps", nargs="*", help="Applications, by default every one in the tests directory")
+    parser.add_argument("--check", action="store_true", help="Only list the configs which are missing or stale")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    cmd_args = parser.parse_args()
+
+    cache = XeCache()
+    apps = cmd_args.apps or sorted(p.parent.name for p in TESTS_DIR.glob("test_*/CMakeLists.txt"))
+    for app in apps:
+        if cmd_args.check:
+            stale = cache.stale(app)
+            print(f"{app}: {len(stale)} stale" + "".join(f"\n    {c}" for c in stale if c))
+        else:
+            results = cache.ensure(app, jobs=cmd_args.jobs)
+            print(f"{app}: {len(results)} updated" + "".join(f"\n    {c}: {how}" for c, how in results.items()))
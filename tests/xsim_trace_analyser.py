@@ -0,0 +1,187 @@
+# Copyright 2025 XMOS LIMITED.
+# This Software is subject to the terms of the XMOS Public Licence: Version 1.
+
+"""
+Streaming analyser for xsim instruction traces (--trace-to, as written when helpers.args.trace is set)
+
+Each trace line is attributed to its logical core (tile and core number) and function. The time from one
+instruction to the next on the same core is charged to the first one, so a core blocked in an IN or WAITEU is
+charged to the function that blocked. Memory use only depends on the number of distinct functions and
+instruction addresses, not on the length of the trace.
+
+If the frame boundaries recorded by the PHY models are given (see sim_trace.FrameLog), the cost of every function
+is also accumulated per frame and the worst frame kept.
+
+Usage:
+    python xsim_trace_analyser.py logs/xsim_trace_....txt [--frames logs/xsim_trace_....frames.csv]
+"""
+
+import argparse
+import bisect
+import csv
+import gzip
+import re
+import sys
+from collections import defaultdict
+
+# tile[0]@1-P-SI A-.----0008012a (rmii_master_rx_pins_4b +  1a) : in     r0, res[r1]  @2345
+TRACE_LINE_RE = re.compile(r"^(?P<tile>[^@\s]+)@(?P<core>\d+)\S*\s.*?"
+                           r"(?P<addr>[0-9a-fA-F]{8})\s+\((?P<func>[^()+]+?)\s*\+\s*(?P<offset>[0-9a-fA-F]+)\)\s*:"
+                           r"\s*(?P<insn>.*?)\s*@(?P<time>\d+)\s*$")
+
+
+class FunctionStats():
+    __slots__ = ("instructions", "ticks", "frame_ticks", "worst_frame_ticks", "worst_frame")
+
+    def __init__(self):
+        self.instructions = 0
+        self.ticks = 0
+        self.frame_ticks = 0
+        self.worst_frame_ticks = 0
+        self.worst_frame = None
+
+
+class TraceAnalyser():
+    """ Accumulates per core, per function and per address costs from trace lines
+
+        Parameters:
+        frame_starts (list): Sorted times at which frames start, in trace time units
+        max_line_ticks (int): Gaps between instructions on a core longer than this are not charged to anything.
+            Useful to skip the time a core spends paused between frames. None to charge everything.
+    """
+
+    def __init__(self, frame_starts=None, max_line_ticks=None):
+        self.frame_starts = list(frame_starts) if frame_starts else []
+        self.max_line_ticks = max_line_ticks
+        self.functions = defaultdict(FunctionStats)  # (core, function) -> FunctionStats
+        self.addresses = {}                          # address -> [count, ticks, function, offset, instruction]
+        self.last = {}                               # core -> (time, (core, function), address)
+        self.num_lines = 0
+        self.num_unparsed = 0
+        self.current_frame = None
+
+    def _close_frame(self):
+        for stats in self.functions.values():
+            if stats.frame_ticks > stats.worst_frame_ticks:
+                stats.worst_frame_ticks = stats.frame_ticks
+                stats.worst_frame = self.current_frame
+            stats.frame_ticks = 0
+
+    def _update_frame(self, time):
+        if not self.frame_starts:
+            return
+        frame = bisect.bisect_right(self.frame_starts, time) - 1
+        if frame != self.current_frame:
+            if self.current_frame is not None and self.current_frame >= 0:
+                self._close_frame()
+            else:
+                for stats in self.functions.values():
+                    stats.frame_ticks = 0
+            self.current_frame = frame
+
+    def add_line(self, line):
+        match = TRACE_LINE_RE.match(line)
+        if not match:
+            self.num_unparsed += 1
+            return
+        self.num_lines += 1
+
+        core = f"{match.group('tile')}@{match.group('core')}"
+        time = int(match.group("time"))
+        address = int(match.group("addr"), 16)
+        key = (core, match.group("func"))
+
+        # Charge the time since the previous instruction on this core to that instruction
+        previous = self.last.get(core)
+        if previous:
+            ticks = time - previous[0]
+            if self.max_line_ticks is None or ticks <= self.max_line_ticks:
+                self.functions[previous[1]].ticks += ticks
+                self.functions[previous[1]].frame_ticks += ticks
+                self.addresses[previous[2]][1] += ticks
+        self._update_frame(time)
+
+        self.functions[key].instructions += 1
+        entry = self.addresses.get(address)
+        if entry is None:
+            self.addresses[address] = [1, 0, key[1], int(match.group("offset"), 16), match.group("insn")]
+        else:
+            entry[0] += 1
+        self.last[core] = (time, key, address)
+
+    def finish(self):
+        if self.current_frame is not None and self.current_frame >= 0:
+            self._close_frame()
+
+    def core_totals(self):
+        totals = defaultdict(lambda: [0, 0])
+        for (core, _), stats in self.functions.items():
+            totals[core][0] += stats.instructions
+            totals[core][1] += stats.ticks
+        return totals
+
+    def report(self, top=20, out=sys.stdout):
+        totals = self.core_totals()
+        print(f"Parsed {self.num_lines} instructions ({self.num_unparsed} other lines)", file=out)
+        for core in sorted(totals):
+            core_instructions, core_ticks = totals[core]
+            print(f"\n{core}: {core_instructions} instructions, {core_ticks} ticks", file=out)
+            print(f"  {'function':40} {'instr':>12} {'ticks':>14} {'%':>6} {'worst frame':>12} {'frame':>6}",
+                  file=out)
+            rows = [(f, s) for (c, f), s in self.functions.items() if c == core]
+            for function, stats in sorted(rows, key=lambda r: -r[1].ticks)[:top]:
+                percent = 100 * stats.ticks / core_ticks if core_ticks else 0
+                worst = f"{stats.worst_frame_ticks:12} {stats.worst_frame:6}" if stats.worst_frame is not None else ""
+                print(f"  {function:40} {stats.instructions:12} {stats.ticks:14} {percent:6.1f} {worst}", file=out)
+
+        print("\nHot spots", file=out)
+        print(f"  {'address':10} {'function':40} {'count':>12} {'ticks':>14}  instruction", file=out)
+        hot = sorted(self.addresses.items(), key=lambda a: -a[1][1])[:top]
+        for address, (count, ticks, function, offset, insn) in hot:
+            print(f"  {address:08x}   {function + ' + ' + format(offset, 'x'):40} {count:12} {ticks:14}  {insn}",
+                  file=out)
+
+
+def open_trace(filename):
+    if filename == "-":
+        return sys.stdin
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", errors="replace")
+    return open(filename, errors="replace")
+
+
+def load_frame_starts(filename, source=None, time_scale=1.0):
+    """ Read frame start times written by sim_trace.FrameLog, converting from fs to trace units """
+    starts = []
+    with open(filename) as f:
+        for row in csv.DictReader(f):
+            if source is None or row["source"] == source:
+                starts.append(float(row["time"]) / time_scale)
+    return sorted(starts)
+
+
+def analyse_trace(filename, frame_starts=None, max_line_ticks=None):
+    analyser = TraceAnalyser(frame_starts, max_line_ticks)
+    with open_trace(filename) as f:
+        for line in f:
+            analyser.add_line(line)
+    analyser.finish()
+    return analyser
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per function cycle budgets from an xsim instruction trace")
+    parser.add_argument("trace", help="Trace file (.txt or .txt.gz), or - for stdin")
+    parser.add_argument("--frames", help="Frame boundary file written by sim_trace.FrameLog")
+    parser.add_argument("--frame-source", choices=["tx", "rx"], help="Only use frames from this PHY direction")
+    parser.add_argument("--fs-per-tick", type=float, default=1.0,
+                        help="Femtoseconds per trace time unit, to line the frame times up with the trace")
+    parser.add_argument("--max-line-ticks", type=int, default=None,
+                        help="Don't charge gaps longer than this between instructions on a core")
+    parser.add_argument("--top", type=int, default=20)
+    cmd_args = parser.parse_args()
+
+    frames = None
+    if cmd_args.frames:
+        frames = load_frame_starts(cmd_args.frames, cmd_args.frame_source, cmd_args.fs_per_tick)
+    analyse_trace(cmd_args.trace, frames, cmd_args.max_line_ticks).report(cmd_args.top)